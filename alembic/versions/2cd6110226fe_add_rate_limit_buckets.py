@@ -0,0 +1,38 @@
+"""add_rate_limit_buckets
+
+Revision ID: 2cd6110226fe
+Revises: 1765f27dd620
+Create Date: 2026-10-19 09:12:41.118204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "2cd6110226fe"
+down_revision: Union[str, Sequence[str], None] = "1765f27dd620"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "rate_limit_buckets",
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("tat", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index(
+        op.f("ix_rate_limit_buckets_tat"), "rate_limit_buckets", ["tat"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_rate_limit_buckets_tat"), table_name="rate_limit_buckets")
+    op.drop_table("rate_limit_buckets")
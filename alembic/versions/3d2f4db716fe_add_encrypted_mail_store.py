@@ -0,0 +1,94 @@
+"""add_encrypted_mail_store
+
+Revision ID: 3d2f4db716fe
+Revises: 4c9a900ead1a
+Create Date: 2026-10-19 20:41:09.318270
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3d2f4db716fe"
+down_revision: Union[str, Sequence[str], None] = "4c9a900ead1a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _common() -> list[sa.Column]:
+    # Columns both tables share: owner, envelope summary and content pointer
+    return [
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("alias_id", sa.Integer(), nullable=True),
+        sa.Column("from_address", sa.String(length=255), nullable=True),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("content_pointer", sa.String(length=64), nullable=False),
+        sa.Column("content_key_id", sa.String(length=64), nullable=False),
+        sa.Column("received_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("will_delete_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["alias_id"], ["aliases.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    ]
+
+
+def _indexes(table: str) -> None:
+    op.create_index(op.f(f"ix_{table}_id"), table, ["id"], unique=False)
+    op.create_index(
+        f"ix_{table}_user_received", table, ["user_id", "received_at"], unique=False
+    )
+    op.create_index(
+        f"ix_{table}_will_delete_at", table, ["will_delete_at"], unique=False
+    )
+    op.create_index(
+        f"ix_{table}_content_pointer", table, ["content_pointer"], unique=False
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "spam_quarantine",
+        sa.Column("subject_hash", sa.String(length=64), nullable=True),
+        sa.Column("spam_score", sa.SmallInteger(), nullable=False),
+        sa.Column("spam_reason", sa.Text(), nullable=False),
+        sa.Column("released", sa.Boolean(), nullable=False),
+        *_common(),
+    )
+    _indexes("spam_quarantine")
+
+    op.create_table(
+        "failed_emails",
+        sa.Column("failure_reason", sa.Text(), nullable=True),
+        sa.Column("retry_count", sa.Integer(), nullable=False),
+        sa.Column("last_retry_at", sa.DateTime(timezone=True), nullable=True),
+        *_common(),
+    )
+    _indexes("failed_emails")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("failed_emails", "spam_quarantine"):
+        op.drop_index(f"ix_{table}_content_pointer", table_name=table)
+        op.drop_index(f"ix_{table}_will_delete_at", table_name=table)
+        op.drop_index(f"ix_{table}_user_received", table_name=table)
+        op.drop_index(op.f(f"ix_{table}_id"), table_name=table)
+        op.drop_table(table)
@@ -0,0 +1,37 @@
+"""add_webhook_batch_events
+
+Revision ID: 4c9a900ead1a
+Revises: f925cba076ee
+Create Date: 2026-10-19 18:47:13.205841
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4c9a900ead1a"
+down_revision: Union[str, Sequence[str], None] = "f925cba076ee"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "webhooks",
+        sa.Column(
+            "batch_events",
+            sa.Boolean(),
+            server_default=sa.false(),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("webhooks", "batch_events")
@@ -0,0 +1,45 @@
+"""unique_magic_link_token_email
+
+Revision ID: 58b149968d78
+Revises: 2cd6110226fe
+Create Date: 2026-10-19 10:03:17.552910
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "58b149968d78"
+down_revision: Union[str, Sequence[str], None] = "2cd6110226fe"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep only the newest token per email before enforcing uniqueness
+    op.execute(
+        sa.text(
+            "DELETE FROM magic_link_tokens WHERE id NOT IN "
+            "(SELECT MAX(id) FROM magic_link_tokens GROUP BY email)"
+        )
+    )
+    op.drop_index(op.f("ix_magic_link_tokens_email"), table_name="magic_link_tokens")
+    op.create_index(
+        op.f("ix_magic_link_tokens_email"), "magic_link_tokens", ["email"], unique=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_magic_link_tokens_email"), table_name="magic_link_tokens")
+    op.create_index(
+        op.f("ix_magic_link_tokens_email"),
+        "magic_link_tokens",
+        ["email"],
+        unique=False,
+    )
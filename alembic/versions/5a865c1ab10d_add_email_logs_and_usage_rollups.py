@@ -0,0 +1,135 @@
+"""add_email_logs_and_usage_rollups
+
+Revision ID: 5a865c1ab10d
+Revises: 7530c54a182c
+Create Date: 2026-10-19 16:22:05.730912
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5a865c1ab10d"
+down_revision: Union[str, Sequence[str], None] = "7530c54a182c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps() -> list[sa.Column]:
+    return [
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    ]
+
+
+def _counters() -> list[sa.Column]:
+    return [
+        sa.Column(name, sa.BigInteger(), nullable=False)
+        for name in (
+            "emails_received",
+            "emails_forwarded",
+            "emails_failed",
+            "emails_spam",
+            "bytes_received",
+        )
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "email_logs",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("alias_id", sa.Integer(), nullable=True),
+        sa.Column("from_address", sa.String(length=255), nullable=True),
+        sa.Column("subject_hash", sa.String(length=64), nullable=True),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("failure_reason", sa.Text(), nullable=True),
+        sa.Column("received_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("forwarded_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["alias_id"], ["aliases.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_email_logs_id"), "email_logs", ["id"], unique=False)
+    op.create_index(
+        "ix_email_logs_user_received",
+        "email_logs",
+        ["user_id", "received_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_email_logs_updated_at", "email_logs", ["updated_at"], unique=False
+    )
+
+    op.create_table(
+        "usage_daily",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        *_counters(),
+        sa.Column("id", sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_usage_daily_id"), "usage_daily", ["id"], unique=False)
+    op.create_index(
+        "ix_usage_daily_user_day", "usage_daily", ["user_id", "day"], unique=True
+    )
+
+    op.create_table(
+        "usage_weekly",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("week_start", sa.Date(), nullable=False),
+        *_counters(),
+        sa.Column("id", sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_usage_weekly_id"), "usage_weekly", ["id"], unique=False)
+    op.create_index(
+        "ix_usage_weekly_user_week",
+        "usage_weekly",
+        ["user_id", "week_start"],
+        unique=True,
+    )
+
+    op.create_table(
+        "rollup_watermarks",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("processed_until", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("rollup_watermarks")
+    op.drop_index("ix_usage_weekly_user_week", table_name="usage_weekly")
+    op.drop_index(op.f("ix_usage_weekly_id"), table_name="usage_weekly")
+    op.drop_table("usage_weekly")
+    op.drop_index("ix_usage_daily_user_day", table_name="usage_daily")
+    op.drop_index(op.f("ix_usage_daily_id"), table_name="usage_daily")
+    op.drop_table("usage_daily")
+    op.drop_index("ix_email_logs_updated_at", table_name="email_logs")
+    op.drop_index("ix_email_logs_user_received", table_name="email_logs")
+    op.drop_index(op.f("ix_email_logs_id"), table_name="email_logs")
+    op.drop_table("email_logs")
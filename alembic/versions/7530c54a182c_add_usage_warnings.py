@@ -0,0 +1,60 @@
+"""add_usage_warnings
+
+Revision ID: 7530c54a182c
+Revises: caed78683a82
+Create Date: 2026-10-19 15:41:27.518304
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7530c54a182c"
+down_revision: Union[str, Sequence[str], None] = "caed78683a82"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "usage_warnings",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("metric", sa.String(length=16), nullable=False),
+        sa.Column("threshold", sa.SmallInteger(), nullable=False),
+        sa.Column("usage_percent", sa.SmallInteger(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_usage_warnings_id"), "usage_warnings", ["id"], unique=False)
+    op.create_index(
+        "ix_usage_warnings_dedup",
+        "usage_warnings",
+        ["user_id", "period_start", "metric", "threshold"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_usage_warnings_dedup", table_name="usage_warnings")
+    op.drop_index(op.f("ix_usage_warnings_id"), table_name="usage_warnings")
+    op.drop_table("usage_warnings")
@@ -0,0 +1,36 @@
+"""add_session_revoked_at
+
+Revision ID: a17f08362cc0
+Revises: 58b149968d78
+Create Date: 2026-10-19 11:24:08.193406
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a17f08362cc0"
+down_revision: Union[str, Sequence[str], None] = "58b149968d78"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "sessions",
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_sessions_revoked_at"), "sessions", ["revoked_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_sessions_revoked_at"), table_name="sessions")
+    op.drop_column("sessions", "revoked_at")
@@ -0,0 +1,52 @@
+"""keyset_pagination_indexes
+
+Revision ID: b3863c296674
+Revises: a17f08362cc0
+Create Date: 2026-10-19 11:52:41.306217
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b3863c296674"
+down_revision: Union[str, Sequence[str], None] = "a17f08362cc0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (user_id, id) replaces the single-column user_id indexes: it serves the
+    # same lookups and lets list endpoints walk a user's rows in id order.
+    op.create_index("ix_aliases_user_id_id", "aliases", ["user_id", "id"], unique=False)
+    op.drop_index(op.f("ix_aliases_user_id"), table_name="aliases")
+    op.drop_index("ix_aliases_user_active", table_name="aliases")
+    op.create_index(
+        "ix_aliases_user_active",
+        "aliases",
+        ["user_id", "is_active", "id"],
+        unique=False,
+    )
+
+    op.create_index(
+        "ix_destinations_user_id_id", "destinations", ["user_id", "id"], unique=False
+    )
+    op.drop_index(op.f("ix_destinations_user_id"), table_name="destinations")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        op.f("ix_destinations_user_id"), "destinations", ["user_id"], unique=False
+    )
+    op.drop_index("ix_destinations_user_id_id", table_name="destinations")
+
+    op.drop_index("ix_aliases_user_active", table_name="aliases")
+    op.create_index(
+        "ix_aliases_user_active", "aliases", ["user_id", "is_active"], unique=False
+    )
+    op.create_index(op.f("ix_aliases_user_id"), "aliases", ["user_id"], unique=False)
+    op.drop_index("ix_aliases_user_id_id", table_name="aliases")
@@ -0,0 +1,82 @@
+"""add_overflow_hold
+
+Revision ID: b7e41c9d2a05
+Revises: e8ae1f8c71c3
+Create Date: 2026-10-19 22:14:37.182904
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e41c9d2a05"
+down_revision: Union[str, Sequence[str], None] = "e8ae1f8c71c3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "overflow_hold",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("alias_id", sa.Integer(), nullable=True),
+        sa.Column("recipient", sa.String(length=255), nullable=False),
+        sa.Column("from_address", sa.String(length=255), nullable=True),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("hold_reason", sa.String(length=64), nullable=True),
+        sa.Column("content_pointer", sa.String(length=64), nullable=False),
+        sa.Column("content_key_id", sa.String(length=64), nullable=False),
+        sa.Column("received_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("held_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("will_delete_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["alias_id"], ["aliases.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_overflow_hold_id"), "overflow_hold", ["id"], unique=False)
+    # Release walks one user's rows in held_at order
+    op.create_index(
+        "ix_overflow_hold_user_held",
+        "overflow_hold",
+        ["user_id", "held_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_overflow_hold_will_delete_at",
+        "overflow_hold",
+        ["will_delete_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_overflow_hold_content_pointer",
+        "overflow_hold",
+        ["content_pointer"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_overflow_hold_content_pointer", table_name="overflow_hold")
+    op.drop_index("ix_overflow_hold_will_delete_at", table_name="overflow_hold")
+    op.drop_index("ix_overflow_hold_user_held", table_name="overflow_hold")
+    op.drop_index(op.f("ix_overflow_hold_id"), table_name="overflow_hold")
+    op.drop_table("overflow_hold")
@@ -0,0 +1,62 @@
+"""add_bandwidth_usage
+
+Revision ID: b8ffa62a39e0
+Revises: b3863c296674
+Create Date: 2026-10-19 13:08:52.447120
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b8ffa62a39e0"
+down_revision: Union[str, Sequence[str], None] = "b3863c296674"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "bandwidth_usage",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("bytes_used", sa.BigInteger(), nullable=False),
+        sa.Column("emails_received", sa.BigInteger(), nullable=False),
+        sa.Column("emails_forwarded", sa.BigInteger(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_bandwidth_usage_id"), "bandwidth_usage", ["id"], unique=False
+    )
+    op.create_index(
+        "ix_bandwidth_usage_user_period",
+        "bandwidth_usage",
+        ["user_id", "period_start"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_bandwidth_usage_user_period", table_name="bandwidth_usage")
+    op.drop_index(op.f("ix_bandwidth_usage_id"), table_name="bandwidth_usage")
+    op.drop_table("bandwidth_usage")
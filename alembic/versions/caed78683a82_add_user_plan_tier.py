@@ -0,0 +1,46 @@
+"""add_user_plan_tier
+
+Revision ID: caed78683a82
+Revises: b8ffa62a39e0
+Create Date: 2026-10-19 13:51:26.718034
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "caed78683a82"
+down_revision: Union[str, Sequence[str], None] = "b8ffa62a39e0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column(
+            "plan_tier",
+            sa.String(length=32),
+            server_default="starter",
+            nullable=False,
+        ),
+    )
+    # The enforcement snapshot refreshes incrementally by updated_at
+    op.create_index("ix_users_updated_at", "users", ["updated_at"], unique=False)
+    op.create_index("ix_aliases_updated_at", "aliases", ["updated_at"], unique=False)
+    op.create_index(
+        "ix_destinations_updated_at", "destinations", ["updated_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_destinations_updated_at", table_name="destinations")
+    op.drop_index("ix_aliases_updated_at", table_name="aliases")
+    op.drop_index("ix_users_updated_at", table_name="users")
+    op.drop_column("users", "plan_tier")
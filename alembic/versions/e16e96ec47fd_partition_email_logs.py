@@ -0,0 +1,150 @@
+"""partition_email_logs
+
+Revision ID: e16e96ec47fd
+Revises: 5a865c1ab10d
+Create Date: 2026-10-19 17:03:48.215663
+
+"""
+
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e16e96ec47fd"
+down_revision: Union[str, Sequence[str], None] = "5a865c1ab10d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    "id, user_id, alias_id, from_address, subject_hash, size_bytes, status, "
+    "failure_reason, received_at, forwarded_at, created_at, updated_at"
+)
+
+# Monthly partitions created up front; the cleanup task keeps creating the
+# upcoming ones (app/services/email_log.py)
+PARTITIONS_AHEAD = 2
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _create_indexes() -> None:
+    op.create_index("ix_email_logs_id", "email_logs", ["id"], unique=False)
+    op.create_index(
+        "ix_email_logs_user_received",
+        "email_logs",
+        ["user_id", "received_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_email_logs_updated_at", "email_logs", ["updated_at"], unique=False
+    )
+
+
+def _move_aside() -> None:
+    op.execute("ALTER TABLE email_logs RENAME TO email_logs_old")
+    op.execute("ALTER SEQUENCE email_logs_id_seq RENAME TO email_logs_old_id_seq")
+    # Index names are schema-wide, including the one behind the primary key
+    op.execute("ALTER INDEX email_logs_pkey RENAME TO email_logs_old_pkey")
+    for index in (
+        "ix_email_logs_id",
+        "ix_email_logs_user_received",
+        "ix_email_logs_updated_at",
+    ):
+        op.execute(f"DROP INDEX {index}")
+
+
+def _copy_back() -> None:
+    op.execute(
+        f"INSERT INTO email_logs ({COLUMNS}) SELECT {COLUMNS} FROM email_logs_old"
+    )
+    op.execute(
+        "SELECT setval('email_logs_id_seq', "
+        "COALESCE((SELECT max(id) FROM email_logs), 0) + 1, false)"
+    )
+    op.execute("DROP TABLE email_logs_old")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Range partitioning is PostgreSQL-only; other backends keep the plain
+    # table and fall back to batched deletes for retention.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    _move_aside()
+    op.execute("""
+        CREATE TABLE email_logs (
+            id BIGSERIAL NOT NULL,
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            alias_id INTEGER REFERENCES aliases (id) ON DELETE SET NULL,
+            from_address VARCHAR(255),
+            subject_hash VARCHAR(64),
+            size_bytes BIGINT NOT NULL,
+            status VARCHAR(16) NOT NULL,
+            failure_reason TEXT,
+            received_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            forwarded_at TIMESTAMP WITH TIME ZONE,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            PRIMARY KEY (id, received_at)
+        ) PARTITION BY RANGE (received_at)
+        """)
+    # Catches rows outside the monthly partitions so inserts never fail
+    op.execute("CREATE TABLE email_logs_default PARTITION OF email_logs DEFAULT")
+    # Existing rows get monthly partitions too, from the oldest one on, so
+    # retention can drop them like any other month
+    now = datetime.now(timezone.utc)
+    current = date(now.year, now.month, 1)
+    oldest = (
+        op.get_bind()
+        .execute(sa.text("SELECT min(received_at) FROM email_logs_old"))
+        .scalar()
+    )
+    month = current
+    if oldest is not None:
+        oldest = oldest.astimezone(timezone.utc)
+        month = min(date(oldest.year, oldest.month, 1), current)
+    last = current
+    for _ in range(PARTITIONS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE email_logs_p{month:%Y_%m} PARTITION OF email_logs "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{_next_month(month).isoformat()} 00:00:00+00')"
+        )
+        month = _next_month(month)
+    _create_indexes()
+    _copy_back()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    _move_aside()
+    op.execute("""
+        CREATE TABLE email_logs (
+            id SERIAL NOT NULL PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            alias_id INTEGER REFERENCES aliases (id) ON DELETE SET NULL,
+            from_address VARCHAR(255),
+            subject_hash VARCHAR(64),
+            size_bytes BIGINT NOT NULL,
+            status VARCHAR(16) NOT NULL,
+            failure_reason TEXT,
+            received_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            forwarded_at TIMESTAMP WITH TIME ZONE,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL
+        )
+        """)
+    _create_indexes()
+    _copy_back()
@@ -0,0 +1,36 @@
+"""add_email_log_header_snapshot
+
+Revision ID: e8ae1f8c71c3
+Revises: 3d2f4db716fe
+Create Date: 2026-10-19 21:26:52.604118
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e8ae1f8c71c3"
+down_revision: Union[str, Sequence[str], None] = "3d2f4db716fe"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # On PostgreSQL this is the partitioned parent; partitions follow
+    op.add_column(
+        "email_logs", sa.Column("header_pointer", sa.String(length=64), nullable=True)
+    )
+    op.add_column(
+        "email_logs", sa.Column("header_key_id", sa.String(length=64), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("email_logs", "header_key_id")
+    op.drop_column("email_logs", "header_pointer")
@@ -0,0 +1,118 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.dependencies import get_db, require_auth
+from app.models.alias import Alias
+from app.models.user import User
+from app.schemas.alias import (
+    AliasBulkCreate,
+    AliasBulkCreateResponse,
+    AliasBulkUpdate,
+    AliasBulkUpdateResponse,
+    AliasConflict,
+    AliasListResponse,
+    AliasResponse,
+    AliasSuggestionsResponse,
+)
+from app.services.alias import alias_service
+from app.services.alias_generator import alias_generator
+from app.utils.pagination import decode_cursor, encode_cursor
+
+settings = get_settings()
+router = APIRouter()
+
+
+def alias_response(alias: Alias) -> AliasResponse:
+    """Build the API representation of an alias."""
+    return AliasResponse(
+        id=alias.id,
+        name=alias.name,
+        domain=alias.domain,
+        full_address=f"{alias.name}@{alias.domain}",
+        destination_id=alias.destination_id,
+        is_active=alias.is_active,
+        created_at=alias.created_at.isoformat(),
+        updated_at=alias.updated_at.isoformat(),
+    )
+
+
+@router.get("", response_model=AliasListResponse)
+async def list_aliases(
+    cursor: str | None = Query(None, description="Cursor from a previous page"),
+    limit: int = Query(
+        settings.pagination_default_limit, ge=1, le=settings.pagination_max_limit
+    ),
+    is_active: bool | None = None,
+    include_total: bool = Query(
+        False, description="Also count aliases (capped for very large lists)"
+    ),
+    user: User = Depends(require_auth),
+    db: AsyncSession = Depends(get_db),
+) -> AliasListResponse:
+    """List the current user's aliases, oldest first."""
+    after_id = decode_cursor(cursor) if cursor else None
+    aliases, has_more = await alias_service.list_aliases(
+        db, user.id, limit, after_id, is_active
+    )
+
+    total, total_is_exact = None, True
+    if include_total:
+        total, total_is_exact = await alias_service.count_aliases(
+            db, user.id, is_active
+        )
+
+    return AliasListResponse(
+        aliases=[alias_response(alias) for alias in aliases],
+        next_cursor=encode_cursor(aliases[-1].id) if has_more else None,
+        has_more=has_more,
+        total=total,
+        total_is_exact=total_is_exact,
+    )
+
+
+@router.get("/suggestions", response_model=AliasSuggestionsResponse)
+async def suggest_alias_names(
+    domain: str = Query(..., min_length=1, max_length=255),
+    count: int = Query(1, ge=1, le=20),
+    user: User = Depends(require_auth),
+    db: AsyncSession = Depends(get_db),
+) -> AliasSuggestionsResponse:
+    """Suggest readable alias names that are currently unused on ``domain``."""
+    names = await alias_generator.generate(db, domain.lower(), count)
+    return AliasSuggestionsResponse(domain=domain.lower(), names=names)
+
+
+@router.post("/bulk", response_model=AliasBulkCreateResponse, status_code=201)
+async def bulk_create_aliases(
+    request: AliasBulkCreate,
+    user: User = Depends(require_auth),
+    db: AsyncSession = Depends(get_db),
+) -> AliasBulkCreateResponse:
+    """Create many aliases at once, reporting addresses that already exist."""
+    created, conflicts = await alias_service.bulk_create_aliases(
+        db, user.id, request.aliases
+    )
+    return AliasBulkCreateResponse(
+        created=[alias_response(alias) for alias in created],
+        conflicts=[
+            AliasConflict(name=alias.name, domain=alias.domain) for alias in conflicts
+        ],
+    )
+
+
+@router.patch("/bulk", response_model=AliasBulkUpdateResponse)
+async def bulk_update_aliases(
+    request: AliasBulkUpdate,
+    user: User = Depends(require_auth),
+    db: AsyncSession = Depends(get_db),
+) -> AliasBulkUpdateResponse:
+    """Enable or disable many aliases at once."""
+    updated_ids = await alias_service.set_active(
+        db, user.id, request.alias_ids, request.is_active
+    )
+    updated = set(updated_ids)
+    return AliasBulkUpdateResponse(
+        updated_ids=updated_ids,
+        not_found_ids=sorted(set(request.alias_ids) - updated),
+    )
@@ -17,6 +17,7 @@ from app.schemas.auth import (
 )
 from app.services.email import email_service
 from app.services.magic_link import magic_link_service
+from app.services.rate_limit import rate_limiter
 from app.services.session import session_service
 from app.services.webauthn import webauthn_service
 
@@ -31,6 +32,13 @@ async def request_magic_link(
 ) -> MagicLinkResponse:
     """Request a magic link for passwordless authentication."""
 
+    # Every request costs an SMTP send, so also limit per recipient address
+    await rate_limiter.check(
+        f"magic-link:email:{request.email.lower()}",
+        settings.magic_link_rate_limit_requests,
+        settings.magic_link_rate_limit_window,
+    )
+
     # Create magic link token
     token = await magic_link_service.create_magic_link(db, request.email)
 
@@ -58,30 +66,21 @@ async def verify_magic_link(
 ) -> AuthResponse:
     """Verify magic link token and create session."""
 
-    # Verify magic link token
-    email = await magic_link_service.verify_magic_link(db, request.token)
+    # Consume token, get or create user and create session in one transaction
+    login = await magic_link_service.login(
+        db, request.token, get_user_agent(http_request), get_client_ip(http_request)
+    )
 
-    if not email:
+    if not login:
         raise HTTPException(
             status_code=400,
             detail="Invalid or expired magic link token.",
         )
 
-    # Get or create user
-    user = await magic_link_service.get_or_create_user(db, email)
-
-    # Create session
-    user_agent = get_user_agent(http_request)
-    ip_address = get_client_ip(http_request)
-
-    signed_token, session = await session_service.create_session(
-        db, user.id, user_agent, ip_address
-    )
-
     # Set session cookie
     response.set_cookie(
         key="session",
-        value=signed_token,
+        value=login.signed_token,
         max_age=settings.session_max_age,
         httponly=settings.session_httponly,
         secure=settings.session_secure,
@@ -90,8 +89,8 @@ async def verify_magic_link(
 
     return AuthResponse(
         message="Authentication successful.",
-        user_id=user.id,
-        email=user.email,
+        user_id=login.user_id,
+        email=login.email,
     )
 
 
@@ -187,7 +186,7 @@ async def passkey_authenticate(
         ip_address = get_client_ip(http_request)
 
         signed_token, session = await session_service.create_session(
-            db, user.id, user_agent, ip_address
+            db, user.id, user_agent, ip_address, user.email
         )
 
         # Set session cookie
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.dependencies import get_db, require_auth
+from app.models.destination import Destination
+from app.models.user import User
+from app.schemas.destination import DestinationListResponse, DestinationResponse
+from app.services.destination import destination_service
+from app.utils.pagination import decode_cursor, encode_cursor
+
+settings = get_settings()
+router = APIRouter()
+
+
+def destination_response(destination: Destination) -> DestinationResponse:
+    """Build the API representation of a destination."""
+    return DestinationResponse(
+        id=destination.id,
+        email=destination.email,
+        is_verified=destination.verified_at is not None,
+        created_at=destination.created_at.isoformat(),
+        updated_at=destination.updated_at.isoformat(),
+    )
+
+
+@router.get("", response_model=DestinationListResponse)
+async def list_destinations(
+    cursor: str | None = Query(None, description="Cursor from a previous page"),
+    limit: int = Query(
+        settings.pagination_default_limit, ge=1, le=settings.pagination_max_limit
+    ),
+    include_total: bool = Query(
+        False, description="Also count destinations (capped for very large lists)"
+    ),
+    user: User = Depends(require_auth),
+    db: AsyncSession = Depends(get_db),
+) -> DestinationListResponse:
+    """List the current user's destination addresses, oldest first."""
+    after_id = decode_cursor(cursor) if cursor else None
+    destinations, has_more = await destination_service.list_destinations(
+        db, user.id, limit, after_id
+    )
+
+    total, total_is_exact = None, True
+    if include_total:
+        total, total_is_exact = await destination_service.count_destinations(
+            db, user.id
+        )
+
+    return DestinationListResponse(
+        destinations=[destination_response(d) for d in destinations],
+        next_cursor=encode_cursor(destinations[-1].id) if has_more else None,
+        has_more=has_more,
+        total=total,
+        total_is_exact=total_is_exact,
+    )
@@ -5,10 +5,9 @@ from datetime import datetime, timezone
 
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse, PlainTextResponse
-from sqlalchemy import text
 
 from app.config import get_settings
-from app.db.session import AsyncSessionLocal
+from app.services.health import health_monitor
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -30,69 +29,28 @@ metrics = {
 }
 
 
-async def check_database() -> tuple[bool, str, float]:
-    """Check database connectivity and response time."""
-    start_time = time.time()
-    try:
-        async with AsyncSessionLocal() as session:
-            # Simple query to test connectivity
-            result = await session.execute(text("SELECT 1"))
-            row = result.fetchone()  # Don't await this
-            assert row is not None and row[0] == 1
-            response_time = time.time() - start_time
-            return True, "connected", response_time
-    except Exception as e:
-        response_time = time.time() - start_time
-        logger.error(f"Database health check failed: {e}")
-        return False, f"error: {str(e)}", response_time
-
-
-async def check_migrations() -> tuple[bool, str]:
-    """Check if database migrations are up to date."""
-    try:
-        async with AsyncSessionLocal() as session:
-            # Check if alembic_version table exists and has current version
-            result = await session.execute(
-                text(
-                    "SELECT version_num FROM alembic_version "
-                    + "ORDER BY version_num DESC LIMIT 1"
-                )
-            )
-            version = result.fetchone()  # Don't await this
-            if version:
-                return True, f"current: {version[0]}"
-            else:
-                return False, "no migrations applied"
-    except Exception as e:
-        logger.error(f"Migration check failed: {e}")
-        return False, f"error: {str(e)}"
-
-
 @router.get("/health")
 async def health_check() -> JSONResponse:
-    """Comprehensive health check with database connectivity."""
-    start_time = time.time()
+    """Health check served from the background monitor's cached probes."""
+    start_time = time.perf_counter()
 
-    # Check database
-    db_healthy, db_status, db_response_time = await check_database()
+    results = await health_monitor.get_results()
+    checks = {
+        name: result.to_dict(health_monitor.stale_after)
+        for name, result in results.items()
+    }
 
-    # Overall health status
-    healthy = db_healthy
+    # Overall health status (non-critical checks only warn)
+    healthy = all(check["status"] != "fail" for check in checks.values())
     status_code = 200 if healthy else 503
 
-    response_time = time.time() - start_time
+    response_time = time.perf_counter() - start_time
 
     response_data = {
         "status": "healthy" if healthy else "unhealthy",
         "timestamp": datetime.now(timezone.utc).isoformat(),
-        "response_time_ms": round(response_time * 1000, 2),
-        "checks": {
-            "database": {
-                "status": "pass" if db_healthy else "fail",
-                "details": db_status,
-                "response_time_ms": round(db_response_time * 1000, 2),
-            },
-        },
+        "response_time_ms": round(response_time * 1000, 3),
+        "checks": checks,
     }
 
     if healthy:
@@ -108,35 +66,27 @@ async def health_check() -> JSONResponse:
 @router.get("/health/ready")
 async def readiness_check() -> JSONResponse:
     """Readiness probe - checks if app is ready to serve traffic."""
-    start_time = time.time()
+    start_time = time.perf_counter()
 
-    # Check database connectivity
-    db_healthy, db_status, db_response_time = await check_database()
+    results = await health_monitor.get_results()
+    migrations = await health_monitor.get_migrations()
 
-    # Check migrations
-    migrations_ok, migration_status = await check_migrations()
+    checks = {
+        "database": results["database"].to_dict(health_monitor.stale_after),
+        "migrations": migrations.to_dict(),
+    }
 
     # App is ready if database is connected and migrations are applied
-    ready = db_healthy and migrations_ok
+    ready = all(check["status"] == "pass" for check in checks.values())
     status_code = 200 if ready else 503
 
-    response_time = time.time() - start_time
+    response_time = time.perf_counter() - start_time
 
     response_data = {
         "status": "ready" if ready else "not_ready",
         "timestamp": datetime.now(timezone.utc).isoformat(),
-        "response_time_ms": round(response_time * 1000, 2),
-        "checks": {
-            "database": {
-                "status": "pass" if db_healthy else "fail",
-                "details": db_status,
-                "response_time_ms": round(db_response_time * 1000, 2),
-            },
-            "migrations": {
-                "status": "pass" if migrations_ok else "fail",
-                "details": migration_status,
-            },
-        },
+        "response_time_ms": round(response_time * 1000, 3),
+        "checks": checks,
     }
 
     return JSONResponse(status_code=status_code, content=response_data)
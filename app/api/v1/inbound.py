@@ -0,0 +1,37 @@
+"""Inbound mail webhooks from Cloudflare Email Routing and Postmark."""
+
+from fastapi import APIRouter, Request
+
+from app.config import get_settings
+from app.exceptions import NotFoundError
+from app.schemas.inbound import InboundAccepted
+from app.services.inbound import CLOUDFLARE, POSTMARK, inbound_receiver
+
+settings = get_settings()
+router = APIRouter()
+
+
+def _require_provider(provider: str) -> None:
+    # Only the configured provider's endpoint is exposed (INBOUND_PROVIDER)
+    if settings.inbound_provider != provider:
+        raise NotFoundError()
+
+
+@router.post("/cloudflare", response_model=InboundAccepted)
+async def receive_cloudflare(request: Request) -> InboundAccepted:
+    """Queue a raw message posted by the Cloudflare Email Worker."""
+    _require_provider(CLOUDFLARE)
+    entry_id = await inbound_receiver.receive_cloudflare(
+        request.headers, request.stream()
+    )
+    return InboundAccepted(id=entry_id)
+
+
+@router.post("/postmark", response_model=InboundAccepted)
+async def receive_postmark(request: Request) -> InboundAccepted:
+    """Queue a Postmark inbound webhook payload."""
+    _require_provider(POSTMARK)
+    entry_id = await inbound_receiver.receive_postmark(
+        request.headers, request.stream()
+    )
+    return InboundAccepted(id=entry_id)
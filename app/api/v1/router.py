@@ -1,8 +1,20 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from app.api.v1 import auth, health
+from app.api.v1 import aliases, auth, destinations, health, inbound, usage
+from app.dependencies import rate_limit
 
 api_router = APIRouter()
 
-api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
+api_router.include_router(
+    auth.router,
+    prefix="/auth",
+    tags=["authentication"],
+    dependencies=[Depends(rate_limit("auth"))],
+)
+api_router.include_router(aliases.router, prefix="/aliases", tags=["aliases"])
+api_router.include_router(
+    destinations.router, prefix="/destinations", tags=["destinations"]
+)
+api_router.include_router(usage.router, prefix="/usage", tags=["usage"])
+api_router.include_router(inbound.router, prefix="/inbound", tags=["inbound"])
 api_router.include_router(health.router, tags=["health"])
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dependencies import get_db, require_auth
+from app.models.user import User
+from app.schemas.usage import UsageBucket, UsageHistoryResponse, UsageResponse
+from app.services.bandwidth import bandwidth_accountant, period_start
+from app.services.usage_rollup import usage_history, week_start
+
+router = APIRouter()
+
+
+@router.get("", response_model=UsageResponse)
+async def get_usage(
+    user: User = Depends(require_auth),
+    db: AsyncSession = Depends(get_db),
+) -> UsageResponse:
+    """Get the current user's usage counters for this month."""
+    usage = await bandwidth_accountant.get_usage(db, user.id)
+    return UsageResponse(
+        period_start=period_start(),
+        bytes_used=usage.bytes_used,
+        emails_received=usage.emails_received,
+        emails_forwarded=usage.emails_forwarded,
+    )
+
+
+@router.get("/history", response_model=UsageHistoryResponse)
+async def get_usage_history(
+    granularity: Literal["daily", "weekly"] = Query(default="daily"),
+    periods: int = Query(default=30, ge=1, le=366),
+    user: User = Depends(require_auth),
+    db: AsyncSession = Depends(get_db),
+) -> UsageHistoryResponse:
+    """Get the current user's daily or weekly usage from the rollup tables."""
+    today = datetime.now(timezone.utc).date()
+    if granularity == "weekly":
+        since = week_start(today) - timedelta(weeks=periods - 1)
+    else:
+        since = today - timedelta(days=periods - 1)
+
+    buckets = [
+        UsageBucket(
+            start=row.start,
+            emails_received=row.emails_received,
+            emails_forwarded=row.emails_forwarded,
+            emails_failed=row.emails_failed,
+            emails_spam=row.emails_spam,
+            bytes_received=row.bytes_received,
+        )
+        for row in await usage_history(db, user.id, granularity, since)
+    ]
+    return UsageHistoryResponse(granularity=granularity, buckets=buckets)
@@ -2,10 +2,29 @@
 
 from typing import Literal
 
-from pydantic import Field, field_validator
+from pydantic import BaseModel, Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class PlanTier(BaseModel):
+    """Monthly limits for one plan tier (plan-tiers.md)."""
+
+    emails_per_month: int
+    bytes_per_month: int
+    spam_filter_included: bool = True
+
+
+DEFAULT_PLAN_TIERS = {
+    "starter": PlanTier(
+        emails_per_month=10_000,
+        bytes_per_month=5 * 1024**3,
+        spam_filter_included=False,
+    ),
+    "standard": PlanTier(emails_per_month=50_000, bytes_per_month=25 * 1024**3),
+    "pro": PlanTier(emails_per_month=200_000, bytes_per_month=100 * 1024**3),
+}
+
+
 class BaseAppSettings(BaseSettings):
     """Base settings class."""
 
@@ -46,10 +65,157 @@ class BaseAppSettings(BaseSettings):
     session_secure: bool = True
     session_httponly: bool = True
     session_samesite: Literal["lax", "strict", "none"] = "lax"
+    session_stateless: bool = False  # verify cookies without a DB query
+    session_revocation_sync_interval: float = 30.0  # seconds
+    session_revocation_max_entries: int = 100_000
 
     # Rate Limiting
     rate_limit_requests: int = 100
     rate_limit_window: int = 3600  # 1 hour
+    rate_limit_backend: Literal["memory", "database"] = "memory"
+    rate_limit_max_keys: int = 100_000  # memory bound for the in-process backend
+    # Reverse proxy IPs whose X-Forwarded-For rate limits believe
+    trusted_proxies: list[str] = []
+    magic_link_rate_limit_requests: int = 5  # per email address
+    magic_link_rate_limit_window: int = 900  # 15 minutes
+
+    # List Pagination
+    pagination_default_limit: int = 50
+    pagination_max_limit: int = 200
+    pagination_count_cap: int = 10_000  # totals above this are reported as ">= cap"
+    alias_bulk_max: int = 500  # aliases per bulk create/update request
+
+    # Alias name generation (adjective-noun-number)
+    alias_generator_adjectives_file: str | None = None  # one word per line
+    alias_generator_nouns_file: str | None = None
+    alias_generator_suffix_min: int = 10
+    alias_generator_suffix_max: int = 9999
+    alias_generator_batch_size: int = 32  # candidates checked per DB query
+    alias_generator_max_attempts: int = 5  # batches before giving up
+    alias_generator_bloom: bool = False  # pre-filter with existing names
+    alias_generator_bloom_capacity: int = 1_000_000
+
+    # Health Monitoring
+    health_check_interval: float = 15.0  # seconds between background probes
+    health_check_timeout: float = 3.0  # per-probe budget
+    health_check_stale_after: float = 60.0  # cached results older than this fail
+    health_check_smtp: bool = True
+
+    # Expired row cleanup
+    cleanup_enabled: bool = True  # run the in-app schedule (disable if using cron)
+    cleanup_interval: int = 3600  # seconds between runs
+    cleanup_batch_size: int = 1000
+    cleanup_batch_pause: float = 0.1  # seconds between batches
+
+    # Bandwidth accounting
+    bandwidth_flush_interval: float = 10.0  # seconds between counter flushes
+    bandwidth_flush_threshold: int = 1000  # increments that force an early flush
+    bandwidth_flush_batch_size: int = 500  # rows per upsert statement
+    bandwidth_base_ttl: float = 60.0  # reload persisted usage after this long
+    # Crash journal of the recording process (server.py); one process per path
+    bandwidth_journal_path: str | None = "data/bandwidth.journal"
+
+    # Plans and enforcement (bandwidth-enforcement.md)
+    plan_tiers: dict[str, PlanTier] = DEFAULT_PLAN_TIERS  # JSON in PLAN_TIERS
+    default_plan_tier: str = "starter"  # for users on an unknown tier
+    enforcement_mode: Literal["hold", "reject", "allow-with-flag"] = "hold"
+    max_message_bytes: int = 25 * 1024**2
+    enforcement_refresh_interval: float = 30.0  # incremental snapshot refresh
+    enforcement_full_refresh_interval: float = 900.0  # full reload (deletions)
+
+    # Usage warnings (sliding-thresholds.md)
+    usage_warnings_enabled: bool = True
+    usage_warning_early_enabled: bool = True
+    # (elapsed fraction below which it applies, percent) pairs, in order
+    usage_warning_early_thresholds: list[tuple[float, int]] = [(0.25, 60), (0.5, 70)]
+    usage_warning_global_threshold: int = 80
+    usage_warning_emails_enabled: bool = True
+    usage_warning_interval: float = 5.0  # seconds between evaluations
+    usage_warning_batch_size: int = 500  # users per evaluation query
+
+    # Email metadata log (email_logs)
+    email_log_flush_interval: float = 2.0  # seconds between buffered writes
+    email_log_flush_threshold: int = 500  # buffered records that force a write
+    email_log_batch_size: int = 1000  # rows per multi-row INSERT / COPY
+    email_log_max_buffer: int = 50_000  # oldest records dropped beyond this
+    email_log_retention_days: int = 90  # whole partitions dropped after this
+    email_log_partitions_ahead: int = 2  # future monthly partitions kept ready
+
+    # Webhook delivery (webhook-events.md)
+    webhooks_enabled: bool = True
+    webhook_timeout: float = 10.0  # seconds per delivery attempt
+    webhook_max_concurrency: int = 100  # in-flight deliveries, all endpoints
+    webhook_max_per_endpoint: int = 4  # in-flight deliveries per endpoint
+    webhook_queue_size: int = 1000  # queued per endpoint; the rest wait in the db
+    webhook_max_attempts: int = 8
+    webhook_backoff_base: float = 5.0  # seconds before the first retry
+    webhook_backoff_max: float = 3600.0
+    webhook_breaker_threshold: int = 5  # consecutive failures that open it
+    webhook_breaker_cooldown: float = 60.0  # doubles while the endpoint stays down
+    webhook_breaker_max_cooldown: float = 1800.0
+    webhook_publish_interval: float = 0.5  # seconds between accepting batches
+    webhook_retry_poll_interval: float = 10.0  # seconds between due-retry scans
+    webhook_batch_size: int = 500  # deliveries claimed per scan
+    # Coalescing for webhooks with batch_events set (array payloads)
+    webhook_coalesce_max_events: int = 100
+    webhook_coalesce_max_bytes: int = 256 * 1024
+    webhook_coalesce_max_wait: float = 2.0  # seconds an event may wait for others
+
+    # Daily/weekly usage rollups from email_logs
+    rollup_enabled: bool = True  # run the in-app schedule (disable if using cron)
+    rollup_interval: float = 300.0  # seconds between runs
+    rollup_batch_size: int = 500  # users per aggregate query
+    rollup_overlap: float = 120.0  # seconds re-read behind the watermark
+
+    # Inbound provider webhooks (provider-selection.md)
+    inbound_provider: Literal["cloudflare", "postmark"] = "cloudflare"
+    inbound_spool_dir: str = "data/inbound"
+    inbound_verify_signatures: bool = True
+    cloudflare_inbound_secret: str = ""  # HMAC key shared with the Email Worker
+    postmark_inbound_user: str = ""  # basic auth credentials in the webhook URL
+    postmark_inbound_password: str = ""
+    inbound_max_concurrent: int = 64  # bodies received at once; 503 beyond this
+    inbound_write_buffer: int = 256 * 1024  # bytes buffered per disk write
+    inbound_poll_interval: float = 1.0  # seconds between spool scans (server.py)
+    inbound_workers: int = 8  # spooled messages processed at once
+    inbound_claim_lease: float = 600.0  # seconds before a claim counts as dead
+
+    # Spam heuristics (spam-filtering-mvp.md); SPAM_ENABLED turns it on in server.py
+    spam_threshold: int = 1  # rule hits that make a message spam
+    spam_bad_sender_domains: str = ""  # comma-separated; subdomains match too
+    spam_bad_sender_domains_file: str | None = None  # one per line, hot-reloaded
+    spam_max_recipients: int = 50  # envelope or To/Cc addresses
+    spam_reload_interval: float = 30.0  # seconds between domains file checks
+    spam_quarantine_days: int = 30
+
+    # Encrypted content store for quarantined and failed mail
+    content_store_enabled: bool = True
+    content_store_dir: str = "data/content"
+    # key id -> urlsafe base64 AES-256 key (JSON); derived from SECRET_KEY if empty
+    content_store_keys: dict[str, str] = {}
+    content_store_key_id: str | None = None  # encrypts new content; old keys decrypt
+    content_store_chunk_size: int = 64 * 1024  # plaintext bytes per AES-GCM chunk
+    failed_email_retention_days: int = 7
+    # Overflow Hold (bandwidth-enforcement.md): over-limit mail, released at
+    # a steady rate once the owner's usage period rolls over (server.py)
+    overflow_hold_days: int = 30  # counted from when the message was received
+    hold_release_rate: float = 20.0  # messages per second, across all users
+    hold_release_concurrency: int = 8  # released messages in the pipeline at once
+    hold_release_batch_size: int = 500  # held rows read per query
+    hold_release_interval: float = 300.0  # seconds between checks for due users
+    # Encrypted raw header block per message (mail-validation-and-headers.md),
+    # kept as long as email_logs
+    header_snapshots_enabled: bool = True
+    header_snapshot_dir: str = "data/headers"
+
+    # SPF/DKIM/DMARC, log-only (mail-validation-and-headers.md);
+    # SENDER_AUTH_ENABLED turns it on in server.py
+    sender_auth_timeout: float = 2.0  # seconds per message for all three checks
+    dns_timeout: float = 1.5  # seconds per DNS query
+    dns_max_concurrency: int = 64  # DNS queries in flight at once
+    dns_cache_size: int = 10000  # cached answers (LRU)
+    dns_cache_max_ttl: int = 3600  # caps the TTL of cached answers
+    dns_negative_ttl: int = 300  # how long missing names are remembered
 
     # Email Config
     from_email: str = Field(..., alias="FROM_EMAIL")
@@ -113,6 +279,12 @@ class TestingSettings(BaseAppSettings):
     magic_link_ttl: int = 60  # 1 minute
     session_max_age: int = 3600  # 1 hour
 
+    # No relay is reachable from the test runner
+    health_check_smtp: bool = False
+
+    # Tests pass their own journal paths
+    bandwidth_journal_path: str | None = None
+
 
 class StagingSettings(BaseAppSettings):
     """Staging environment settings."""
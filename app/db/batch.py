@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any
+
+from sqlalchemy import ColumnElement, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+async def delete_in_batches(
+    db: AsyncSession,
+    key: InstrumentedAttribute[Any],
+    *criteria: ColumnElement[bool],
+    batch_size: int = 1000,
+    pause: float = 0.0,
+) -> int:
+    """Delete rows matching ``criteria`` in primary-key ordered batches.
+
+    Each batch selects the next ``batch_size`` matching keys after the last
+    one seen and deletes that key range in its own short transaction, so no
+    single statement locks the whole table or writes one huge WAL burst.
+    ``pause`` seconds are slept between batches to let replicas and vacuum
+    keep up. Returns the number of rows deleted.
+    """
+    deleted = 0
+    last_key = None
+
+    while True:
+        query = select(key).where(*criteria).order_by(key).limit(batch_size)
+        if last_key is not None:
+            query = query.where(key > last_key)
+        keys = (await db.scalars(query)).all()
+        if not keys:
+            break
+
+        result = await db.execute(
+            delete(key.class_).where(key >= keys[0], key <= keys[-1], *criteria)
+        )
+        await db.commit()
+        deleted += result.rowcount or 0  # type: ignore[attr-defined]
+
+        if len(keys) < batch_size:
+            break
+        last_key = keys[-1]
+        if pause:
+            await asyncio.sleep(pause)
+
+    return deleted
@@ -0,0 +1,41 @@
+from typing import Any, Sequence, TypeVar
+
+from sqlalchemy import Select, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+T = TypeVar("T")
+
+
+async def keyset_page(
+    db: AsyncSession,
+    query: Select[tuple[T]],
+    key: InstrumentedAttribute[Any],
+    after: Any | None,
+    limit: int,
+) -> tuple[Sequence[T], bool]:
+    """Fetch the page of ``query`` rows whose ``key`` follows ``after``.
+
+    Rows are ordered by ``key`` and one extra row is read to learn whether
+    another page exists, so the cost depends only on ``limit`` and not on
+    how deep into the result set the page is. Returns ``(rows, has_more)``.
+    """
+    if after is not None:
+        query = query.where(key > after)
+    rows = (await db.scalars(query.order_by(key).limit(limit + 1))).all()
+    return rows[:limit], len(rows) > limit
+
+
+async def capped_count(
+    db: AsyncSession, query: Select[Any], cap: int
+) -> tuple[int, bool]:
+    """Count the rows of ``query``, giving up after ``cap`` rows.
+
+    Returns ``(count, exact)``; when ``exact`` is False there are at least
+    ``count`` rows. Bounds the work of a COUNT(*) for very large lists.
+    """
+    limited = query.with_only_columns(literal(1)).order_by(None).limit(cap + 1)
+    count = await db.scalar(select(func.count()).select_from(limited.subquery())) or 0
+    if count > cap:
+        return cap, False
+    return count, True
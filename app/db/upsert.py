@@ -0,0 +1,16 @@
+from typing import Any
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DialectInsert = postgresql.Insert | sqlite.Insert
+
+
+def dialect_insert(db: AsyncSession, entity: Any) -> DialectInsert:
+    """Build an INSERT that supports ON CONFLICT for the session's dialect."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(entity)
+    if dialect == "sqlite":
+        return sqlite.insert(entity)
+    raise NotImplementedError(f"Upserts are not supported on {dialect}")
@@ -1,12 +1,16 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable
 
 from fastapi import Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import get_settings
 from app.db.session import AsyncSessionLocal
 from app.models.user import User
+from app.services.rate_limit import rate_limiter
 from app.services.session import session_service
 
+settings = get_settings()
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """FastAPI dependency to get database session."""
@@ -60,6 +64,39 @@ def get_client_ip(request: Request) -> str | None:
     return request.client.host if request.client else None
 
 
+def get_rate_limit_ip(
+    request: Request, trusted_proxies: list[str] = settings.trusted_proxies
+) -> str | None:
+    """Get the client IP to rate limit, which a client cannot choose.
+
+    Forwarded headers are only believed from a trusted proxy; the address
+    used is the last X-Forwarded-For hop not added by one of them.
+    """
+    peer = request.client.host if request.client else None
+    if peer not in trusted_proxies:
+        return peer
+    forwarded_for = request.headers.get("x-forwarded-for", "")
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if hop not in trusted_proxies:
+            return hop
+    return request.headers.get("x-real-ip") or peer
+
+
+def rate_limit(
+    scope: str,
+    limit: int = settings.rate_limit_requests,
+    window: int = settings.rate_limit_window,
+) -> Callable[[Request], Awaitable[None]]:
+    """Build a FastAPI dependency enforcing a per-IP rate limit for ``scope``."""
+
+    async def dependency(request: Request) -> None:
+        client_ip = get_rate_limit_ip(request) or "unknown"
+        await rate_limiter.check(f"{scope}:ip:{client_ip}", limit, window)
+
+    return dependency
+
+
 def get_user_agent(request: Request) -> str | None:
     """Get user agent from request headers."""
     return request.headers.get("user-agent")
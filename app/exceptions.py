@@ -80,6 +80,18 @@ class ConflictError(APIException):
         super().__init__(message, 409, error_code, details)
 
 
+class PayloadTooLargeError(APIException):
+    """Exception for 413 Payload Too Large errors."""
+
+    def __init__(
+        self,
+        message: str = "Payload too large",
+        error_code: str = "PAYLOAD_TOO_LARGE",
+        details: dict[str, Any] | None = None,
+    ) -> None:
+        super().__init__(message, 413, error_code, details)
+
+
 class RateLimitError(APIException):
     """Exception for 429 Rate Limit errors."""
 
@@ -1,5 +1,6 @@
 import uuid
-from typing import Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
@@ -15,6 +16,11 @@ from app.config import get_settings
 from app.exceptions import APIException
 from app.middleware.logging import RequestLoggingMiddleware
 from app.middleware.session import SessionMiddleware
+from app.services.alias_generator import alias_generator
+from app.services.cleanup import cleanup_worker
+from app.services.health import health_monitor
+from app.services.session_revocation import revocation_list
+from app.services.usage_rollup import usage_rollup
 from app.utils.logging import get_logger, setup_logging
 
 # Setup logging before creating app
@@ -23,10 +29,35 @@ logger = get_logger(__name__)
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start background workers on startup and stop them on shutdown."""
+    await health_monitor.start()
+    if settings.cleanup_enabled:
+        cleanup_worker.start()
+    if settings.session_stateless:
+        revocation_list.start()
+    alias_generator.start()
+    # The bandwidth accountant is not started here: the API only reads usage,
+    # and its journal belongs to the process recording it (server.py)
+    if settings.rollup_enabled:
+        usage_rollup.start()
+    try:
+        yield
+    finally:
+        await usage_rollup.stop()
+        await alias_generator.stop()
+        await revocation_list.stop()
+        await cleanup_worker.stop()
+        await health_monitor.stop()
+
+
 app = FastAPI(
     title=settings.app_name,
     version="0.1.0",
     debug=settings.debug,
+    lifespan=lifespan,
 )
 
 # Templates
@@ -98,8 +129,13 @@ async def api_exception_handler(request: Request, exc: APIException) -> JSONResp
         },
     )
 
+    headers = None
+    if "retry_after" in exc.details:
+        headers = {"Retry-After": str(exc.details["retry_after"])}
+
     return JSONResponse(
         status_code=exc.status_code,
+        headers=headers,
         content={
             "type": f"https://quitspyingon.me/errors/{exc.error_code.lower()}",
             "title": exc.message,
@@ -1,10 +1,17 @@
 from app.models.alias import Alias
+from app.models.bandwidth_usage import BandwidthUsage
 from app.models.base import BaseModel
 from app.models.destination import Destination
+from app.models.email_log import EmailLog
 from app.models.magic_link_token import MagicLinkToken
 from app.models.passkey import Passkey
+from app.models.rate_limit import RateLimitBucket
 from app.models.session import Session
+from app.models.stored_email import FailedEmail, HeldEmail, QuarantinedEmail
+from app.models.usage_rollup import RollupWatermark, UsageDaily, UsageWeekly
+from app.models.usage_warning import UsageWarning
 from app.models.user import User
+from app.models.webhook import Webhook, WebhookDelivery
 
 __all__ = [
     "BaseModel",
@@ -14,4 +21,16 @@ __all__ = [
     "Session",
     "MagicLinkToken",
     "Passkey",
+    "RateLimitBucket",
+    "BandwidthUsage",
+    "UsageWarning",
+    "EmailLog",
+    "UsageDaily",
+    "UsageWeekly",
+    "RollupWatermark",
+    "Webhook",
+    "WebhookDelivery",
+    "QuarantinedEmail",
+    "FailedEmail",
+    "HeldEmail",
 ]
@@ -16,7 +16,7 @@ class Alias(BaseModel):
     __tablename__ = "aliases"
 
     user_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
     destination_id: Mapped[int] = mapped_column(
         ForeignKey("destinations.id", ondelete="CASCADE"),
@@ -37,5 +37,9 @@ class Alias(BaseModel):
 
     __table_args__ = (
         Index("ix_aliases_name_domain", "name", "domain", unique=True),
-        Index("ix_aliases_user_active", "user_id", "is_active"),
+        # Keyset pagination: (user_id, id) for all aliases, with is_active
+        # in between for filtered listings
+        Index("ix_aliases_user_active", "user_id", "is_active", "id"),
+        Index("ix_aliases_user_id_id", "user_id", "id"),
+        Index("ix_aliases_updated_at", "updated_at"),
     )
@@ -0,0 +1,25 @@
+from datetime import date
+
+from sqlalchemy import BigInteger, Date, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import BaseModel
+
+
+class BandwidthUsage(BaseModel):
+    """Per-user monthly usage counters (bandwidth-enforcement.md)."""
+
+    __tablename__ = "bandwidth_usage"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    # First day of the calendar month (UTC) the counters belong to
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+    bytes_used: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    emails_received: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    emails_forwarded: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+    __table_args__ = (
+        Index("ix_bandwidth_usage_user_period", "user_id", "period_start", unique=True),
+    )
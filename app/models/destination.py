@@ -17,7 +17,7 @@ class Destination(BaseModel):
     __tablename__ = "destinations"
 
     user_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
     email: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     verified_at: Mapped[Optional[datetime]] = mapped_column(
@@ -34,4 +34,6 @@ class Destination(BaseModel):
     __table_args__ = (
         Index("ix_destinations_user_email", "user_id", "email", unique=True),
         Index("ix_destinations_verification_token", "verification_token"),
+        Index("ix_destinations_user_id_id", "user_id", "id"),
+        Index("ix_destinations_updated_at", "updated_at"),
     )
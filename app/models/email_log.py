@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import BaseModel
+
+# EmailLog.status values
+RECEIVED = "received"
+FORWARDED = "forwarded"
+FAILED = "failed"
+BOUNCED = "bounced"
+SPAM = "spam"
+HELD = "held"
+
+
+class EmailLog(BaseModel):
+    """Metadata for one received message; no content (email-privacy-design.md).
+
+    On PostgreSQL the table is range-partitioned by month on ``received_at``
+    (primary key ``(id, received_at)``) so retention drops whole partitions;
+    see app/services/email_log.py.
+    """
+
+    __tablename__ = "email_logs"
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True
+    )
+
+    # Denormalized from the alias so usage survives alias deletion
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    alias_id: Mapped[int | None] = mapped_column(
+        ForeignKey("aliases.id", ondelete="SET NULL"), nullable=True
+    )
+    from_address: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    subject_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    status: Mapped[str] = mapped_column(String(16), default=RECEIVED, nullable=False)
+    failure_reason: Mapped[str | None] = mapped_column(Text, nullable=True)
+    received_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    forwarded_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Encrypted raw header snapshot in the header store (content_store.py)
+    header_pointer: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    header_key_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_logs_user_received", "user_id", "received_at"),
+        # Rollup watermark: rows inserted or updated since the last run
+        Index("ix_email_logs_updated_at", "updated_at"),
+    )
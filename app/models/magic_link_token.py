@@ -11,7 +11,10 @@ class MagicLinkToken(BaseModel):
 
     __tablename__ = "magic_link_tokens"
 
-    email: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    # One live token per address; reissuing upserts over the previous one
+    email: Mapped[str] = mapped_column(
+        String(255), unique=True, nullable=False, index=True
+    )
     token_hash: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     expires_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, index=True
@@ -0,0 +1,14 @@
+from sqlalchemy import Float, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class RateLimitBucket(Base):
+    """Shared GCRA state for rate limiting across app processes."""
+
+    __tablename__ = "rate_limit_buckets"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # Theoretical arrival time (unix epoch seconds)
+    tat: Mapped[float] = mapped_column(Float, nullable=False, index=True)
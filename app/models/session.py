@@ -29,6 +29,9 @@ class Session(BaseModel):
     last_activity: Mapped[Optional[datetime]] = mapped_column(
         DateTime(timezone=True), nullable=True
     )
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
 
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="sessions")
@@ -0,0 +1,126 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import BaseModel
+
+
+class QuarantinedEmail(BaseModel):
+    """A message held as spam (spam-filtering-mvp.md), for one recipient alias.
+
+    The content is not in the row: ``content_pointer`` names an encrypted
+    file in the content store (app/services/content_store.py), shared by
+    every row for the same message, and ``content_key_id`` the key it was
+    encrypted with.
+    """
+
+    __tablename__ = "spam_quarantine"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    alias_id: Mapped[int | None] = mapped_column(
+        ForeignKey("aliases.id", ondelete="SET NULL"), nullable=True
+    )
+    from_address: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    subject_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    spam_score: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    spam_reason: Mapped[str] = mapped_column(Text, nullable=False)
+    content_pointer: Mapped[str] = mapped_column(String(64), nullable=False)
+    content_key_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    received_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    will_delete_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    released: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+
+    __table_args__ = (
+        Index("ix_spam_quarantine_user_received", "user_id", "received_at"),
+        Index("ix_spam_quarantine_will_delete_at", "will_delete_at"),
+        Index("ix_spam_quarantine_content_pointer", "content_pointer"),
+    )
+
+
+class FailedEmail(BaseModel):
+    """A message the relay did not accept, kept for retry; content as above."""
+
+    __tablename__ = "failed_emails"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    alias_id: Mapped[int | None] = mapped_column(
+        ForeignKey("aliases.id", ondelete="SET NULL"), nullable=True
+    )
+    from_address: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    failure_reason: Mapped[str | None] = mapped_column(Text, nullable=True)
+    content_pointer: Mapped[str] = mapped_column(String(64), nullable=False)
+    content_key_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    retry_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_retry_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    received_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    will_delete_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_failed_emails_user_received", "user_id", "received_at"),
+        Index("ix_failed_emails_will_delete_at", "will_delete_at"),
+        Index("ix_failed_emails_content_pointer", "content_pointer"),
+    )
+
+
+class HeldEmail(BaseModel):
+    """A message in Overflow Hold (bandwidth-enforcement.md); content as above.
+
+    Held when the alias's owner was over their plan limits, and fed back to
+    the pipeline for ``recipient`` once their usage period rolls over
+    (app/services/overflow_hold.py), or deleted at ``will_delete_at``.
+    """
+
+    __tablename__ = "overflow_hold"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    alias_id: Mapped[int | None] = mapped_column(
+        ForeignKey("aliases.id", ondelete="SET NULL"), nullable=True
+    )
+    recipient: Mapped[str] = mapped_column(String(255), nullable=False)
+    from_address: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    hold_reason: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    content_pointer: Mapped[str] = mapped_column(String(64), nullable=False)
+    content_key_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    received_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    held_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    will_delete_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_overflow_hold_user_held", "user_id", "held_at"),
+        Index("ix_overflow_hold_will_delete_at", "will_delete_at"),
+        Index("ix_overflow_hold_content_pointer", "content_pointer"),
+    )
@@ -0,0 +1,63 @@
+from datetime import date, datetime
+
+from sqlalchemy import BigInteger, Date, DateTime, ForeignKey, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, BaseModel
+
+
+class _UsageRollupCounters:
+    """Counters shared by the daily and weekly rollups."""
+
+    emails_received: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    emails_forwarded: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    emails_failed: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    emails_spam: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    bytes_received: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+
+class UsageDaily(BaseModel, _UsageRollupCounters):
+    """Per-user message counts for one UTC day, built from email_logs."""
+
+    __tablename__ = "usage_daily"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+
+    __table_args__ = (Index("ix_usage_daily_user_day", "user_id", "day", unique=True),)
+
+    @property
+    def start(self) -> date:
+        return self.day
+
+
+class UsageWeekly(BaseModel, _UsageRollupCounters):
+    """Per-user message counts for one ISO week (starting Monday)."""
+
+    __tablename__ = "usage_weekly"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    week_start: Mapped[date] = mapped_column(Date, nullable=False)
+
+    __table_args__ = (
+        Index("ix_usage_weekly_user_week", "user_id", "week_start", unique=True),
+    )
+
+    @property
+    def start(self) -> date:
+        return self.week_start
+
+
+class RollupWatermark(Base):
+    """How far a rollup job has read its source table."""
+
+    __tablename__ = "rollup_watermarks"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    processed_until: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
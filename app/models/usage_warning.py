@@ -0,0 +1,37 @@
+from datetime import date
+
+from sqlalchemy import Date, ForeignKey, Index, SmallInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import BaseModel
+
+
+class UsageWarning(BaseModel):
+    """A usage threshold crossing emitted for a period (sliding-thresholds.md).
+
+    The unique index on (user_id, period_start, metric, threshold) is the
+    de-duplication index: each crossing is emitted at most once per period,
+    across processes and restarts.
+    """
+
+    __tablename__ = "usage_warnings"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+    metric: Mapped[str] = mapped_column(String(16), nullable=False)  # bytes|emails
+    # Percent of the monthly limit; 101 marks over-limit
+    threshold: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    usage_percent: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "ix_usage_warnings_dedup",
+            "user_id",
+            "period_start",
+            "metric",
+            "threshold",
+            unique=True,
+        ),
+    )
@@ -20,6 +20,10 @@ class User(BaseModel):
     email: Mapped[str] = mapped_column(
         String(255), unique=True, nullable=False, index=True
     )
+    # Key into settings.plan_tiers
+    plan_tier: Mapped[str] = mapped_column(
+        String(32), default="starter", server_default="starter", nullable=False
+    )
 
     # Relationships
     aliases: Mapped[list["Alias"]] = relationship(
@@ -35,4 +39,7 @@ class User(BaseModel):
         "Passkey", back_populates="user", cascade="all, delete-orphan"
     )
 
-    __table_args__ = (Index("ix_users_email_lower", "email"),)
+    __table_args__ = (
+        Index("ix_users_email_lower", "email"),
+        Index("ix_users_updated_at", "updated_at"),
+    )
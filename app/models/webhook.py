@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import BaseModel
+
+# WebhookDelivery.status values
+PENDING = "pending"
+DEAD = "dead"
+
+
+class Webhook(BaseModel):
+    """A user's webhook endpoint (webhook-events.md)."""
+
+    __tablename__ = "webhooks"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    url: Mapped[str] = mapped_column(Text, nullable=False)
+    # HMAC-SHA256 key for X-QSM-Signature
+    secret: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Sent as X-QSM-Key-Id so receivers can rotate secrets
+    key_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    # Opt-in: coalesce events into JSON array payloads
+    batch_events: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+
+
+class WebhookDelivery(BaseModel):
+    """A pending (or abandoned) event delivery to one webhook.
+
+    This is the persistent retry queue: a row exists from the moment an event
+    is accepted until it is delivered, when the row is deleted. Rows that
+    run out of attempts stay behind as ``dead`` for inspection.
+    """
+
+    __tablename__ = "webhook_deliveries"
+
+    webhook_id: Mapped[int] = mapped_column(
+        ForeignKey("webhooks.id", ondelete="CASCADE"), nullable=False
+    )
+    event_id: Mapped[str] = mapped_column(String(40), nullable=False)
+    # Signed request body (JSON)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(String(16), default=PENDING, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Due time for pending rows; also the claim lease while one is in flight
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_webhook_deliveries_event", "webhook_id", "event_id", unique=True),
+        Index("ix_webhook_deliveries_due", "status", "next_attempt_at"),
+    )
@@ -1,4 +1,15 @@
-from app.schemas.alias import AliasCreate, AliasListResponse, AliasResponse, AliasUpdate
+from app.schemas.alias import (
+    AliasBulkCreate,
+    AliasBulkCreateResponse,
+    AliasBulkUpdate,
+    AliasBulkUpdateResponse,
+    AliasConflict,
+    AliasCreate,
+    AliasListResponse,
+    AliasResponse,
+    AliasSuggestionsResponse,
+    AliasUpdate,
+)
 from app.schemas.auth import (
     AuthResponse,
     MagicLinkRequest,
@@ -21,6 +32,8 @@ from app.schemas.destination import (
     DestinationResponse,
     DestinationUpdate,
 )
+from app.schemas.inbound import InboundAccepted
+from app.schemas.usage import UsageBucket, UsageHistoryResponse, UsageResponse
 
 __all__ = [
     # Auth schemas
@@ -33,15 +46,27 @@ __all__ = [
     "SessionResponse",
     "VerifyMagicLinkRequest",
     # Alias schemas
+    "AliasBulkCreate",
+    "AliasBulkCreateResponse",
+    "AliasBulkUpdate",
+    "AliasBulkUpdateResponse",
+    "AliasConflict",
     "AliasCreate",
     "AliasListResponse",
     "AliasResponse",
+    "AliasSuggestionsResponse",
     "AliasUpdate",
     # Destination schemas
     "DestinationCreate",
     "DestinationListResponse",
     "DestinationResponse",
     "DestinationUpdate",
+    # Inbound schemas
+    "InboundAccepted",
+    # Usage schemas
+    "UsageResponse",
+    "UsageBucket",
+    "UsageHistoryResponse",
     # Base schemas
     "ErrorResponse",
     "MessageResponse",
@@ -1,4 +1,9 @@
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+from app.config import get_settings
+from app.utils.alias_names import alias_name_error
+
+settings = get_settings()
 
 
 class AliasCreate(BaseModel):
@@ -13,17 +18,15 @@ class AliasCreate(BaseModel):
     @classmethod
     def validate_alias_name(cls, v: str) -> str:
         """Validate alias name according to alias-naming-rules.md."""
-        if not v.replace("-", "").replace("_", "").replace(".", "").isalnum():
-            raise ValueError(
-                "Alias name can only contain letters, numbers, hyphens, "
-                "underscores, and dots"
-            )
-        if v.startswith(("-", "_", ".")) or v.endswith(("-", "_", ".")):
-            raise ValueError(
-                "Alias name cannot start or end with hyphens, underscores, or dots"
-            )
-        if ".." in v or "--" in v or "__" in v:
-            raise ValueError("Alias name cannot contain consecutive special characters")
+        error = alias_name_error(v)
+        if error:
+            raise ValueError(error)
+        return v.lower()
+
+    @field_validator("domain")
+    @classmethod
+    def normalize_domain(cls, v: str) -> str:
+        """Domains are case-insensitive; store them lowercased."""
         return v.lower()
 
 
@@ -45,17 +48,73 @@ class AliasResponse(BaseModel):
     domain: str
     full_address: str
     destination_id: int
-    description: str | None
+    description: str | None = None
     is_active: bool
     created_at: str
     updated_at: str
 
 
 class AliasListResponse(BaseModel):
-    """Schema for paginated alias list responses."""
+    """Schema for cursor-paginated alias list responses."""
 
     aliases: list[AliasResponse]
-    total: int
-    page: int
-    per_page: int
-    pages: int
+    next_cursor: str | None
+    has_more: bool
+    total: int | None = None
+    total_is_exact: bool = True
+
+
+class AliasSuggestionsResponse(BaseModel):
+    """Schema for generated alias name suggestions."""
+
+    domain: str
+    names: list[str]
+
+
+class AliasBulkCreate(BaseModel):
+    """Schema for creating many aliases in one request."""
+
+    aliases: list[AliasCreate] = Field(
+        ..., min_length=1, max_length=settings.alias_bulk_max
+    )
+
+    @model_validator(mode="after")
+    def reject_duplicates(self) -> "AliasBulkCreate":
+        """Reject batches that contain the same address twice."""
+        seen: set[tuple[str, str]] = set()
+        for alias in self.aliases:
+            key = (alias.name, alias.domain)
+            if key in seen:
+                raise ValueError(
+                    f"Duplicate alias in batch: {alias.name}@{alias.domain}"
+                )
+            seen.add(key)
+        return self
+
+
+class AliasConflict(BaseModel):
+    """An alias address in a bulk request that already exists."""
+
+    name: str
+    domain: str
+
+
+class AliasBulkCreateResponse(BaseModel):
+    """Schema for bulk alias creation results."""
+
+    created: list[AliasResponse]
+    conflicts: list[AliasConflict]
+
+
+class AliasBulkUpdate(BaseModel):
+    """Schema for enabling or disabling many aliases at once."""
+
+    alias_ids: list[int] = Field(..., min_length=1, max_length=settings.alias_bulk_max)
+    is_active: bool
+
+
+class AliasBulkUpdateResponse(BaseModel):
+    """Schema for bulk alias update results."""
+
+    updated_ids: list[int]
+    not_found_ids: list[int]
@@ -22,17 +22,17 @@ class DestinationResponse(BaseModel):
 
     id: int
     email: str
-    name: str
+    name: str | None = None
     is_verified: bool
     created_at: str
     updated_at: str
 
 
 class DestinationListResponse(BaseModel):
-    """Schema for paginated destination list responses."""
+    """Schema for cursor-paginated destination list responses."""
 
     destinations: list[DestinationResponse]
-    total: int
-    page: int
-    per_page: int
-    pages: int
+    next_cursor: str | None
+    has_more: bool
+    total: int | None = None
+    total_is_exact: bool = True
@@ -0,0 +1,10 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class InboundAccepted(BaseModel):
+    """Schema for an inbound message accepted into the spool."""
+
+    status: Literal["queued"] = "queued"
+    id: str
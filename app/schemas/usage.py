@@ -0,0 +1,31 @@
+from datetime import date
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class UsageResponse(BaseModel):
+    """Schema for the current user's usage this month."""
+
+    period_start: date
+    bytes_used: int
+    emails_received: int
+    emails_forwarded: int
+
+
+class UsageBucket(BaseModel):
+    """Schema for one day or week of rolled-up usage."""
+
+    start: date
+    emails_received: int
+    emails_forwarded: int
+    emails_failed: int
+    emails_spam: int
+    bytes_received: int
+
+
+class UsageHistoryResponse(BaseModel):
+    """Schema for rolled-up usage history, oldest bucket first."""
+
+    granularity: Literal["daily", "weekly"]
+    buckets: list[UsageBucket]
@@ -0,0 +1,127 @@
+from typing import Sequence
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.db.pagination import capped_count, keyset_page
+from app.db.upsert import dialect_insert
+from app.exceptions import ValidationError
+from app.models.alias import Alias
+from app.models.destination import Destination
+from app.schemas.alias import AliasCreate
+
+settings = get_settings()
+
+
+class AliasService:
+    """Service for querying and managing a user's aliases."""
+
+    async def list_aliases(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        limit: int,
+        after_id: int | None = None,
+        is_active: bool | None = None,
+    ) -> tuple[Sequence[Alias], bool]:
+        """Return one keyset page of aliases ordered by id, plus ``has_more``."""
+        query = select(Alias).where(Alias.user_id == user_id)
+        if is_active is not None:
+            query = query.where(Alias.is_active == is_active)
+        return await keyset_page(db, query, Alias.id, after_id, limit)
+
+    async def count_aliases(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        is_active: bool | None = None,
+        cap: int = settings.pagination_count_cap,
+    ) -> tuple[int, bool]:
+        """Count a user's aliases up to ``cap``. Returns ``(count, exact)``."""
+        query = select(Alias.id).where(Alias.user_id == user_id)
+        if is_active is not None:
+            query = query.where(Alias.is_active == is_active)
+        return await capped_count(db, query, cap)
+
+    async def bulk_create_aliases(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        aliases: Sequence[AliasCreate],
+    ) -> tuple[list[Alias], list[AliasCreate]]:
+        """Create many aliases in one INSERT statement and one transaction.
+
+        Addresses that already exist (``ix_aliases_name_domain``) are skipped
+        rather than failing the batch. Returns ``(created, conflicts)``.
+        """
+        destination_ids = {alias.destination_id for alias in aliases}
+        owned = set(
+            (
+                await db.scalars(
+                    select(Destination.id).where(
+                        Destination.user_id == user_id,
+                        Destination.id.in_(destination_ids),
+                    )
+                )
+            ).all()
+        )
+        unknown = sorted(destination_ids - owned)
+        if unknown:
+            raise ValidationError(
+                "Unknown destination",
+                "DESTINATION_NOT_FOUND",
+                {"destination_ids": unknown},
+            )
+
+        insert = dialect_insert(db, Alias).values(
+            [
+                {
+                    "user_id": user_id,
+                    "destination_id": alias.destination_id,
+                    "name": alias.name,
+                    "domain": alias.domain,
+                    "is_active": True,
+                }
+                for alias in aliases
+            ]
+        )
+        stmt = insert.on_conflict_do_nothing(
+            index_elements=[Alias.name, Alias.domain]
+        ).returning(Alias)
+        created = list((await db.scalars(stmt)).all())
+        await db.commit()
+
+        inserted = {(alias.name, alias.domain) for alias in created}
+        conflicts = [
+            alias for alias in aliases if (alias.name, alias.domain) not in inserted
+        ]
+        created.sort(key=lambda alias: alias.id)
+        return created, conflicts
+
+    async def set_active(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        alias_ids: Sequence[int],
+        is_active: bool,
+    ) -> list[int]:
+        """Enable or disable many aliases with one UPDATE.
+
+        Ids that do not exist or belong to another user are ignored.
+        Returns the ids that were updated.
+        """
+        updated = await db.scalars(
+            update(Alias)
+            .where(Alias.user_id == user_id, Alias.id.in_(alias_ids))
+            .values(is_active=is_active)
+            .returning(Alias.id)
+            .execution_options(synchronize_session=False)
+        )
+        ids = sorted(updated.all())
+        await db.commit()
+        return ids
+
+
+# Global alias service instance
+alias_service = AliasService()
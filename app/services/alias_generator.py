@@ -0,0 +1,229 @@
+"""Readable alias name generation (``adjective-noun-number``)."""
+
+import asyncio
+import secrets
+from pathlib import Path
+from typing import Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.exceptions import ConflictError
+from app.models.alias import Alias
+from app.utils.alias_names import is_valid_alias_name
+from app.utils.bloom import BloomFilter
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+DEFAULT_ADJECTIVES = (
+    "amber", "ample", "azure", "bold", "brave", "brisk", "bright", "calm",
+    "clever", "cosmic", "cozy", "crisp", "curious", "dapper", "daring", "deft",
+    "eager", "early", "easy", "fancy", "fast", "fierce", "fluffy", "fond",
+    "frosty", "gentle", "giddy", "glad", "golden", "grand", "happy", "hardy",
+    "hazel", "honest", "humble", "icy", "jade", "jolly", "keen", "kind",
+    "lively", "lucky", "lunar", "mellow", "merry", "mighty", "mint", "misty",
+    "modest", "neat", "nimble", "noble", "olive", "pale", "patient", "plucky",
+    "polite", "proud", "quick", "quiet", "rapid", "ready", "rosy", "royal",
+    "rustic", "sandy", "scarlet", "shy", "silent", "silver", "sleek", "smooth",
+    "snowy", "solar", "spry", "steady", "stormy", "sunny", "swift", "tame",
+    "tidy", "tiny", "topaz", "tranquil", "upbeat", "velvet", "vivid", "warm",
+    "wavy", "wild", "windy", "wise", "witty", "young", "zany", "zesty",
+)  # fmt: skip
+
+DEFAULT_NOUNS = (
+    "acorn", "badger", "beacon", "beaver", "bison", "breeze", "brook", "canyon",
+    "cedar", "cloud", "comet", "coral", "cricket", "crow", "dawn", "delta",
+    "dingo", "dolphin", "dune", "eagle", "ember", "falcon", "fern", "finch",
+    "fjord", "forest", "fox", "gazelle", "gecko", "glacier", "grove", "harbor",
+    "hawk", "heron", "hill", "ibis", "island", "jackal", "jaguar", "koala",
+    "lagoon", "lark", "lemur", "lynx", "maple", "marten", "meadow", "meteor",
+    "moose", "moth", "nebula", "newt", "oak", "ocean", "orca", "otter",
+    "owl", "panda", "pebble", "pine", "planet", "puffin", "quail", "rabbit",
+    "raven", "reef", "river", "robin", "salmon", "sparrow", "spruce", "squid",
+    "stone", "storm", "summit", "swan", "tapir", "thistle", "tiger", "toucan",
+    "trout", "tulip", "tundra", "valley", "violet", "walrus", "willow", "wombat",
+    "wren", "yak", "zebra", "zephyr", "badge", "cactus", "lotus", "quartz",
+)  # fmt: skip
+
+
+def load_words(path: str | None, default: Sequence[str]) -> tuple[str, ...]:
+    """Load a one-word-per-line dictionary, keeping only ``a-z`` words."""
+    if path is None:
+        return tuple(default)
+    words = {
+        line.strip().lower()
+        for line in Path(path).read_text().splitlines()
+        if line.strip().isascii() and line.strip().isalpha()
+    }
+    if not words:
+        raise ValueError(f"Alias dictionary {path} contains no usable words")
+    return tuple(sorted(words))
+
+
+class AliasNameGenerator:
+    """Generate unused alias names with as few database round-trips as possible.
+
+    Candidates are drawn in batches and checked against
+    ``ix_aliases_name_domain`` with a single ``IN`` query per batch, so a
+    retry costs one query for ``batch_size`` candidates rather than one per
+    candidate. With ``bloom`` enabled, a bloom filter of existing addresses
+    (loaded in the background and extended with every collision found)
+    discards most taken candidates before they reach the database. The
+    filter is only used to skip names; the database always has the final
+    word on whether a name is free.
+    """
+
+    def __init__(
+        self,
+        adjectives: Sequence[str] = DEFAULT_ADJECTIVES,
+        nouns: Sequence[str] = DEFAULT_NOUNS,
+        suffix_range: tuple[int, int] = (
+            settings.alias_generator_suffix_min,
+            settings.alias_generator_suffix_max,
+        ),
+        batch_size: int = settings.alias_generator_batch_size,
+        max_attempts: int = settings.alias_generator_max_attempts,
+        bloom_capacity: int | None = None,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    ) -> None:
+        if not adjectives or not nouns:
+            raise ValueError("Alias dictionaries must not be empty")
+        if suffix_range[0] < 0 or suffix_range[0] > suffix_range[1]:
+            raise ValueError("Invalid alias suffix range")
+        self.adjectives = tuple(adjectives)
+        self.nouns = tuple(nouns)
+        self.suffix_min, self.suffix_max = suffix_range
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.session_factory = session_factory
+        self.bloom = BloomFilter(bloom_capacity) if bloom_capacity else None
+        self.bloom_ready = False
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def namespace_size(self) -> int:
+        """Number of distinct names this generator can produce."""
+        suffixes = self.suffix_max - self.suffix_min + 1
+        return len(self.adjectives) * len(self.nouns) * suffixes
+
+    def draw(self, count: int) -> set[str]:
+        """Draw up to ``count`` distinct random candidate names."""
+        suffixes = self.suffix_max - self.suffix_min + 1
+        candidates: set[str] = set()
+        for _ in range(count * 2):
+            name = (
+                f"{secrets.choice(self.adjectives)}-{secrets.choice(self.nouns)}-"
+                f"{self.suffix_min + secrets.randbelow(suffixes)}"
+            )
+            if is_valid_alias_name(name):
+                candidates.add(name)
+                if len(candidates) == count:
+                    break
+        return candidates
+
+    def remember(self, name: str, domain: str) -> None:
+        """Record an address as taken in the bloom filter."""
+        if self.bloom is not None:
+            self.bloom.add(f"{name}@{domain}")
+
+    def _probably_taken(self, name: str, domain: str) -> bool:
+        if self.bloom is None or not self.bloom_ready:
+            return False
+        return f"{name}@{domain}" in self.bloom
+
+    async def generate(
+        self, db: AsyncSession, domain: str, count: int = 1
+    ) -> list[str]:
+        """Return ``count`` names that are currently unused on ``domain``.
+
+        Raises ConflictError if no free names are found within
+        ``max_attempts`` batches.
+        """
+        names: list[str] = []
+        for _ in range(self.max_attempts):
+            needed = count - len(names)
+            candidates = [
+                name
+                for name in self.draw(max(self.batch_size, needed * 2))
+                if name not in names and not self._probably_taken(name, domain)
+            ]
+            if not candidates:
+                continue
+
+            taken = set(
+                (
+                    await db.scalars(
+                        select(Alias.name).where(
+                            Alias.domain == domain, Alias.name.in_(candidates)
+                        )
+                    )
+                ).all()
+            )
+            for name in taken:
+                self.remember(name, domain)
+            names.extend([name for name in candidates if name not in taken][:needed])
+            if len(names) == count:
+                return names
+
+        logger.warning(
+            "Alias name generation exhausted",
+            extra={"domain": domain, "namespace_size": self.namespace_size},
+        )
+        raise ConflictError(
+            "Could not find an unused alias name, please try again",
+            "ALIAS_NAME_EXHAUSTED",
+        )
+
+    async def load_bloom(self, db: AsyncSession) -> int:
+        """Fill the bloom filter with every existing alias address."""
+        if self.bloom is None:
+            return 0
+        loaded = 0
+        result = await db.stream(
+            select(Alias.name, Alias.domain).execution_options(yield_per=10_000)
+        )
+        async for name, domain in result:
+            self.remember(name, domain)
+            loaded += 1
+        self.bloom_ready = True
+        return loaded
+
+    async def _load(self) -> None:
+        try:
+            async with self.session_factory() as db:
+                loaded = await self.load_bloom(db)
+            logger.info("Alias bloom filter loaded", extra={"aliases": loaded})
+        except Exception:
+            logger.error("Alias bloom filter load failed", exc_info=True)
+
+    def start(self) -> None:
+        """Load the bloom filter in the background, if enabled."""
+        if self.bloom is not None and self._task is None:
+            self._task = asyncio.create_task(self._load(), name="alias-bloom")
+
+    async def stop(self) -> None:
+        """Cancel a bloom filter load still in progress."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Global alias name generator instance
+alias_generator = AliasNameGenerator(
+    adjectives=load_words(settings.alias_generator_adjectives_file, DEFAULT_ADJECTIVES),
+    nouns=load_words(settings.alias_generator_nouns_file, DEFAULT_NOUNS),
+    bloom_capacity=(
+        settings.alias_generator_bloom_capacity
+        if settings.alias_generator_bloom
+        else None
+    ),
+)
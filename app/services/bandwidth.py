@@ -0,0 +1,432 @@
+"""Per-user monthly usage counters, aggregated in memory and flushed in batches."""
+
+import asyncio
+import fcntl
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import IO, Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.db.upsert import dialect_insert
+from app.models.bandwidth_usage import BandwidthUsage
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+UsageKey = tuple[int, date]
+
+
+@dataclass
+class UsageCounters:
+    """Usage for one user and month (or an increment to it)."""
+
+    bytes_used: int = 0
+    emails_received: int = 0
+    emails_forwarded: int = 0
+
+    def add(self, other: "UsageCounters") -> None:
+        """Add another set of counters in place."""
+        self.bytes_used += other.bytes_used
+        self.emails_received += other.emails_received
+        self.emails_forwarded += other.emails_forwarded
+
+    def __add__(self, other: "UsageCounters") -> "UsageCounters":
+        return UsageCounters(
+            self.bytes_used + other.bytes_used,
+            self.emails_received + other.emails_received,
+            self.emails_forwarded + other.emails_forwarded,
+        )
+
+
+def period_start(at: datetime | None = None) -> date:
+    """First day of the (UTC) calendar month containing ``at``."""
+    at = at or datetime.now(timezone.utc)
+    return date(at.year, at.month, 1)
+
+
+class UsageJournal:
+    """Append-only file of increments that have not reached the database yet.
+
+    Each increment is one text line. ``rotate`` moves the current file aside
+    when a flush starts and ``commit`` deletes it once the flush has
+    committed, so after a crash ``replay`` returns exactly the unflushed
+    increments, except for a crash between the database commit and
+    ``commit`` which replays (double counts) that one batch.
+
+    A journal belongs to one process: ``lock`` takes an exclusive lock on
+    it, so a second process configured with the same path fails to start
+    instead of replaying and rotating increments it does not own.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.flushing_path = self.path.with_name(self.path.name + ".flushing")
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self._file: IO[str] | None = None
+        self._lock_file: IO[str] | None = None
+
+    def lock(self) -> None:
+        """Take the journal for this process; raises if another holds it."""
+        if self._lock_file is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = self.lock_path.open("a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(
+                f"Bandwidth journal {self.path} is in use by another process"
+            ) from None
+        self._lock_file = lock_file
+
+    def unlock(self) -> None:
+        """Release the journal (closing the file drops the lock)."""
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def append(self, key: UsageKey, delta: UsageCounters) -> None:
+        """Record one increment."""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="ascii")
+        user_id, period = key
+        self._file.write(
+            f"{user_id} {period.isoformat()} {delta.bytes_used} "
+            f"{delta.emails_received} {delta.emails_forwarded}\n"
+        )
+        # Hand the line to the OS so it survives a process crash
+        self._file.flush()
+
+    def rotate(self) -> None:
+        """Move the current journal into the in-flight file before a flush.
+
+        A leftover in-flight file from a failed flush is kept and extended,
+        because its increments are part of the retried batch.
+        """
+        self.close()
+        if not self.path.exists():
+            return
+        if self.flushing_path.exists():
+            with self.flushing_path.open("a", encoding="ascii") as flushing:
+                flushing.write(self.path.read_text(encoding="ascii"))
+            self.path.unlink()
+        else:
+            self.path.replace(self.flushing_path)
+
+    def commit(self) -> None:
+        """Forget the in-flight file once its batch is in the database."""
+        self.flushing_path.unlink(missing_ok=True)
+
+    def replay(self) -> dict[UsageKey, UsageCounters]:
+        """Aggregate every increment still on disk."""
+        pending: dict[UsageKey, UsageCounters] = {}
+        for path in (self.flushing_path, self.path):
+            if not path.exists():
+                continue
+            for line in path.read_text(encoding="ascii").splitlines():
+                try:
+                    user_id, period, *values = line.split()
+                    key = (int(user_id), date.fromisoformat(period))
+                    delta = UsageCounters(*(int(value) for value in values))
+                except (TypeError, ValueError):
+                    # A torn final line from a crash mid-write
+                    logger.warning("Skipping malformed bandwidth journal line")
+                    continue
+                pending.setdefault(key, UsageCounters()).add(delta)
+        return pending
+
+    def close(self) -> None:
+        """Close the journal file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BandwidthAccountant:
+    """Count usage per (user, month) without a database write per message.
+
+    ``record_*`` only touch memory and append to the journal. Pending
+    increments are written with batched additive upserts every
+    ``flush_interval`` seconds, or sooner once ``flush_threshold``
+    increments have accumulated. Reads combine the persisted base row
+    (cached for ``base_ttl`` seconds) with whatever is still pending here.
+    Increments recorded by other processes show up once they flush and the
+    base is reloaded. ``record_*`` may be called from another thread (the
+    SMTP server runs its handler on its own event loop).
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = settings.bandwidth_flush_interval,
+        flush_threshold: int = settings.bandwidth_flush_threshold,
+        batch_size: int = settings.bandwidth_flush_batch_size,
+        base_ttl: float = settings.bandwidth_base_ttl,
+        journal_path: str | None = settings.bandwidth_journal_path,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.batch_size = batch_size
+        self.base_ttl = base_ttl
+        self.journal = UsageJournal(journal_path) if journal_path else None
+        self.session_factory = session_factory
+        self._pending: dict[UsageKey, UsageCounters] = {}
+        self._in_flight: dict[UsageKey, UsageCounters] = {}
+        self._base: dict[UsageKey, tuple[UsageCounters, float]] = {}
+        self._increments = 0
+        # Users whose counters moved since the last take_dirty_users()
+        self._dirty: set[int] = set()
+        # Guards _pending, _dirty and the journal between recording threads
+        # and flushes
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task[None] | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def record(
+        self,
+        user_id: int,
+        bytes_used: int = 0,
+        emails_received: int = 0,
+        emails_forwarded: int = 0,
+        at: datetime | None = None,
+    ) -> None:
+        """Add an increment to a user's counters for the month of ``at``."""
+        key = (user_id, period_start(at))
+        delta = UsageCounters(bytes_used, emails_received, emails_forwarded)
+        with self._lock:
+            if self.journal is not None:
+                self.journal.append(key, delta)
+            self._pending.setdefault(key, UsageCounters()).add(delta)
+            self._dirty.add(user_id)
+            self._increments += 1
+            flush_due = self._increments >= self.flush_threshold
+        if flush_due:
+            self._schedule_flush()
+
+    def record_received(
+        self, user_id: int, size: int, at: datetime | None = None
+    ) -> None:
+        """Count a received message; its bytes are counted here, once."""
+        self.record(user_id, bytes_used=size, emails_received=1, at=at)
+
+    def record_forwarded(self, user_id: int, at: datetime | None = None) -> None:
+        """Count a successful forward (bytes were counted on receipt)."""
+        self.record(user_id, emails_forwarded=1, at=at)
+
+    def take_dirty_users(self) -> set[int]:
+        """Return and clear the users whose usage changed since the last call."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def mark_dirty(self, user_ids: Iterable[int]) -> None:
+        """Have ``take_dirty_users`` return ``user_ids`` again."""
+        with self._lock:
+            self._dirty.update(user_ids)
+
+    def unflushed_usage(
+        self, user_id: int, at: datetime | None = None
+    ) -> UsageCounters:
+        """Increments recorded here that are not in the database yet."""
+        key = (user_id, period_start(at))
+        usage = UsageCounters()
+        for source in (self._in_flight, self._pending):
+            if key in source:
+                usage.add(source[key])
+        return usage
+
+    def current_usage(
+        self, user_id: int, at: datetime | None = None
+    ) -> UsageCounters | None:
+        """Usage from memory only, or None if the persisted base isn't loaded."""
+        base = self._base.get((user_id, period_start(at)))
+        if base is None:
+            return None
+        return base[0] + self.unflushed_usage(user_id, at)
+
+    async def load_base(
+        self, db: AsyncSession, user_ids: Iterable[int], at: datetime | None = None
+    ) -> None:
+        """Load persisted counters for many users with one query."""
+        period = period_start(at)
+        user_ids = list(user_ids)
+        # Serialized with flushes so a batch is never both in the loaded base
+        # and added to it afterwards
+        async with self._flush_lock:
+            rows = await db.scalars(
+                select(BandwidthUsage).where(
+                    BandwidthUsage.user_id.in_(user_ids),
+                    BandwidthUsage.period_start == period,
+                )
+            )
+            loaded = {row.user_id: row for row in rows}
+            now = time.monotonic()
+            for user_id in user_ids:
+                row = loaded.get(user_id)
+                counters = (
+                    UsageCounters(
+                        row.bytes_used, row.emails_received, row.emails_forwarded
+                    )
+                    if row
+                    else UsageCounters()
+                )
+                self._base[(user_id, period)] = (counters, now)
+
+    async def get_usage(
+        self, db: AsyncSession, user_id: int, at: datetime | None = None
+    ) -> UsageCounters:
+        """Current usage, reloading the persisted base when it is stale."""
+        base = self._base.get((user_id, period_start(at)))
+        if base is None or time.monotonic() - base[1] > self.base_ttl:
+            await self.load_base(db, [user_id], at)
+        usage = self.current_usage(user_id, at)
+        assert usage is not None
+        return usage
+
+    async def flush(self) -> int:
+        """Write pending increments with batched upserts. Returns rows written."""
+        async with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                self._in_flight = batch
+                self._increments = 0
+                if self.journal is not None:
+                    self.journal.rotate()
+
+            try:
+                async with self.session_factory() as db:
+                    items = list(batch.items())
+                    for start in range(0, len(items), self.batch_size):
+                        await self._upsert(db, items[start : start + self.batch_size])
+                    await db.commit()
+            except Exception:
+                # Keep the increments for the next attempt
+                with self._lock:
+                    for key, delta in batch.items():
+                        self._pending.setdefault(key, UsageCounters()).add(delta)
+                    self._in_flight = {}
+                raise
+
+            if self.journal is not None:
+                self.journal.commit()
+            for key, delta in batch.items():
+                if key in self._base:
+                    self._base[key][0].add(delta)
+            self._in_flight = {}
+            return len(batch)
+
+    async def _upsert(
+        self, db: AsyncSession, items: list[tuple[UsageKey, UsageCounters]]
+    ) -> None:
+        insert = dialect_insert(db, BandwidthUsage).values(
+            [
+                {
+                    "user_id": user_id,
+                    "period_start": period,
+                    "bytes_used": delta.bytes_used,
+                    "emails_received": delta.emails_received,
+                    "emails_forwarded": delta.emails_forwarded,
+                }
+                for (user_id, period), delta in items
+            ]
+        )
+        stmt = insert.on_conflict_do_update(
+            index_elements=[BandwidthUsage.user_id, BandwidthUsage.period_start],
+            set_={
+                "bytes_used": BandwidthUsage.bytes_used + insert.excluded.bytes_used,
+                "emails_received": (
+                    BandwidthUsage.emails_received + insert.excluded.emails_received
+                ),
+                "emails_forwarded": (
+                    BandwidthUsage.emails_forwarded + insert.excluded.emails_forwarded
+                ),
+                "updated_at": func.now(),
+            },
+        )
+        await db.execute(stmt)
+
+    async def _flush_logged(self) -> None:
+        try:
+            await self.flush()
+        except Exception:
+            logger.error("Bandwidth counter flush failed", exc_info=True)
+
+    def _schedule_flush(self) -> None:
+        try:
+            loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._loop is not None and loop is not self._loop:
+            # Recorded from another thread: flush on the loop that owns us
+            self._loop.call_soon_threadsafe(self._schedule_flush)
+            return
+        if loop is None:
+            return
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        self._flush_task = loop.create_task(
+            self._flush_logged(), name="bandwidth-flush"
+        )
+
+    def recover(self) -> int:
+        """Reload increments left in the journal by a previous process."""
+        if self.journal is None:
+            return 0
+        self.journal.lock()
+        recovered = self.journal.replay()
+        for key, delta in recovered.items():
+            self._pending.setdefault(key, UsageCounters()).add(delta)
+        if recovered:
+            logger.info(
+                "Recovered bandwidth increments from journal",
+                extra={"keys": len(recovered)},
+            )
+        return len(recovered)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush_logged()
+
+    def start(self) -> None:
+        """Recover the journal and start flushing in the background."""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self.recover()
+            self._task = asyncio.create_task(self._run(), name="bandwidth-flusher")
+
+    async def stop(self) -> None:
+        """Stop the background flush and write out what is pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flush_task is not None:
+            await self._flush_task
+            self._flush_task = None
+        await self._flush_logged()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal.unlock()
+        self._loop = None
+
+
+# Global bandwidth accountant instance
+bandwidth_accountant = BandwidthAccountant()
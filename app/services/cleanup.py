@@ -0,0 +1,128 @@
+"""Scheduled cleanup of expired tokens, sessions, rate limits, logs and mail."""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.db.batch import delete_in_batches
+from app.db.session import AsyncSessionLocal
+from app.models.rate_limit import RateLimitBucket
+from app.services.content_store import (
+    cleanup_failed_emails,
+    cleanup_header_snapshots,
+    cleanup_overflow_hold,
+    cleanup_quarantine,
+)
+from app.services.email_log import cleanup_email_logs
+from app.services.magic_link import magic_link_service
+from app.services.session import session_service
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+CleanupTask = Callable[[AsyncSession, int, float], Awaitable[int]]
+
+
+@dataclass(frozen=True)
+class CleanupReport:
+    """Result of one cleanup task run."""
+
+    task: str
+    rows_deleted: int
+    duration: float
+    error: str | None = None
+
+
+async def cleanup_rate_limit_buckets(
+    db: AsyncSession, batch_size: int, pause: float
+) -> int:
+    """Remove rate limit buckets whose state has fully decayed."""
+    return await delete_in_batches(
+        db,
+        RateLimitBucket.key,
+        RateLimitBucket.tat <= time.time(),
+        batch_size=batch_size,
+        pause=pause,
+    )
+
+
+class CleanupWorker:
+    """Run batched expiry deletes once or on a fixed interval."""
+
+    def __init__(
+        self,
+        interval: float = settings.cleanup_interval,
+        batch_size: int = settings.cleanup_batch_size,
+        pause: float = settings.cleanup_batch_pause,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    ) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.session_factory = session_factory
+        self.tasks: dict[str, CleanupTask] = {
+            "magic_link_tokens": magic_link_service.cleanup_expired_tokens,
+            "sessions": session_service.cleanup_expired_sessions,
+            "rate_limit_buckets": cleanup_rate_limit_buckets,
+            "email_logs": cleanup_email_logs,
+            "spam_quarantine": cleanup_quarantine,
+            "failed_emails": cleanup_failed_emails,
+            "overflow_hold": cleanup_overflow_hold,
+            "header_snapshots": cleanup_header_snapshots,
+        }
+        self._task: asyncio.Task[None] | None = None
+
+    async def run_task(self, name: str) -> CleanupReport:
+        """Run a single cleanup task and report what it did."""
+        start_time = time.perf_counter()
+        try:
+            async with self.session_factory() as db:
+                deleted = await self.tasks[name](db, self.batch_size, self.pause)
+        except Exception as e:
+            logger.error(f"Cleanup task '{name}' failed", exc_info=True)
+            return CleanupReport(name, 0, time.perf_counter() - start_time, str(e))
+
+        report = CleanupReport(name, deleted, time.perf_counter() - start_time)
+        logger.info(
+            f"Cleanup task '{name}' finished",
+            extra={
+                "task": name,
+                "rows_deleted": report.rows_deleted,
+                "duration_ms": round(report.duration * 1000, 2),
+            },
+        )
+        return report
+
+    async def run_once(self) -> list[CleanupReport]:
+        """Run every cleanup task sequentially."""
+        return [await self.run_task(name) for name in self.tasks]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    def start(self) -> None:
+        """Start running cleanups in the background every ``interval`` seconds."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="cleanup-worker")
+
+    async def stop(self) -> None:
+        """Stop the background schedule."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Global cleanup worker instance
+cleanup_worker = CleanupWorker()
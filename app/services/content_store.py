@@ -0,0 +1,351 @@
+"""Encrypted on-disk store for message content and header snapshots.
+
+Message content is kept out of the database: it is encrypted in fixed-size
+chunks straight to a file, and rows in ``spam_quarantine``,
+``failed_emails`` and ``overflow_hold`` hold only the file's pointer and
+the id of the key that encrypted it. Neither side ever needs the whole
+message in memory. Raw header snapshots are kept the same way in a
+separate store, pointed at from email_logs.
+
+File format: a header (magic plus a random 7-byte nonce prefix), then
+chunks framed as a 4-byte big-endian length and the AES-256-GCM ciphertext
+with its tag. Chunk ``n`` is encrypted under the nonce
+``prefix || n (4 bytes) || last (1 byte)`` with the header as associated
+data, so chunks cannot be reordered, moved between files, or dropped from
+the end without decryption failing.
+"""
+
+import asyncio
+import base64
+import os
+import secrets
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Generator, Iterable
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.stored_email import FailedEmail, HeldEmail, QuarantinedEmail
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+MAGIC = b"QSMC\x01"
+NONCE_PREFIX_SIZE = 7
+HEADER_SIZE = len(MAGIC) + NONCE_PREFIX_SIZE
+_LENGTH = struct.Struct(">I")
+
+# Key id used when CONTENT_STORE_KEYS is not configured
+DERIVED_KEY_ID = "sk1"
+
+
+class ContentCorruptError(Exception):
+    """Stored content failed authentication or is truncated."""
+
+
+def derive_key(secret: str) -> bytes:
+    """An AES-256 key derived from the application secret."""
+    return HKDF(
+        algorithm=hashes.SHA256(), length=32, salt=None, info=b"qsm-content-store"
+    ).derive(secret.encode())
+
+
+def load_keys(configured: dict[str, str]) -> dict[str, bytes]:
+    """Decode CONTENT_STORE_KEYS (key id -> base64 key), or derive one."""
+    if not configured:
+        return {DERIVED_KEY_ID: derive_key(settings.secret_key)}
+    keys = {}
+    for key_id, encoded in configured.items():
+        key = base64.urlsafe_b64decode(encoded)
+        if len(key) != 32:
+            raise ValueError(f"Content store key {key_id!r} must be 32 bytes")
+        keys[key_id] = key
+    return keys
+
+
+def _nonce(prefix: bytes, counter: int, last: bool) -> bytes:
+    return prefix + counter.to_bytes(4, "big") + (b"\x01" if last else b"\x00")
+
+
+@dataclass(frozen=True, slots=True)
+class StoredContent:
+    """Where encrypted content was stored and how to decrypt it."""
+
+    pointer: str
+    key_id: str
+    size: int  # plaintext bytes
+
+
+class ContentWriter:
+    """Encrypt content to a temporary file as it is written.
+
+    ``commit`` seals the last chunk and moves the file into place; leaving
+    the ``with`` block without committing removes the partial file.
+    """
+
+    def __init__(self, store: "ContentStore") -> None:
+        self.store = store
+        self.key_id = store.key_id
+        self._aead = AESGCM(store.keys[store.key_id])
+        self.pointer = secrets.token_hex(16)
+        self._path = store.path(self.pointer)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp = self._path.with_suffix(".tmp")
+        self._file: BinaryIO = open(self._tmp, "wb")
+        self._header = MAGIC + secrets.token_bytes(NONCE_PREFIX_SIZE)
+        self._file.write(self._header)
+        self._buffer = bytearray()
+        self._counter = 0
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        """Add plaintext; full chunks are encrypted and written out."""
+        self.size += len(data)
+        self._buffer += data
+        chunk_size = self.store.chunk_size
+        while len(self._buffer) > chunk_size:
+            self._seal(bytes(self._buffer[:chunk_size]), last=False)
+            del self._buffer[:chunk_size]
+
+    def _seal(self, chunk: bytes, last: bool) -> None:
+        nonce = _nonce(self._header[len(MAGIC) :], self._counter, last)
+        sealed = self._aead.encrypt(nonce, chunk, self._header)
+        self._file.write(_LENGTH.pack(len(sealed)))
+        self._file.write(sealed)
+        self._counter += 1
+
+    def commit(self) -> StoredContent:
+        """Seal the final chunk, sync, and make the content visible."""
+        self._seal(bytes(self._buffer), last=True)
+        self._buffer.clear()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp, self._path)
+        return StoredContent(self.pointer, self.key_id, self.size)
+
+    def discard(self) -> None:
+        """Drop an uncommitted write."""
+        if not self._file.closed:
+            self._file.close()
+            self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> "ContentWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.discard()
+
+
+class ContentStore:
+    """Encrypted content files under ``directory``, addressed by pointer.
+
+    New content is encrypted with ``key_id``; older content stays readable
+    as long as its key is still in ``keys``, which is how keys are rotated.
+    """
+
+    def __init__(
+        self,
+        directory: str = settings.content_store_dir,
+        keys: dict[str, bytes] | None = None,
+        key_id: str | None = settings.content_store_key_id,
+        chunk_size: int = settings.content_store_chunk_size,
+    ) -> None:
+        self.directory = Path(directory)
+        self.keys = keys if keys is not None else load_keys(settings.content_store_keys)
+        if not key_id and len(self.keys) == 1:
+            key_id = next(iter(self.keys))
+        if key_id not in self.keys:
+            raise ValueError("CONTENT_STORE_KEY_ID must name a configured key")
+        self.key_id: str = key_id
+        self.chunk_size = chunk_size
+
+    def path(self, pointer: str) -> Path:
+        """File holding ``pointer``'s content, sharded by its first byte."""
+        if len(pointer) != 32 or not all(c in "0123456789abcdef" for c in pointer):
+            raise ValueError(f"Invalid content pointer: {pointer!r}")
+        return self.directory / pointer[:2] / pointer
+
+    def writer(self) -> ContentWriter:
+        """Start writing new content; see ContentWriter."""
+        return ContentWriter(self)
+
+    def store(self, chunks: Iterable[bytes]) -> StoredContent:
+        """Encrypt ``chunks`` to a new file. Blocking; see ``astore``."""
+        with self.writer() as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+            return writer.commit()
+
+    async def astore(self, chunks: Iterable[bytes]) -> StoredContent:
+        """``store`` on a worker thread."""
+        return await asyncio.to_thread(self.store, chunks)
+
+    def open(self, pointer: str, key_id: str) -> Generator[bytes, None, None]:
+        """Decrypt stored content chunk by chunk.
+
+        Raises ContentCorruptError as soon as a chunk fails authentication,
+        so callers never see plaintext that was tampered with.
+        """
+        key = self.keys.get(key_id)
+        if key is None:
+            raise KeyError(f"Unknown content store key id: {key_id!r}")
+        aead = AESGCM(key)
+        with open(self.path(pointer), "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if len(header) != HEADER_SIZE or not header.startswith(MAGIC):
+                raise ContentCorruptError(f"Bad content header: {pointer}")
+            prefix = header[len(MAGIC) :]
+            counter = 0
+            sealed = self._frame(f)
+            while sealed is not None:
+                following = self._frame(f)
+                last = following is None
+                try:
+                    yield aead.decrypt(_nonce(prefix, counter, last), sealed, header)
+                except InvalidTag:
+                    raise ContentCorruptError(
+                        f"Content failed authentication: {pointer}"
+                    ) from None
+                sealed = following
+                counter += 1
+            if counter == 0:
+                raise ContentCorruptError(f"Content truncated: {pointer}")
+
+    @staticmethod
+    def _frame(f: BinaryIO) -> bytes | None:
+        length = f.read(_LENGTH.size)
+        if not length:
+            return None
+        if len(length) != _LENGTH.size:
+            raise ContentCorruptError("Content truncated mid-chunk")
+        (size,) = _LENGTH.unpack(length)
+        sealed = f.read(size)
+        if len(sealed) != size:
+            raise ContentCorruptError("Content truncated mid-chunk")
+        return sealed
+
+    def read(self, pointer: str, key_id: str) -> bytes:
+        """The whole decrypted content (for relaying it again)."""
+        return b"".join(self.open(pointer, key_id))
+
+    def delete(self, pointer: str) -> None:
+        """Remove stored content; missing files are ignored."""
+        self.path(pointer).unlink(missing_ok=True)
+
+    def purge_older_than(self, cutoff: datetime) -> int:
+        """Remove content written before ``cutoff``. Returns files removed.
+
+        Files are never rewritten, so their mtime is when they were stored.
+        """
+        if not self.directory.is_dir():
+            return 0
+        before = cutoff.timestamp()
+        removed = 0
+        for shard in self.directory.iterdir():
+            if not shard.is_dir():
+                continue
+            for path in shard.iterdir():
+                try:
+                    if path.stat().st_mtime < before:
+                        path.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+        return removed
+
+
+StoredEmail = QuarantinedEmail | FailedEmail | HeldEmail
+
+
+async def delete_unreferenced(
+    db: AsyncSession, pointers: set[str], store: "ContentStore"
+) -> None:
+    """Delete the content files no stored email row points at any more.
+
+    One message's content is shared by all of its recipients' rows, in any
+    of the tables.
+    """
+    pointers = set(pointers)
+    for model in (QuarantinedEmail, FailedEmail, HeldEmail):
+        if not pointers:
+            return
+        pointers -= set(
+            await db.scalars(
+                select(model.content_pointer).where(model.content_pointer.in_(pointers))
+            )
+        )
+    for pointer in pointers:
+        await asyncio.to_thread(store.delete, pointer)
+
+
+async def _purge_expired(
+    db: AsyncSession,
+    model: type[StoredEmail],
+    batch_size: int,
+    pause: float,
+    store: "ContentStore",
+) -> int:
+    # Rows go first, then any content file no remaining row points at
+    now = datetime.now(timezone.utc)
+    deleted = 0
+    while True:
+        rows = (
+            await db.execute(
+                select(model.id, model.content_pointer)
+                .where(model.will_delete_at <= now)
+                .order_by(model.id)
+                .limit(batch_size)
+            )
+        ).all()
+        if not rows:
+            break
+        await db.execute(delete(model).where(model.id.in_([row.id for row in rows])))
+        await db.commit()
+        deleted += len(rows)
+        await delete_unreferenced(db, {row.content_pointer for row in rows}, store)
+
+        if len(rows) < batch_size:
+            break
+        if pause:
+            await asyncio.sleep(pause)
+    return deleted
+
+
+async def cleanup_quarantine(db: AsyncSession, batch_size: int, pause: float) -> int:
+    """Delete expired spam quarantine rows and their content (cleanup task)."""
+    return await _purge_expired(db, QuarantinedEmail, batch_size, pause, content_store)
+
+
+async def cleanup_failed_emails(db: AsyncSession, batch_size: int, pause: float) -> int:
+    """Delete expired failed email rows and their content (cleanup task)."""
+    return await _purge_expired(db, FailedEmail, batch_size, pause, content_store)
+
+
+async def cleanup_overflow_hold(db: AsyncSession, batch_size: int, pause: float) -> int:
+    """Delete held mail past its hold period and its content (cleanup task)."""
+    return await _purge_expired(db, HeldEmail, batch_size, pause, content_store)
+
+
+async def cleanup_header_snapshots(
+    db: AsyncSession, batch_size: int, pause: float
+) -> int:
+    """Purge header snapshots past email_logs retention (cleanup task)."""
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        days=settings.email_log_retention_days
+    )
+    return await asyncio.to_thread(header_store.purge_older_than, cutoff)
+
+
+# Global content store instances
+content_store = ContentStore()
+header_store = ContentStore(directory=settings.header_snapshot_dir)
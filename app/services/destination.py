@@ -0,0 +1,39 @@
+from typing import Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.db.pagination import capped_count, keyset_page
+from app.models.destination import Destination
+
+settings = get_settings()
+
+
+class DestinationService:
+    """Service for querying a user's destination addresses."""
+
+    async def list_destinations(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        limit: int,
+        after_id: int | None = None,
+    ) -> tuple[Sequence[Destination], bool]:
+        """Return one keyset page of destinations ordered by id, plus ``has_more``."""
+        query = select(Destination).where(Destination.user_id == user_id)
+        return await keyset_page(db, query, Destination.id, after_id, limit)
+
+    async def count_destinations(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        cap: int = settings.pagination_count_cap,
+    ) -> tuple[int, bool]:
+        """Count a user's destinations up to ``cap``. Returns ``(count, exact)``."""
+        query = select(Destination.id).where(Destination.user_id == user_id)
+        return await capped_count(db, query, cap)
+
+
+# Global destination service instance
+destination_service = DestinationService()
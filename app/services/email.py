@@ -93,6 +93,32 @@ class EmailService:
 
         return await self._send_email_async(to_email, subject, content)
 
+    async def send_usage_warning(
+        self,
+        to_email: str,
+        threshold: int,
+        usage_percent: int,
+        metric: str,
+        approaching_reset: bool,
+    ) -> bool:
+        """Send a usage threshold warning (sliding-thresholds.md)."""
+        context = {
+            "threshold": threshold,
+            "over_limit": threshold > 100,
+            "usage_percent": usage_percent,
+            "metric": "bandwidth" if metric == "bytes" else "email",
+            "approaching_reset": approaching_reset,
+            "manage_url": f"{settings.webauthn_origin}/aliases",
+        }
+
+        if threshold > 100:
+            subject = "You're over your monthly limit"
+        else:
+            subject = f"You've used {threshold}% of your monthly limit"
+        content = self._render_template("usage_warning.txt", context)
+
+        return await self._send_email_async(to_email, subject, content)
+
 
 # Global email service instance
 email_service = EmailService()
@@ -0,0 +1,330 @@
+"""Buffered writes and partition-based retention for email_logs."""
+
+import asyncio
+import hashlib
+import threading
+from dataclasses import astuple, dataclass, fields
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.db.batch import delete_in_batches
+from app.db.session import AsyncSessionLocal
+from app.models.email_log import EmailLog
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+@dataclass(slots=True)
+class EmailLogRecord:
+    """One email_logs row, buffered until the next flush."""
+
+    user_id: int
+    alias_id: int | None
+    from_address: str | None
+    subject_hash: str | None
+    size_bytes: int
+    status: str
+    received_at: datetime
+    forwarded_at: datetime | None = None
+    failure_reason: str | None = None
+    header_pointer: str | None = None
+    header_key_id: str | None = None
+
+
+COLUMNS = [field.name for field in fields(EmailLogRecord)]
+
+
+def hash_subject(subject: str | None) -> str | None:
+    """Hash a subject line so only its fingerprint is stored."""
+    if subject is None:
+        return None
+    return hashlib.sha256(subject.encode("utf-8", errors="replace")).hexdigest()
+
+
+class EmailLogWriter:
+    """Buffer email_logs rows from the ingest path and write them in batches.
+
+    ``add`` only appends to memory, so it is safe to call once per message
+    from the SMTP handler (including from the server's own thread). Records
+    are written every ``flush_interval`` seconds, or sooner once
+    ``flush_threshold`` are buffered, as multi-row INSERTs of up to
+    ``batch_size`` rows; on PostgreSQL with asyncpg they are streamed with
+    COPY instead. Callers pass each message's final status, so a forwarded
+    message is one INSERT rather than an INSERT plus an UPDATE. If the
+    database is unavailable the buffer is kept, up to ``max_buffer``
+    records, after which the oldest are dropped: log rows are metadata, and
+    usage counters are kept separately by the bandwidth accountant.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = settings.email_log_flush_interval,
+        flush_threshold: int = settings.email_log_flush_threshold,
+        batch_size: int = settings.email_log_batch_size,
+        max_buffer: int = settings.email_log_max_buffer,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.session_factory = session_factory
+        self.dropped = 0
+        self._buffer: list[EmailLogRecord] = []
+        # Guards _buffer between the SMTP thread and flushes
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task[None] | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def pending(self) -> int:
+        """Records buffered and not yet written."""
+        return len(self._buffer)
+
+    def add(self, record: EmailLogRecord) -> None:
+        """Buffer one record for the next flush."""
+        with self._lock:
+            self._buffer.append(record)
+            self._trim()
+            flush_due = len(self._buffer) >= self.flush_threshold
+        if flush_due:
+            self._schedule_flush()
+
+    def _trim(self) -> None:
+        excess = len(self._buffer) - self.max_buffer
+        if excess > 0:
+            del self._buffer[:excess]
+            self.dropped += excess
+            logger.warning(
+                "Email log buffer full, dropped oldest records",
+                extra={"dropped": excess},
+            )
+
+    async def flush(self) -> int:
+        """Write buffered records. Returns rows written."""
+        async with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+            try:
+                async with self.session_factory() as db:
+                    for start in range(0, len(batch), self.batch_size):
+                        await self._write(db, batch[start : start + self.batch_size])
+                    await db.commit()
+            except Exception:
+                # Keep the records for the next attempt, ahead of newer ones
+                with self._lock:
+                    self._buffer[:0] = batch
+                    self._trim()
+                raise
+            return len(batch)
+
+    async def _write(self, db: AsyncSession, records: list[EmailLogRecord]) -> None:
+        if db.get_bind().dialect.driver == "asyncpg":
+            conn = await db.connection()
+            raw = await conn.get_raw_connection()
+            driver = raw.driver_connection
+            assert driver is not None
+            await driver.copy_records_to_table(
+                EmailLog.__tablename__,
+                records=[astuple(record) for record in records],
+                columns=COLUMNS,
+            )
+            return
+        await db.execute(
+            insert(EmailLog).values(
+                [dict(zip(COLUMNS, astuple(record))) for record in records]
+            )
+        )
+
+    async def _flush_logged(self) -> None:
+        try:
+            await self.flush()
+        except Exception:
+            logger.error("Email log flush failed", exc_info=True)
+
+    def _schedule_flush(self) -> None:
+        try:
+            loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._loop is not None and loop is not self._loop:
+            # Added from another thread: flush on the loop that owns us
+            self._loop.call_soon_threadsafe(self._schedule_flush)
+            return
+        if loop is None:
+            return
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        self._flush_task = loop.create_task(
+            self._flush_logged(), name="email-log-flush"
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush_logged()
+
+    def start(self) -> None:
+        """Start flushing in the background."""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.create_task(self._run(), name="email-log-writer")
+
+    async def stop(self) -> None:
+        """Stop the background flush and write out what is buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flush_task is not None:
+            await self._flush_task
+            self._flush_task = None
+        await self._flush_logged()
+        self._loop = None
+
+
+def month_start(at: datetime | date) -> date:
+    """First day of the month containing ``at``."""
+    return date(at.year, at.month, 1)
+
+
+def next_month(month: date) -> date:
+    """First day of the month after ``month``."""
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Name of the email_logs partition holding ``month``."""
+    return f"{EmailLog.__tablename__}_p{month:%Y_%m}"
+
+
+def _is_postgresql(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+async def ensure_partitions(
+    db: AsyncSession, months_ahead: int, now: datetime | None = None
+) -> list[str]:
+    """Create this month's partition and ``months_ahead`` future ones."""
+    if not _is_postgresql(db):
+        return []
+    month = month_start(now or datetime.now(timezone.utc))
+    names = []
+    for _ in range(months_ahead + 1):
+        name = partition_name(month)
+        await db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} "
+                f"PARTITION OF {EmailLog.__tablename__} "
+                f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+                f"TO ('{next_month(month).isoformat()} 00:00:00+00')"
+            )
+        )
+        names.append(name)
+        month = next_month(month)
+    await db.commit()
+    return names
+
+
+async def drop_expired_partitions(
+    db: AsyncSession, retention_days: int, now: datetime | None = None
+) -> int:
+    """Drop monthly partitions entirely older than the retention window.
+
+    Returns the (estimated) number of rows removed.
+    """
+    if not _is_postgresql(db):
+        return 0
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+    prefix = f"{EmailLog.__tablename__}_p"
+    rows = 0
+    for name, estimate in await db.execute(
+        text(
+            "SELECT c.relname, c.reltuples::bigint FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:parent AS regclass)"
+        ),
+        {"parent": EmailLog.__tablename__},
+    ):
+        if not name.startswith(prefix):
+            continue  # the default partition
+        try:
+            month = datetime.strptime(name[len(prefix) :], "%Y_%m").date()
+        except ValueError:
+            continue
+        if datetime.combine(next_month(month), datetime.min.time(), timezone.utc) > (
+            cutoff
+        ):
+            continue
+        await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        rows += max(estimate, 0)
+        logger.info("Dropped email log partition", extra={"partition": name})
+    await db.commit()
+    return rows
+
+
+async def delete_expired_default(
+    db: AsyncSession, cutoff: datetime, batch_size: int, pause: float
+) -> int:
+    """Batch-delete expired rows that landed in the default partition.
+
+    Rows outside every monthly partition (e.g. received before the partition
+    for their month existed) are never dropped with a partition.
+    """
+    name = f"{EmailLog.__tablename__}_default"
+    deleted = 0
+    while True:
+        result = await db.execute(
+            text(
+                f"DELETE FROM {name} WHERE ctid = ANY(ARRAY("
+                f"SELECT ctid FROM {name} WHERE received_at < :cutoff "
+                "LIMIT :batch_size))"
+            ),
+            {"cutoff": cutoff, "batch_size": batch_size},
+        )
+        await db.commit()
+        count = result.rowcount or 0  # type: ignore[attr-defined]
+        deleted += count
+        if count < batch_size:
+            return deleted
+        if pause:
+            await asyncio.sleep(pause)
+
+
+async def cleanup_email_logs(db: AsyncSession, batch_size: int, pause: float) -> int:
+    """Apply email_logs retention; a cleanup task (see app/services/cleanup.py).
+
+    On PostgreSQL this drops whole expired partitions (and creates upcoming
+    ones) instead of deleting rows, plus batched deletes in the default
+    partition; elsewhere it falls back to batched deletes.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        days=settings.email_log_retention_days
+    )
+    if _is_postgresql(db):
+        await ensure_partitions(db, settings.email_log_partitions_ahead)
+        dropped = await drop_expired_partitions(db, settings.email_log_retention_days)
+        return dropped + await delete_expired_default(db, cutoff, batch_size, pause)
+    return await delete_in_batches(
+        db,
+        EmailLog.id,
+        EmailLog.received_at < cutoff,
+        batch_size=batch_size,
+        pause=pause,
+    )
+
+
+# Global email log writer instance
+email_log_writer = EmailLogWriter()
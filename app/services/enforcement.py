@@ -0,0 +1,318 @@
+"""Accept/hold/reject decisions for incoming mail (bandwidth-enforcement.md)."""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Literal
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.config.environments import PlanTier
+from app.db.session import AsyncSessionLocal
+from app.models.alias import Alias
+from app.models.bandwidth_usage import BandwidthUsage
+from app.models.destination import Destination
+from app.models.user import User
+from app.services.bandwidth import BandwidthAccountant, bandwidth_accountant
+from app.services.bandwidth import period_start as usage_period_start
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# Reason codes (X-QSM-Reason)
+BANDWIDTH_EXCEEDED = "bandwidth-exceeded"
+EMAILS_EXCEEDED = "emails-exceeded"
+OVERSIZE = "oversize"
+ALIAS_INACTIVE = "alias-inactive"
+NO_VERIFIED_DESTINATIONS = "no-verified-destinations"
+ALIAS_UNKNOWN = "alias-unknown"
+# Not a Decision reason: no snapshot is loaded yet, so callers defer
+NOT_READY = "enforcement-not-ready"
+
+# Overlap between incremental refreshes to tolerate clock skew and commits
+# that land just after a refresh started
+REFRESH_OVERLAP = timedelta(seconds=5)
+LOAD_CHUNK_SIZE = 1000
+
+Action = Literal["accept", "hold", "reject"]
+Mode = Literal["hold", "reject", "allow-with-flag"]
+
+
+@dataclass(frozen=True, slots=True)
+class Decision:
+    """What to do with a message for one recipient."""
+
+    action: Action
+    reason: str | None = None
+    user_id: int | None = None
+    alias_id: int | None = None
+
+    @property
+    def flagged(self) -> bool:
+        """Delivered despite a notable condition (``allow-with-flag``)."""
+        return self.action == "accept" and self.reason is not None
+
+
+@dataclass(slots=True)
+class _AliasEntry:
+    user_id: int
+    is_active: bool
+    alias_id: int | None = None
+
+
+@dataclass(slots=True)
+class _UserEntry:
+    limits: PlanTier
+    has_verified_destination: bool
+
+
+def _chunks(values: list[int]) -> Iterable[list[int]]:
+    for start in range(0, len(values), LOAD_CHUNK_SIZE):
+        yield values[start : start + LOAD_CHUNK_SIZE]
+
+
+class EnforcementEngine:
+    """Decide accept/hold/reject per recipient from an in-memory snapshot.
+
+    ``check`` is pure dictionary lookups plus the accountant's in-memory
+    usage, so it can run at RCPT or DATA time without any SQL. The snapshot
+    of aliases, plan limits and verified destinations is loaded once and
+    then refreshed incrementally from ``updated_at`` every
+    ``refresh_interval`` seconds; a full reload every
+    ``full_refresh_interval`` seconds picks up deleted rows. Changes made in
+    this process can be applied immediately with ``set_alias`` and
+    ``set_user``.
+    """
+
+    def __init__(
+        self,
+        accountant: BandwidthAccountant = bandwidth_accountant,
+        plan_tiers: dict[str, PlanTier] = settings.plan_tiers,
+        default_tier: str = settings.default_plan_tier,
+        mode: Mode = settings.enforcement_mode,
+        max_message_bytes: int = settings.max_message_bytes,
+        refresh_interval: float = settings.enforcement_refresh_interval,
+        full_refresh_interval: float = settings.enforcement_full_refresh_interval,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    ) -> None:
+        self.accountant = accountant
+        self.plan_tiers = plan_tiers
+        self.default_limits = plan_tiers[default_tier]
+        self.mode = mode
+        self.max_message_bytes = max_message_bytes
+        self.refresh_interval = refresh_interval
+        self.full_refresh_interval = full_refresh_interval
+        self.session_factory = session_factory
+        self._aliases: dict[str, _AliasEntry] = {}
+        self._users: dict[int, _UserEntry] = {}
+        self._refreshed_until: datetime | None = None
+        self._last_full_load: float | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether a snapshot has been loaded."""
+        return self._last_full_load is not None
+
+    def check(self, address: str, size: int = 0) -> Decision:
+        """Decide what to do with a ``size``-byte message to ``address``.
+
+        Pass ``size=0`` at RCPT time when the size is not known yet.
+        """
+        alias = self._aliases.get(address.lower())
+        if alias is None:
+            return Decision("reject", ALIAS_UNKNOWN)
+        if not alias.is_active:
+            return Decision("reject", ALIAS_INACTIVE, alias.user_id, alias.alias_id)
+
+        user = self._users.get(alias.user_id)
+        if user is None or not user.has_verified_destination:
+            return Decision(
+                "reject", NO_VERIFIED_DESTINATIONS, alias.user_id, alias.alias_id
+            )
+        if size > self.max_message_bytes:
+            return Decision("reject", OVERSIZE, alias.user_id, alias.alias_id)
+
+        usage = self.accountant.current_usage(
+            alias.user_id
+        ) or self.accountant.unflushed_usage(alias.user_id)
+        if usage.bytes_used + size > user.limits.bytes_per_month:
+            return self._over_limit(BANDWIDTH_EXCEEDED, alias)
+        if usage.emails_received >= user.limits.emails_per_month:
+            return self._over_limit(EMAILS_EXCEEDED, alias)
+        return Decision("accept", None, alias.user_id, alias.alias_id)
+
+    def _over_limit(self, reason: str, alias: _AliasEntry) -> Decision:
+        if self.mode == "allow-with-flag":
+            return Decision("accept", reason, alias.user_id, alias.alias_id)
+        return Decision(self.mode, reason, alias.user_id, alias.alias_id)
+
+    def spam_filter_included(self, address: str) -> bool:
+        """Whether the alias owner's plan includes spam filtering."""
+        alias = self._aliases.get(address.lower())
+        user = self._users.get(alias.user_id) if alias is not None else None
+        return user is not None and user.limits.spam_filter_included
+
+    def record_received(self, address: str, size: int) -> None:
+        """Count a received message against the alias owner's usage."""
+        alias = self._aliases.get(address.lower())
+        if alias is not None:
+            self.accountant.record_received(alias.user_id, size)
+
+    def record_forwarded(self, address: str) -> None:
+        """Count a successful forward against the alias owner's usage."""
+        alias = self._aliases.get(address.lower())
+        if alias is not None:
+            self.accountant.record_forwarded(alias.user_id)
+
+    def set_alias(
+        self,
+        address: str,
+        user_id: int,
+        is_active: bool,
+        alias_id: int | None = None,
+    ) -> None:
+        """Apply an alias change made in this process."""
+        self._aliases[address.lower()] = _AliasEntry(user_id, is_active, alias_id)
+
+    def remove_alias(self, address: str) -> None:
+        """Forget a deleted alias."""
+        self._aliases.pop(address.lower(), None)
+
+    def set_user(
+        self, user_id: int, plan_tier: str, has_verified_destination: bool
+    ) -> None:
+        """Apply a plan or destination change made in this process."""
+        self._users[user_id] = _UserEntry(
+            self.plan_tiers.get(plan_tier, self.default_limits),
+            has_verified_destination,
+        )
+
+    async def load(self, db: AsyncSession) -> None:
+        """Replace the snapshot with a full load."""
+        started = datetime.now(timezone.utc)
+        aliases = {
+            f"{name}@{domain}".lower(): _AliasEntry(user_id, is_active, alias_id)
+            for alias_id, name, domain, user_id, is_active in await db.execute(
+                select(
+                    Alias.id, Alias.name, Alias.domain, Alias.user_id, Alias.is_active
+                )
+            )
+        }
+        verified = set(
+            await db.scalars(
+                select(Destination.user_id)
+                .where(Destination.verified_at.is_not(None))
+                .distinct()
+            )
+        )
+        users = {
+            user_id: _UserEntry(
+                self.plan_tiers.get(plan_tier, self.default_limits),
+                user_id in verified,
+            )
+            for user_id, plan_tier in await db.execute(select(User.id, User.plan_tier))
+        }
+        for chunk in _chunks(list(users)):
+            await self.accountant.load_base(db, chunk)
+
+        self._aliases, self._users = aliases, users
+        self._refreshed_until = started
+        self._last_full_load = time.monotonic()
+        logger.info(
+            "Enforcement snapshot loaded",
+            extra={"aliases": len(aliases), "users": len(users)},
+        )
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Apply rows changed since the last load or refresh."""
+        if self._refreshed_until is None:
+            await self.load(db)
+            return
+        started = datetime.now(timezone.utc)
+        since = self._refreshed_until - REFRESH_OVERLAP
+
+        for alias_id, name, domain, user_id, is_active in await db.execute(
+            select(
+                Alias.id, Alias.name, Alias.domain, Alias.user_id, Alias.is_active
+            ).where(Alias.updated_at >= since)
+        ):
+            self.set_alias(f"{name}@{domain}", user_id, is_active, alias_id)
+
+        changed_users: dict[int, str] = {}
+        for query in (
+            select(User.id, User.plan_tier).where(User.updated_at >= since),
+            select(User.id, User.plan_tier)
+            .join(Destination, Destination.user_id == User.id)
+            .where(Destination.updated_at >= since)
+            .distinct(),
+        ):
+            for user_id, plan_tier in await db.execute(query):
+                changed_users[user_id] = plan_tier
+        for chunk in _chunks(list(changed_users)):
+            verified = set(
+                await db.scalars(
+                    select(Destination.user_id)
+                    .where(
+                        Destination.user_id.in_(chunk),
+                        Destination.verified_at.is_not(None),
+                    )
+                    .distinct()
+                )
+            )
+            for user_id in chunk:
+                self.set_user(user_id, changed_users[user_id], user_id in verified)
+
+        # Usage flushed by other processes
+        flushed = list(
+            await db.scalars(
+                select(BandwidthUsage.user_id).where(
+                    BandwidthUsage.period_start == usage_period_start(),
+                    BandwidthUsage.updated_at >= since,
+                )
+            )
+        )
+        for chunk in _chunks(flushed):
+            await self.accountant.load_base(db, chunk)
+
+        self._refreshed_until = started
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with self.session_factory() as db:
+                    if (
+                        self._last_full_load is None
+                        or time.monotonic() - self._last_full_load
+                        > self.full_refresh_interval
+                    ):
+                        await self.load(db)
+                    else:
+                        await self.refresh(db)
+            except Exception:
+                logger.error("Enforcement snapshot refresh failed", exc_info=True)
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        """Load the snapshot and keep it fresh in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="enforcement-snapshot")
+
+    async def stop(self) -> None:
+        """Stop refreshing the snapshot."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Global enforcement engine instance
+enforcement_engine = EnforcementEngine()
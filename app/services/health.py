@@ -0,0 +1,207 @@
+"""Background health monitor serving cached dependency checks."""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+Probe = Callable[[], Awaitable[tuple[bool, str]]]
+
+
+@dataclass(frozen=True)
+class CheckResult:
+    """Outcome of a single dependency probe."""
+
+    healthy: bool
+    details: str
+    response_time: float
+    checked_at: float
+    critical: bool = True
+
+    def age(self, now: float | None = None) -> float:
+        """Seconds since the probe completed."""
+        return (now if now is not None else time.time()) - self.checked_at
+
+    def to_dict(self, stale_after: float | None = None) -> dict[str, Any]:
+        """Render the result for health endpoint responses."""
+        age = self.age()
+        stale = stale_after is not None and age > stale_after
+        if self.healthy and not stale:
+            status = "pass"
+        else:
+            status = "fail" if self.critical else "warn"
+
+        return {
+            "status": status,
+            "details": f"stale: {self.details}" if stale else self.details,
+            "response_time_ms": round(self.response_time * 1000, 2),
+            "checked_at": datetime.fromtimestamp(
+                self.checked_at, timezone.utc
+            ).isoformat(),
+            "age_seconds": round(age, 2),
+        }
+
+
+async def check_database() -> tuple[bool, str]:
+    """Check database connectivity."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(text("SELECT 1"))
+        row = result.fetchone()
+        if row is None or row[0] != 1:
+            return False, "unexpected response"
+        return True, "connected"
+
+
+async def check_migrations() -> tuple[bool, str]:
+    """Check if database migrations have been applied."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text(
+                "SELECT version_num FROM alembic_version "
+                + "ORDER BY version_num DESC LIMIT 1"
+            )
+        )
+        version = result.fetchone()
+        if version:
+            return True, f"current: {version[0]}"
+        return False, "no migrations applied"
+
+
+async def check_smtp_relay() -> tuple[bool, str]:
+    """Check that the SMTP relay accepts TCP connections."""
+    reader, writer = await asyncio.open_connection(
+        settings.relay_host, settings.relay_port
+    )
+    try:
+        banner = await reader.readline()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+    if not banner.startswith(b"220"):
+        return False, f"unexpected banner: {banner[:64]!r}"
+    return True, "reachable"
+
+
+class HealthMonitor:
+    """Probe dependencies on an interval and serve the cached results.
+
+    Health endpoints read from the cache, so orchestrator probes cost O(1)
+    and never take a connection from the (small) database pool. Migrations
+    are checked at startup, since they only change on deploy, and then
+    every interval only while that check is failing (e.g. the database was
+    down at startup).
+    """
+
+    def __init__(
+        self,
+        interval: float = settings.health_check_interval,
+        timeout: float = settings.health_check_timeout,
+        stale_after: float = settings.health_check_stale_after,
+    ) -> None:
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self._probes: dict[str, tuple[Probe, bool]] = {}
+        self._results: dict[str, CheckResult] = {}
+        self._migrations: CheckResult | None = None
+        self._refresh_lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    def register(self, name: str, probe: Probe, critical: bool = True) -> None:
+        """Register a periodic probe. Non-critical failures only warn."""
+        self._probes[name] = (probe, critical)
+
+    async def _run_probe(self, probe: Probe, critical: bool) -> CheckResult:
+        start_time = time.perf_counter()
+        try:
+            healthy, details = await asyncio.wait_for(probe(), self.timeout)
+        except asyncio.TimeoutError:
+            healthy, details = False, f"timeout after {self.timeout}s"
+        except Exception as e:
+            healthy, details = False, f"error: {str(e)}"
+
+        return CheckResult(
+            healthy=healthy,
+            details=details,
+            response_time=time.perf_counter() - start_time,
+            checked_at=time.time(),
+            critical=critical,
+        )
+
+    async def refresh(self) -> None:
+        """Run every registered probe concurrently and update the cache."""
+        async with self._refresh_lock:
+            names = list(self._probes)
+            results = await asyncio.gather(
+                *(self._run_probe(*self._probes[name]) for name in names)
+            )
+            for name, result in zip(names, results):
+                if not result.healthy:
+                    logger.warning(
+                        f"Health probe '{name}' failed: {result.details}",
+                        extra={"check": name, "critical": result.critical},
+                    )
+                self._results[name] = result
+
+    async def refresh_migrations(self) -> CheckResult:
+        """Check migration state and cache it until the next call."""
+        self._migrations = await self._run_probe(check_migrations, True)
+        return self._migrations
+
+    async def get_results(self) -> dict[str, CheckResult]:
+        """Return cached probe results, probing once if nothing is cached yet."""
+        if not self._results and self._probes:
+            await self.refresh()
+        return dict(self._results)
+
+    async def get_migrations(self) -> CheckResult:
+        """Return the cached migration check, probing once if absent."""
+        if self._migrations is None:
+            return await self.refresh_migrations()
+        return self._migrations
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+                if self._migrations is None or not self._migrations.healthy:
+                    await self.refresh_migrations()
+            except Exception:
+                logger.error("Health monitor refresh failed", exc_info=True)
+
+    async def start(self) -> None:
+        """Prime the cache and start the background probe loop."""
+        if self._task is not None:
+            return
+        await asyncio.gather(self.refresh(), self.refresh_migrations())
+        self._task = asyncio.create_task(self._run(), name="health-monitor")
+
+    async def stop(self) -> None:
+        """Stop the background probe loop."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Global health monitor instance
+health_monitor = HealthMonitor()
+health_monitor.register("database", check_database)
+if settings.health_check_smtp:
+    health_monitor.register("smtp", check_smtp_relay, critical=False)
@@ -0,0 +1,550 @@
+"""Inbound provider webhooks: durable spool and payload adapters.
+
+Shared-hosting deployments receive mail from Cloudflare Email Routing or
+Postmark inbound webhooks instead of SMTP (provider-selection.md). The API
+streams each request body into an on-disk spool and answers as soon as it is
+durable; server.py drains the spool into the same handler as SMTP mail.
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.message import EmailMessage
+from email.utils import getaddresses
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    BinaryIO,
+    Callable,
+    Mapping,
+)
+
+from app.config import get_settings
+from app.exceptions import (
+    PayloadTooLargeError,
+    ServiceUnavailableError,
+    UnauthorizedError,
+    ValidationError,
+)
+from app.services.pipeline import BytesContent, Content, FileContent
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+CLOUDFLARE = "cloudflare"
+POSTMARK = "postmark"
+
+BODY = ".body"
+META = ".json"
+
+# Postmark sends JSON with base64 attachments and both text and HTML parts,
+# so its bodies are allowed to be this much larger than a raw message
+POSTMARK_OVERHEAD = 2
+# Seconds providers are asked to wait when every receive slot is busy
+RETRY_AFTER = 5
+# Headers rebuilt from Postmark's own fields or by EmailMessage
+_POSTMARK_SKIP_HEADERS = {
+    "from",
+    "to",
+    "cc",
+    "subject",
+    "date",
+    "mime-version",
+    "content-type",
+    "content-transfer-encoding",
+}
+
+
+class InboundDeferred(Exception):
+    """Raised by a consumer callback to retry the entry later (a 4xx)."""
+
+
+@dataclass(frozen=True, slots=True)
+class InboundMessage:
+    """A received message, normalized from the provider's payload."""
+
+    id: str
+    provider: str
+    mail_from: str | None
+    rcpt_tos: list[str]
+    content: Content
+
+
+def _fsync_dir(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SpoolWriter:
+    """Stream one request body into the spool.
+
+    Chunks are collected in memory up to the spool's ``write_buffer`` and
+    written from a worker thread, so neither a large body nor a slow disk
+    blocks the event loop. Nothing is visible to consumers until
+    ``commit``; leaving the ``async with`` block without committing removes
+    the partial file.
+    """
+
+    def __init__(self, spool: "InboundSpool", max_bytes: int) -> None:
+        self.spool = spool
+        self.max_bytes = max_bytes
+        # Sortable by arrival, so consumers take entries in order
+        self.id = f"{time.time_ns():020d}-{secrets.token_hex(4)}"
+        self.size = 0
+        self._path = spool.tmp / f"{self.id}{BODY}"
+        self._file: BinaryIO | None = None
+        self._buffer = bytearray()
+        self._committed = False
+
+    async def __aenter__(self) -> "SpoolWriter":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        if not self._committed:
+            await asyncio.to_thread(self._discard)
+
+    async def write(self, chunk: bytes) -> None:
+        """Append a chunk of the body."""
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise PayloadTooLargeError(details={"max_bytes": self.max_bytes})
+        self._buffer += chunk
+        if len(self._buffer) >= self.spool.write_buffer:
+            data, self._buffer = bytes(self._buffer), bytearray()
+            await asyncio.to_thread(self._write, data)
+
+    async def commit(self, meta: dict[str, Any]) -> str:
+        """Make the entry durable and visible to consumers. Returns its id."""
+        data, self._buffer = bytes(self._buffer), bytearray()
+        await asyncio.to_thread(self._commit, data, meta)
+        self._committed = True
+        return self.id
+
+    def _write(self, data: bytes) -> None:
+        if self._file is None:
+            self._file = open(self._path, "wb")
+        self._file.write(data)
+
+    def _commit(self, data: bytes, meta: dict[str, Any]) -> None:
+        self._write(data)
+        assert self._file is not None
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+        meta_path = self.spool.tmp / f"{self.id}{META}"
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self._path, self.spool.new / self._path.name)
+        # The metadata rename is the commit point
+        os.replace(meta_path, self.spool.new / meta_path.name)
+        _fsync_dir(self.spool.new)
+
+    def _discard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._path.unlink(missing_ok=True)
+
+
+class InboundSpool:
+    """Durable on-disk queue between the receiver endpoints and server.py.
+
+    Maildir-style: bodies stream into ``tmp/``, and an entry appears in
+    ``new/`` once its body and metadata are fsynced and the metadata file
+    is renamed there. Consumers claim an entry by renaming it into ``cur/``,
+    so several processes can share one spool, and delete it once processed;
+    entries that fail are moved to ``failed/`` for inspection. A claim is a
+    lease: the claim time is kept as the metadata file's mtime, and entries
+    still in ``cur/`` once it has expired are taken to belong to a consumer
+    that died.
+    """
+
+    def __init__(
+        self,
+        directory: str = settings.inbound_spool_dir,
+        write_buffer: int = settings.inbound_write_buffer,
+    ) -> None:
+        self.root = Path(directory)
+        self.tmp = self.root / "tmp"
+        self.new = self.root / "new"
+        self.cur = self.root / "cur"
+        self.failed = self.root / "failed"
+        self.write_buffer = write_buffer
+        self._ready = False
+
+    def _ensure_dirs(self) -> None:
+        if not self._ready:
+            for path in (self.tmp, self.new, self.cur, self.failed):
+                path.mkdir(parents=True, exist_ok=True)
+            self._ready = True
+
+    def writer(self, max_bytes: int) -> SpoolWriter:
+        """Start a new entry."""
+        self._ensure_dirs()
+        return SpoolWriter(self, max_bytes)
+
+    def pending(self) -> int:
+        """Committed entries not yet claimed."""
+        self._ensure_dirs()
+        return sum(1 for name in os.listdir(self.new) if name.endswith(META))
+
+    def claim(self, limit: int) -> list[str]:
+        """Claim up to ``limit`` of the oldest entries. Returns their ids."""
+        self._ensure_dirs()
+        names = sorted(name for name in os.listdir(self.new) if name.endswith(META))
+        claimed: list[str] = []
+        for name in names:
+            if len(claimed) >= limit:
+                break
+            entry_id = name[: -len(META)]
+            try:
+                os.replace(self.new / name, self.cur / name)
+            except FileNotFoundError:
+                continue  # taken by another consumer
+            os.replace(self.new / f"{entry_id}{BODY}", self.cur / f"{entry_id}{BODY}")
+            # Renames keep the mtime; start the lease
+            os.utime(self.cur / name)
+            claimed.append(entry_id)
+        return claimed
+
+    def release(self, entry_id: str) -> None:
+        """Return a claimed entry to ``new/`` so it is claimed again."""
+        # Body first, so an entry is never visible without its body
+        body = self.cur / f"{entry_id}{BODY}"
+        if body.exists():
+            os.replace(body, self.new / body.name)
+        os.replace(self.cur / f"{entry_id}{META}", self.new / f"{entry_id}{META}")
+
+    def recover(self, lease: float) -> int:
+        """Return entries claimed more than ``lease`` seconds ago to ``new/``.
+
+        Younger claims may belong to a live consumer and are left alone.
+        """
+        self._ensure_dirs()
+        expired = time.time() - lease
+        count = 0
+        for name in os.listdir(self.cur):
+            if not name.endswith(META):
+                continue
+            try:
+                if os.stat(self.cur / name).st_mtime > expired:
+                    continue
+                self.release(name[: -len(META)])
+            except FileNotFoundError:
+                continue  # finished or recovered meanwhile
+            count += 1
+        return count
+
+    def load(self, entry_id: str) -> InboundMessage:
+        """Read and normalize a claimed entry."""
+        meta = json.loads((self.cur / f"{entry_id}{META}").read_text())
+        return normalize(entry_id, meta, FileContent(self.cur / f"{entry_id}{BODY}"))
+
+    def remove(self, entry_id: str) -> None:
+        """Delete a processed entry."""
+        for suffix in (META, BODY):
+            (self.cur / f"{entry_id}{suffix}").unlink(missing_ok=True)
+
+    def fail(self, entry_id: str) -> None:
+        """Set aside an entry that could not be processed."""
+        for suffix in (META, BODY):
+            path = self.cur / f"{entry_id}{suffix}"
+            if path.exists():
+                os.replace(path, self.failed / path.name)
+
+
+def normalize(entry_id: str, meta: dict[str, Any], body: Content) -> InboundMessage:
+    """Turn a spooled provider payload into an InboundMessage.
+
+    Raw messages (Cloudflare) keep pointing at the spooled body; Postmark
+    JSON is parsed and the message built in memory.
+    """
+    provider = meta["provider"]
+    if provider == POSTMARK:
+        return _from_postmark(entry_id, json.loads(body.read()))
+    return InboundMessage(
+        id=entry_id,
+        provider=provider,
+        mail_from=meta.get("mail_from"),
+        rcpt_tos=list(meta.get("rcpt_tos", [])),
+        content=body,
+    )
+
+
+def _from_postmark(entry_id: str, payload: dict[str, Any]) -> InboundMessage:
+    mail_from = (payload.get("FromFull") or {}).get("Email") or payload.get("From")
+    recipient = payload.get("OriginalRecipient")
+    if recipient:
+        rcpt_tos = [recipient]
+    else:
+        rcpt_tos = [a for _, a in getaddresses([payload.get("To") or ""]) if a]
+    raw = payload.get("RawEmail")
+    content = raw.encode() if raw else _postmark_message(payload)
+    return InboundMessage(
+        entry_id, POSTMARK, mail_from, rcpt_tos, BytesContent(content)
+    )
+
+
+def _postmark_message(payload: dict[str, Any]) -> bytes:
+    # Rebuild the message from Postmark's parsed fields (used when the
+    # webhook is not configured to include the raw source)
+    msg = EmailMessage()
+    for name in ("From", "To", "Cc", "Subject", "Date"):
+        if payload.get(name):
+            msg[name] = payload[name]
+    for header in payload.get("Headers") or []:
+        if header.get("Name", "").lower() not in _POSTMARK_SKIP_HEADERS:
+            msg[header["Name"]] = header.get("Value", "")
+
+    text, html = payload.get("TextBody"), payload.get("HtmlBody")
+    if text:
+        msg.set_content(text)
+        if html:
+            msg.add_alternative(html, subtype="html")
+    elif html:
+        msg.set_content(html, subtype="html")
+    for attachment in payload.get("Attachments") or []:
+        maintype, _, subtype = (
+            attachment.get("ContentType") or "application/octet-stream"
+        ).partition("/")
+        msg.add_attachment(
+            base64.b64decode(attachment.get("Content") or ""),
+            maintype=maintype,
+            subtype=subtype or "octet-stream",
+            filename=attachment.get("Name"),
+        )
+    return msg.as_bytes()
+
+
+class InboundReceiver:
+    """Verify provider webhook requests and stream their bodies to the spool.
+
+    At most ``max_concurrent`` bodies are received at once; beyond that
+    requests get a 503 with Retry-After straight away, which providers
+    treat as "retry later", so a retry burst cannot pile up open requests.
+    """
+
+    def __init__(
+        self,
+        spool: InboundSpool | None = None,
+        max_bytes: int = settings.max_message_bytes,
+        max_concurrent: int = settings.inbound_max_concurrent,
+        verify_signatures: bool = settings.inbound_verify_signatures,
+        cloudflare_secret: str = settings.cloudflare_inbound_secret,
+        postmark_user: str = settings.postmark_inbound_user,
+        postmark_password: str = settings.postmark_inbound_password,
+    ) -> None:
+        self.spool = spool or InboundSpool()
+        self.max_bytes = max_bytes
+        self.max_concurrent = max_concurrent
+        self.verify_signatures = verify_signatures
+        self.cloudflare_secret = cloudflare_secret
+        self.postmark_user = postmark_user
+        self.postmark_password = postmark_password
+        self.active = 0
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        if self.active >= self.max_concurrent:
+            raise ServiceUnavailableError(
+                "Inbound queue busy", details={"retry_after": RETRY_AFTER}
+            )
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+
+    async def receive_cloudflare(
+        self, headers: Mapping[str, str], body: AsyncIterable[bytes]
+    ) -> str:
+        """Spool a raw message from the Email Worker. Returns the entry id.
+
+        The Worker sends the envelope in X-QSM-Mail-From / X-QSM-Rcpt-To
+        (comma-separated) and signs the body with the shared secret in
+        X-QSM-Signature (hex HMAC-SHA256), like our outgoing webhooks.
+        """
+        rcpt_tos = [
+            rcpt.strip()
+            for rcpt in headers.get("x-qsm-rcpt-to", "").split(",")
+            if rcpt.strip()
+        ]
+        if not rcpt_tos:
+            raise ValidationError("Missing X-QSM-Rcpt-To header")
+        if self.verify_signatures and not self.cloudflare_secret:
+            raise UnauthorizedError("Inbound signature secret not configured")
+
+        digest = hmac.new(self.cloudflare_secret.encode(), digestmod=hashlib.sha256)
+        async with self._slot(), self.spool.writer(self.max_bytes) as writer:
+            async for chunk in body:
+                digest.update(chunk)
+                await writer.write(chunk)
+            if self.verify_signatures and not hmac.compare_digest(
+                digest.hexdigest(), headers.get("x-qsm-signature", "")
+            ):
+                raise UnauthorizedError("Invalid signature", "INVALID_SIGNATURE")
+            return await writer.commit(
+                {
+                    "provider": CLOUDFLARE,
+                    "mail_from": headers.get("x-qsm-mail-from"),
+                    "rcpt_tos": rcpt_tos,
+                    "received_at": datetime.now(timezone.utc).isoformat(),
+                }
+            )
+
+    async def receive_postmark(
+        self, headers: Mapping[str, str], body: AsyncIterable[bytes]
+    ) -> str:
+        """Spool a Postmark inbound JSON payload. Returns the entry id.
+
+        Postmark authenticates with basic auth credentials in the webhook
+        URL, checked before the body is read. The JSON is parsed later, by
+        the consumer.
+        """
+        if self.verify_signatures and not self._postmark_auth_ok(
+            headers.get("authorization", "")
+        ):
+            raise UnauthorizedError("Invalid credentials", "INVALID_SIGNATURE")
+
+        async with (
+            self._slot(),
+            self.spool.writer(self.max_bytes * POSTMARK_OVERHEAD) as writer,
+        ):
+            async for chunk in body:
+                await writer.write(chunk)
+            return await writer.commit(
+                {
+                    "provider": POSTMARK,
+                    "received_at": datetime.now(timezone.utc).isoformat(),
+                }
+            )
+
+    def _postmark_auth_ok(self, authorization: str) -> bool:
+        if not self.postmark_user or not authorization.startswith("Basic "):
+            return False
+        try:
+            decoded = base64.b64decode(authorization[6:], validate=True).decode()
+        except (binascii.Error, UnicodeDecodeError):
+            return False
+        user, _, password = decoded.partition(":")
+        # Evaluate both so timing does not reveal which one was wrong
+        user_ok = hmac.compare_digest(user, self.postmark_user)
+        password_ok = hmac.compare_digest(password, self.postmark_password)
+        return user_ok and password_ok
+
+
+class InboundConsumer:
+    """Feed spooled messages to a processing callback (runs in server.py).
+
+    Up to ``workers`` messages are processed at once. Processed entries are
+    deleted; entries whose processing raises are moved to ``failed/``,
+    except on InboundDeferred, which returns them to the spool to be tried
+    again on a later scan.
+    Entries left claimed by a consumer that stopped are picked up again once
+    their ``lease`` has expired, so delivery is at-least-once; the lease must
+    be longer than processing one message can take.
+    """
+
+    def __init__(
+        self,
+        handle: Callable[[InboundMessage], Awaitable[None]],
+        spool: InboundSpool | None = None,
+        poll_interval: float = settings.inbound_poll_interval,
+        workers: int = settings.inbound_workers,
+        lease: float = settings.inbound_claim_lease,
+    ) -> None:
+        self.handle = handle
+        self.spool = spool or InboundSpool()
+        self.poll_interval = poll_interval
+        self.workers = workers
+        self.lease = lease
+        self._semaphore = asyncio.Semaphore(workers)
+        self._task: asyncio.Task[None] | None = None
+
+    async def _process(self, entry_id: str) -> bool:
+        # False if the entry was deferred
+        async with self._semaphore:
+            try:
+                message = await asyncio.to_thread(self.spool.load, entry_id)
+                await self.handle(message)
+            except InboundDeferred as exc:
+                logger.info(
+                    "Inbound message deferred",
+                    extra={"entry_id": entry_id, "reason": str(exc)},
+                )
+                await asyncio.to_thread(self.spool.release, entry_id)
+                return False
+            except Exception:
+                logger.error(
+                    "Inbound message failed",
+                    exc_info=True,
+                    extra={"entry_id": entry_id},
+                )
+                await asyncio.to_thread(self.spool.fail, entry_id)
+                return True
+            await asyncio.to_thread(self.spool.remove, entry_id)
+            return True
+
+    async def run_once(self) -> int:
+        """Process a batch of spooled messages. Returns how many, not deferred.
+
+        Deferred entries do not count, so a batch that is only deferred
+        waits ``poll_interval`` before they are tried again.
+        """
+        recovered = await asyncio.to_thread(self.spool.recover, self.lease)
+        if recovered:
+            logger.info("Recovered inbound messages", extra={"recovered": recovered})
+        entries = await asyncio.to_thread(self.spool.claim, self.workers * 4)
+        done = await asyncio.gather(*(self._process(entry_id) for entry_id in entries))
+        return sum(done)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.run_once()
+            except Exception:
+                logger.error("Inbound spool scan failed", exc_info=True)
+                processed = 0
+            if not processed:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        """Start consuming in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="inbound-consumer")
+
+    async def stop(self) -> None:
+        """Stop consuming; claimed entries are recovered once their lease ends."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Global inbound spool and receiver instances
+inbound_spool = InboundSpool()
+inbound_receiver = InboundReceiver(inbound_spool)
@@ -1,18 +1,31 @@
 import hashlib
 import secrets
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from sqlalchemy import delete, select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
+from app.db.batch import delete_in_batches
+from app.db.upsert import dialect_insert
 from app.models.magic_link_token import MagicLinkToken
 from app.models.user import User
+from app.services.session import session_service
 
 settings = get_settings()
 
 
+@dataclass(frozen=True)
+class MagicLinkLogin:
+    """Result of a successful magic link login."""
+
+    user_id: int
+    email: str
+    signed_token: str
+
+
 class MagicLinkService:
     """Service for managing magic link authentication."""
 
@@ -30,48 +43,112 @@ class MagicLinkService:
         token = secrets.token_urlsafe(32)
         token_hash = self._hash_token(token)
 
-        # Clean up any existing tokens for this email
-        await db.execute(delete(MagicLinkToken).where(MagicLinkToken.email == email))
-
-        # Create new token
-        magic_token = MagicLinkToken(
+        # Replace any previous token for this email in a single statement
+        # rather than DELETE + INSERT, which churns rows and index entries
+        insert = dialect_insert(db, MagicLinkToken).values(
             email=email,
             token_hash=token_hash,
             expires_at=datetime.now(timezone.utc)
             + timedelta(seconds=settings.magic_link_ttl),
         )
-
-        db.add(magic_token)
+        await db.execute(
+            insert.on_conflict_do_update(
+                index_elements=[MagicLinkToken.email],
+                set_={
+                    "token_hash": insert.excluded.token_hash,
+                    "expires_at": insert.excluded.expires_at,
+                    "used_at": None,
+                    "created_at": func.now(),
+                    "updated_at": func.now(),
+                },
+            )
+        )
         await db.commit()
 
         return token
 
-    async def verify_magic_link(
+    async def consume_magic_link(
         self,
         db: AsyncSession,
         token: str,
     ) -> Optional[str]:
-        """Verify a magic link token and return the email if valid."""
-        token_hash = self._hash_token(token)
-
-        # Find valid token
-        result = await db.execute(
-            select(MagicLinkToken).where(
-                MagicLinkToken.token_hash == token_hash,
-                MagicLinkToken.expires_at > datetime.now(timezone.utc),
+        """Mark a valid token as used and return its email, without committing.
+
+        The check and the update are one ``UPDATE ... RETURNING`` statement,
+        so a token can only ever be consumed once.
+        """
+        now = datetime.now(timezone.utc)
+        email: Optional[str] = await db.scalar(
+            update(MagicLinkToken)
+            .where(
+                MagicLinkToken.token_hash == self._hash_token(token),
+                MagicLinkToken.expires_at > now,
                 MagicLinkToken.used_at.is_(None),
             )
+            .values(used_at=now)
+            .returning(MagicLinkToken.email)
+            .execution_options(synchronize_session=False)
         )
+        return email
 
-        magic_token = result.scalar_one_or_none()
-        if not magic_token:
-            return None
-
-        # Mark token as used
-        magic_token.used_at = datetime.now(timezone.utc)
+    async def verify_magic_link(
+        self,
+        db: AsyncSession,
+        token: str,
+    ) -> Optional[str]:
+        """Verify a magic link token and return the email if valid."""
+        email = await self.consume_magic_link(db, token)
         await db.commit()
+        return email
+
+    async def upsert_user(
+        self,
+        db: AsyncSession,
+        email: str,
+    ) -> int:
+        """Create the user if missing and return its id, without committing.
+
+        Existing users get ``updated_at`` bumped, which doubles as the last
+        login time.
+        """
+        insert = dialect_insert(db, User).values(email=email)
+        user_id = await db.scalar(
+            insert.on_conflict_do_update(
+                index_elements=[User.email],
+                set_={"updated_at": func.now()},
+            ).returning(User.id)
+        )
+        assert user_id is not None
+        return user_id
+
+    async def login(
+        self,
+        db: AsyncSession,
+        token: str,
+        user_agent: Optional[str] = None,
+        ip_address: Optional[str] = None,
+    ) -> Optional[MagicLinkLogin]:
+        """Consume a token, provision the user and open a session atomically.
+
+        Three statements and a single commit, instead of a commit after each
+        step.
+        """
+        try:
+            email = await self.consume_magic_link(db, token)
+            if email is None:
+                await db.rollback()
+                return None
+
+            user_id = await self.upsert_user(db, email)
+            signed_token, _ = await session_service.add_session(
+                db, user_id, user_agent, ip_address, email
+            )
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
 
-        return magic_token.email
+        return MagicLinkLogin(user_id=user_id, email=email, signed_token=signed_token)
 
     async def get_or_create_user(
         self,
@@ -103,15 +180,20 @@ class MagicLinkService:
         result = await db.execute(select(User).where(User.email == email))
         return result.scalar_one_or_none()
 
-    async def cleanup_expired_tokens(self, db: AsyncSession) -> int:
-        """Remove expired magic link tokens."""
-        result = await db.execute(
-            delete(MagicLinkToken).where(
-                MagicLinkToken.expires_at <= datetime.now(timezone.utc)
-            )
+    async def cleanup_expired_tokens(
+        self,
+        db: AsyncSession,
+        batch_size: int = settings.cleanup_batch_size,
+        pause: float = settings.cleanup_batch_pause,
+    ) -> int:
+        """Remove expired magic link tokens in bounded batches."""
+        return await delete_in_batches(
+            db,
+            MagicLinkToken.id,
+            MagicLinkToken.expires_at <= datetime.now(timezone.utc),
+            batch_size=batch_size,
+            pause=pause,
         )
-        await db.commit()
-        return result.rowcount or 0  # type: ignore[attr-defined]
 
 
 # Global magic link service instance
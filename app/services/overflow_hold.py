@@ -0,0 +1,222 @@
+"""Release of Overflow Hold mail when usage periods roll over.
+
+Over-limit messages are kept encrypted in ``overflow_hold`` by the
+pipeline's retain stage (bandwidth-enforcement.md). Once a user's usage
+period has rolled over, their held messages are fed back through the
+pipeline, oldest first, so they are checked against the new period's
+limits like any new message. A month rollover can make a great many users
+due at once, so releases are paced to ``rate`` messages per second across
+all users, with at most ``concurrency`` in the pipeline at a time.
+
+Each released row is deleted once the pipeline has run, whatever the
+outcome: a message over the new period's limits is held again by the
+pipeline itself (with its original expiry), which also pauses that
+user's release until the next check. Delivery is at-least-once; a message being
+released when the process stops is released again on the next run.
+Expired rows are purged by the cleanup worker (cleanup_overflow_hold).
+"""
+
+import asyncio
+from datetime import datetime, time, timezone
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models.email_log import HELD
+from app.models.stored_email import HeldEmail
+from app.services.bandwidth import period_start
+from app.services.content_store import ContentStore, delete_unreferenced
+from app.services.pipeline import EncryptedContent, MailMessage
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+def current_period_start(at: datetime | None = None) -> datetime:
+    """When the usage period containing ``at`` began, as a UTC datetime."""
+    return datetime.combine(period_start(at), time(), tzinfo=timezone.utc)
+
+
+class HoldReleaser:
+    """Feed held messages of users whose period rolled over to the pipeline.
+
+    ``forward`` runs a message through the pipeline (Pipeline.run).
+    """
+
+    def __init__(
+        self,
+        forward: Callable[[MailMessage], Awaitable[MailMessage]],
+        store: ContentStore,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        rate: float = settings.hold_release_rate,
+        concurrency: int = settings.hold_release_concurrency,
+        batch_size: int = settings.hold_release_batch_size,
+        interval: float = settings.hold_release_interval,
+    ) -> None:
+        self.forward = forward
+        self.store = store
+        self.session_factory = session_factory
+        self.rate = rate
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.interval = interval
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._next_at = 0.0
+        self._task: asyncio.Task[None] | None = None
+
+    async def _pace(self) -> None:
+        # Evenly spaced start times, shared by every user being released
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start = max(self._next_at, now)
+        self._next_at = start + 1 / self.rate
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def _release_one(self, row: HeldEmail) -> str | None:
+        # The recipient's status after the pipeline, or None if it raised
+        async with self._semaphore:
+            message = MailMessage.create(
+                "hold",
+                row.from_address,
+                [row.recipient],
+                EncryptedContent(
+                    self.store, row.content_pointer, row.content_key_id, row.size_bytes
+                ),
+            )
+            message.received_at = row.received_at
+            try:
+                await self.forward(message)
+            except Exception:
+                logger.error(
+                    "Releasing held message failed",
+                    extra={"hold_id": row.id},
+                    exc_info=True,
+                )
+                return None
+            return message.recipients[0].status
+
+    async def release_user(self, user_id: int, before: datetime | None = None) -> int:
+        """Release ``user_id``'s mail held before ``before``. Returns how many.
+
+        ``before`` defaults to the start of the current period. Stops early
+        once a released message is held again; the rest wait for the next
+        check, which tries again with the oldest.
+        """
+        before = before or current_period_start()
+        released = 0
+        after: tuple[datetime, int] | None = None
+        while True:
+            async with self.session_factory() as db:
+                query = (
+                    select(HeldEmail)
+                    .where(HeldEmail.user_id == user_id, HeldEmail.held_at < before)
+                    .order_by(HeldEmail.held_at, HeldEmail.id)
+                    .limit(self.batch_size)
+                )
+                if after is not None:
+                    query = query.where(
+                        (HeldEmail.held_at > after[0])
+                        | ((HeldEmail.held_at == after[0]) & (HeldEmail.id > after[1]))
+                    )
+                rows = list(await db.scalars(query))
+            if not rows:
+                return released
+            after = (rows[-1].held_at, rows[-1].id)
+
+            held_again = False
+            done: list[HeldEmail] = []
+
+            async def release(row: HeldEmail) -> None:
+                nonlocal held_again
+                status = await self._release_one(row)
+                if status is not None:
+                    done.append(row)
+                held_again = held_again or status == HELD
+
+            tasks = []
+            for row in rows:
+                await self._pace()
+                if held_again:
+                    break
+                tasks.append(asyncio.create_task(release(row)))
+            await asyncio.gather(*tasks)
+
+            if done:
+                async with self.session_factory() as db:
+                    await db.execute(
+                        delete(HeldEmail).where(
+                            HeldEmail.id.in_([row.id for row in done])
+                        )
+                    )
+                    await db.commit()
+                    await delete_unreferenced(
+                        db, {row.content_pointer for row in done}, self.store
+                    )
+            released += len(done)
+            if held_again or len(rows) < self.batch_size:
+                return released
+
+    async def due_users(self) -> list[int]:
+        """Users with mail held in an earlier period than the current one."""
+        async with self.session_factory() as db:
+            return list(
+                await db.scalars(
+                    select(HeldEmail.user_id)
+                    .where(HeldEmail.held_at < current_period_start())
+                    .distinct()
+                )
+            )
+
+    async def run_once(self) -> int:
+        """Release the held mail of every due user. Returns messages released.
+
+        Up to ``concurrency`` users are released side by side, so one user
+        with a large backlog does not hold up the rest.
+        """
+        before = current_period_start()
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for user_id in await self.due_users():
+            queue.put_nowait(user_id)
+        users = queue.qsize()
+        released = 0
+
+        async def worker() -> None:
+            nonlocal released
+            while not queue.empty():
+                released += await self.release_user(queue.get_nowait(), before)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        if users:
+            logger.info(
+                "Released held mail", extra={"users": users, "released": released}
+            )
+        return released
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.error("Overflow Hold release failed", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Check for due users every ``interval`` seconds in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="hold-releaser")
+
+    async def stop(self) -> None:
+        """Stop releasing; unfinished releases are picked up on the next start."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,807 @@
+"""Message processing pipeline shared by SMTP and provider webhook ingest.
+
+Both ingest paths build a ``MailMessage`` (metadata plus a pointer to the
+raw content) and run it through the same stages:
+
+    validate -> enforce -> spam -> auth -> forward -> retain -> snapshot -> log
+    -> events
+
+Logging runs after forwarding so each recipient's email_logs row is
+written once, with its final status (see app/services/email_log.py).
+"""
+
+import asyncio
+import os
+import secrets
+import smtplib
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Iterator, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models.email_log import FAILED, FORWARDED, HELD, SPAM
+from app.models.stored_email import FailedEmail, HeldEmail, QuarantinedEmail
+from app.services.content_store import ContentStore, StoredContent
+from app.services.email_log import EmailLogRecord, EmailLogWriter, hash_subject
+from app.services.enforcement import (
+    BANDWIDTH_EXCEEDED,
+    EMAILS_EXCEEDED,
+    NOT_READY,
+    OVERSIZE,
+    Decision,
+    EnforcementEngine,
+)
+from app.services.sender_auth import SenderAuthenticator, SenderAuthResult
+from app.services.spam import SpamFilter, SpamVerdict
+from app.services.webhooks import WebhookDispatcher, WebhookEvent
+from app.utils.logging import get_logger
+from app.utils.mail_headers import (
+    HeaderFields,
+    header_end,
+    parse_headers,
+    rewrite_header_block,
+)
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# Recipient.status values besides the email_logs ones
+PENDING = "pending"
+REJECTED = "rejected"
+
+# Bytes read per step while looking for the end of the header block
+HEADER_READ_SIZE = 64 * 1024
+
+
+class Content(ABC):
+    """Pointer to a message's raw bytes, wherever they are kept."""
+
+    size: int
+
+    @abstractmethod
+    def read(self) -> bytes:
+        """The whole message."""
+
+    @abstractmethod
+    def header_block(self) -> bytes:
+        """The header block, up to and including the blank line after it."""
+
+    def chunks(self, size: int) -> Iterator[bytes]:
+        """The whole message in pieces of at most ``size`` bytes."""
+        data = self.read()
+        for start in range(0, len(data), size):
+            yield data[start : start + size]
+
+    async def aread(self) -> bytes:
+        """``read`` without blocking the event loop."""
+        return self.read()
+
+    async def aheader_block(self) -> bytes:
+        """``header_block`` without blocking the event loop."""
+        return self.header_block()
+
+
+class BytesContent(Content):
+    """Content already in memory (SMTP DATA)."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.size = len(data)
+
+    def read(self) -> bytes:
+        return self.data
+
+    def header_block(self) -> bytes:
+        end = header_end(self.data)
+        return self.data if end == -1 else self.data[:end]
+
+
+class FileContent(Content):
+    """Content in a file (the inbound spool); read only when needed."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.size = path.stat().st_size
+        self._header: bytes | None = None
+
+    def read(self) -> bytes:
+        return self.path.read_bytes()
+
+    def header_block(self) -> bytes:
+        # Kept after the first read; several stages look at the headers
+        if self._header is None:
+            self._header = self._read_header()
+        return self._header
+
+    def _read_header(self) -> bytes:
+        data = bytearray()
+        with open(self.path, "rb") as f:
+            while chunk := f.read(HEADER_READ_SIZE):
+                data += chunk
+                end = header_end(data)
+                if end != -1:
+                    return bytes(data[:end])
+        return bytes(data)
+
+    def chunks(self, size: int) -> Iterator[bytes]:
+        with open(self.path, "rb") as f:
+            while chunk := f.read(size):
+                yield chunk
+
+    async def aread(self) -> bytes:
+        return await asyncio.to_thread(self.read)
+
+    async def aheader_block(self) -> bytes:
+        if self._header is not None:
+            return self._header
+        return await asyncio.to_thread(self.header_block)
+
+
+class EncryptedContent(Content):
+    """Content in the encrypted content store (quarantine, failed mail).
+
+    Decrypted on the fly; the header block only decrypts the first chunks.
+    """
+
+    def __init__(self, store: ContentStore, pointer: str, key_id: str, size: int):
+        self.store = store
+        self.pointer = pointer
+        self.key_id = key_id
+        self.size = size
+
+    def read(self) -> bytes:
+        return self.store.read(self.pointer, self.key_id)
+
+    def header_block(self) -> bytes:
+        data = bytearray()
+        chunks = self.store.open(self.pointer, self.key_id)
+        try:
+            for chunk in chunks:
+                data += chunk
+                end = header_end(data)
+                if end != -1:
+                    return bytes(data[:end])
+        finally:
+            chunks.close()
+        return bytes(data)
+
+    def chunks(self, size: int) -> Iterator[bytes]:
+        # Decrypted in the store's chunk size, whatever ``size`` asks for
+        return self.store.open(self.pointer, self.key_id)
+
+    async def aread(self) -> bytes:
+        return await asyncio.to_thread(self.read)
+
+    async def aheader_block(self) -> bytes:
+        return await asyncio.to_thread(self.header_block)
+
+
+@dataclass(slots=True)
+class Recipient:
+    """One alias a message was sent to, and what happened to it."""
+
+    address: str
+    destination: str | None = None
+    decision: Decision | None = None
+    status: str = PENDING
+    reason: str | None = None
+    forwarded_at: datetime | None = None
+
+
+@dataclass(slots=True)
+class MailMessage:
+    """A message in the pipeline: metadata plus a pointer to its content."""
+
+    source: str
+    mail_from: str | None
+    recipients: list[Recipient]
+    content: Content
+    id: str = field(default_factory=lambda: secrets.token_hex(8))
+    received_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    headers: HeaderFields | None = None
+    subject_hash: str | None = None
+    spam: SpamVerdict | None = None
+    header_snapshot: StoredContent | None = None
+    # SMTP client address and HELO name; unknown for provider ingest
+    client_ip: str | None = None
+    helo: str | None = None
+    validation: SenderAuthResult | None = None
+    # SMTP reply for the transaction; provider ingest treats non-2xx as failed
+    reply: str = "250 OK"
+
+    @classmethod
+    def create(
+        cls,
+        source: str,
+        mail_from: str | None,
+        rcpt_tos: Sequence[str],
+        content: Content,
+        id: str | None = None,
+        client_ip: str | None = None,
+        helo: str | None = None,
+    ) -> "MailMessage":
+        message = cls(source, mail_from, [Recipient(r) for r in rcpt_tos], content)
+        if id is not None:
+            message.id = id
+        message.client_ip, message.helo = client_ip, helo
+        return message
+
+    @property
+    def size(self) -> int:
+        return self.content.size
+
+    def pending(self) -> list[Recipient]:
+        """Recipients no stage has settled yet."""
+        return [r for r in self.recipients if r.status == PENDING]
+
+
+class Stage(ABC):
+    """One pipeline step; subclasses implement ``process``.
+
+    Stages only settle recipients that are still pending, so a stage can be
+    benchmarked or tested on its own with a hand-built message.
+    """
+
+    name = "stage"
+
+    @abstractmethod
+    async def process(self, message: MailMessage) -> None:
+        """Settle (some of) the message's pending recipients."""
+
+
+class ValidateStage(Stage):
+    """Resolve each recipient's destination and read the header fields.
+
+    Only the header block is read and parsed (app/utils/mail_headers.py);
+    the body is left alone however large it is.
+    """
+
+    name = "validate"
+
+    def __init__(self, resolve: Callable[[str], str | None]) -> None:
+        self.resolve = resolve
+
+    async def process(self, message: MailMessage) -> None:
+        message.headers = parse_headers(await message.content.aheader_block())
+        message.subject_hash = hash_subject(message.headers.subject)
+        for rcpt in message.pending():
+            rcpt.destination = self.resolve(rcpt.address)
+            if rcpt.destination is None:
+                rcpt.status, rcpt.reason = REJECTED, "alias-unknown"
+
+
+class EnforceStage(Stage):
+    """Apply plan limits and count received usage (bandwidth-enforcement.md)."""
+
+    name = "enforce"
+
+    def __init__(self, enforcer: EnforcementEngine | None) -> None:
+        self.enforcer = enforcer
+
+    async def process(self, message: MailMessage) -> None:
+        if self.enforcer is None:
+            return
+        if not self.enforcer.ready:
+            # Nothing is known about any alias yet; have the sender retry
+            for rcpt in message.pending():
+                rcpt.status, rcpt.reason = REJECTED, NOT_READY
+            message.reply = "451 4.3.0 Alias lookup unavailable, try again later"
+            return
+        for rcpt in message.pending():
+            decision = self.enforcer.check(rcpt.address, message.size)
+            rcpt.decision = decision
+            if decision.action != "reject":
+                self.enforcer.record_received(rcpt.address, message.size)
+            if decision.action == "hold":
+                rcpt.status, rcpt.reason = HELD, decision.reason
+            elif decision.action == "reject":
+                rcpt.status, rcpt.reason = REJECTED, decision.reason
+
+
+class SpamStage(Stage):
+    """Score the headers and settle recipients as spam (spam-filtering-mvp.md).
+
+    With an enforcer, only recipients whose plan includes spam filtering are
+    checked; messages with none of those are not scored at all.
+    """
+
+    name = "spam"
+
+    def __init__(
+        self,
+        spam_filter: SpamFilter | None,
+        enforcer: EnforcementEngine | None = None,
+    ) -> None:
+        self.spam_filter = spam_filter
+        self.enforcer = enforcer
+
+    async def process(self, message: MailMessage) -> None:
+        if self.spam_filter is None:
+            return
+        filtered = [
+            rcpt
+            for rcpt in message.pending()
+            if self.enforcer is None or self.enforcer.spam_filter_included(rcpt.address)
+        ]
+        if not filtered:
+            return
+        verdict = self.spam_filter.score(
+            await message.content.aheader_block(),
+            message.mail_from,
+            len(message.recipients),
+        )
+        if not verdict.spam:
+            return
+        message.spam = verdict
+        reason = f"{verdict.reason} (score {verdict.score})"
+        for rcpt in filtered:
+            rcpt.status, rcpt.reason = SPAM, reason
+
+
+class SenderAuthStage(Stage):
+    """Check SPF, DKIM and DMARC (mail-validation-and-headers.md).
+
+    Log-only: the result is added to forwarded copies as X-QSM-Validation
+    and never settles a recipient. Messages nobody will receive are not
+    checked.
+    """
+
+    name = "auth"
+
+    def __init__(self, authenticator: SenderAuthenticator | None) -> None:
+        self.authenticator = authenticator
+
+    async def process(self, message: MailMessage) -> None:
+        if self.authenticator is None or not message.pending():
+            return
+        content = message.content
+        message.validation = await self.authenticator.check(
+            message.client_ip,
+            message.helo,
+            message.mail_from,
+            await content.aheader_block(),
+            message.headers.from_ if message.headers else None,
+            lambda: content.chunks(HEADER_READ_SIZE),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class RelayConfig:
+    """Outgoing SMTP relay, from RELAY_* environment variables."""
+
+    host: str | None
+    port: int
+    user: str | None
+    password: str | None
+
+    @classmethod
+    def from_env(cls) -> "RelayConfig":
+        try:
+            port = int(os.getenv("RELAY_PORT", 587))
+        except ValueError:
+            port = 587
+        return cls(
+            os.getenv("RELAY_HOST"),
+            port,
+            os.getenv("RELAY_USER"),
+            os.getenv("RELAY_PASSWORD"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class OutgoingMessage:
+    """One recipient's copy: its envelope and the raw message to send.
+
+    ``header`` is the rewritten header block; ``body`` is a view of the
+    original message after its header block, shared by every copy and never
+    decoded.
+    """
+
+    mail_from: str
+    rcpt_to: str
+    header: bytes
+    body: memoryview
+
+    @property
+    def data(self) -> bytes:
+        return b"".join((self.header, self.body))
+
+
+def smtp_send(config: RelayConfig, msg: OutgoingMessage) -> None:
+    """Send one message through the relay (blocking)."""
+    assert config.host and config.user and config.password
+    with smtplib.SMTP(config.host, config.port) as smtp:
+        smtp.starttls()
+        smtp.login(config.user, config.password)
+        smtp.sendmail(msg.mail_from, [msg.rcpt_to], msg.data)
+
+
+def _replaced_on_forward(name: str) -> bool:
+    # To is rewritten, and X-QSM-* fields are only ever set by us
+    return name == "to" or name.startswith("x-qsm-")
+
+
+class ForwardStage(Stage):
+    """Send each pending recipient's copy through the relay.
+
+    The original message is forwarded byte for byte, MIME structure and
+    attachments included: only the header block is rewritten (To replaced,
+    X-QSM-* fields added) and the body is spliced on behind it. The
+    blocking SMTP exchange runs in a worker thread, so other messages keep
+    moving through the pipeline meanwhile. The first failure stops the
+    message (its remaining recipients stay unsent) and sets a 550 reply.
+    """
+
+    name = "forward"
+
+    def __init__(
+        self,
+        enforcer: EnforcementEngine | None = None,
+        config: Callable[[], RelayConfig] = RelayConfig.from_env,
+        send: Callable[[RelayConfig, OutgoingMessage], None] = smtp_send,
+    ) -> None:
+        self.enforcer = enforcer
+        self.config = config
+        self.send = send
+
+    async def process(self, message: MailMessage) -> None:
+        pending = message.pending()
+        if not pending:
+            return
+        config = self.config()
+        if not config.host:
+            logger.error("RELAY_HOST not configured")
+            message.reply = "550 Relay not configured"
+            return
+        if not config.user or not config.password:
+            logger.error("Relay credentials not configured")
+            message.reply = "550 Relay credentials missing"
+            return
+
+        block = await message.content.aheader_block()
+        body = memoryview(await message.content.aread())[len(block) :]
+        for rcpt in pending:
+            assert rcpt.destination is not None
+            add = []
+            if message.validation is not None:
+                add.append(("X-QSM-Validation", message.validation.header))
+            decision = rcpt.decision
+            if decision is not None and decision.flagged and decision.reason:
+                add.append(("X-QSM-Reason", decision.reason))
+            add.append(("To", rcpt.destination))
+            msg = OutgoingMessage(
+                message.mail_from or "",
+                rcpt.destination,
+                rewrite_header_block(block, add, _replaced_on_forward),
+                body,
+            )
+            try:
+                await asyncio.to_thread(self.send, config, msg)
+            except Exception as e:
+                logger.warning(
+                    "Forwarding failed",
+                    extra={"message_id": message.id, "error": str(e)},
+                )
+                rcpt.status, rcpt.reason = FAILED, str(e)
+                message.reply = "550 Forwarding failed"
+                return
+            rcpt.status = FORWARDED
+            rcpt.forwarded_at = datetime.now(timezone.utc)
+            if self.enforcer is not None:
+                self.enforcer.record_forwarded(rcpt.address)
+
+
+class RetainStage(Stage):
+    """Keep encrypted copies of spam, held and failed messages.
+
+    The content is encrypted to the store (content_store.py) once per
+    message, streamed from wherever it is, and a ``spam_quarantine``,
+    ``overflow_hold`` or ``failed_emails`` row per recipient points at it.
+    Only recipients of known users are kept.
+
+    SMTP messages run through the pipeline on aiosmtpd's own event loop, but
+    database connections belong to the loop that opened them, so the rows
+    are always written on the loop the stage was built on (server.py's main
+    loop), like EmailLogWriter does.
+    """
+
+    name = "retain"
+
+    def __init__(
+        self,
+        store: ContentStore | None,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        quarantine_days: int = settings.spam_quarantine_days,
+        failed_days: int = settings.failed_email_retention_days,
+        hold_days: int = settings.overflow_hold_days,
+    ) -> None:
+        self.store = store
+        self.session_factory = session_factory
+        self.quarantine_days = quarantine_days
+        self.failed_days = failed_days
+        self.hold_days = hold_days
+        try:
+            self._loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+
+    async def process(self, message: MailMessage) -> None:
+        if self.store is None:
+            return
+        kept = [
+            rcpt
+            for rcpt in message.recipients
+            if rcpt.status in (SPAM, HELD, FAILED)
+            and rcpt.decision is not None
+            and rcpt.decision.user_id is not None
+        ]
+        if not kept:
+            return
+        stored = await self.store.astore(message.content.chunks(self.store.chunk_size))
+        rows: list[QuarantinedEmail | HeldEmail | FailedEmail] = []
+        for rcpt in kept:
+            assert rcpt.decision is not None and rcpt.decision.user_id is not None
+            common = dict(
+                user_id=rcpt.decision.user_id,
+                alias_id=rcpt.decision.alias_id,
+                from_address=message.mail_from,
+                size_bytes=message.size,
+                content_pointer=stored.pointer,
+                content_key_id=stored.key_id,
+                received_at=message.received_at,
+            )
+            if rcpt.status == SPAM and message.spam is not None:
+                rows.append(
+                    QuarantinedEmail(
+                        **common,
+                        subject_hash=message.subject_hash,
+                        spam_score=message.spam.score,
+                        spam_reason=message.spam.reason,
+                        will_delete_at=message.received_at
+                        + timedelta(days=self.quarantine_days),
+                    )
+                )
+            elif rcpt.status == HELD:
+                rows.append(
+                    HeldEmail(
+                        **common,
+                        recipient=rcpt.address,
+                        hold_reason=rcpt.reason,
+                        held_at=datetime.now(timezone.utc),
+                        will_delete_at=message.received_at
+                        + timedelta(days=self.hold_days),
+                    )
+                )
+            else:
+                rows.append(
+                    FailedEmail(
+                        **common,
+                        failure_reason=rcpt.reason,
+                        will_delete_at=message.received_at
+                        + timedelta(days=self.failed_days),
+                    )
+                )
+        try:
+            loop = asyncio.get_running_loop()
+            if self._loop is None or self._loop is loop:
+                await self._save(rows)
+            else:
+                future = asyncio.run_coroutine_threadsafe(self._save(rows), self._loop)
+                await asyncio.wrap_future(future)
+        except Exception:
+            logger.error(
+                "Storing retained message failed",
+                extra={"message_id": message.id},
+                exc_info=True,
+            )
+            await asyncio.to_thread(self.store.delete, stored.pointer)
+
+    async def _save(
+        self, rows: Sequence[QuarantinedEmail | HeldEmail | FailedEmail]
+    ) -> None:
+        async with self.session_factory() as db:
+            db.add_all(rows)
+            await db.commit()
+
+
+class SnapshotStage(Stage):
+    """Keep an encrypted copy of the raw header block (mail-validation spec).
+
+    One snapshot per message with a known owner, whatever happened to it;
+    its pointer goes into the message's email_logs rows, and the files are
+    purged with the same retention as email_logs.
+    """
+
+    name = "snapshot"
+
+    def __init__(self, store: ContentStore | None) -> None:
+        self.store = store
+
+    async def process(self, message: MailMessage) -> None:
+        if self.store is None:
+            return
+        if not any(
+            rcpt.status in LogStage.LOGGED
+            and rcpt.decision is not None
+            and rcpt.decision.user_id is not None
+            for rcpt in message.recipients
+        ):
+            return
+        block = await message.content.aheader_block()
+        message.header_snapshot = await self.store.astore([block])
+
+
+class LogStage(Stage):
+    """Buffer one email_logs row per settled recipient of a known user."""
+
+    name = "log"
+    LOGGED = (FORWARDED, FAILED, HELD, SPAM)
+
+    def __init__(self, log_writer: EmailLogWriter | None) -> None:
+        self.log_writer = log_writer
+
+    async def process(self, message: MailMessage) -> None:
+        if self.log_writer is None:
+            return
+        snapshot = message.header_snapshot
+        for rcpt in message.recipients:
+            decision = rcpt.decision
+            if rcpt.status not in self.LOGGED or decision is None:
+                continue
+            if decision.user_id is None:
+                continue
+            self.log_writer.add(
+                EmailLogRecord(
+                    user_id=decision.user_id,
+                    alias_id=decision.alias_id,
+                    from_address=message.mail_from,
+                    subject_hash=message.subject_hash,
+                    size_bytes=message.size,
+                    status=rcpt.status,
+                    received_at=message.received_at,
+                    forwarded_at=rcpt.forwarded_at,
+                    failure_reason=rcpt.reason if rcpt.status != FORWARDED else None,
+                    header_pointer=snapshot.pointer if snapshot else None,
+                    header_key_id=snapshot.key_id if snapshot else None,
+                )
+            )
+
+
+class EventStage(Stage):
+    """Publish webhook events (webhook-events.md) for the outcome.
+
+    Holds and rejects are only published for plan limits (``over_limit``)
+    and oversize messages (``oversize``); other rejects, such as an
+    inactive alias, have no event.
+    """
+
+    name = "events"
+
+    def __init__(
+        self,
+        webhooks: WebhookDispatcher | None,
+        enforcer: EnforcementEngine | None = None,
+    ) -> None:
+        self.webhooks = webhooks
+        self.enforcer = enforcer
+
+    async def process(self, message: MailMessage) -> None:
+        if self.webhooks is None:
+            return
+        events = []
+        for rcpt in message.recipients:
+            decision = rcpt.decision
+            if decision is None or decision.user_id is None:
+                continue
+            if decision.reason in (BANDWIDTH_EXCEEDED, EMAILS_EXCEEDED):
+                name = "over_limit"
+                metadata: dict[str, object] = {
+                    "enforcement": decision.action,
+                    "reason_code": decision.reason,
+                }
+            elif decision.reason == OVERSIZE:
+                name = "oversize"
+                metadata = {
+                    "size_bytes": message.size,
+                    "limit_bytes": (
+                        self.enforcer.max_message_bytes
+                        if self.enforcer is not None
+                        else settings.max_message_bytes
+                    ),
+                }
+            elif decision.action in ("hold", "reject"):
+                continue
+            elif rcpt.status == FORWARDED:
+                name = "forwarded"
+                metadata = {"size_bytes": message.size, "attempts": 1}
+            elif rcpt.status == FAILED:
+                name = "failed"
+                metadata = {"reason_code": "relay-error", "attempts": 1}
+            elif rcpt.status == SPAM and message.spam is not None:
+                name = "spam"
+                metadata = {
+                    "score": message.spam.score,
+                    "reason": message.spam.reason,
+                }
+            else:
+                continue
+            events.append(
+                WebhookEvent(name, decision.user_id, metadata, decision.alias_id)
+            )
+        if events:
+            self.webhooks.publish(events)
+
+
+@dataclass(slots=True)
+class StageStats:
+    """Timing for one stage, for benchmarks and debugging."""
+
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.seconds / self.calls if self.calls else 0.0
+
+
+class Pipeline:
+    """Run messages through the stages in order.
+
+    Each message passes the stages one after another, but any number of
+    messages can be in the pipeline at once (one per SMTP session or inbound
+    worker), and no stage blocks the event loop, so one message's relay
+    round-trip overlaps other messages' checks. Time spent per stage is
+    kept in ``stats``.
+    """
+
+    def __init__(self, stages: Sequence[Stage]) -> None:
+        self.stages = list(stages)
+        self.stats = {stage.name: StageStats() for stage in self.stages}
+
+    async def run(self, message: MailMessage) -> MailMessage:
+        """Process one message. Returns it, with every stage applied."""
+        for stage in self.stages:
+            start = time.perf_counter()
+            try:
+                await stage.process(message)
+            finally:
+                elapsed = time.perf_counter() - start
+                stats = self.stats[stage.name]
+                stats.calls += 1
+                stats.seconds += elapsed
+                stats.max_seconds = max(stats.max_seconds, elapsed)
+        return message
+
+
+def build_pipeline(
+    resolve: Callable[[str], str | None],
+    enforcer: EnforcementEngine | None = None,
+    log_writer: EmailLogWriter | None = None,
+    webhooks: WebhookDispatcher | None = None,
+    spam_filter: SpamFilter | None = None,
+    content_store: ContentStore | None = None,
+    header_store: ContentStore | None = None,
+    authenticator: SenderAuthenticator | None = None,
+    relay_config: Callable[[], RelayConfig] = RelayConfig.from_env,
+) -> Pipeline:
+    """The standard stage sequence used by server.py."""
+    return Pipeline(
+        [
+            ValidateStage(resolve),
+            EnforceStage(enforcer),
+            SpamStage(spam_filter, enforcer),
+            SenderAuthStage(authenticator),
+            ForwardStage(enforcer, relay_config),
+            RetainStage(content_store),
+            SnapshotStage(header_store),
+            LogStage(log_writer),
+            EventStage(webhooks, enforcer),
+        ]
+    )
@@ -0,0 +1,177 @@
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Protocol
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.db.upsert import dialect_insert
+from app.exceptions import RateLimitError
+from app.models.rate_limit import RateLimitBucket
+
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of a rate limit check."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+
+
+class RateLimitBackend(Protocol):
+    """Storage for GCRA theoretical arrival times (TAT)."""
+
+    async def consume(
+        self, key: str, now: float, interval: float, tolerance: float
+    ) -> tuple[bool, float]:
+        """Atomically try to admit one request.
+
+        Returns whether the request is allowed and the key's TAT afterwards.
+        """
+        ...
+
+
+class InMemoryRateLimitBackend:
+    """Single-process backend bounded to ``max_keys`` entries.
+
+    Keys are kept in LRU order. Expired entries (TAT in the past) carry no
+    state and are dropped first; if the table is still full the least
+    recently used key is evicted, which at worst forgives that key.
+    """
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._tats: OrderedDict[str, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    def _evict(self, now: float) -> None:
+        while self._tats:
+            key, tat = next(iter(self._tats.items()))
+            if tat > now and len(self._tats) < self.max_keys:
+                break
+            del self._tats[key]
+
+    async def consume(
+        self, key: str, now: float, interval: float, tolerance: float
+    ) -> tuple[bool, float]:
+        tat = max(self._tats.get(key, now), now)
+        if tat - now > tolerance:
+            self._tats.move_to_end(key)
+            return False, tat
+
+        if key not in self._tats:
+            self._evict(now)
+        self._tats[key] = tat + interval
+        self._tats.move_to_end(key)
+        return True, tat + interval
+
+
+class DatabaseRateLimitBackend:
+    """Backend shared by every app process through the database.
+
+    Each check is one conditional upsert, so concurrent workers cannot
+    admit more than the limit between them.
+    """
+
+    def __init__(
+        self, session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal
+    ) -> None:
+        self.session_factory = session_factory
+
+    async def consume(
+        self, key: str, now: float, interval: float, tolerance: float
+    ) -> tuple[bool, float]:
+        async with self.session_factory() as db:
+            current = RateLimitBucket.__table__.c.tat
+            greatest = (
+                func.greatest
+                if db.get_bind().dialect.name == "postgresql"
+                else func.max
+            )
+            insert = dialect_insert(db, RateLimitBucket).values(
+                key=key, tat=now + interval
+            )
+            stmt = insert.on_conflict_do_update(
+                index_elements=[RateLimitBucket.key],
+                set_={"tat": greatest(current, now) + interval},
+                where=greatest(current, now) - now <= tolerance,
+            ).returning(RateLimitBucket.tat)
+
+            result = await db.execute(stmt)
+            row = result.first()
+            if row is not None:
+                await db.commit()
+                return True, float(row[0])
+
+            tat = await db.scalar(
+                select(RateLimitBucket.tat).where(RateLimitBucket.key == key)
+            )
+            return False, float(tat if tat is not None else now)
+
+
+class RateLimiter:
+    """Generic cell rate algorithm (GCRA) limiter.
+
+    ``limit`` requests are allowed per ``window`` seconds, spread evenly but
+    with a burst of up to ``limit`` requests. Only one timestamp is stored
+    per key.
+    """
+
+    def __init__(self, backend: RateLimitBackend) -> None:
+        self.backend = backend
+
+    async def hit(
+        self,
+        key: str,
+        limit: int = settings.rate_limit_requests,
+        window: int = settings.rate_limit_window,
+        now: float | None = None,
+    ) -> RateLimitResult:
+        """Consume one request for ``key`` and report the outcome."""
+        now = time.time() if now is None else now
+        interval = window / limit
+        tolerance = window - interval
+
+        allowed, tat = await self.backend.consume(key, now, interval, tolerance)
+        if not allowed:
+            retry_after = tat - now - tolerance
+            return RateLimitResult(False, limit, 0, max(retry_after, 0.0))
+
+        remaining = math.floor((now + window - tat) / interval + 1e-9)
+        return RateLimitResult(True, limit, max(remaining, 0), 0.0)
+
+    async def check(
+        self,
+        key: str,
+        limit: int = settings.rate_limit_requests,
+        window: int = settings.rate_limit_window,
+    ) -> RateLimitResult:
+        """Consume one request for ``key`` or raise ``RateLimitError``."""
+        result = await self.hit(key, limit, window)
+        if not result.allowed:
+            raise RateLimitError(
+                "Too many requests. Please try again later.",
+                details={"retry_after": math.ceil(result.retry_after)},
+            )
+        return result
+
+
+def create_backend() -> RateLimitBackend:
+    """Create the backend selected in settings."""
+    if settings.rate_limit_backend == "database":
+        return DatabaseRateLimitBackend()
+    return InMemoryRateLimitBackend(settings.rate_limit_max_keys)
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter(create_backend())
@@ -0,0 +1,692 @@
+"""SPF, DKIM and DMARC evaluation (mail-validation-and-headers.md).
+
+Results are log-only: they are summarized in ``X-QSM-Validation`` on the
+forwarded copy and never decide delivery. Every DNS query goes through one
+shared DnsCache, which honors record TTLs, caches negative answers, merges
+concurrent lookups of the same name and bounds the queries in flight, so
+repeat senders are checked almost entirely from memory. Each message gets a
+fixed time budget; checks still unfinished when it runs out report
+``temperror`` rather than holding up forwarding.
+
+Not implemented: SPF macros and ``ptr`` (a record using them is evaluated
+as far as possible), and the public suffix list - the organizational domain
+for DMARC relaxed alignment is approximated by the last two labels.
+"""
+
+import asyncio
+import base64
+import hashlib
+import ipaddress
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Protocol
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, padding, rsa
+
+from app.config import get_settings
+from app.utils.logging import get_logger
+from app.utils.mail_headers import from_address, header_end, split_fields
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# Result values, as in Authentication-Results (RFC 8601)
+PASS = "pass"
+FAIL = "fail"
+SOFTFAIL = "softfail"
+NEUTRAL = "neutral"
+NONE = "none"
+TEMPERROR = "temperror"
+PERMERROR = "permerror"
+
+SPF_MAX_LOOKUPS = 10  # RFC 7208 section 4.6.4
+DKIM_MAX_SIGNATURES = 3
+BODY_CHUNK_SIZE = 64 * 1024
+
+
+class DnsNotFound(Exception):
+    """The name or record type does not exist; cached like an answer."""
+
+
+class DnsError(Exception):
+    """The lookup failed or timed out; not cached."""
+
+
+class Resolver(Protocol):
+    """Where DnsCache gets answers from; tests plug in a local stub."""
+
+    async def resolve(self, name: str, rdtype: str) -> tuple[list[str], float]:
+        """Records as text and their TTL; raises DnsNotFound or DnsError.
+
+        TXT records come back with their strings joined, MX records as the
+        exchange host name, A/AAAA as addresses.
+        """
+        ...
+
+
+class DnspythonResolver:
+    """Resolver using the system's nameservers through dnspython."""
+
+    def __init__(
+        self,
+        timeout: float = settings.dns_timeout,
+        nameservers: list[str] | None = None,
+    ) -> None:
+        self.timeout = timeout
+        self.nameservers = nameservers or []
+        self._resolver: dns.asyncresolver.Resolver | None = None
+
+    def _get(self) -> dns.asyncresolver.Resolver:
+        # Reads /etc/resolv.conf, so only once something is looked up
+        if self._resolver is None:
+            resolver = dns.asyncresolver.Resolver(configure=not self.nameservers)
+            if self.nameservers:
+                resolver.nameservers = list(self.nameservers)
+            resolver.lifetime = self.timeout
+            self._resolver = resolver
+        return self._resolver
+
+    async def resolve(self, name: str, rdtype: str) -> tuple[list[str], float]:
+        try:
+            answer = await self._get().resolve(name, rdtype, search=False)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            raise DnsNotFound(name) from None
+        except dns.exception.DNSException as e:
+            raise DnsError(f"{name} {rdtype}: {e!r}") from None
+        records = []
+        for rdata in answer:
+            if rdtype == "TXT":
+                records.append(b"".join(rdata.strings).decode("utf-8", "replace"))
+            elif rdtype == "MX":
+                records.append(rdata.exchange.to_text(omit_final_dot=True))
+            else:
+                records.append(rdata.to_text())
+        ttl = answer.rrset.ttl if answer.rrset is not None else 0
+        return records, float(ttl)
+
+
+class DnsCache:
+    """Shared, TTL-honoring DNS cache in front of a Resolver.
+
+    Answers are kept for their TTL (capped at ``max_ttl``) and missing
+    names for ``negative_ttl``; failures are not cached. Concurrent queries
+    for the same name share one lookup, at most ``max_concurrency`` lookups
+    run at once, and the least recently used entries go beyond
+    ``max_entries``. A caller giving up (its time budget ran out) does not
+    cancel a lookup others may still be waiting for; the answer is cached
+    when it arrives.
+
+    The cache may be shared by event loops in different threads (the SMTP
+    controller's and the main one): answers are shared, while in-flight
+    lookups and the concurrency limit are kept per loop, since futures and
+    semaphores belong to the loop they were created on.
+    """
+
+    def __init__(
+        self,
+        resolver: Resolver | None = None,
+        max_entries: int = settings.dns_cache_size,
+        max_ttl: float = settings.dns_cache_max_ttl,
+        negative_ttl: float = settings.dns_negative_ttl,
+        max_concurrency: int = settings.dns_max_concurrency,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.resolver: Resolver = resolver or DnspythonResolver()
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.hits = 0
+        self.lookups = 0
+        self._entries: OrderedDict[tuple[str, str], tuple[float, list[str] | None]]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_concurrency = max_concurrency
+        # Per event loop: in-flight lookups by key, and the concurrency limit
+        self._loops: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop,
+            tuple[dict[tuple[str, str], asyncio.Future[list[str]]], asyncio.Semaphore],
+        ] = weakref.WeakKeyDictionary()
+
+    def _loop_state(
+        self,
+    ) -> tuple[dict[tuple[str, str], asyncio.Future[list[str]]], asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loops.get(loop)
+            if state is None:
+                state = self._loops[loop] = (
+                    {},
+                    asyncio.Semaphore(self.max_concurrency),
+                )
+            return state
+
+    async def query(self, name: str, rdtype: str) -> list[str]:
+        """Records of ``rdtype`` for ``name``, from cache when fresh."""
+        key = (name.lower().rstrip("."), rdtype)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                entry = None
+        if entry is not None:
+            if entry[1] is None:
+                raise DnsNotFound(name)
+            return entry[1]
+        inflight, semaphore = self._loop_state()
+        future = inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._lookup(key, semaphore))
+            inflight[key] = future
+            future.add_done_callback(lambda f: self._done(inflight, key, f))
+        return await asyncio.shield(future)
+
+    @staticmethod
+    def _done(
+        inflight: dict[tuple[str, str], asyncio.Future[list[str]]],
+        key: tuple[str, str],
+        future: asyncio.Future[list[str]],
+    ) -> None:
+        inflight.pop(key, None)
+        if not future.cancelled():
+            future.exception()  # retrieved, even if every waiter gave up
+
+    async def _lookup(
+        self, key: tuple[str, str], semaphore: asyncio.Semaphore
+    ) -> list[str]:
+        async with semaphore:
+            with self._lock:
+                self.lookups += 1
+            try:
+                records, ttl = await self.resolver.resolve(*key)
+            except DnsNotFound:
+                self._store(key, None, self.negative_ttl)
+                raise
+        self._store(key, records, min(ttl, self.max_ttl))
+        return records
+
+    def _store(
+        self, key: tuple[str, str], records: list[str] | None, ttl: float
+    ) -> None:
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, records)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def domain_of(address: str | None) -> str | None:
+    """The domain part of an address, lowercased."""
+    if not address or "@" not in address:
+        return None
+    return address.rpartition("@")[2].strip().rstrip(".").lower() or None
+
+
+def organizational_domain(domain: str) -> str:
+    """Approximate organizational domain: the last two labels."""
+    return ".".join(domain.split(".")[-2:])
+
+
+# --- SPF (RFC 7208) ---------------------------------------------------------
+
+
+class _SpfPermError(Exception):
+    pass
+
+
+_SPF_QUALIFIERS = {"+": PASS, "-": FAIL, "~": SOFTFAIL, "?": NEUTRAL}
+_SPF_DOMAIN_SPEC = re.compile(
+    r"(?::(?P<domain>[^/]+))?(?:/(?P<v4>\d+))?(?://(?P<v6>\d+))?"
+)
+
+IPAddress = ipaddress.IPv4Address | ipaddress.IPv6Address
+
+
+class _SpfCheck:
+    def __init__(self, cache: DnsCache, ip: IPAddress) -> None:
+        self.cache = cache
+        self.ip = ip
+        self.lookups = 0
+
+    def count_lookup(self) -> None:
+        self.lookups += 1
+        if self.lookups > SPF_MAX_LOOKUPS:
+            raise _SpfPermError("too many DNS lookups")
+
+    async def records(self, name: str, rdtype: str) -> list[str]:
+        try:
+            return await self.cache.query(name, rdtype)
+        except DnsNotFound:
+            return []
+
+    async def evaluate(self, domain: str) -> str:
+        try:
+            txt = await self.cache.query(domain, "TXT")
+        except DnsNotFound:
+            return NONE
+        spf = [r for r in txt if r.lower() == "v=spf1" or r.lower()[:7] == "v=spf1 "]
+        if not spf:
+            return NONE
+        if len(spf) > 1:
+            raise _SpfPermError(f"multiple SPF records for {domain}")
+
+        redirect = None
+        for term in spf[0].split()[1:]:
+            name, eq, value = term.partition("=")
+            if eq and ":" not in name and "/" not in name:
+                if name.lower() == "redirect":
+                    redirect = value
+                continue  # exp= and unknown modifiers
+            qualifier = term[0] if term[0] in _SPF_QUALIFIERS else "+"
+            if await self.matches(term.lstrip("+-~?"), domain):
+                return _SPF_QUALIFIERS[qualifier]
+
+        if redirect is not None:
+            self.count_lookup()
+            result = await self.evaluate(self.expand(redirect))
+            return PERMERROR if result == NONE else result
+        return NEUTRAL
+
+    @staticmethod
+    def expand(domain: str) -> str:
+        if "%" in domain:
+            raise _SpfPermError("SPF macros are not supported")
+        return domain.rstrip(".").lower()
+
+    async def matches(self, mechanism: str, domain: str) -> bool:
+        name = re.split(r"[:/]", mechanism, maxsplit=1)[0].lower()
+        rest = mechanism[len(name) :]
+        if name == "all":
+            return True
+        if name in ("ip4", "ip6"):
+            network = ipaddress.ip_network(rest[1:], strict=False)
+            return network.version == self.ip.version and self.ip in network
+        if name == "include":
+            self.count_lookup()
+            result = await self.evaluate(self.expand(rest[1:]))
+            if result == TEMPERROR:
+                raise DnsError(f"include {rest[1:]}")
+            if result in (NONE, PERMERROR):
+                raise _SpfPermError(f"include {rest[1:]}: {result}")
+            return result == PASS
+        if name == "exists":
+            self.count_lookup()
+            return bool(await self.records(self.expand(rest[1:]), "A"))
+        if name == "ptr":
+            self.count_lookup()
+            return False
+        if name not in ("a", "mx"):
+            raise _SpfPermError(f"unknown mechanism {mechanism!r}")
+
+        spec = _SPF_DOMAIN_SPEC.fullmatch(rest)
+        if spec is None:
+            raise _SpfPermError(f"bad mechanism {mechanism!r}")
+        target = self.expand(spec["domain"]) if spec["domain"] else domain
+        prefix = (
+            int(spec["v4"] or 32) if self.ip.version == 4 else int(spec["v6"] or 128)
+        )
+        rdtype = "A" if self.ip.version == 4 else "AAAA"
+        self.count_lookup()
+        hosts = [target] if name == "a" else (await self.records(target, "MX"))[:10]
+        for host in hosts:
+            for address in await self.records(host, rdtype):
+                if self.ip in ipaddress.ip_network(f"{address}/{prefix}", strict=False):
+                    return True
+        return False
+
+
+async def check_spf(
+    cache: DnsCache, ip: str | None, mail_from: str | None, helo: str | None
+) -> tuple[str, str | None]:
+    """SPF result for the envelope sender (or HELO name), and the domain."""
+    domain = domain_of(mail_from) or (helo.lower().rstrip(".") if helo else None)
+    if ip is None or domain is None:
+        return NONE, domain
+    try:
+        return await _SpfCheck(cache, ipaddress.ip_address(ip)).evaluate(domain), domain
+    except DnsError:
+        return TEMPERROR, domain
+    except (_SpfPermError, ValueError):
+        return PERMERROR, domain
+
+
+# --- DKIM (RFC 6376, RFC 8463) ----------------------------------------------
+
+_WSP = re.compile(rb"[ \t]+")
+_EOL = re.compile(rb"\r?\n")
+_BARE_LF = re.compile(rb"(?<!\r)\n")
+_SIG_B_VALUE = re.compile(rb"((?:^|;)[ \t\r\n]*b[ \t\r\n]*=)[^;]*")
+
+
+def canonicalize_header(raw: bytes, relaxed: bool) -> bytes:
+    """One header field in ``simple`` or ``relaxed`` canonical form."""
+    if not relaxed:
+        raw = _BARE_LF.sub(b"\r\n", raw)
+        return raw if raw.endswith(b"\r\n") else raw + b"\r\n"
+    name, _, value = raw.partition(b":")
+    value = _WSP.sub(b" ", _EOL.sub(b"", value)).strip(b" ")
+    return name.strip().lower() + b":" + value + b"\r\n"
+
+
+class BodyCanonicalizer:
+    """Feed a body in arbitrary chunks; hashes its canonical form."""
+
+    def __init__(self, relaxed: bool, limit: int | None = None) -> None:
+        self.relaxed = relaxed
+        self.limit = limit
+        self.hash = hashlib.sha256()
+        self.written = 0
+        self._partial = b""
+        self._empty_lines = 0
+        self._any = False
+
+    def feed(self, data: bytes) -> None:
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._line(line)
+
+    def _line(self, line: bytes) -> None:
+        if line.endswith(b"\r"):
+            line = line[:-1]
+        if self.relaxed:
+            line = _WSP.sub(b" ", line).rstrip(b" ")
+        if not line:
+            # Trailing empty lines are not part of the canonical body
+            self._empty_lines += 1
+            return
+        self._write(b"\r\n" * self._empty_lines + line + b"\r\n")
+        self._empty_lines = 0
+
+    def _write(self, data: bytes) -> None:
+        self._any = True
+        if self.limit is not None:
+            data = data[: max(self.limit - self.written, 0)]
+        self.written += len(data)
+        self.hash.update(data)
+
+    def finish(self) -> bytes:
+        """The body hash."""
+        if self._partial:
+            self._line(self._partial)
+            self._partial = b""
+        if not self._any and not self.relaxed:
+            self._write(b"\r\n")
+        return self.hash.digest()
+
+
+def body_hash(chunks: Iterable[bytes], relaxed: bool, limit: int | None) -> bytes:
+    """Hash the body of a whole message given as chunks (blocking)."""
+    canon = BodyCanonicalizer(relaxed, limit)
+    head = bytearray()
+    in_body = False
+    for chunk in chunks:
+        if in_body:
+            canon.feed(chunk)
+            continue
+        head += chunk
+        end = header_end(head)
+        if end != -1:
+            canon.feed(bytes(head[end:]))
+            in_body = True
+    return canon.finish()
+
+
+def parse_tags(value: str) -> dict[str, str]:
+    """``tag=value; ...`` lists (DKIM-Signature, key records, DMARC)."""
+    tags = {}
+    for part in value.split(";"):
+        name, eq, tag_value = part.partition("=")
+        if eq:
+            tags[name.strip()] = re.sub(r"\s+", "", tag_value)
+    return tags
+
+
+def signed_header_data(
+    fields: list[tuple[str, bytes]], signature: bytes, signed: list[str], relaxed: bool
+) -> bytes:
+    """The bytes a DKIM signature covers, in canonical form."""
+    remaining: dict[str, list[bytes]] = {}
+    for name, raw in fields:
+        remaining.setdefault(name, []).append(raw)
+    data = bytearray()
+    for name in signed:
+        # Each listed name takes the next instance from the bottom up
+        instances = remaining.get(name)
+        if instances:
+            data += canonicalize_header(instances.pop(), relaxed)
+    field_name, _, value = signature.partition(b":")
+    unsigned = field_name + b":" + _SIG_B_VALUE.sub(rb"\1", value)
+    data += canonicalize_header(unsigned, relaxed).rstrip(b"\r\n")
+    return bytes(data)
+
+
+def _verify_signature(
+    algorithm: str, key: bytes, signature: bytes, data: bytes
+) -> None:
+    public_key: Any
+    if algorithm == "ed25519-sha256":
+        public_key = ed25519.Ed25519PublicKey.from_public_bytes(key)
+        public_key.verify(signature, hashlib.sha256(data).digest())
+        return
+    public_key = serialization.load_der_public_key(key)
+    if not isinstance(public_key, rsa.RSAPublicKey):
+        raise ValueError("not an RSA key")
+    public_key.verify(signature, data, padding.PKCS1v15(), hashes.SHA256())
+
+
+async def _check_signature(
+    cache: DnsCache,
+    fields: list[tuple[str, bytes]],
+    signature: bytes,
+    body: Callable[[], Iterable[bytes]],
+) -> tuple[str, str | None]:
+    tags = parse_tags(signature.partition(b":")[2].decode("latin-1"))
+    domain = tags.get("d", "").lower() or None
+    required = ("v", "a", "b", "bh", "d", "h", "s")
+    if any(not tags.get(tag) for tag in required) or tags["v"] != "1":
+        return PERMERROR, domain
+    algorithm = tags["a"].lower()
+    signed = [name.lower() for name in tags["h"].split(":")]
+    if algorithm not in ("rsa-sha256", "ed25519-sha256") or "from" not in signed:
+        return PERMERROR, domain
+    header_c, _, body_c = tags.get("c", "simple").lower().partition("/")
+    if tags.get("x", "").isdigit() and int(tags["x"]) < time.time():
+        return FAIL, domain
+
+    try:
+        records = await cache.query(f"{tags['s']}._domainkey.{domain}", "TXT")
+    except DnsNotFound:
+        return PERMERROR, domain
+    except DnsError:
+        return TEMPERROR, domain
+    if not records:
+        return PERMERROR, domain
+    key_tags = parse_tags(records[0])
+    if not key_tags.get("p"):
+        return FAIL, domain  # revoked
+
+    try:
+        limit = int(tags["l"]) if "l" in tags else None
+        expected = base64.b64decode(tags["bh"])
+        computed = await asyncio.to_thread(
+            body_hash, body(), body_c == "relaxed", limit
+        )
+        if computed != expected:
+            return FAIL, domain
+        data = signed_header_data(fields, signature, signed, header_c == "relaxed")
+        _verify_signature(
+            algorithm,
+            base64.b64decode(key_tags["p"]),
+            base64.b64decode(tags["b"]),
+            data,
+        )
+    except InvalidSignature:
+        return FAIL, domain
+    except ValueError:
+        return PERMERROR, domain
+    return PASS, domain
+
+
+async def check_dkim(
+    cache: DnsCache, header_block: bytes, body: Callable[[], Iterable[bytes]]
+) -> tuple[str, list[str]]:
+    """Overall DKIM result and the domains of the signatures that passed.
+
+    ``body`` returns the whole message (headers included) as chunks; it is
+    only called when a signature's key was found.
+    """
+    fields = split_fields(header_block)
+    signatures = [raw for name, raw in fields if name == "dkim-signature"]
+    if not signatures:
+        return NONE, []
+    results = [
+        await _check_signature(cache, fields, signature, body)
+        for signature in signatures[:DKIM_MAX_SIGNATURES]
+    ]
+    passed = [domain for result, domain in results if result == PASS and domain]
+    if passed:
+        return PASS, passed
+    for result in (TEMPERROR, FAIL):
+        if any(r == result for r, _ in results):
+            return result, []
+    return PERMERROR, []
+
+
+# --- DMARC (RFC 7489) -------------------------------------------------------
+
+
+async def _dmarc_record(cache: DnsCache, domain: str) -> dict[str, str] | None:
+    for name in dict.fromkeys([domain, organizational_domain(domain)]):
+        try:
+            records = await cache.query(f"_dmarc.{name}", "TXT")
+        except DnsNotFound:
+            continue
+        dmarc = [r for r in records if r.replace(" ", "").lower()[:8] == "v=dmarc1"]
+        if len(dmarc) == 1:
+            return parse_tags(dmarc[0])
+    return None
+
+
+def _aligned(domain: str, from_domain: str, mode: str) -> bool:
+    if mode.lower() == "s":
+        return domain == from_domain
+    return organizational_domain(domain) == organizational_domain(from_domain)
+
+
+async def check_dmarc(
+    cache: DnsCache,
+    from_domain: str | None,
+    spf: tuple[str, str | None],
+    dkim_domains: list[str],
+) -> str:
+    """DMARC result for the From domain given SPF and DKIM outcomes."""
+    if from_domain is None:
+        return NONE
+    try:
+        record = await _dmarc_record(cache, from_domain)
+    except DnsError:
+        return TEMPERROR
+    if record is None:
+        return NONE
+    spf_result, spf_domain = spf
+    if spf_result == PASS and spf_domain:
+        if _aligned(spf_domain, from_domain, record.get("aspf", "r")):
+            return PASS
+    if any(_aligned(d, from_domain, record.get("adkim", "r")) for d in dkim_domains):
+        return PASS
+    return FAIL
+
+
+# --- Per-message evaluation -------------------------------------------------
+
+
+@dataclass(frozen=True, slots=True)
+class SenderAuthResult:
+    """SPF, DKIM and DMARC results for one message."""
+
+    spf: str = NONE
+    dkim: str = NONE
+    dmarc: str = NONE
+
+    @property
+    def header(self) -> str:
+        """The ``X-QSM-Validation`` value."""
+        return f"spf={self.spf}; dkim={self.dkim}; dmarc={self.dmarc}"
+
+
+class SenderAuthenticator:
+    """Run the three checks for a message within a time budget."""
+
+    def __init__(
+        self,
+        cache: DnsCache | None = None,
+        timeout: float = settings.sender_auth_timeout,
+    ) -> None:
+        self.cache = cache or DnsCache()
+        self.timeout = timeout
+
+    async def check(
+        self,
+        client_ip: str | None,
+        helo: str | None,
+        mail_from: str | None,
+        header_block: bytes,
+        from_header: str | None,
+        body: Callable[[], Iterable[bytes]],
+    ) -> SenderAuthResult:
+        """Evaluate one message; unfinished checks report ``temperror``.
+
+        SPF and DKIM run concurrently, then DMARC with what is left of the
+        budget.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        spf_task = asyncio.ensure_future(
+            check_spf(self.cache, client_ip, mail_from, helo)
+        )
+        dkim_task = asyncio.ensure_future(check_dkim(self.cache, header_block, body))
+        done, pending = await asyncio.wait({spf_task, dkim_task}, timeout=self.timeout)
+        for task in pending:
+            task.cancel()
+
+        spf = self._result(spf_task, done, (TEMPERROR, domain_of(mail_from)))
+        dkim = self._result(dkim_task, done, (TEMPERROR, []))
+        from_domain = domain_of(from_address(from_header or ""))
+        try:
+            dmarc = await asyncio.wait_for(
+                check_dmarc(self.cache, from_domain, spf, dkim[1]),
+                max(deadline - loop.time(), 0),
+            )
+        except asyncio.TimeoutError:
+            dmarc = TEMPERROR
+        except Exception:
+            logger.error("DMARC evaluation failed", exc_info=True)
+            dmarc = PERMERROR
+        return SenderAuthResult(spf[0], dkim[0], dmarc)
+
+    @staticmethod
+    def _result(task: asyncio.Future[Any], done: set[Any], timed_out: Any) -> Any:
+        if task not in done:
+            return timed_out
+        if task.exception() is not None:
+            logger.error(
+                "Sender authentication check failed", exc_info=task.exception()
+            )
+            return (PERMERROR, *timed_out[1:])
+        return task.result()
+
+
+# Global sender authenticator instance
+sender_authenticator = SenderAuthenticator()
@@ -1,47 +1,96 @@
 import hashlib
 import secrets
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Optional
 
 from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
-from sqlalchemy import delete, select
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
+from app.db.batch import delete_in_batches
 from app.models.session import Session
 from app.models.user import User
+from app.services.session_revocation import SessionRevocationList, revocation_list
 
 settings = get_settings()
 
 
+@dataclass(frozen=True)
+class SessionClaims:
+    """Identity carried inside a signed session cookie."""
+
+    session_id: int
+    user_id: int
+    email: str
+    expires_at: float
+
+
 class SessionService:
-    """Service for managing user sessions with signed cookies."""
+    """Service for managing user sessions with signed cookies.
 
-    def __init__(self) -> None:
+    In stateless mode (``SESSION_STATELESS``) cookies are verified purely
+    in-process from their signed claims plus the revocation list, falling
+    back to the database only for cookies that do not verify that way.
+    """
+
+    def __init__(
+        self,
+        stateless: bool = settings.session_stateless,
+        revocations: SessionRevocationList = revocation_list,
+    ) -> None:
         self.serializer = URLSafeTimedSerializer(settings.secret_key)
         self.max_age = settings.session_max_age
+        self.stateless = stateless
+        self.revocations = revocations
 
     def _hash_token(self, token: str) -> str:
         """Hash a session token for database storage."""
         return hashlib.sha256(token.encode()).hexdigest()
 
+    def _sign(
+        self,
+        token: str,
+        session_id: int,
+        user_id: int,
+        expires_at: datetime,
+        email: Optional[str] = None,
+    ) -> str:
+        """Create the signed cookie value for a session."""
+        data: dict[str, Any] = {
+            "token": token,
+            "session_id": session_id,
+            "user_id": user_id,
+            "exp": int(expires_at.timestamp()),
+        }
+        if email is not None:
+            data["email"] = email
+        return self.serializer.dumps(data)
+
     async def create_session(
         self,
         db: AsyncSession,
         user_id: int,
         user_agent: Optional[str] = None,
         ip_address: Optional[str] = None,
+        email: Optional[str] = None,
     ) -> tuple[str, Session]:
-        """Create a new session and return signed token."""
+        """Create a new session and return signed token.
+
+        Pass the user's ``email`` to allow stateless verification.
+        """
         # Generate secure random token
         token = secrets.token_urlsafe(32)
         token_hash = self._hash_token(token)
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.max_age)
 
         # Create session record
         session = Session(
             user_id=user_id,
             token_hash=token_hash,
-            expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.max_age),
+            expires_at=expires_at,
             user_agent=user_agent,
             ip_address=ip_address,
             last_activity=datetime.now(timezone.utc),
@@ -52,10 +101,43 @@ class SessionService:
         await db.refresh(session)
 
         # Create signed cookie value
-        signed_token = self.serializer.dumps({"token": token, "session_id": session.id})
+        signed_token = self._sign(token, session.id, user_id, expires_at, email)
 
         return signed_token, session
 
+    async def add_session(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        user_agent: Optional[str] = None,
+        ip_address: Optional[str] = None,
+        email: Optional[str] = None,
+    ) -> tuple[str, int]:
+        """Insert a session in the caller's transaction without committing.
+
+        Returns the signed token and the new session id.
+        """
+        token = secrets.token_urlsafe(32)
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self.max_age)
+
+        session_id = await db.scalar(
+            insert(Session)
+            .values(
+                user_id=user_id,
+                token_hash=self._hash_token(token),
+                expires_at=expires_at,
+                user_agent=user_agent,
+                ip_address=ip_address,
+                last_activity=now,
+            )
+            .returning(Session.id)
+        )
+        assert session_id is not None
+
+        signed_token = self._sign(token, session_id, user_id, expires_at, email)
+        return signed_token, session_id
+
     async def verify_session(
         self,
         db: AsyncSession,
@@ -77,6 +159,7 @@ class SessionService:
                     Session.id == session_id,
                     Session.token_hash == token_hash,
                     Session.expires_at > datetime.now(timezone.utc),
+                    Session.revoked_at.is_(None),
                 )
             )
 
@@ -95,12 +178,47 @@ class SessionService:
         except (BadSignature, SignatureExpired, KeyError):
             return None
 
+    def verify_stateless(self, signed_token: str) -> Optional[SessionClaims]:
+        """Verify a session from its signed claims without touching the database.
+
+        Returns None when the cookie is invalid, revoked, lacks claims (older
+        cookies) or the revocation list is not in sync; callers then fall
+        back to ``verify_session``.
+        """
+        if not self.revocations.ready:
+            return None
+        try:
+            data = self.serializer.loads(signed_token, max_age=self.max_age)
+            claims = SessionClaims(
+                session_id=data["session_id"],
+                user_id=data["user_id"],
+                email=data["email"],
+                expires_at=data["exp"],
+            )
+        except (BadSignature, SignatureExpired, KeyError):
+            return None
+
+        if claims.expires_at <= time.time():
+            return None
+        if self.revocations.is_revoked(claims.session_id):
+            return None
+        return claims
+
     async def get_user_from_session(
         self,
         db: AsyncSession,
         signed_token: str,
     ) -> User | None:
-        """Get user from session token."""
+        """Get user from session token.
+
+        In stateless mode the returned user is a transient instance built
+        from the cookie claims (id and email only, not attached to ``db``).
+        """
+        if self.stateless:
+            claims = self.verify_stateless(signed_token)
+            if claims:
+                return User(id=claims.user_id, email=claims.email)
+
         result = await self.verify_session(db, signed_token)
         return result[1] if result else None
 
@@ -109,25 +227,47 @@ class SessionService:
         db: AsyncSession,
         signed_token: str,
     ) -> bool:
-        """Destroy a session."""
+        """Destroy a session.
+
+        The row is marked revoked rather than deleted so that other workers
+        can pick the revocation up; expiry cleanup removes it later.
+        """
         try:
             data = self.serializer.loads(signed_token, max_age=self.max_age)
             session_id = data["session_id"]
-
-            result = await db.execute(delete(Session).where(Session.id == session_id))
-            await db.commit()
-            return bool(result.rowcount)  # type: ignore[attr-defined]
-
         except (BadSignature, SignatureExpired, KeyError):
             return False
 
-    async def cleanup_expired_sessions(self, db: AsyncSession) -> int:
-        """Remove expired sessions from database."""
-        result = await db.execute(
-            delete(Session).where(Session.expires_at <= datetime.now(timezone.utc))
+        expires_at = await db.scalar(
+            update(Session)
+            .where(Session.id == session_id, Session.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+            .returning(Session.expires_at)
+            .execution_options(synchronize_session=False)
         )
         await db.commit()
-        return result.rowcount or 0  # type: ignore[attr-defined]
+        if expires_at is None:
+            return False
+
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        self.revocations.add(session_id, expires_at.timestamp())
+        return True
+
+    async def cleanup_expired_sessions(
+        self,
+        db: AsyncSession,
+        batch_size: int = settings.cleanup_batch_size,
+        pause: float = settings.cleanup_batch_pause,
+    ) -> int:
+        """Remove expired sessions from database in bounded batches."""
+        return await delete_in_batches(
+            db,
+            Session.id,
+            Session.expires_at <= datetime.now(timezone.utc),
+            batch_size=batch_size,
+            pause=pause,
+        )
 
 
 # Global session service instance
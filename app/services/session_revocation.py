@@ -0,0 +1,125 @@
+"""In-memory list of revoked sessions for stateless cookie verification."""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models.session import Session
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# Overlap between incremental syncs to tolerate clock skew between workers
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class SessionRevocationList:
+    """Bounded set of revoked-but-unexpired session ids.
+
+    Entries are only needed until the session would have expired anyway, so
+    memory is bounded by the number of logouts within one session lifetime.
+    The list is refreshed incrementally from ``sessions.revoked_at``; if it
+    has never synced, has gone stale or overflows ``max_entries``, it
+    reports itself as not ``ready`` and callers must verify against the
+    database instead. It never guesses.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = settings.session_revocation_max_entries,
+        sync_interval: float = settings.session_revocation_sync_interval,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    ) -> None:
+        self.max_entries = max_entries
+        self.sync_interval = sync_interval
+        self.session_factory = session_factory
+        self._revoked: dict[int, float] = {}
+        self._synced_until: datetime | None = None
+        self._last_sync: float | None = None
+        self._overflowed = False
+        self._task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    @property
+    def ready(self) -> bool:
+        """Whether lookups can be trusted without a database check."""
+        if self._last_sync is None or self._overflowed:
+            return False
+        return time.monotonic() - self._last_sync < self.sync_interval * 3
+
+    def add(self, session_id: int, expires_at: float) -> None:
+        """Record a revocation (epoch seconds expiry) made by this process."""
+        self._revoked[session_id] = expires_at
+        if len(self._revoked) > self.max_entries:
+            self._evict_expired()
+            self._overflowed = len(self._revoked) > self.max_entries
+
+    def is_revoked(self, session_id: int) -> bool:
+        """Check whether a session has been revoked."""
+        return session_id in self._revoked
+
+    def _evict_expired(self) -> None:
+        now = time.time()
+        self._revoked = {
+            session_id: expires_at
+            for session_id, expires_at in self._revoked.items()
+            if expires_at > now
+        }
+
+    async def sync(self, db: AsyncSession) -> int:
+        """Pull revocations recorded since the last sync. Returns rows read."""
+        now = datetime.now(timezone.utc)
+        query = select(Session.id, Session.expires_at).where(
+            Session.revoked_at.is_not(None), Session.expires_at > now
+        )
+        if self._synced_until is not None:
+            query = query.where(Session.revoked_at >= self._synced_until - SYNC_OVERLAP)
+
+        rows = (await db.execute(query)).all()
+        for session_id, expires_at in rows:
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            self._revoked[session_id] = expires_at.timestamp()
+
+        self._evict_expired()
+        self._overflowed = len(self._revoked) > self.max_entries
+        self._synced_until = now
+        self._last_sync = time.monotonic()
+        return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with self.session_factory() as db:
+                    await self.sync(db)
+            except Exception:
+                logger.error("Session revocation sync failed", exc_info=True)
+            await asyncio.sleep(self.sync_interval)
+
+    def start(self) -> None:
+        """Start syncing from the sessions table in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="session-revocations")
+
+    async def stop(self) -> None:
+        """Stop the background sync."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Global revocation list instance
+revocation_list = SessionRevocationList()
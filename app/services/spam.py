@@ -0,0 +1,189 @@
+"""Heuristic spam scoring for inbound mail (spam-filtering-mvp.md).
+
+Every message is scored from its envelope and header block only; the body
+is never read. Each rule that fires adds one point and a reason code, and
+a message scoring ``threshold`` or more is spam. The bad sender domain list
+is compiled into a set that is matched label by label (``mail.bad.example``
+is caught by an entry for ``bad.example``), and is reloaded from
+``SPAM_BAD_SENDER_DOMAINS_FILE`` when that file changes, without a restart.
+"""
+
+import asyncio
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from app.config import get_settings
+from app.utils.logging import get_logger
+from app.utils.mail_headers import from_address
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# Reason codes, in the order rules are evaluated
+PROVIDER_FLAGGED = "provider-flagged"
+BAD_SENDER_DOMAIN = "bad-sender-domain"
+MALFORMED_FROM = "malformed-from"
+MISSING_DATE = "missing-date"
+EXCESSIVE_RECIPIENTS = "excessive-recipients"
+
+# The headers the rules look at, with folded continuation lines; one scan
+# of the header block finds all of them
+_HEADER_RE = re.compile(
+    rb"^(from|date|to|cc|x-spam-flag|x-spam-status)[ \t]*:"
+    rb"([^\r\n]*(?:\r?\n[ \t][^\r\n]*)*)",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def parse_domains(lines: Iterable[str]) -> frozenset[str]:
+    """Normalize domain entries, skipping blanks and ``#`` comments."""
+    domains = set()
+    for line in lines:
+        domain = line.split("#", 1)[0].strip().lower().lstrip("*.").rstrip(".")
+        if domain:
+            domains.add(domain)
+    return frozenset(domains)
+
+
+@dataclass(frozen=True, slots=True)
+class SpamVerdict:
+    """Score and reason codes for one message."""
+
+    score: int
+    reasons: tuple[str, ...]
+    spam: bool
+
+    @property
+    def reason(self) -> str:
+        return ",".join(self.reasons)
+
+
+class SpamFilter:
+    """Score messages against the MVP heuristics.
+
+    ``score`` is pure CPU work over bytes already in memory and safe to call
+    from any thread; a reload swaps the domain set in one assignment, so a
+    message is always scored against either the old or the new list.
+    """
+
+    def __init__(
+        self,
+        bad_domains: Iterable[str] = settings.spam_bad_sender_domains.split(","),
+        domains_file: str | None = settings.spam_bad_sender_domains_file,
+        threshold: int = settings.spam_threshold,
+        max_recipients: int = settings.spam_max_recipients,
+        reload_interval: float = settings.spam_reload_interval,
+    ) -> None:
+        self.threshold = threshold
+        self.max_recipients = max_recipients
+        self.reload_interval = reload_interval
+        self.domains_file = Path(domains_file) if domains_file else None
+        self._configured = parse_domains(bad_domains)
+        self.domains = self._configured
+        self._file_state: tuple[int, int] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self.reload()
+
+    def reload(self) -> bool:
+        """Re-read the domains file if it changed. Returns whether it did.
+
+        A file that cannot be read keeps the current list in place.
+        """
+        if self.domains_file is None:
+            return False
+        try:
+            stat = self.domains_file.stat()
+            state = (stat.st_mtime_ns, stat.st_size)
+            if state == self._file_state:
+                return False
+            lines = self.domains_file.read_text().splitlines()
+        except OSError:
+            logger.error(
+                "Spam domain list unreadable",
+                extra={"path": str(self.domains_file)},
+                exc_info=True,
+            )
+            return False
+        self.domains = self._configured | parse_domains(lines)
+        self._file_state = state
+        logger.info("Spam domain list loaded", extra={"domains": len(self.domains)})
+        return True
+
+    def is_bad_domain(self, domain: str) -> bool:
+        """Whether ``domain`` or any parent domain is on the list."""
+        domains = self.domains
+        domain = domain.lower().rstrip(".")
+        while True:
+            if domain in domains:
+                return True
+            dot = domain.find(".")
+            if dot == -1:
+                return False
+            domain = domain[dot + 1 :]
+
+    def score(
+        self, header_block: bytes, mail_from: str | None = None, recipients: int = 0
+    ) -> SpamVerdict:
+        """Score a message from its header block and envelope."""
+        froms: list[str] = []
+        has_date = False
+        listed = 0
+        flagged = False
+        for match in _HEADER_RE.finditer(header_block):
+            name = match.group(1).lower()
+            value = match.group(2)
+            if name == b"from":
+                froms.append(value.decode("latin-1"))
+            elif name == b"date":
+                has_date = has_date or bool(value.strip())
+            elif name in (b"to", b"cc"):
+                listed += value.count(b"@")
+            elif name == b"x-spam-flag":
+                flagged = flagged or value.strip().lower() == b"yes"
+            else:
+                flagged = flagged or value.lstrip()[:3].lower() == b"yes"
+
+        reasons = []
+        if flagged:
+            reasons.append(PROVIDER_FLAGGED)
+        address = from_address(froms[0]) if len(froms) == 1 else None
+        senders = [a for a in (mail_from, address) if a and "@" in a]
+        if any(self.is_bad_domain(a.rpartition("@")[2]) for a in senders):
+            reasons.append(BAD_SENDER_DOMAIN)
+        if address is None:
+            reasons.append(MALFORMED_FROM)
+        if not has_date:
+            reasons.append(MISSING_DATE)
+        if max(recipients, listed) > self.max_recipients:
+            reasons.append(EXCESSIVE_RECIPIENTS)
+        return SpamVerdict(len(reasons), tuple(reasons), len(reasons) >= self.threshold)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception:
+                logger.error("Spam domain list reload failed", exc_info=True)
+
+    def start(self) -> None:
+        """Watch the domains file for changes in the background."""
+        if self.domains_file is not None and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="spam-reload")
+
+    async def stop(self) -> None:
+        """Stop watching the domains file."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Global spam filter instance
+spam_filter = SpamFilter()
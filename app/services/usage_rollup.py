@@ -0,0 +1,276 @@
+"""Daily/weekly usage rollups materialized incrementally from email_logs."""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import Date, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.db.upsert import dialect_insert
+from app.models.email_log import BOUNCED, FAILED, SPAM, EmailLog
+from app.models.usage_rollup import RollupWatermark, UsageDaily, UsageWeekly
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+WATERMARK_NAME = "usage_rollup"
+COUNTERS = (
+    "emails_received",
+    "emails_forwarded",
+    "emails_failed",
+    "emails_spam",
+    "bytes_received",
+)
+
+
+@dataclass(frozen=True)
+class RollupReport:
+    """Result of one rollup run."""
+
+    days: int
+    weeks: int
+    duration: float
+
+
+def week_start(day: date) -> date:
+    """Monday of the ISO week containing ``day``."""
+    return day - timedelta(days=day.weekday())
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+
+
+def _as_date(value: date | str) -> date:
+    # SQLite's date() returns text
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _chunks(values: list[int], size: int) -> Iterable[list[int]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+class UsageRollup:
+    """Keep usage_daily and usage_weekly up to date from email_logs.
+
+    Each run reads only log rows inserted or updated since the watermark
+    (``ix_email_logs_updated_at``), collects the (user, day) buckets they
+    touch, and recomputes those buckets in full with one aggregate query per
+    day and batch of users. Rows are written with upserts that replace the
+    counters rather than add to them, so re-reading rows is harmless: runs
+    are idempotent, a run that dies halfway is simply repeated, and the
+    watermark can trail by ``overlap`` seconds to catch rows committed out
+    of order. Weekly rows are then recomputed from the daily ones.
+    """
+
+    def __init__(
+        self,
+        interval: float = settings.rollup_interval,
+        batch_size: int = settings.rollup_batch_size,
+        overlap: float = settings.rollup_overlap,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    ) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self.overlap = timedelta(seconds=overlap)
+        self.session_factory = session_factory
+        self._task: asyncio.Task[None] | None = None
+
+    async def get_watermark(self, db: AsyncSession) -> datetime | None:
+        """When the last successful run started, if any."""
+        watermark: datetime | None = await db.scalar(
+            select(RollupWatermark.processed_until).where(
+                RollupWatermark.name == WATERMARK_NAME
+            )
+        )
+        return watermark
+
+    async def _set_watermark(self, db: AsyncSession, until: datetime) -> None:
+        insert = dialect_insert(db, RollupWatermark).values(
+            name=WATERMARK_NAME, processed_until=until
+        )
+        stmt = insert.on_conflict_do_update(
+            index_elements=[RollupWatermark.name],
+            set_={"processed_until": insert.excluded.processed_until},
+        )
+        await db.execute(stmt)
+
+    def _utc_day(self, db: AsyncSession) -> Any:
+        if db.get_bind().dialect.name == "postgresql":
+            return cast(func.timezone("UTC", EmailLog.received_at), Date)
+        return func.date(EmailLog.received_at)
+
+    async def _touched_days(
+        self, db: AsyncSession, since: datetime | None
+    ) -> dict[date, set[int]]:
+        day = self._utc_day(db)
+        query = select(EmailLog.user_id, day).distinct()
+        if since is not None:
+            query = query.where(EmailLog.updated_at >= since)
+        touched: dict[date, set[int]] = {}
+        for user_id, value in await db.execute(query):
+            touched.setdefault(_as_date(value), set()).add(user_id)
+        return touched
+
+    async def _upsert(
+        self,
+        db: AsyncSession,
+        model: type[UsageDaily] | type[UsageWeekly],
+        key: str,
+        rows: list[dict[str, Any]],
+    ) -> None:
+        insert = dialect_insert(db, model).values(rows)
+        set_: dict[str, Any] = {name: insert.excluded[name] for name in COUNTERS}
+        set_["updated_at"] = func.now()
+        stmt = insert.on_conflict_do_update(
+            index_elements=[model.user_id, getattr(model, key)], set_=set_
+        )
+        await db.execute(stmt)
+
+    async def _rollup_day(
+        self, db: AsyncSession, day: date, user_ids: Sequence[int]
+    ) -> None:
+        counts: dict[int, dict[str, Any]] = {
+            user_id: {"user_id": user_id, "day": day, **dict.fromkeys(COUNTERS, 0)}
+            for user_id in user_ids
+        }
+        start = _day_start(day)
+        for row in await db.execute(
+            select(
+                EmailLog.user_id,
+                func.count(),
+                func.count(EmailLog.forwarded_at),
+                func.count().filter(EmailLog.status.in_([FAILED, BOUNCED])),
+                func.count().filter(EmailLog.status == SPAM),
+                func.coalesce(func.sum(EmailLog.size_bytes), 0),
+            )
+            .where(
+                EmailLog.user_id.in_(user_ids),
+                EmailLog.received_at >= start,
+                EmailLog.received_at < start + timedelta(days=1),
+            )
+            .group_by(EmailLog.user_id)
+        ):
+            counts[row[0]].update(zip(COUNTERS, row[1:]))
+        await self._upsert(db, UsageDaily, "day", list(counts.values()))
+
+    async def _rollup_week(
+        self, db: AsyncSession, week: date, user_ids: Sequence[int]
+    ) -> None:
+        counts: dict[int, dict[str, Any]] = {
+            user_id: {
+                "user_id": user_id,
+                "week_start": week,
+                **dict.fromkeys(COUNTERS, 0),
+            }
+            for user_id in user_ids
+        }
+        for row in await db.execute(
+            select(
+                UsageDaily.user_id,
+                *(func.sum(getattr(UsageDaily, name)) for name in COUNTERS),
+            )
+            .where(
+                UsageDaily.user_id.in_(user_ids),
+                UsageDaily.day >= week,
+                UsageDaily.day < week + timedelta(days=7),
+            )
+            .group_by(UsageDaily.user_id)
+        ):
+            counts[row[0]].update(zip(COUNTERS, row[1:]))
+        await self._upsert(db, UsageWeekly, "week_start", list(counts.values()))
+
+    async def run(self, db: AsyncSession) -> RollupReport:
+        """Roll up log rows changed since the watermark."""
+        start_time = time.perf_counter()
+        started = datetime.now(timezone.utc)
+        watermark = await self.get_watermark(db)
+        since = watermark - self.overlap if watermark is not None else None
+
+        touched = await self._touched_days(db, since)
+        weeks: dict[date, set[int]] = {}
+        for day, user_ids in sorted(touched.items()):
+            for chunk in _chunks(sorted(user_ids), self.batch_size):
+                await self._rollup_day(db, day, chunk)
+            weeks.setdefault(week_start(day), set()).update(user_ids)
+        for week, user_ids in sorted(weeks.items()):
+            for chunk in _chunks(sorted(user_ids), self.batch_size):
+                await self._rollup_week(db, week, chunk)
+
+        await self._set_watermark(db, started)
+        await db.commit()
+        return RollupReport(
+            days=sum(len(user_ids) for user_ids in touched.values()),
+            weeks=sum(len(user_ids) for user_ids in weeks.values()),
+            duration=time.perf_counter() - start_time,
+        )
+
+    async def run_once(self) -> RollupReport:
+        """Run once in a fresh session and log the result."""
+        async with self.session_factory() as db:
+            report = await self.run(db)
+        logger.info(
+            "Usage rollup finished",
+            extra={
+                "days": report.days,
+                "weeks": report.weeks,
+                "duration_ms": round(report.duration * 1000),
+            },
+        )
+        return report
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.error("Usage rollup failed", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Run rollups in the background every ``interval`` seconds."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="usage-rollup")
+
+    async def stop(self) -> None:
+        """Stop the background schedule."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+async def usage_history(
+    db: AsyncSession, user_id: int, granularity: str, since: date
+) -> list[UsageDaily] | list[UsageWeekly]:
+    """Precomputed usage buckets starting on or after ``since``, oldest first."""
+    if granularity == "weekly":
+        return list(
+            await db.scalars(
+                select(UsageWeekly)
+                .where(UsageWeekly.user_id == user_id, UsageWeekly.week_start >= since)
+                .order_by(UsageWeekly.week_start)
+            )
+        )
+    return list(
+        await db.scalars(
+            select(UsageDaily)
+            .where(UsageDaily.user_id == user_id, UsageDaily.day >= since)
+            .order_by(UsageDaily.day)
+        )
+    )
+
+
+# Global usage rollup instance
+usage_rollup = UsageRollup()
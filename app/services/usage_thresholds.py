@@ -0,0 +1,367 @@
+"""Usage warnings on sliding thresholds (sliding-thresholds.md)."""
+
+import asyncio
+import calendar
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Awaitable, Callable, Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.config.environments import PlanTier
+from app.db.session import AsyncSessionLocal
+from app.db.upsert import dialect_insert
+from app.models.usage_warning import UsageWarning
+from app.models.user import User
+from app.services.bandwidth import (
+    BandwidthAccountant,
+    UsageCounters,
+    bandwidth_accountant,
+    period_start,
+)
+from app.services.email import email_service
+from app.services.enforcement import BANDWIDTH_EXCEEDED, EMAILS_EXCEEDED
+from app.services.webhooks import WebhookDispatcher, WebhookEvent, webhook_dispatcher
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# Threshold level recorded for usage above the limit (100% is its own level)
+OVER_LIMIT = 101
+# Elapsed fraction from which warnings carry "approaching reset" context
+APPROACHING_RESET = 0.75
+# usage_percent is a SmallInteger; anything past this is just "a lot"
+MAX_REPORTED_PERCENT = 999
+
+BYTES = "bytes"
+EMAILS = "emails"
+
+
+@dataclass(frozen=True, slots=True)
+class ThresholdEvent:
+    """A user's usage crossed a warning threshold for the first time this period."""
+
+    user_id: int
+    period_start: date
+    metric: str
+    threshold: int
+    usage_percent: int
+    approaching_reset: bool
+
+    @property
+    def over_limit(self) -> bool:
+        return self.threshold == OVER_LIMIT
+
+
+EventSink = Callable[[list[ThresholdEvent]], Awaitable[None]]
+
+
+def period_elapsed(at: datetime | None = None) -> float:
+    """Fraction (0.0-1.0) of the calendar month containing ``at`` that has passed."""
+    at = at or datetime.now(timezone.utc)
+    days = calendar.monthrange(at.year, at.month)[1]
+    start = datetime(at.year, at.month, 1, tzinfo=timezone.utc)
+    return (at - start).total_seconds() / (days * 86400)
+
+
+def _percent(used: int, limit: int) -> int:
+    return min(used * 100 // limit, MAX_REPORTED_PERCENT) if limit > 0 else 0
+
+
+def _chunks(values: list[int], size: int) -> Iterable[list[int]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+class ThresholdEvaluator:
+    """Emit usage warnings as counters move, once per threshold and period.
+
+    Only users whose counters changed since the last pass (the accountant's
+    dirty set) are evaluated, so the cost follows mail volume rather than
+    the number of users. The last threshold emitted per user and metric is
+    kept in memory as one small tuple per user, which makes a pass over
+    users below their next threshold free of writes. Crossings are inserted
+    into ``usage_warnings`` with ON CONFLICT DO NOTHING; only rows that were
+    actually inserted become events, so several processes (or a restart)
+    never emit the same warning twice. Events are handed to every sink in
+    one batch per pass.
+    """
+
+    def __init__(
+        self,
+        accountant: BandwidthAccountant = bandwidth_accountant,
+        plan_tiers: dict[str, PlanTier] = settings.plan_tiers,
+        default_tier: str = settings.default_plan_tier,
+        early_thresholds: list[tuple[float, int]] = (
+            settings.usage_warning_early_thresholds
+        ),
+        early_enabled: bool = settings.usage_warning_early_enabled,
+        global_threshold: int = settings.usage_warning_global_threshold,
+        emails_enabled: bool = settings.usage_warning_emails_enabled,
+        webhooks: WebhookDispatcher | None = (
+            webhook_dispatcher if settings.webhooks_enabled else None
+        ),
+        interval: float = settings.usage_warning_interval,
+        batch_size: int = settings.usage_warning_batch_size,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    ) -> None:
+        self.accountant = accountant
+        self.plan_tiers = plan_tiers
+        self.default_limits = plan_tiers[default_tier]
+        self.early_thresholds = early_thresholds
+        self.early_enabled = early_enabled
+        self.global_threshold = global_threshold
+        self.interval = interval
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+        self.sinks: list[EventSink] = []
+        self.webhooks = webhooks
+        if emails_enabled:
+            self.sinks.append(self.email_warnings)
+        if webhooks is not None:
+            self.sinks.append(self.publish_webhooks)
+        # user_id -> (period, last bytes threshold, last emails threshold)
+        self._emitted: dict[int, tuple[date, int, int]] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    def add_sink(self, sink: EventSink) -> None:
+        """Also deliver event batches to ``sink``."""
+        self.sinks.append(sink)
+
+    def threshold_for(self, used: int, limit: int, elapsed: float) -> int:
+        """Highest threshold ``used`` has reached at ``elapsed``, or 0."""
+        if used > limit:
+            return OVER_LIMIT
+        percent = _percent(used, limit)
+        if percent >= 100:
+            return 100
+        if percent >= self.global_threshold:
+            return self.global_threshold
+        if self.early_enabled:
+            for until, threshold in self.early_thresholds:
+                if elapsed < until:
+                    return threshold if percent >= threshold else 0
+        return 0
+
+    async def _load_emitted(
+        self, db: AsyncSession, user_ids: list[int], period: date
+    ) -> None:
+        emitted = {user_id: [0, 0] for user_id in user_ids}
+        for user_id, metric, threshold in await db.execute(
+            select(
+                UsageWarning.user_id,
+                UsageWarning.metric,
+                func.max(UsageWarning.threshold),
+            )
+            .where(
+                UsageWarning.user_id.in_(user_ids),
+                UsageWarning.period_start == period,
+            )
+            .group_by(UsageWarning.user_id, UsageWarning.metric)
+        ):
+            emitted[user_id][0 if metric == BYTES else 1] = threshold
+        for user_id, (bytes_level, emails_level) in emitted.items():
+            self._emitted[user_id] = (period, bytes_level, emails_level)
+
+    async def evaluate(
+        self, db: AsyncSession, user_ids: Iterable[int], at: datetime | None = None
+    ) -> list[ThresholdEvent]:
+        """Record and return the new crossings for ``user_ids``."""
+        at = at or datetime.now(timezone.utc)
+        period = period_start(at)
+        elapsed = period_elapsed(at)
+        user_ids = list(user_ids)
+        if not user_ids:
+            return []
+
+        tiers: dict[int, str] = {}
+        for user_id, plan_tier in await db.execute(
+            select(User.id, User.plan_tier).where(User.id.in_(user_ids))
+        ):
+            tiers[user_id] = plan_tier
+        unloaded = [
+            user_id
+            for user_id in tiers
+            if self.accountant.current_usage(user_id, at) is None
+        ]
+        if unloaded:
+            await self.accountant.load_base(db, unloaded, at)
+        unknown = [
+            user_id
+            for user_id in tiers
+            if user_id not in self._emitted or self._emitted[user_id][0] != period
+        ]
+        if unknown:
+            await self._load_emitted(db, unknown, period)
+
+        candidates: list[ThresholdEvent] = []
+        for user_id, plan_tier in tiers.items():
+            limits = self.plan_tiers.get(plan_tier, self.default_limits)
+            usage = self.accountant.current_usage(user_id, at) or UsageCounters()
+            _, last_bytes, last_emails = self._emitted[user_id]
+            for metric, used, limit, last in (
+                (BYTES, usage.bytes_used, limits.bytes_per_month, last_bytes),
+                (EMAILS, usage.emails_received, limits.emails_per_month, last_emails),
+            ):
+                threshold = self.threshold_for(used, limit, elapsed)
+                if threshold > last:
+                    candidates.append(
+                        ThresholdEvent(
+                            user_id,
+                            period,
+                            metric,
+                            threshold,
+                            _percent(used, limit),
+                            elapsed >= APPROACHING_RESET,
+                        )
+                    )
+        if not candidates:
+            return []
+
+        insert = dialect_insert(db, UsageWarning).values(
+            [
+                {
+                    "user_id": event.user_id,
+                    "period_start": event.period_start,
+                    "metric": event.metric,
+                    "threshold": event.threshold,
+                    "usage_percent": event.usage_percent,
+                }
+                for event in candidates
+            ]
+        )
+        stmt = insert.on_conflict_do_nothing(
+            index_elements=[
+                UsageWarning.user_id,
+                UsageWarning.period_start,
+                UsageWarning.metric,
+                UsageWarning.threshold,
+            ]
+        ).returning(UsageWarning.user_id, UsageWarning.metric)
+        inserted = {(user_id, metric) for user_id, metric in await db.execute(stmt)}
+        await db.commit()
+
+        for event in candidates:
+            _, last_bytes, last_emails = self._emitted[event.user_id]
+            if event.metric == BYTES:
+                last_bytes = max(last_bytes, event.threshold)
+            else:
+                last_emails = max(last_emails, event.threshold)
+            self._emitted[event.user_id] = (period, last_bytes, last_emails)
+        return [
+            event for event in candidates if (event.user_id, event.metric) in inserted
+        ]
+
+    async def run_once(self, at: datetime | None = None) -> int:
+        """Evaluate users whose usage moved and emit the new crossings."""
+        dirty = self.accountant.take_dirty_users()
+        if not dirty:
+            return 0
+        events: list[ThresholdEvent] = []
+        try:
+            async with self.session_factory() as db:
+                for chunk in _chunks(sorted(dirty), self.batch_size):
+                    events.extend(await self.evaluate(db, chunk, at))
+        except Exception:
+            # Evaluate these users again on the next pass
+            self.accountant.mark_dirty(dirty)
+            raise
+        if events:
+            await self._emit(events)
+        return len(events)
+
+    async def _emit(self, events: list[ThresholdEvent]) -> None:
+        for sink in self.sinks:
+            try:
+                await sink(events)
+            except Exception:
+                logger.error(
+                    "Usage warning sink failed",
+                    exc_info=True,
+                    extra={"events": len(events)},
+                )
+
+    async def email_warnings(self, events: list[ThresholdEvent]) -> None:
+        """Notification sink: one email per user for their highest crossing."""
+        highest: dict[int, ThresholdEvent] = {}
+        for event in events:
+            current = highest.get(event.user_id)
+            if current is None or event.threshold > current.threshold:
+                highest[event.user_id] = event
+        async with self.session_factory() as db:
+            emails: dict[int, str] = {}
+            for user_id, email in await db.execute(
+                select(User.id, User.email).where(User.id.in_(list(highest)))
+            ):
+                emails[user_id] = email
+        for user_id, event in highest.items():
+            if user_id in emails:
+                await email_service.send_usage_warning(
+                    emails[user_id],
+                    event.threshold,
+                    event.usage_percent,
+                    event.metric,
+                    event.approaching_reset,
+                )
+
+    async def publish_webhooks(self, events: list[ThresholdEvent]) -> None:
+        """Webhook sink: ``usage_threshold`` and ``over_limit`` events."""
+        assert self.webhooks is not None
+        self.webhooks.publish(
+            (
+                WebhookEvent(
+                    "over_limit",
+                    event.user_id,
+                    {
+                        "enforcement": settings.enforcement_mode,
+                        "reason_code": (
+                            BANDWIDTH_EXCEEDED
+                            if event.metric == BYTES
+                            else EMAILS_EXCEEDED
+                        ),
+                    },
+                )
+                if event.over_limit
+                else WebhookEvent(
+                    "usage_threshold",
+                    event.user_id,
+                    {
+                        "metric": event.metric,
+                        "threshold_percent": event.threshold,
+                        "current_percent": event.usage_percent,
+                    },
+                )
+            )
+            for event in events
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.error("Usage warning evaluation failed", exc_info=True)
+
+    def start(self) -> None:
+        """Evaluate dirty users in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="usage-thresholds")
+
+    async def stop(self) -> None:
+        """Stop evaluating."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Global usage threshold evaluator instance
+threshold_evaluator = ThresholdEvaluator()
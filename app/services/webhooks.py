@@ -0,0 +1,630 @@
+"""Webhook delivery engine (webhook-events.md)."""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable
+
+import aiohttp
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.db.upsert import dialect_insert
+from app.models.webhook import DEAD, PENDING, Webhook, WebhookDelivery
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+ENVELOPE_VERSION = "1"
+# How long a claimed delivery is reserved for this process before another
+# process (or this one, after a restart) may claim it again
+CLAIM_LEASE = timedelta(minutes=10)
+# Endpoint workers exit after this long without work
+WORKER_IDLE_TIMEOUT = 60.0
+USER_AGENT = "quitspyingonme-webhooks/1"
+
+
+def new_event_id() -> str:
+    """Unique event id; receivers de-duplicate on it."""
+    return f"evt_{secrets.token_hex(12)}"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass(frozen=True, slots=True)
+class WebhookEvent:
+    """One event for a user's webhooks."""
+
+    event: str
+    user_id: int
+    metadata: dict[str, Any]
+    alias_id: int | None = None
+    id: str = field(default_factory=new_event_id)
+    timestamp: datetime = field(default_factory=_utcnow)
+
+    def envelope(self) -> dict[str, Any]:
+        """The JSON envelope from the spec."""
+        return {
+            "event": self.event,
+            "version": ENVELOPE_VERSION,
+            "id": self.id,
+            "timestamp": self.timestamp.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "user_id": str(self.user_id),
+            "alias_id": str(self.alias_id) if self.alias_id is not None else None,
+            "metadata": self.metadata,
+        }
+
+
+def sign(secret: str, body: bytes) -> str:
+    """X-QSM-Signature: hex HMAC-SHA256 of the body."""
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def backoff_delay(
+    attempts: int,
+    base: float,
+    maximum: float,
+    rand: Callable[[], float] = random.random,
+) -> float:
+    """Exponential backoff with jitter: half fixed, half random."""
+    ceiling: float = min(maximum, base * 2.0 ** max(attempts - 1, 0))
+    return ceiling / 2 + rand() * ceiling / 2
+
+
+class CircuitBreaker:
+    """Stop calling an endpoint after consecutive failures.
+
+    After ``threshold`` consecutive failures the breaker opens for
+    ``cooldown`` seconds. Once that passes a single probe is let through:
+    success closes the breaker, failure opens it again for twice as long
+    (up to ``max_cooldown``).
+    """
+
+    def __init__(self, threshold: int, cooldown: float, max_cooldown: float) -> None:
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self._probing = False
+
+    @property
+    def closed(self) -> bool:
+        return self.open_until == 0.0
+
+    def allow(self, now: float) -> bool:
+        """Whether a request may be sent at monotonic time ``now``."""
+        if self.closed:
+            return True
+        if now < self.open_until or self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.open_until = 0.0
+        self.cooldown = self.base_cooldown
+        self._probing = False
+
+    def record_failure(self, now: float) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.threshold:
+            self.open_until = now + self.cooldown
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+        self._probing = False
+
+
+@dataclass(slots=True)
+class _Delivery:
+    id: int
+    webhook_id: int
+    url: str
+    secret: str
+    key_id: str | None
+    event_id: str
+    payload: str
+    attempts: int
+    batch: bool = False
+    # Monotonic time it was queued; starts the coalescing deadline
+    queued_at: float = 0.0
+
+
+class _Endpoint:
+    """Queue, workers and breaker for one webhook."""
+
+    def __init__(self, queue_size: int, breaker: CircuitBreaker) -> None:
+        self.queue: asyncio.Queue[_Delivery] = asyncio.Queue(queue_size)
+        self.queued: set[int] = set()
+        self.workers: set[asyncio.Task[None]] = set()
+        self.breaker = breaker
+        # One worker at a time fills a batch, so batches are not split
+        self.collecting = asyncio.Lock()
+
+
+class WebhookDispatcher:
+    """Deliver signed webhook events concurrently, with retries.
+
+    ``publish`` only appends to memory, so the ingest path never waits on
+    the network or the database. Every ``publish_interval`` seconds the
+    published events are fanned out to the users' active webhooks and
+    stored in ``webhook_deliveries`` (the persistent retry queue) with one
+    multi-row insert, then queued in memory for immediate delivery.
+
+    Each endpoint has its own bounded queue, up to ``max_per_endpoint``
+    workers and a circuit breaker, and all requests share one global
+    concurrency limit and one aiohttp keep-alive connection pool. A slow or
+    dead endpoint therefore only ever ties up its own share. Failed
+    deliveries are retried with exponential backoff and jitter until
+    ``max_attempts``; rows due for a retry, or left behind by a stopped
+    process, are claimed by a periodic scan. Delivery is at-least-once;
+    receivers de-duplicate on the event id.
+
+    Webhooks with ``batch_events`` set receive JSON arrays of envelopes
+    instead: a batch is sent once it holds ``coalesce_max_events`` events
+    or ``coalesce_max_bytes`` of payload, or ``coalesce_max_wait`` seconds
+    after its first event was queued. Events keep their own ids and their
+    own rows in the retry queue; a batch succeeds or fails as a whole.
+    """
+
+    def __init__(
+        self,
+        timeout: float = settings.webhook_timeout,
+        max_concurrency: int = settings.webhook_max_concurrency,
+        max_per_endpoint: int = settings.webhook_max_per_endpoint,
+        queue_size: int = settings.webhook_queue_size,
+        max_attempts: int = settings.webhook_max_attempts,
+        backoff_base: float = settings.webhook_backoff_base,
+        backoff_max: float = settings.webhook_backoff_max,
+        breaker_threshold: int = settings.webhook_breaker_threshold,
+        breaker_cooldown: float = settings.webhook_breaker_cooldown,
+        breaker_max_cooldown: float = settings.webhook_breaker_max_cooldown,
+        publish_interval: float = settings.webhook_publish_interval,
+        retry_poll_interval: float = settings.webhook_retry_poll_interval,
+        batch_size: int = settings.webhook_batch_size,
+        coalesce_max_events: int = settings.webhook_coalesce_max_events,
+        coalesce_max_bytes: int = settings.webhook_coalesce_max_bytes,
+        coalesce_max_wait: float = settings.webhook_coalesce_max_wait,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    ) -> None:
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_per_endpoint = max_per_endpoint
+        self.queue_size = queue_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.breaker_max_cooldown = breaker_max_cooldown
+        self.publish_interval = publish_interval
+        self.retry_poll_interval = retry_poll_interval
+        self.batch_size = batch_size
+        self.coalesce_max_events = coalesce_max_events
+        self.coalesce_max_bytes = coalesce_max_bytes
+        self.coalesce_max_wait = coalesce_max_wait
+        self.session_factory = session_factory
+        self._inbox: list[WebhookEvent] = []
+        # Guards _inbox between publishing threads and the pump
+        self._lock = threading.Lock()
+        self._endpoints: dict[int, _Endpoint] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._delivered: list[int] = []
+        self._failed: list[dict[str, Any]] = []
+        self._http: aiohttp.ClientSession | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def publish(self, events: Iterable[WebhookEvent]) -> None:
+        """Queue events for delivery. Safe to call from any thread."""
+        with self._lock:
+            self._inbox.extend(events)
+
+    async def accept(self) -> int:
+        """Store published events as deliveries and queue them. Returns count."""
+        with self._lock:
+            events, self._inbox = self._inbox, []
+        if not events:
+            return 0
+        try:
+            deliveries = await self._store(events)
+        except Exception:
+            with self._lock:
+                self._inbox[:0] = events
+            raise
+        for delivery in deliveries:
+            self._enqueue(delivery)
+        return len(deliveries)
+
+    async def _store(
+        self, events: list[WebhookEvent], claim: bool = True
+    ) -> list[_Delivery]:
+        async with self.session_factory() as db:
+            webhooks: dict[int, list[Webhook]] = {}
+            for webhook in await db.scalars(
+                select(Webhook).where(
+                    Webhook.user_id.in_({event.user_id for event in events}),
+                    Webhook.is_active.is_(True),
+                )
+            ):
+                webhooks.setdefault(webhook.user_id, []).append(webhook)
+            by_id = {w.id: w for hooks in webhooks.values() for w in hooks}
+
+            # Claimed by this process, or due right away for the retry scan
+            due = _utcnow() + CLAIM_LEASE if claim else _utcnow()
+            rows = [
+                {
+                    "webhook_id": webhook.id,
+                    "event_id": event.id,
+                    "payload": json.dumps(event.envelope(), separators=(",", ":")),
+                    "status": PENDING,
+                    "attempts": 0,
+                    "next_attempt_at": due,
+                }
+                for event in events
+                for webhook in webhooks.get(event.user_id, [])
+            ]
+            deliveries = []
+            for start in range(0, len(rows), self.batch_size):
+                insert = dialect_insert(db, WebhookDelivery).values(
+                    rows[start : start + self.batch_size]
+                )
+                stmt = insert.on_conflict_do_nothing(
+                    index_elements=[
+                        WebhookDelivery.webhook_id,
+                        WebhookDelivery.event_id,
+                    ]
+                ).returning(
+                    WebhookDelivery.id,
+                    WebhookDelivery.webhook_id,
+                    WebhookDelivery.event_id,
+                    WebhookDelivery.payload,
+                )
+                for delivery_id, webhook_id, event_id, payload in await db.execute(
+                    stmt
+                ):
+                    webhook = by_id[webhook_id]
+                    deliveries.append(
+                        _Delivery(
+                            delivery_id,
+                            webhook_id,
+                            webhook.url,
+                            webhook.secret,
+                            webhook.key_id,
+                            event_id,
+                            payload,
+                            0,
+                            webhook.batch_events,
+                        )
+                    )
+            await db.commit()
+        return deliveries
+
+    async def claim_due(self, now: datetime | None = None) -> int:
+        """Claim deliveries whose retry is due and queue them. Returns count."""
+        now = now or _utcnow()
+        async with self.session_factory() as db:
+            due = (
+                select(WebhookDelivery.id)
+                .where(
+                    WebhookDelivery.status == PENDING,
+                    WebhookDelivery.next_attempt_at <= now,
+                )
+                .order_by(WebhookDelivery.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            claimed = (
+                await db.execute(
+                    update(WebhookDelivery)
+                    .where(WebhookDelivery.id.in_(due.scalar_subquery()))
+                    .values(next_attempt_at=now + CLAIM_LEASE)
+                    .returning(
+                        WebhookDelivery.id,
+                        WebhookDelivery.webhook_id,
+                        WebhookDelivery.event_id,
+                        WebhookDelivery.payload,
+                        WebhookDelivery.attempts,
+                    )
+                )
+            ).all()
+            webhooks = {
+                webhook.id: webhook
+                for webhook in await db.scalars(
+                    select(Webhook).where(
+                        Webhook.id.in_({row.webhook_id for row in claimed})
+                    )
+                )
+            }
+            await db.commit()
+
+        count = 0
+        for delivery_id, webhook_id, event_id, payload, attempts in claimed:
+            webhook = webhooks.get(webhook_id)
+            if webhook is None or not webhook.is_active:
+                continue
+            self._enqueue(
+                _Delivery(
+                    delivery_id,
+                    webhook_id,
+                    webhook.url,
+                    webhook.secret,
+                    webhook.key_id,
+                    event_id,
+                    payload,
+                    attempts,
+                    webhook.batch_events,
+                )
+            )
+            count += 1
+        return count
+
+    def _endpoint(self, webhook_id: int) -> _Endpoint:
+        endpoint = self._endpoints.get(webhook_id)
+        if endpoint is None:
+            endpoint = _Endpoint(
+                self.queue_size,
+                CircuitBreaker(
+                    self.breaker_threshold,
+                    self.breaker_cooldown,
+                    self.breaker_max_cooldown,
+                ),
+            )
+            self._endpoints[webhook_id] = endpoint
+        return endpoint
+
+    def _enqueue(self, delivery: _Delivery) -> None:
+        endpoint = self._endpoint(delivery.webhook_id)
+        if delivery.id in endpoint.queued:
+            return
+        try:
+            endpoint.queue.put_nowait(delivery)
+        except asyncio.QueueFull:
+            # Stays claimed in the database; picked up again after the lease
+            return
+        delivery.queued_at = time.monotonic()
+        endpoint.queued.add(delivery.id)
+        # One worker per queued request: a batch is one request
+        pending = endpoint.queue.qsize()
+        if delivery.batch:
+            pending = -(-pending // self.coalesce_max_events)
+        if len(endpoint.workers) < min(self.max_per_endpoint, pending):
+            task = asyncio.create_task(
+                self._work(delivery.webhook_id, endpoint),
+                name=f"webhook-{delivery.webhook_id}",
+            )
+            endpoint.workers.add(task)
+
+    async def _work(self, webhook_id: int, endpoint: _Endpoint) -> None:
+        try:
+            while True:
+                try:
+                    delivery = await asyncio.wait_for(
+                        endpoint.queue.get(), WORKER_IDLE_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    return
+                batch = [delivery]
+                try:
+                    if delivery.batch:
+                        async with endpoint.collecting:
+                            await self._coalesce(endpoint, batch)
+                    await self._deliver(endpoint, batch)
+                finally:
+                    endpoint.queued.difference_update(d.id for d in batch)
+        finally:
+            task = asyncio.current_task()
+            if task is not None:
+                endpoint.workers.discard(task)
+            if (
+                not endpoint.workers
+                and endpoint.queue.empty()
+                and endpoint.breaker.closed
+            ):
+                self._endpoints.pop(webhook_id, None)
+
+    async def _coalesce(self, endpoint: _Endpoint, batch: list[_Delivery]) -> None:
+        # Add queued deliveries to ``batch`` until it is full or its first
+        # event has waited long enough
+        deadline = batch[0].queued_at + self.coalesce_max_wait
+        size = len(batch[0].payload)
+        while len(batch) < self.coalesce_max_events and size < self.coalesce_max_bytes:
+            if endpoint.queue.empty():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    delivery = await asyncio.wait_for(endpoint.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    return
+            else:
+                delivery = endpoint.queue.get_nowait()
+            batch.append(delivery)
+            size += len(delivery.payload) + 1
+
+    async def _deliver(self, endpoint: _Endpoint, batch: list[_Delivery]) -> None:
+        breaker = endpoint.breaker
+        if not breaker.allow(time.monotonic()):
+            # Not an attempt: wait for the breaker without using up retries
+            retry_at = _utcnow() + timedelta(
+                seconds=breaker.open_until - time.monotonic()
+            )
+            self._failed.extend(
+                {"id": d.id, "next_attempt_at": retry_at, "last_error": "circuit open"}
+                for d in batch
+            )
+            return
+
+        error: str | None = None
+        try:
+            async with self._semaphore:
+                status = await self._post(batch)
+            if not 200 <= status < 300:
+                error = f"HTTP {status}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = repr(e)
+
+        if error is None:
+            breaker.record_success()
+            self._delivered.extend(d.id for d in batch)
+            return
+
+        breaker.record_failure(time.monotonic())
+        for delivery in batch:
+            self._failed.append(self._failure(delivery, error))
+
+    def _failure(self, delivery: _Delivery, error: str) -> dict[str, Any]:
+        attempts = delivery.attempts + 1
+        result: dict[str, Any] = {
+            "id": delivery.id,
+            "attempts": attempts,
+            "last_error": error,
+        }
+        if attempts >= self.max_attempts:
+            result["status"] = DEAD
+            logger.warning(
+                "Webhook delivery abandoned",
+                extra={
+                    "webhook_id": delivery.webhook_id,
+                    "event_id": delivery.event_id,
+                },
+            )
+        else:
+            result["next_attempt_at"] = _utcnow() + timedelta(
+                seconds=backoff_delay(attempts, self.backoff_base, self.backoff_max)
+            )
+        return result
+
+    async def _post(self, batch: list[_Delivery]) -> int:
+        if self._http is None:
+            self._http = self._new_http()
+        first = batch[0]
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": USER_AGENT,
+            "X-QSM-Timestamp": str(int(time.time())),
+        }
+        if first.batch:
+            # Payloads are stored as serialized envelopes; join them as-is
+            body = ("[" + ",".join(d.payload for d in batch) + "]").encode()
+            headers["X-QSM-Batch-Size"] = str(len(batch))
+        else:
+            body = first.payload.encode()
+            headers["X-QSM-Event-Id"] = first.event_id
+        headers["X-QSM-Signature"] = sign(first.secret, body)
+        if first.key_id:
+            headers["X-QSM-Key-Id"] = first.key_id
+        async with self._http.post(
+            first.url,
+            data=body,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            allow_redirects=False,
+        ) as response:
+            return response.status
+
+    def _new_http(self) -> aiohttp.ClientSession:
+        # Keep-alive connections are pooled per host. There is no per-host
+        # cap: many endpoints can share a host (webhook relay services), and
+        # per-endpoint concurrency is already bounded by the workers.
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.max_concurrency, limit_per_host=0, keepalive_timeout=30
+            )
+        )
+
+    async def save_results(self) -> int:
+        """Write finished attempts back to the retry queue. Returns count."""
+        delivered, self._delivered = self._delivered, []
+        failed, self._failed = self._failed, []
+        if not delivered and not failed:
+            return 0
+        try:
+            async with self.session_factory() as db:
+                if delivered:
+                    await db.execute(
+                        delete(WebhookDelivery).where(WebhookDelivery.id.in_(delivered))
+                    )
+                # Group by the columns set so each group is one executemany
+                groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+                for result in failed:
+                    groups.setdefault(tuple(sorted(result)), []).append(result)
+                for results in groups.values():
+                    await db.execute(update(WebhookDelivery), results)
+                await db.commit()
+        except Exception:
+            self._delivered[:0] = delivered
+            self._failed[:0] = failed
+            raise
+        return len(delivered) + len(failed)
+
+    async def drain(self) -> None:
+        """Wait until every queued delivery has been attempted (for tests)."""
+        while any(not e.queue.empty() or e.queued for e in self._endpoints.values()):
+            await asyncio.sleep(0.01)
+
+    async def _run(self) -> None:
+        last_poll = 0.0
+        while True:
+            await asyncio.sleep(self.publish_interval)
+            try:
+                await self.accept()
+                await self.save_results()
+                if time.monotonic() - last_poll >= self.retry_poll_interval:
+                    last_poll = time.monotonic()
+                    await self.claim_due()
+            except Exception:
+                logger.error("Webhook dispatch failed", exc_info=True)
+
+    def start(self) -> None:
+        """Accept, deliver and retry events in the background."""
+        if self._task is None:
+            self._http = self._new_http()
+            self._task = asyncio.create_task(self._run(), name="webhook-dispatcher")
+
+    async def stop(self) -> None:
+        """Stop delivering; unfinished deliveries stay in the retry queue."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        workers = [t for e in self._endpoints.values() for t in e.workers]
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._endpoints.clear()
+        for step in (self._store_inbox, self.save_results):
+            try:
+                await step()
+            except Exception:
+                logger.error("Webhook shutdown flush failed", exc_info=True)
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    async def _store_inbox(self) -> None:
+        # Persist without queueing; the next retry scan (here or in another
+        # process) delivers them
+        with self._lock:
+            events, self._inbox = self._inbox, []
+        if events:
+            await self._store(events, claim=False)
+
+
+# Global webhook dispatcher instance
+webhook_dispatcher = WebhookDispatcher()
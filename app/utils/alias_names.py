@@ -0,0 +1,75 @@
+"""Alias local-part rules from docs/specs/alias-naming-rules.md.
+
+This is the single validator shared by the API schemas, the alias name
+generator and the SMTP ingest path. It has no settings or database
+dependencies so that ``server.py`` can import it on its own.
+"""
+
+import re
+
+ALIAS_NAME_MIN_LENGTH = 3
+ALIAS_NAME_MAX_LENGTH = 32
+
+RESERVED_ALIAS_NAMES = frozenset(
+    {
+        "abuse",
+        "admin",
+        "billing",
+        "contact",
+        "help",
+        "hostmaster",
+        "info",
+        "mailer-daemon",
+        "no-reply",
+        "postmaster",
+        "root",
+        "sales",
+        "security",
+        "support",
+        "webmaster",
+    }
+)
+
+# Runs of [a-z0-9] joined by single hyphens: covers the character set, the
+# start/end rule and the no-consecutive-hyphens rule in one match.
+_ALIAS_NAME = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_ALIAS_CHARS = re.compile(r"[a-z0-9-]*")
+
+
+def is_valid_alias_name(name: str) -> bool:
+    """Check an alias local-part (case-insensitively) without building errors.
+
+    This is the hot path for RCPT checks; use ``alias_name_error`` when the
+    reason for rejection is needed.
+    """
+    name = name.lower()
+    return (
+        ALIAS_NAME_MIN_LENGTH <= len(name) <= ALIAS_NAME_MAX_LENGTH
+        and _ALIAS_NAME.fullmatch(name) is not None
+        and name not in RESERVED_ALIAS_NAMES
+    )
+
+
+def alias_name_error(name: str) -> str | None:
+    """Explain why an alias local-part is invalid, or return None if it is valid."""
+    name = name.lower()
+    if is_valid_alias_name(name):
+        return None
+    if _ALIAS_CHARS.fullmatch(name) is None:
+        return "Alias name can only contain letters, numbers, and hyphens"
+    if not ALIAS_NAME_MIN_LENGTH <= len(name) <= ALIAS_NAME_MAX_LENGTH:
+        return (
+            f"Alias name must be between {ALIAS_NAME_MIN_LENGTH} and "
+            f"{ALIAS_NAME_MAX_LENGTH} characters"
+        )
+    if name.startswith("-") or name.endswith("-"):
+        return "Alias name cannot start or end with a hyphen"
+    if "--" in name:
+        return "Alias name cannot contain consecutive special characters (--)"
+    return f"'{name}' is reserved and cannot be used as an alias"
+
+
+def is_valid_alias_address(address: str) -> bool:
+    """Check that an address has a valid alias local-part and some domain."""
+    local_part, at, domain = address.rpartition("@")
+    return bool(at and domain) and is_valid_alias_name(local_part)
@@ -0,0 +1,119 @@
+"""Header-only parsing and rewriting of raw messages.
+
+Only the header block (everything up to the first blank line) is ever
+looked at, and only the fields the service uses are extracted, in one regex
+scan; the body and any attachments are never parsed. Values are unfolded
+and decoded as UTF-8, but encoded words (RFC 2047) are left as they are.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Sequence
+
+_FIELD_RE = re.compile(
+    rb"^(from|subject|date|message-id|authentication-results)[ \t]*:"
+    rb"([^\r\n]*(?:\r?\n[ \t][^\r\n]*)*)",
+    re.IGNORECASE | re.MULTILINE,
+)
+_FOLD_RE = re.compile(rb"\r?\n(?=[ \t])")
+_ANGLE_ADDR_RE = re.compile(r"<([^<>@\s]+@[^<>@\s]+)>")
+_BARE_ADDR_RE = re.compile(r"\s*([^<>@\s\"(),;:]+@[^<>@\s\"(),;:]+)\s*")
+
+
+def header_end(data: bytes | bytearray) -> int:
+    """Offset just past the blank line ending the header block, or -1."""
+    ends = [
+        index + len(sep)
+        for sep in (b"\r\n\r\n", b"\n\n")
+        if (index := data.find(sep)) != -1
+    ]
+    return min(ends) if ends else -1
+
+
+def from_address(value: str) -> str | None:
+    """The single address in a ``From`` header value, or None if malformed."""
+    found: list[str] = _ANGLE_ADDR_RE.findall(value)
+    if len(found) == 1:
+        return found[0]
+    if not found and (match := _BARE_ADDR_RE.fullmatch(value)):
+        return match.group(1)
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class HeaderFields:
+    """The header fields used for logging, validation and spam checks."""
+
+    from_: str | None = None
+    subject: str | None = None
+    date: str | None = None
+    message_id: str | None = None
+    # One per receiving hop, newest first, as they appear
+    authentication_results: tuple[str, ...] = ()
+
+
+def parse_headers(block: bytes) -> HeaderFields:
+    """Extract HeaderFields from a header block (see ``header_end``).
+
+    The first occurrence of a single-valued field wins.
+    """
+    found: dict[bytes, str] = {}
+    results: list[str] = []
+    for match in _FIELD_RE.finditer(block):
+        name = match.group(1).lower()
+        value = _FOLD_RE.sub(b"", match.group(2)).strip().decode("utf-8", "replace")
+        if name == b"authentication-results":
+            results.append(value)
+        elif name not in found:
+            found[name] = value
+    return HeaderFields(
+        from_=found.get(b"from"),
+        subject=found.get(b"subject"),
+        date=found.get(b"date"),
+        message_id=found.get(b"message-id"),
+        authentication_results=tuple(results),
+    )
+
+
+def split_fields(block: bytes) -> list[tuple[str, bytes]]:
+    """Header fields as (lowercased name, raw bytes including folding).
+
+    Joining the raw bytes gives back the block up to its blank line.
+    """
+    fields: list[tuple[str, bytes]] = []
+    for line in block.splitlines(keepends=True):
+        if not line.strip(b"\r\n"):
+            break
+        if line[:1] in (b" ", b"\t") and fields:
+            name, raw = fields[-1]
+            fields[-1] = (name, raw + line)
+        else:
+            name = line.split(b":", 1)[0].strip().lower().decode("latin-1")
+            fields.append((name, line))
+    return fields
+
+
+def rewrite_header_block(
+    block: bytes, add: Sequence[tuple[str, str]], drop: Callable[[str], bool]
+) -> bytes:
+    """``block`` with the fields ``drop`` selects removed and ``add`` prepended.
+
+    Fields that are kept stay byte for byte as they were, and new ones use
+    the block's own line ending. Values are put on one line, so they cannot
+    inject further fields.
+    """
+    first = block.find(b"\n")
+    eol = b"\n" if first != -1 and block[first - 1 : first] != b"\r" else b"\r\n"
+    out = bytearray()
+    for name, value in add:
+        value = " ".join(value.split())
+        out += f"{name}: {value}".encode() + eol
+    kept = 0
+    for name, raw in split_fields(block):
+        kept += len(raw)
+        if not drop(name):
+            out += raw
+    if out and not out.endswith(b"\n"):
+        out += eol  # a last field with no line ending
+    out += block[kept:] or eol  # the blank line, if the block had one
+    return bytes(out)
@@ -0,0 +1,23 @@
+"""Opaque cursors for keyset-paginated list endpoints."""
+
+import base64
+import binascii
+
+from app.exceptions import ValidationError
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the id of the last row on a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor produced by ``encode_cursor``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError("Invalid pagination cursor", "INVALID_CURSOR")
+    if last_id < 0:
+        raise ValidationError("Invalid pagination cursor", "INVALID_CURSOR")
+    return last_id
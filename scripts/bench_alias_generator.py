@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Benchmark alias name generation as the namespace fills up.
+
+Seeds the aliases table with ``--fill`` of the generator's namespace and
+times name generation with and without the bloom filter pre-check. Runs
+against in-memory SQLite by default.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.db.base import Base  # noqa: E402
+from app.models.alias import Alias  # noqa: E402
+from app.models.destination import Destination  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.alias_generator import AliasNameGenerator  # noqa: E402
+
+DOMAIN = "bench.invalid"
+
+
+async def main(
+    database_url: str, nouns: int, suffixes: int, fill: float, names: int
+) -> None:
+    engine = create_async_engine(database_url, poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    def make_generator(bloom_capacity: int | None) -> AliasNameGenerator:
+        return AliasNameGenerator(
+            adjectives=["mint", "calm", "bold", "keen"],
+            nouns=[f"n{chr(97 + i % 26)}" * (1 + i // 26) for i in range(nouns)],
+            suffix_range=(0, suffixes - 1),
+            max_attempts=50,
+            bloom_capacity=bloom_capacity,
+            session_factory=factory,
+        )
+
+    generator = make_generator(None)
+    target = int(generator.namespace_size * fill)
+    async with factory() as db:
+        user_id = await db.scalar(
+            insert(User).values(email="bench@bench.invalid").returning(User.id)
+        )
+        destination_id = await db.scalar(
+            insert(Destination)
+            .values(user_id=user_id, email="dest@bench.invalid")
+            .returning(Destination.id)
+        )
+        seeded: set[str] = set()
+        while len(seeded) < target:
+            seeded |= generator.draw(min(10_000, target - len(seeded)))
+        rows = [
+            {
+                "user_id": user_id,
+                "destination_id": destination_id,
+                "name": name,
+                "domain": DOMAIN,
+            }
+            for name in seeded
+        ]
+        for start in range(0, len(rows), 5000):
+            await db.execute(insert(Alias), rows[start : start + 5000])
+        await db.commit()
+
+    print(
+        f"Namespace {generator.namespace_size} names, {len(seeded)} taken "
+        f"({fill:.0%}); generating {names} names"
+    )
+    for label, bloom_capacity in (("db only", None), ("bloom", target * 2)):
+        generator = make_generator(bloom_capacity)
+        async with factory() as db:
+            await generator.load_bloom(db)
+            start_time = time.perf_counter()
+            for _ in range(names):
+                await generator.generate(db, DOMAIN)
+            elapsed = time.perf_counter() - start_time
+        print(
+            f"  {label:<8} {elapsed:8.3f}s  {names / elapsed:10.0f} names/s  "
+            f"{elapsed / names * 1e6:8.1f} us/name"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default="sqlite+aiosqlite:///:memory:",
+        help="Async SQLAlchemy URL (default: in-memory SQLite)",
+    )
+    parser.add_argument("--nouns", type=int, default=100)
+    parser.add_argument("--suffixes", type=int, default=250)
+    parser.add_argument("--fill", type=float, default=0.9, help="Fraction taken")
+    parser.add_argument("--names", type=int, default=500)
+    args = parser.parse_args()
+
+    asyncio.run(
+        main(args.database_url, args.nouns, args.suffixes, args.fill, args.names)
+    )
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark magic-link issuance: legacy DELETE + INSERT vs single upsert.
+
+Runs against in-memory SQLite by default. Point --database-url at a migrated
+PostgreSQL database to measure the real thing; rows are written under the
+`bench.invalid` domain and removed afterwards.
+"""
+
+import argparse
+import asyncio
+import secrets
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Awaitable, Callable
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import delete  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.db.base import Base  # noqa: E402
+from app.models.magic_link_token import MagicLinkToken  # noqa: E402
+from app.services.magic_link import magic_link_service  # noqa: E402
+
+Issuer = Callable[[AsyncSession, str], Awaitable[object]]
+
+
+async def issue_delete_insert(db: AsyncSession, email: str) -> str:
+    """Previous implementation: delete old tokens, insert a new row."""
+    token = secrets.token_urlsafe(32)
+    await db.execute(delete(MagicLinkToken).where(MagicLinkToken.email == email))
+    db.add(
+        MagicLinkToken(
+            email=email,
+            token_hash=magic_link_service._hash_token(token),
+            expires_at=datetime.now(timezone.utc) + timedelta(minutes=15),
+        )
+    )
+    await db.commit()
+    return token
+
+
+async def run_strategy(
+    factory: async_sessionmaker[AsyncSession],
+    issue: Issuer,
+    emails: list[str],
+    rounds: int,
+) -> float:
+    """Issue a token for every email ``rounds`` times; return elapsed seconds."""
+    async with factory() as db:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for email in emails:
+                await issue(db, email)
+        elapsed = time.perf_counter() - start
+
+        await db.execute(
+            delete(MagicLinkToken).where(MagicLinkToken.email.like("%@bench.invalid"))
+        )
+        await db.commit()
+    return elapsed
+
+
+async def main(database_url: str, emails: int, rounds: int) -> None:
+    if database_url.startswith("sqlite"):
+        engine = create_async_engine(database_url, poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    else:
+        engine = create_async_engine(database_url)
+
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    addresses = [f"user{i}@bench.invalid" for i in range(emails)]
+    total = emails * rounds
+
+    strategies: list[tuple[str, Issuer]] = [
+        ("delete+insert", issue_delete_insert),
+        ("upsert", magic_link_service.create_magic_link),
+    ]
+    print(f"Issuing {total} tokens ({emails} addresses x {rounds} rounds)")
+    for name, issue in strategies:
+        elapsed = await run_strategy(factory, issue, addresses, rounds)
+        print(
+            f"  {name:<14} {elapsed:8.3f}s  {total / elapsed:10.0f} ops/s  "
+            f"{elapsed / total * 1e6:8.1f} us/op"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default="sqlite+aiosqlite:///:memory:",
+        help="Async SQLAlchemy URL (default: in-memory SQLite)",
+    )
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.database_url, args.emails, args.rounds))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Benchmark the message pipeline, stage by stage.
+
+Pushes synthetic messages through the standard stages with in-memory
+collaborators: enforcement from a preloaded snapshot, the spam heuristics,
+email log rows and webhook events buffered but never written, and a relay
+that only sleeps for --relay-latency seconds. Prints throughput and the
+time spent in each stage.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.bandwidth import BandwidthAccountant  # noqa: E402
+from app.services.email_log import EmailLogWriter  # noqa: E402
+from app.services.enforcement import EnforcementEngine  # noqa: E402
+from app.services.pipeline import (  # noqa: E402
+    BytesContent,
+    MailMessage,
+    RelayConfig,
+    build_pipeline,
+)
+from app.services.spam import SpamFilter  # noqa: E402
+from app.services.webhooks import WebhookDispatcher  # noqa: E402
+
+ALIASES = 1000
+RELAY = RelayConfig("relay.invalid", 587, "bench", "bench")
+
+
+def make_content(size: int) -> bytes:
+    headers = (
+        b"From: sender@example.com\r\n"
+        b"Subject: Benchmark message\r\n"
+        b"Date: Mon, 19 Oct 2026 12:00:00 +0000\r\n"
+        b"Message-ID: <bench@example.com>\r\n\r\n"
+    )
+    return headers + b"x" * max(size - len(headers), 0)
+
+
+async def main(messages: int, concurrency: int, size: int, latency: float) -> None:
+    accountant = BandwidthAccountant(flush_threshold=messages * 2, journal_path=None)
+    enforcer = EnforcementEngine(accountant=accountant)
+    enforcer.set_user(1, "pro", True)
+    aliases = [f"bench-alias-{n}@bench.invalid" for n in range(ALIASES)]
+    for n, address in enumerate(aliases):
+        enforcer.set_alias(address, 1, True, n)
+    log_writer = EmailLogWriter(flush_threshold=messages + 1, max_buffer=messages)
+
+    def send(config: RelayConfig, msg: object) -> None:
+        time.sleep(latency)
+
+    pipeline = build_pipeline(
+        lambda rcpt: "dest@example.com",
+        enforcer,
+        log_writer,
+        WebhookDispatcher(),
+        SpamFilter(bad_domains=["spam.invalid"], domains_file=None),
+        relay_config=lambda: RELAY,
+    )
+    pipeline.stages[4].send = send  # type: ignore[attr-defined]
+
+    content = make_content(size)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(n: int) -> None:
+        async with semaphore:
+            message = MailMessage.create(
+                "smtp",
+                "sender@example.com",
+                [aliases[n % ALIASES]],
+                BytesContent(content),
+            )
+            await pipeline.run(message)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(n) for n in range(messages)))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{messages} messages of {size} bytes, concurrency {concurrency}, "
+        f"relay latency {latency * 1000:.1f}ms"
+    )
+    print(f"  total     {elapsed:8.3f}s  {messages / elapsed:10.0f} msg/s")
+    for name, stats in pipeline.stats.items():
+        print(
+            f"  {name:<9} {stats.seconds:8.3f}s  mean {stats.mean * 1e6:9.1f}us  "
+            f"max {stats.max_seconds * 1e6:9.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--size", type=int, default=20_000)
+    parser.add_argument("--relay-latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.messages, args.concurrency, args.size, args.relay_latency))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Delete expired tokens, sessions, rate limit buckets and old email logs.
+
+Intended for cron on shared hosting (set CLEANUP_ENABLED=false so the app
+does not also run its in-process schedule), e.g.:
+
+    */30 * * * * cd /path/to/app && .venv/bin/python scripts/cleanup_expired.py
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.config import get_settings  # noqa: E402
+from app.services.cleanup import CleanupWorker  # noqa: E402
+
+
+async def run_cleanup(batch_size: int, pause: float) -> bool:
+    """Run every cleanup task once and print a report."""
+    worker = CleanupWorker(batch_size=batch_size, pause=pause)
+    reports = await worker.run_once()
+
+    for report in reports:
+        if report.error:
+            print(f"✗ {report.task}: {report.error}")
+        else:
+            print(
+                f"✓ {report.task}: {report.rows_deleted} rows deleted "
+                f"in {report.duration * 1000:.0f}ms"
+            )
+
+    return all(report.error is None for report in reports)
+
+
+if __name__ == "__main__":
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.cleanup_batch_size,
+        help="Rows deleted per transaction",
+    )
+    parser.add_argument(
+        "--pause",
+        type=float,
+        default=settings.cleanup_batch_pause,
+        help="Seconds to sleep between batches",
+    )
+    args = parser.parse_args()
+
+    if not asyncio.run(run_cleanup(args.batch_size, args.pause)):
+        sys.exit(1)
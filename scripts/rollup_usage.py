@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Roll up new email log rows into daily/weekly usage tables.
+
+Only rows changed since the last run are read, and re-running is harmless,
+so this is safe to schedule from cron on shared hosting (set
+ROLLUP_ENABLED=false so the app does not also run its in-process schedule),
+e.g.:
+
+    */10 * * * * cd /path/to/app && .venv/bin/python scripts/rollup_usage.py
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.config import get_settings  # noqa: E402
+from app.services.usage_rollup import UsageRollup  # noqa: E402
+
+
+async def run_rollup(batch_size: int, overlap: float) -> bool:
+    """Run the rollup once and print a report."""
+    rollup = UsageRollup(batch_size=batch_size, overlap=overlap)
+    try:
+        report = await rollup.run_once()
+    except Exception as e:
+        print(f"✗ usage rollup: {e}")
+        return False
+
+    print(
+        f"✓ usage rollup: {report.days} daily and {report.weeks} weekly rows "
+        f"updated in {report.duration * 1000:.0f}ms"
+    )
+    return True
+
+
+if __name__ == "__main__":
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.rollup_batch_size,
+        help="Users per aggregate query",
+    )
+    parser.add_argument(
+        "--overlap",
+        type=float,
+        default=settings.rollup_overlap,
+        help="Seconds of log changes re-read behind the watermark",
+    )
+    args = parser.parse_args()
+
+    if not asyncio.run(run_rollup(args.batch_size, args.overlap)):
+        sys.exit(1)
@@ -2,12 +2,13 @@
 
 import asyncio
 import os
-import smtplib
-from email.message import EmailMessage
+from types import SimpleNamespace
 
 from aiosmtpd.controller import Controller
 from dotenv import load_dotenv
 
+from app.utils.alias_names import is_valid_alias_address
+
 load_dotenv()
 
 # Parse aliases from env
@@ -21,56 +22,132 @@ for alias_pair in os.getenv("ALIASES", "").split(","):
             print(f"[WARNING] Invalid alias format: {alias_pair}")
 
 
+# SMTP replies for enforcement rejections, by reason code
+REJECT_REPLIES = {
+    "alias-unknown": "550 5.1.1 Unknown alias",
+    "alias-inactive": "550 5.1.1 Alias inactive",
+    "no-verified-destinations": "550 5.1.1 Alias has no verified destination",
+    "oversize": "552 5.3.4 Message too big",
+    "bandwidth-exceeded": "552 5.2.2 Mailbox over quota",
+    "emails-exceeded": "552 5.2.2 Mailbox over quota",
+}
+NOT_READY_REPLY = "451 4.3.0 Alias lookup unavailable, try again later"
+
+
 class ForwardingHandler:
+    def __init__(
+        self,
+        enforcer=None,
+        log_writer=None,
+        webhooks=None,
+        spam_filter=None,
+        content_store=None,
+        header_store=None,
+        authenticator=None,
+    ):
+        # Optional EnforcementEngine (app.services.enforcement)
+        self.enforcer = enforcer
+        # Optional EmailLogWriter (app.services.email_log) and WebhookDispatcher
+        # (app.services.webhooks); both need the enforcer to resolve the owner
+        self.log_writer = log_writer
+        self.webhooks = webhooks
+        # Optional SpamFilter (app.services.spam) and ContentStore
+        # (app.services.content_store) for quarantined and failed mail, and
+        # another for header snapshots
+        self.spam_filter = spam_filter
+        self.content_store = content_store
+        self.header_store = header_store
+        # Optional SenderAuthenticator (app.services.sender_auth)
+        self.authenticator = authenticator
+        from app.services.pipeline import build_pipeline
+
+        # Shared by SMTP and provider webhook ingest (app/services/pipeline.py)
+        self.pipeline = build_pipeline(
+            lambda rcpt: ALIASES.get(rcpt),
+            enforcer,
+            log_writer,
+            webhooks,
+            spam_filter,
+            content_store,
+            header_store,
+            authenticator,
+        )
+
+    async def handle_RCPT(
+        self, server, session, envelope, address: str, rcpt_options
+    ) -> str:
+        # Cheap syntax check before any lookup; spam runs hit this per recipient
+        if not is_valid_alias_address(address):
+            print(f"[REJECTED] Invalid alias address: {address}")
+            return "553 5.1.3 Invalid alias address"
+        if self.enforcer is not None:
+            if not self.enforcer.ready:
+                # No alias snapshot yet (e.g. DB down at startup): defer,
+                # or every recipient would look unknown
+                print(f"[DEFERRED] {address}: enforcement not ready")
+                return NOT_READY_REPLY
+            decision = self.enforcer.check(address)
+            if decision.action == "reject":
+                print(f"[REJECTED] {address}: {decision.reason}")
+                return REJECT_REPLIES.get(decision.reason, "550 5.7.1 Rejected")
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
     async def handle_DATA(self, server, session, envelope) -> str:
+        from app.services.pipeline import BytesContent, MailMessage
+
         print(f"\n[RECEIVED] From: {envelope.mail_from}")
         print(f"[RECEIVED] To: {envelope.rcpt_tos}")
 
-        for rcpt in envelope.rcpt_tos:
-            if rcpt not in ALIASES:
-                print(f"[REJECTED] Unknown alias: {rcpt}")
-                continue
-
-            destination = ALIASES[rcpt]
-            print(f"[FORWARDING] {rcpt} -> {destination}")
-
-            try:
-                # Create forwarded message
-                msg = EmailMessage()
-                msg.set_content(envelope.content.decode("utf-8", errors="replace"))
-                msg["From"] = envelope.mail_from
-                msg["To"] = destination
-                msg["Subject"] = f"[Forwarded via {rcpt}]"
-
-                # Forward via SMTP relay
-                relay_host = os.getenv("RELAY_HOST")
-                if not relay_host:
-                    print("[ERROR] RELAY_HOST not configured")
-                    return "550 Relay not configured"
-
-                try:
-                    relay_port = int(os.getenv("RELAY_PORT", 587))
-                except ValueError:
-                    relay_port = 587
-
-                relay_user = os.getenv("RELAY_USER")
-                relay_pass = os.getenv("RELAY_PASSWORD")
-
-                if not relay_user or not relay_pass:
-                    print("[ERROR] RELAY credentials not configured")
-                    return "550 Relay credentials missing"
-
-                with smtplib.SMTP(relay_host, relay_port) as smtp:
-                    smtp.starttls()
-                    smtp.login(relay_user, relay_pass)
-                    smtp.send_message(msg)
-
-                print(f"[SUCCESS] Forwarded to {destination}")
-            except Exception as e:
-                print(f"[ERROR] Failed to forward: {e}")
-                return "550 Forwarding failed"
+        # peer is a (host, port) tuple for TCP sessions
+        peer = getattr(session, "peer", None)
+        message = MailMessage.create(
+            "smtp",
+            envelope.mail_from,
+            envelope.rcpt_tos,
+            BytesContent(envelope.content),
+            client_ip=peer[0] if isinstance(peer, tuple) else None,
+            helo=getattr(session, "host_name", None),
+        )
+        await self.pipeline.run(message)
+        for rcpt in message.recipients:
+            print(f"[{rcpt.status.upper()}] {rcpt.address}: {rcpt.reason or ''}")
+        return message.reply
 
-        return "250 OK"
+    async def handle_inbound(self, message):
+        """Process a message received by a provider webhook.
+
+        ``message`` is an app.services.inbound.InboundMessage; it gets the same
+        recipient checks as SMTP RCPT and then the same pipeline as DATA.
+        Temporary (4xx) failures raise InboundDeferred, so the spooled entry
+        is claimed again later.
+        """
+        from app.services.inbound import InboundDeferred
+        from app.services.pipeline import MailMessage
+
+        envelope = SimpleNamespace(rcpt_tos=[])
+        for rcpt in message.rcpt_tos:
+            reply = await self.handle_RCPT(None, None, envelope, rcpt, [])
+            if reply.startswith("4"):
+                # Retry the whole message later rather than drop this recipient
+                raise InboundDeferred(f"{rcpt}: {reply}")
+        if not envelope.rcpt_tos:
+            return
+        mail = MailMessage.create(
+            message.provider,
+            message.mail_from,
+            envelope.rcpt_tos,
+            message.content,
+            id=message.id,
+        )
+        await self.pipeline.run(mail)
+        if mail.reply.startswith("4"):
+            raise InboundDeferred(mail.reply)
+        if not mail.reply.startswith("250"):
+            # Sets the spooled message aside in failed/ for inspection
+            raise RuntimeError(
+                f"Inbound message {message.id} not forwarded: {mail.reply}"
+            )
 
 
 async def main():
@@ -93,9 +170,90 @@ async def main():
         print("  [WARNING] No aliases configured")
     print(f"{'='*60}\n")
 
-    controller = Controller(ForwardingHandler(), hostname=host, port=port)
+    enforcer = None
+    evaluator = None
+    log_writer = None
+    webhooks = None
+    content_store = None
+    header_store = None
+    if os.getenv("ENFORCEMENT_ENABLED", "").lower() == "true":
+        # Needs the full app configuration (DATABASE_URL etc.)
+        from app.config import get_settings
+        from app.services import content_store as stores
+        from app.services.bandwidth import bandwidth_accountant
+        from app.services.email_log import email_log_writer
+        from app.services.enforcement import enforcement_engine
+        from app.services.usage_thresholds import threshold_evaluator
+        from app.services.webhooks import webhook_dispatcher
+
+        bandwidth_accountant.start()
+        enforcement_engine.start()
+        enforcer = enforcement_engine
+        email_log_writer.start()
+        log_writer = email_log_writer
+        if get_settings().webhooks_enabled:
+            webhook_dispatcher.start()
+            webhooks = webhook_dispatcher
+        if get_settings().content_store_enabled:
+            # Encrypted copies of spam and failed mail, owned by a user
+            content_store = stores.content_store
+        if get_settings().header_snapshots_enabled:
+            header_store = stores.header_store
+        print("Enforcement: enabled")
+        if get_settings().usage_warnings_enabled:
+            # Usage is recorded in this process, so warnings are evaluated here
+            threshold_evaluator.start()
+            evaluator = threshold_evaluator
+
+    spam_filter = None
+    if os.getenv("SPAM_ENABLED", "").lower() == "true":
+        # Header heuristics (docs/specs/spam-filtering-mvp.md)
+        from app.services.spam import spam_filter
+
+        spam_filter.start()
+        print(f"Spam filter: enabled ({len(spam_filter.domains)} bad domains)")
+
+    authenticator = None
+    if os.getenv("SENDER_AUTH_ENABLED", "").lower() == "true":
+        # SPF/DKIM/DMARC, summarized in X-QSM-Validation (log-only)
+        from app.services.sender_auth import sender_authenticator
+
+        authenticator = sender_authenticator
+        print("Sender authentication: enabled")
+
+    handler = ForwardingHandler(
+        enforcer,
+        log_writer,
+        webhooks,
+        spam_filter,
+        content_store,
+        header_store,
+        authenticator,
+    )
+    controller = Controller(handler, hostname=host, port=port)
     controller.start()
 
+    releaser = None
+    if (
+        content_store is not None
+        and os.getenv("HOLD_RELEASE_ENABLED", "").lower() == "true"
+    ):
+        # Overflow Hold mail goes back through the pipeline after rollover
+        from app.services.overflow_hold import HoldReleaser
+
+        releaser = HoldReleaser(handler.pipeline.run, content_store)
+        releaser.start()
+        print("Overflow Hold release: enabled")
+
+    consumer = None
+    if os.getenv("INBOUND_ENABLED", "").lower() == "true":
+        # Mail spooled by the provider webhook endpoints (app/api/v1/inbound.py)
+        from app.services.inbound import InboundConsumer
+
+        consumer = InboundConsumer(handler.handle_inbound)
+        consumer.start()
+        print("Inbound webhooks: enabled")
+
     print("[RUNNING] Server started. Press Ctrl+C to stop.\n")
 
     try:
@@ -104,6 +262,21 @@ async def main():
     except KeyboardInterrupt:
         print("\n[STOPPED] Shutting down...")
         controller.stop()
+        if consumer is not None:
+            await consumer.stop()
+        if releaser is not None:
+            await releaser.stop()
+        if spam_filter is not None:
+            await spam_filter.stop()
+        if evaluator is not None:
+            await evaluator.stop()
+        if log_writer is not None:
+            await log_writer.stop()
+        if webhooks is not None:
+            await webhooks.stop()
+        if enforcer is not None:
+            await enforcer.stop()
+            await enforcer.accountant.stop()
 
 
 if __name__ == "__main__":
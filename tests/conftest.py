@@ -73,12 +73,19 @@ async def db() -> AsyncGenerator[AsyncSession, None]:
         await engine.dispose()
 
 
+@pytest.fixture
+def session_factory(db: AsyncSession) -> async_sessionmaker[AsyncSession]:
+    """Session factory on the test database, for services opening their own."""
+    return async_sessionmaker(db.bind, expire_on_commit=False)
+
+
 @pytest_asyncio.fixture
 async def client(db: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     """Create an async test client with database dependency override."""
     # Import here to avoid circular imports
     from app.api.v1 import auth
     from app.services import email
+    from app.services.rate_limit import InMemoryRateLimitBackend, rate_limiter
 
     async def override_get_db():
         yield db
@@ -90,6 +97,10 @@ async def client(db: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
 
     app.dependency_overrides[get_db] = override_get_db
 
+    # Start every test with empty rate limit buckets
+    original_backend = rate_limiter.backend
+    rate_limiter.backend = InMemoryRateLimitBackend()
+
     try:
         transport = ASGITransport(app=app)
         async with AsyncClient(
@@ -98,6 +109,7 @@ async def client(db: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
             yield test_client
     finally:
         app.dependency_overrides.clear()
+        rate_limiter.backend = original_backend
         email.email_service = original_email_service
         mock_email_service.clear_sent_emails()
 
@@ -149,4 +161,7 @@ async def authenticated_client(
     )
     assert response.status_code == 200
 
+    # The cookie is marked Secure, so the client won't resend it over http
+    client.cookies.set("session", response.cookies["session"])
+
     yield client
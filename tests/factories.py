@@ -96,13 +96,14 @@ class SessionFactory:
         db: AsyncSession,
         user: User,
         token_hash: Optional[str] = None,
+        expires_at: Optional[datetime] = None,
         **kwargs,
     ) -> Session:
         """Create a session with realistic data."""
         session = Session(
             user_id=user.id,
             token_hash=token_hash or fake.sha256(),
-            expires_at=datetime.now(timezone.utc),
+            expires_at=expires_at or datetime.now(timezone.utc),
             **kwargs,
         )
         db.add(session)
@@ -119,13 +120,14 @@ class MagicLinkTokenFactory:
         db: AsyncSession,
         email: Optional[str] = None,
         token_hash: Optional[str] = None,
+        expires_at: Optional[datetime] = None,
         **kwargs,
     ) -> MagicLinkToken:
         """Create a magic link token with realistic data."""
         token = MagicLinkToken(
             email=email or fake.email(),
             token_hash=token_hash or fake.sha256(),
-            expires_at=datetime.now(timezone.utc),
+            expires_at=expires_at or datetime.now(timezone.utc),
             **kwargs,
         )
         db.add(token)
@@ -0,0 +1,251 @@
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.destination import Destination
+from app.models.user import User
+from app.utils.pagination import encode_cursor
+from tests.factories import AliasFactory, DestinationFactory, UserFactory
+
+
+class TestListAliases:
+    """Test keyset-paginated alias listing."""
+
+    async def test_requires_auth(self, client: AsyncClient):
+        """Listing aliases requires a session."""
+        response = await client.get("/api/v1/aliases")
+        assert response.status_code == 401
+
+    async def test_walk_pages(
+        self,
+        authenticated_client: AsyncClient,
+        db: AsyncSession,
+        user: User,
+        destination: Destination,
+    ):
+        """Following next_cursor visits every alias exactly once, in id order."""
+        created = [
+            await AliasFactory.create(db, user=user, destination=destination, name=n)
+            for n in ("alpha", "bravo", "charlie", "delta", "echo")
+        ]
+
+        seen: list[int] = []
+        cursor = None
+        while True:
+            params: dict[str, str | int] = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = await authenticated_client.get("/api/v1/aliases", params=params)
+            assert response.status_code == 200
+            data = response.json()
+            seen.extend(alias["id"] for alias in data["aliases"])
+            if not data["has_more"]:
+                assert data["next_cursor"] is None
+                break
+            cursor = data["next_cursor"]
+
+        assert seen == [alias.id for alias in created]
+        assert data["aliases"][-1]["full_address"] == "echo@example.com"
+
+    async def test_only_own_aliases(
+        self,
+        authenticated_client: AsyncClient,
+        db: AsyncSession,
+        user: User,
+        destination: Destination,
+    ):
+        """Aliases of other users are never listed."""
+        other = await UserFactory.create(db, email="other@example.com")
+        other_destination = await DestinationFactory.create(db, user=other)
+        await AliasFactory.create(
+            db, user=other, destination=other_destination, name="theirs"
+        )
+        mine = await AliasFactory.create(
+            db, user=user, destination=destination, name="mine"
+        )
+
+        response = await authenticated_client.get("/api/v1/aliases")
+        assert [a["id"] for a in response.json()["aliases"]] == [mine.id]
+
+    async def test_filter_and_capped_total(
+        self,
+        authenticated_client: AsyncClient,
+        db: AsyncSession,
+        user: User,
+        destination: Destination,
+        monkeypatch,
+    ):
+        """Totals are exact below the cap and flagged as approximate above it."""
+        for i in range(3):
+            await AliasFactory.create(
+                db, user=user, destination=destination, name=f"active{i}"
+            )
+        await AliasFactory.create(
+            db, user=user, destination=destination, name="off", is_active=False
+        )
+
+        response = await authenticated_client.get(
+            "/api/v1/aliases", params={"is_active": False, "include_total": True}
+        )
+        data = response.json()
+        assert [a["name"] for a in data["aliases"]] == ["off"]
+        assert data["total"] == 1
+        assert data["total_is_exact"] is True
+
+        from app.services.alias import alias_service
+
+        original = alias_service.count_aliases
+
+        async def count_with_small_cap(db, user_id, is_active=None):
+            return await original(db, user_id, is_active, cap=2)
+
+        monkeypatch.setattr(alias_service, "count_aliases", count_with_small_cap)
+        data = (
+            await authenticated_client.get(
+                "/api/v1/aliases", params={"include_total": True}
+            )
+        ).json()
+        assert data["total"] == 2
+        assert data["total_is_exact"] is False
+
+    async def test_invalid_cursor(self, authenticated_client: AsyncClient):
+        """Garbage cursors are rejected with a validation error."""
+        response = await authenticated_client.get(
+            "/api/v1/aliases", params={"cursor": "not-a-cursor!"}
+        )
+        assert response.status_code == 422
+        assert response.json()["error_code"] == "INVALID_CURSOR"
+
+    async def test_cursor_past_end(self, authenticated_client: AsyncClient):
+        """A cursor beyond the last alias yields an empty final page."""
+        response = await authenticated_client.get(
+            "/api/v1/aliases", params={"cursor": encode_cursor(10**9)}
+        )
+        data = response.json()
+        assert data["aliases"] == []
+        assert data["has_more"] is False
+
+
+class TestBulkAliases:
+    """Test bulk alias creation and updates."""
+
+    async def test_bulk_create_reports_conflicts(
+        self,
+        authenticated_client: AsyncClient,
+        db: AsyncSession,
+        user: User,
+        destination: Destination,
+    ):
+        """Existing addresses are reported as conflicts, the rest are created."""
+        await AliasFactory.create(db, user=user, destination=destination, name="taken")
+
+        response = await authenticated_client.post(
+            "/api/v1/aliases/bulk",
+            json={
+                "aliases": [
+                    {
+                        "name": n,
+                        "domain": "example.com",
+                        "destination_id": destination.id,
+                    }
+                    for n in ("Shop", "taken", "news")
+                ]
+            },
+        )
+        assert response.status_code == 201
+        data = response.json()
+        assert [a["name"] for a in data["created"]] == ["shop", "news"]
+        assert data["conflicts"] == [{"name": "taken", "domain": "example.com"}]
+
+    async def test_bulk_create_rejects_foreign_destination(
+        self, authenticated_client: AsyncClient, db: AsyncSession
+    ):
+        """Destinations must belong to the current user."""
+        other = await UserFactory.create(db, email="other@example.com")
+        foreign = await DestinationFactory.create(db, user=other)
+
+        response = await authenticated_client.post(
+            "/api/v1/aliases/bulk",
+            json={
+                "aliases": [
+                    {
+                        "name": "xyz",
+                        "domain": "example.com",
+                        "destination_id": foreign.id,
+                    }
+                ]
+            },
+        )
+        assert response.status_code == 422
+        assert response.json()["destination_ids"] == [foreign.id]
+
+    async def test_bulk_create_rejects_duplicates_in_batch(
+        self, authenticated_client: AsyncClient, destination: Destination
+    ):
+        """The same address twice in one batch fails validation."""
+        alias = {"name": "dup", "domain": "example.com", "destination_id": 1}
+        response = await authenticated_client.post(
+            "/api/v1/aliases/bulk", json={"aliases": [alias, alias]}
+        )
+        assert response.status_code == 422
+
+    async def test_bulk_create_rejects_mixed_case_duplicates(
+        self, authenticated_client: AsyncClient, destination: Destination
+    ):
+        """Addresses differing only in domain case are the same alias."""
+        aliases = [
+            {"name": "dup", "domain": domain, "destination_id": destination.id}
+            for domain in ("Example.com", "example.com")
+        ]
+        response = await authenticated_client.post(
+            "/api/v1/aliases/bulk", json={"aliases": aliases}
+        )
+        assert response.status_code == 422
+
+    async def test_bulk_toggle(
+        self,
+        authenticated_client: AsyncClient,
+        db: AsyncSession,
+        user: User,
+        destination: Destination,
+    ):
+        """One request disables several aliases, ignoring unknown ids."""
+        aliases = [
+            await AliasFactory.create(db, user=user, destination=destination, name=n)
+            for n in ("one", "two", "three")
+        ]
+        other = await UserFactory.create(db, email="other@example.com")
+        other_destination = await DestinationFactory.create(db, user=other)
+        theirs = await AliasFactory.create(
+            db, user=other, destination=other_destination, name="theirs"
+        )
+
+        ids = [aliases[0].id, aliases[2].id, theirs.id]
+        response = await authenticated_client.patch(
+            "/api/v1/aliases/bulk", json={"alias_ids": ids, "is_active": False}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["updated_ids"] == [aliases[0].id, aliases[2].id]
+        assert data["not_found_ids"] == [theirs.id]
+
+        listed = (
+            await authenticated_client.get(
+                "/api/v1/aliases", params={"is_active": True}
+            )
+        ).json()
+        assert [a["name"] for a in listed["aliases"]] == ["two"]
+
+
+class TestAliasSuggestions:
+    """Test alias name suggestions."""
+
+    async def test_suggestions(self, authenticated_client: AsyncClient):
+        """Suggestions return the requested number of names."""
+        response = await authenticated_client.get(
+            "/api/v1/aliases/suggestions",
+            params={"domain": "Example.com", "count": 3},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["domain"] == "example.com"
+        assert len(set(data["names"])) == 3
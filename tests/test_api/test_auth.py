@@ -209,3 +209,20 @@ class TestAuth:
         assert data["message"] == "Authentication successful."
         assert data["email"] == email
         assert "session" in response.cookies
+
+    async def test_request_magic_link_rate_limited_per_email(self, client: AsyncClient):
+        """Test repeated magic link requests for one address are limited."""
+        for _ in range(5):
+            response = await client.post(
+                "/api/v1/auth/request-magic-link", json={"email": "spam@example.com"}
+            )
+            assert response.status_code == 200
+
+        response = await client.post(
+            "/api/v1/auth/request-magic-link", json={"email": "spam@example.com"}
+        )
+
+        assert response.status_code == 429
+        assert response.json()["error_code"] == "RATE_LIMIT_EXCEEDED"
+        assert int(response.headers["retry-after"]) > 0
+        assert len(mock_email_service.sent_emails) == 5
@@ -0,0 +1,43 @@
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.destination import Destination
+from app.models.user import User
+from tests.factories import DestinationFactory
+
+
+class TestListDestinations:
+    """Test keyset-paginated destination listing."""
+
+    async def test_walk_pages(
+        self,
+        authenticated_client: AsyncClient,
+        db: AsyncSession,
+        user: User,
+        destination: Destination,
+    ):
+        """Destinations are paged by cursor with verification status."""
+        unverified = await DestinationFactory.create(
+            db, user=user, email="new@example.com", verified=False
+        )
+
+        first = (
+            await authenticated_client.get(
+                "/api/v1/destinations", params={"limit": 1, "include_total": True}
+            )
+        ).json()
+        assert [d["id"] for d in first["destinations"]] == [destination.id]
+        assert first["destinations"][0]["is_verified"] is True
+        assert first["has_more"] is True
+        assert first["total"] == 2
+
+        second = (
+            await authenticated_client.get(
+                "/api/v1/destinations",
+                params={"limit": 1, "cursor": first["next_cursor"]},
+            )
+        ).json()
+        assert [d["id"] for d in second["destinations"]] == [unverified.id]
+        assert second["destinations"][0]["is_verified"] is False
+        assert second["has_more"] is False
+        assert second["total"] is None
@@ -0,0 +1,77 @@
+import base64
+import hashlib
+import hmac
+
+import pytest
+from httpx import AsyncClient
+
+from app.api.v1 import inbound
+from app.services.inbound import InboundReceiver, InboundSpool
+
+RAW = b"From: a@example.com\r\nSubject: Hi\r\n\r\nHello"
+
+
+@pytest.fixture
+def spool(tmp_path, monkeypatch) -> InboundSpool:
+    spool = InboundSpool(str(tmp_path))
+    receiver = InboundReceiver(
+        spool,
+        cloudflare_secret="s3cret",
+        postmark_user="pm",
+        postmark_password="secret",
+    )
+    monkeypatch.setattr(inbound, "inbound_receiver", receiver)
+    return spool
+
+
+class TestInboundWebhooks:
+    """Test the provider receiver endpoints."""
+
+    async def test_cloudflare_queues_message(
+        self, client: AsyncClient, spool: InboundSpool
+    ):
+        """A signed raw message is spooled and acknowledged."""
+        response = await client.post(
+            "/api/v1/inbound/cloudflare",
+            content=RAW,
+            headers={
+                "X-QSM-Mail-From": "a@example.com",
+                "X-QSM-Rcpt-To": "mint-bison-42@example.com",
+                "X-QSM-Signature": hmac.new(b"s3cret", RAW, hashlib.sha256).hexdigest(),
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "queued"
+        assert spool.pending() == 1
+
+    async def test_cloudflare_rejects_bad_signature(
+        self, client: AsyncClient, spool: InboundSpool
+    ):
+        """Unsigned bodies are refused so the provider can alert on it."""
+        response = await client.post(
+            "/api/v1/inbound/cloudflare",
+            content=RAW,
+            headers={"X-QSM-Rcpt-To": "mint-bison-42@example.com"},
+        )
+
+        assert response.status_code == 401
+        assert response.json()["error_code"] == "INVALID_SIGNATURE"
+        assert spool.pending() == 0
+
+    async def test_only_configured_provider_is_exposed(
+        self, client: AsyncClient, spool: InboundSpool, monkeypatch
+    ):
+        """The Postmark endpoint answers only when INBOUND_PROVIDER=postmark."""
+        auth = "Basic " + base64.b64encode(b"pm:secret").decode()
+        response = await client.post(
+            "/api/v1/inbound/postmark", content=b"{}", headers={"Authorization": auth}
+        )
+        assert response.status_code == 404
+
+        monkeypatch.setattr(inbound.settings, "inbound_provider", "postmark")
+        response = await client.post(
+            "/api/v1/inbound/postmark", content=b"{}", headers={"Authorization": auth}
+        )
+        assert response.status_code == 200
+        assert spool.pending() == 1
@@ -0,0 +1,74 @@
+from datetime import date
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.usage_rollup import UsageDaily
+from app.models.user import User
+from app.services.bandwidth import bandwidth_accountant, period_start
+
+
+class TestUsage:
+    """Test the current usage endpoint."""
+
+    async def test_requires_auth(self, client: AsyncClient):
+        """Usage is only available to signed-in users."""
+        response = await client.get("/api/v1/usage")
+        assert response.status_code == 401
+
+    async def test_includes_unflushed_usage(
+        self, authenticated_client: AsyncClient, user: User, monkeypatch
+    ):
+        """Increments not yet flushed are already visible."""
+        monkeypatch.setattr(bandwidth_accountant, "_pending", {})
+        monkeypatch.setattr(bandwidth_accountant, "_base", {})
+        bandwidth_accountant.record_received(user.id, 2048)
+
+        response = await authenticated_client.get("/api/v1/usage")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["period_start"] == period_start().isoformat()
+        assert data["bytes_used"] == 2048
+        assert data["emails_received"] == 1
+        assert data["emails_forwarded"] == 0
+
+    async def test_history_from_rollups(
+        self, authenticated_client: AsyncClient, db: AsyncSession, user: User
+    ):
+        """History returns precomputed daily buckets."""
+        today = date.today()
+        db.add(
+            UsageDaily(
+                user_id=user.id,
+                day=today,
+                emails_received=3,
+                emails_forwarded=2,
+                emails_failed=1,
+                emails_spam=0,
+                bytes_received=300,
+            )
+        )
+        await db.commit()
+
+        response = await authenticated_client.get(
+            "/api/v1/usage/history", params={"periods": 7}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["granularity"] == "daily"
+        assert data["buckets"] == [
+            {
+                "start": today.isoformat(),
+                "emails_received": 3,
+                "emails_forwarded": 2,
+                "emails_failed": 1,
+                "emails_spam": 0,
+                "bytes_received": 300,
+            }
+        ]
+
+        response = await authenticated_client.get(
+            "/api/v1/usage/history", params={"granularity": "weekly"}
+        )
+        assert response.status_code == 200
+        assert response.json()["buckets"] == []
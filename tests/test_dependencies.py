@@ -8,6 +8,7 @@ from app.dependencies import (
     get_client_ip,
     get_current_user,
     get_current_user_optional,
+    get_rate_limit_ip,
     get_user_agent,
 )
 from app.models.user import User
@@ -69,6 +70,24 @@ class TestDependencies:
 
         assert ip is None
 
+    def test_get_rate_limit_ip_ignores_untrusted_forwarding(self) -> None:
+        """Forwarded headers from an untrusted peer cannot pick the key."""
+        request = MagicMock(spec=Request)
+        request.headers = {"x-forwarded-for": "1.2.3.4", "x-real-ip": "1.2.3.4"}
+        request.client = MagicMock(host="203.0.113.9")
+
+        assert get_rate_limit_ip(request, []) == "203.0.113.9"
+
+    def test_get_rate_limit_ip_behind_trusted_proxy(self) -> None:
+        """Behind a trusted proxy the last untrusted hop is used."""
+        request = MagicMock(spec=Request)
+        request.headers = {"x-forwarded-for": "1.2.3.4, 198.51.100.7, 10.0.0.2"}
+        request.client = MagicMock(host="10.0.0.1")
+
+        ip = get_rate_limit_ip(request, ["10.0.0.1", "10.0.0.2"])
+
+        assert ip == "198.51.100.7"
+
     def test_get_user_agent(self) -> None:
         """Test user agent extraction."""
         request = MagicMock(spec=Request)
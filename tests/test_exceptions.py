@@ -8,6 +8,7 @@ from app.exceptions import (
     ForbiddenError,
     InvalidTokenError,
     NotFoundError,
+    PayloadTooLargeError,
     RateLimitError,
     ServiceUnavailableError,
     UnauthorizedError,
@@ -108,6 +109,15 @@ def test_service_unavailable_error():
     assert exc.message == "Service temporarily unavailable"
 
 
+def test_payload_too_large_error():
+    """Test PayloadTooLargeError exception."""
+    exc = PayloadTooLargeError()
+
+    assert exc.status_code == 413
+    assert exc.error_code == "PAYLOAD_TOO_LARGE"
+    assert exc.message == "Payload too large"
+
+
 def test_invalid_token_error():
     """Test InvalidTokenError exception."""
     exc = InvalidTokenError()
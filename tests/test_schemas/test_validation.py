@@ -5,6 +5,12 @@ from app.schemas.alias import AliasCreate, AliasUpdate
 from app.schemas.auth import MagicLinkRequest, PasskeyRegisterRequest
 from app.schemas.base import PaginationParams
 from app.schemas.destination import DestinationCreate, DestinationUpdate
+from app.utils.alias_names import (
+    RESERVED_ALIAS_NAMES,
+    alias_name_error,
+    is_valid_alias_address,
+    is_valid_alias_name,
+)
 
 
 class TestAliasSchemas:
@@ -58,6 +64,66 @@ class TestAliasSchemas:
         assert update.destination_id is None
         assert update.is_active is None
 
+    def test_alias_create_reserved_name(self) -> None:
+        """Test reserved local-parts are rejected."""
+        with pytest.raises(ValidationError) as exc_info:
+            AliasCreate(name="Postmaster", domain="example.com", destination_id=1)
+
+        assert "reserved" in str(exc_info.value)
+
+    def test_alias_create_length(self) -> None:
+        """Test alias names must be 3-32 characters."""
+        for name in ("ab", "a" * 33):
+            with pytest.raises(ValidationError) as exc_info:
+                AliasCreate(name=name, domain="example.com", destination_id=1)
+            assert "between 3 and 32 characters" in str(exc_info.value)
+
+
+class TestAliasNameRules:
+    """Test the shared alias name validator."""
+
+    @pytest.mark.parametrize(
+        "name", ["abc", "mint-bison-42", "A1B", "a" * 32, "info1", "x-y"]
+    )
+    def test_valid_names(self, name: str) -> None:
+        """Test names allowed by the spec."""
+        assert is_valid_alias_name(name)
+        assert alias_name_error(name) is None
+
+    @pytest.mark.parametrize(
+        "name",
+        [
+            "",
+            "ab",
+            "a" * 33,
+            "a_b",
+            "a.b",
+            "a+b",
+            "a b",
+            "-ab",
+            "ab-",
+            "a--b",
+            "ümlaut",
+        ],
+    )
+    def test_invalid_names(self, name: str) -> None:
+        """Test names rejected by the spec, each with a reason."""
+        assert not is_valid_alias_name(name)
+        assert alias_name_error(name)
+
+    def test_reserved_names(self) -> None:
+        """Test every reserved local-part is rejected in any case."""
+        for name in RESERVED_ALIAS_NAMES:
+            assert not is_valid_alias_name(name)
+            assert not is_valid_alias_name(name.upper())
+
+    def test_addresses(self) -> None:
+        """Test addresses are checked by their local-part."""
+        assert is_valid_alias_address("mint-bison-42@example.com")
+        assert not is_valid_alias_address("abuse@example.com")
+        assert not is_valid_alias_address("mint-bison-42@")
+        assert not is_valid_alias_address("mint-bison-42")
+
 
 class TestAuthSchemas:
     """Test authentication schema validation."""
@@ -4,6 +4,10 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from app.services.email_log import hash_subject
+from app.services.enforcement import Decision
+from app.services.inbound import InboundDeferred, InboundMessage
+from app.services.pipeline import BytesContent
 from server import ALIASES, ForwardingHandler, main
 
 
@@ -20,6 +24,89 @@ class TestForwardingHandler:
         envelope.content = b"Subject: Test\n\nTest message"
         return envelope
 
+    @pytest.mark.asyncio
+    async def test_handle_rcpt_valid_alias(self, handler):
+        envelope = MagicMock()
+        envelope.rcpt_tos = []
+        result = await handler.handle_RCPT(
+            None, None, envelope, "mint-bison-42@localhost", []
+        )
+        assert result == "250 OK"
+        assert envelope.rcpt_tos == ["mint-bison-42@localhost"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "address", ["postmaster@localhost", "a+tag@localhost", "no-domain", "x@y"]
+    )
+    async def test_handle_rcpt_invalid_alias(self, handler, address):
+        envelope = MagicMock()
+        envelope.rcpt_tos = []
+        result = await handler.handle_RCPT(None, None, envelope, address, [])
+        assert result.startswith("553")
+        assert envelope.rcpt_tos == []
+
+    @pytest.mark.asyncio
+    async def test_handle_rcpt_enforcement_reject(self, handler):
+        handler.enforcer = MagicMock()
+        handler.enforcer.check.return_value = Decision("reject", "alias-inactive")
+        envelope = MagicMock()
+        envelope.rcpt_tos = []
+        result = await handler.handle_RCPT(None, None, envelope, "off@localhost", [])
+        assert result == "550 5.1.1 Alias inactive"
+        assert envelope.rcpt_tos == []
+
+    @pytest.mark.asyncio
+    async def test_handle_rcpt_defers_until_enforcement_ready(self, handler):
+        handler.enforcer = MagicMock(ready=False)
+        envelope = MagicMock()
+        envelope.rcpt_tos = []
+        result = await handler.handle_RCPT(
+            None, None, envelope, "mint-bison-42@localhost", []
+        )
+        assert result.startswith("451 4.3.0")
+        assert envelope.rcpt_tos == []
+        handler.enforcer.check.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("app.services.pipeline.smtplib.SMTP")
+    async def test_handle_data_enforcement_hold(self, mock_smtp, mock_envelope):
+        handler = ForwardingHandler(enforcer=MagicMock())
+        handler.enforcer.check.return_value = Decision("hold", "bandwidth-exceeded", 1)
+
+        with patch.dict("server.ALIASES", {"test@localhost": "dest@example.com"}):
+            result = await handler.handle_DATA(None, None, mock_envelope)
+
+        assert result == "250 OK"
+        mock_smtp.assert_not_called()
+        handler.enforcer.record_received.assert_called_once_with(
+            "test@localhost", len(mock_envelope.content)
+        )
+        handler.enforcer.record_forwarded.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch.dict(
+        os.environ,
+        {
+            "RELAY_HOST": "smtp.example.com",
+            "RELAY_USER": "user@example.com",
+            "RELAY_PASSWORD": "password",
+        },
+    )
+    @patch("app.services.pipeline.smtplib.SMTP")
+    async def test_handle_data_logs_final_status(self, mock_smtp, mock_envelope):
+        handler = ForwardingHandler(enforcer=MagicMock(), log_writer=MagicMock())
+        handler.enforcer.check.return_value = Decision("accept", None, 1, 7)
+
+        with patch.dict("server.ALIASES", {"test@localhost": "dest@example.com"}):
+            result = await handler.handle_DATA(None, None, mock_envelope)
+
+        assert result == "250 OK"
+        (record,) = handler.log_writer.add.call_args.args
+        assert (record.user_id, record.alias_id, record.status) == (1, 7, "forwarded")
+        assert record.size_bytes == len(mock_envelope.content)
+        assert record.subject_hash == hash_subject("Test")
+        assert record.forwarded_at is not None
+
     @pytest.mark.asyncio
     async def test_handle_data_unknown_alias(self, handler, mock_envelope):
         mock_envelope.rcpt_tos = ["unknown@localhost"]
@@ -54,7 +141,7 @@ class TestForwardingHandler:
             "RELAY_PASSWORD": "password",
         },
     )
-    @patch("server.smtplib.SMTP")
+    @patch("app.services.pipeline.smtplib.SMTP")
     async def test_handle_data_success(self, mock_smtp, handler, mock_envelope):
         mock_smtp_instance = MagicMock()
         mock_smtp.return_value.__enter__.return_value = mock_smtp_instance
@@ -74,7 +161,7 @@ class TestForwardingHandler:
             "RELAY_PASSWORD": "password",
         },
     )
-    @patch("server.smtplib.SMTP")
+    @patch("app.services.pipeline.smtplib.SMTP")
     async def test_handle_data_smtp_error(self, mock_smtp, handler, mock_envelope):
         mock_smtp.side_effect = Exception("SMTP Error")
 
@@ -82,6 +169,63 @@ class TestForwardingHandler:
             result = await handler.handle_DATA(None, None, mock_envelope)
             assert result == "550 Forwarding failed"
 
+    @pytest.mark.asyncio
+    @patch.dict(
+        os.environ,
+        {
+            "RELAY_HOST": "smtp.example.com",
+            "RELAY_USER": "user@example.com",
+            "RELAY_PASSWORD": "password",
+        },
+    )
+    @patch("app.services.pipeline.smtplib.SMTP")
+    async def test_handle_inbound_forwards(self, mock_smtp, handler):
+        mock_smtp_instance = MagicMock()
+        mock_smtp.return_value.__enter__.return_value = mock_smtp_instance
+        message = InboundMessage(
+            "1-a",
+            "cloudflare",
+            "sender@example.com",
+            ["mint-bison-42@localhost", "postmaster@localhost"],
+            BytesContent(b"Subject: Test\n\nTest message"),
+        )
+
+        with patch.dict("server.ALIASES", {"mint-bison-42@localhost": "d@example.com"}):
+            await handler.handle_inbound(message)
+
+        mock_smtp_instance.sendmail.assert_called_once()
+
+    @pytest.mark.asyncio
+    @patch.dict(os.environ, {"RELAY_HOST": ""})
+    async def test_handle_inbound_failure_raises(self, handler):
+        message = InboundMessage(
+            "1-a",
+            "postmark",
+            None,
+            ["mint-bison-42@localhost"],
+            BytesContent(b"\n\nbody"),
+        )
+
+        with patch.dict("server.ALIASES", {"mint-bison-42@localhost": "d@example.com"}):
+            with pytest.raises(RuntimeError):
+                await handler.handle_inbound(message)
+
+    @pytest.mark.asyncio
+    async def test_handle_inbound_defers_on_tempfail(self, handler):
+        handler.enforcer = MagicMock(ready=False)
+        handler.pipeline = MagicMock()
+        message = InboundMessage(
+            "1-a",
+            "cloudflare",
+            None,
+            ["mint-bison-42@localhost"],
+            BytesContent(b"\n\nbody"),
+        )
+
+        with pytest.raises(InboundDeferred):
+            await handler.handle_inbound(message)
+        handler.pipeline.run.assert_not_called()
+
 
 class TestMain:
     @pytest.mark.asyncio
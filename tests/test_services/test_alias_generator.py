@@ -0,0 +1,109 @@
+import re
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.exceptions import ConflictError
+from app.models.destination import Destination
+from app.models.user import User
+from app.services.alias_generator import AliasNameGenerator, load_words
+from app.utils.bloom import BloomFilter
+from tests.factories import AliasFactory
+
+NAME_PATTERN = re.compile(r"^[a-z]+-[a-z]+-\d+$")
+
+
+class TestBloomFilter:
+    """Test the bloom filter used to pre-filter candidates."""
+
+    def test_no_false_negatives(self):
+        """Every added item is reported present."""
+        bloom = BloomFilter(1000, error_rate=0.01)
+        items = [f"name-{i}@example.com" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        assert all(item in bloom for item in items)
+        assert len(bloom) == 1000
+
+    def test_false_positive_rate(self):
+        """Unseen items are rarely reported present at design capacity."""
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"in-{i}")
+        false_positives = sum(f"out-{i}" in bloom for i in range(10_000))
+        assert false_positives < 300
+
+
+class TestAliasNameGenerator:
+    """Test readable alias name generation."""
+
+    async def test_generates_readable_unused_names(self, db: AsyncSession):
+        """Names follow adjective-noun-number and are distinct."""
+        generator = AliasNameGenerator()
+        names = await generator.generate(db, "example.com", count=10)
+
+        assert len(set(names)) == 10
+        assert all(NAME_PATTERN.match(name) for name in names)
+        assert all(len(name) <= 32 for name in names)
+
+    async def test_skips_taken_names(
+        self, db: AsyncSession, user: User, destination: Destination
+    ):
+        """Existing aliases are never suggested, even in a tiny namespace."""
+        generator = AliasNameGenerator(
+            adjectives=["mint"], nouns=["bison"], suffix_range=(1, 3), batch_size=8
+        )
+        for suffix in (1, 2):
+            await AliasFactory.create(
+                db, user=user, destination=destination, name=f"mint-bison-{suffix}"
+            )
+
+        assert await generator.generate(db, "example.com") == ["mint-bison-3"]
+        # Same names on another domain are free
+        assert len(await generator.generate(db, "other.com", count=3)) == 3
+
+    async def test_exhausted_namespace(
+        self, db: AsyncSession, user: User, destination: Destination
+    ):
+        """A full namespace raises a conflict after max_attempts batches."""
+        generator = AliasNameGenerator(
+            adjectives=["mint"], nouns=["bison"], suffix_range=(1, 1), max_attempts=2
+        )
+        await AliasFactory.create(
+            db, user=user, destination=destination, name="mint-bison-1"
+        )
+
+        with pytest.raises(ConflictError):
+            await generator.generate(db, "example.com")
+
+    async def test_bloom_filter_prefilters_and_learns(
+        self, db: AsyncSession, user: User, destination: Destination
+    ):
+        """Loaded and newly discovered addresses are skipped without a query."""
+        generator = AliasNameGenerator(
+            adjectives=["mint"],
+            nouns=["bison"],
+            suffix_range=(1, 3),
+            bloom_capacity=100,
+        )
+        await AliasFactory.create(
+            db, user=user, destination=destination, name="mint-bison-1"
+        )
+
+        assert await generator.load_bloom(db) == 1
+        assert generator.bloom_ready
+        assert generator._probably_taken("mint-bison-1", "example.com")
+
+        await AliasFactory.create(
+            db, user=user, destination=destination, name="mint-bison-2"
+        )
+        names = await generator.generate(db, "example.com")
+        assert names == ["mint-bison-3"]
+        assert generator._probably_taken("mint-bison-2", "example.com")
+
+    def test_load_words(self, tmp_path):
+        """Custom dictionaries keep only plain lowercase words."""
+        path = tmp_path / "nouns.txt"
+        path.write_text("Otter\nsea-lion\n\nfox\nfox\n")
+        assert load_words(str(path), ()) == ("fox", "otter")
+        assert load_words(None, ("owl",)) == ("owl",)
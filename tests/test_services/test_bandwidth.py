@@ -0,0 +1,196 @@
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.bandwidth_usage import BandwidthUsage
+from app.models.user import User
+from app.services.bandwidth import (
+    BandwidthAccountant,
+    UsageCounters,
+    UsageJournal,
+    period_start,
+)
+
+OCTOBER = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+
+def make_accountant(
+    session_factory: async_sessionmaker[AsyncSession], **kwargs
+) -> BandwidthAccountant:
+    kwargs.setdefault("journal_path", None)
+    return BandwidthAccountant(
+        session_factory=session_factory,
+        **kwargs,
+    )
+
+
+async def stored(db: AsyncSession, user_id: int) -> list[BandwidthUsage]:
+    return list(
+        await db.scalars(
+            select(BandwidthUsage)
+            .where(BandwidthUsage.user_id == user_id)
+            .order_by(BandwidthUsage.period_start)
+            .execution_options(populate_existing=True)
+        )
+    )
+
+
+class TestBandwidthAccountant:
+    """Test in-memory usage aggregation and batched flushes."""
+
+    async def test_flush_aggregates_increments(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+    ):
+        """Many increments become one additive upsert per user and month."""
+        accountant = make_accountant(session_factory)
+        for _ in range(5):
+            accountant.record_received(user.id, 1000, at=OCTOBER)
+        accountant.record_forwarded(user.id, at=OCTOBER)
+        accountant.record_received(user.id, 10, at=datetime(2026, 11, 1))
+
+        assert await accountant.flush() == 2
+        rows = await stored(db, user.id)
+        assert [(r.period_start, r.bytes_used) for r in rows] == [
+            (date(2026, 10, 1), 5000),
+            (date(2026, 11, 1), 10),
+        ]
+        assert rows[0].emails_received == 5
+        assert rows[0].emails_forwarded == 1
+
+        # A second flush adds to the stored row
+        accountant.record_received(user.id, 500, at=OCTOBER)
+        await accountant.flush()
+        assert (await stored(db, user.id))[0].bytes_used == 5500
+
+    async def test_usage_combines_base_and_pending(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+    ):
+        """Reads see persisted usage plus unflushed increments."""
+        accountant = make_accountant(session_factory)
+        accountant.record_received(user.id, 300, at=OCTOBER)
+        await accountant.flush()
+
+        assert accountant.current_usage(user.id, at=OCTOBER) is None
+        usage = await accountant.get_usage(db, user.id, at=OCTOBER)
+        assert usage == UsageCounters(300, 1, 0)
+
+        accountant.record_received(user.id, 200, at=OCTOBER)
+        assert accountant.current_usage(user.id, at=OCTOBER) == UsageCounters(500, 2, 0)
+        # Flushing moves the increment into the cached base, not twice
+        await accountant.flush()
+        assert accountant.current_usage(user.id, at=OCTOBER) == UsageCounters(500, 2, 0)
+
+    async def test_threshold_triggers_flush(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+    ):
+        """Reaching the increment threshold schedules an early flush."""
+        accountant = make_accountant(session_factory, flush_threshold=3)
+        for _ in range(3):
+            accountant.record_received(user.id, 1, at=OCTOBER)
+        assert accountant._flush_task is not None
+        await accountant._flush_task
+
+        assert (await stored(db, user.id))[0].emails_received == 3
+
+    async def test_failed_flush_keeps_increments(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        tmp_path: Path,
+    ):
+        """Increments survive a failed flush, in memory and in the journal."""
+        accountant = make_accountant(
+            session_factory, journal_path=str(tmp_path / "usage.journal")
+        )
+        accountant.record_received(user.id, 100, at=OCTOBER)
+
+        def broken_factory():
+            raise ConnectionError("database down")
+
+        working_factory = accountant.session_factory
+        accountant.session_factory = broken_factory  # type: ignore[assignment]
+        with pytest.raises(ConnectionError):
+            await accountant.flush()
+        accountant.record_received(user.id, 50, at=OCTOBER)
+
+        assert accountant.unflushed_usage(user.id, at=OCTOBER).bytes_used == 150
+        assert (
+            sum(delta.bytes_used for delta in accountant.journal.replay().values())
+            == 150
+        )
+
+        accountant.session_factory = working_factory
+        await accountant.flush()
+        assert (await stored(db, user.id))[0].bytes_used == 150
+        assert accountant.journal.replay() == {}
+
+    async def test_recover_from_journal(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        tmp_path: Path,
+    ):
+        """A new process replays increments a crashed one never flushed."""
+        path = str(tmp_path / "usage.journal")
+        crashed = make_accountant(session_factory, journal_path=path)
+        crashed.record_received(user.id, 700, at=OCTOBER)
+        crashed.record_forwarded(user.id, at=OCTOBER)
+        crashed.journal.close()
+
+        # Simulate a torn final write
+        with open(path, "a") as journal:
+            journal.write(f"{user.id} 2026-10")
+
+        restarted = make_accountant(session_factory, journal_path=path)
+        assert restarted.recover() == 1
+        await restarted.flush()
+
+        row = (await stored(db, user.id))[0]
+        assert (row.bytes_used, row.emails_received, row.emails_forwarded) == (
+            700,
+            1,
+            1,
+        )
+
+
+class TestUsageJournal:
+    """Test the crash journal on its own."""
+
+    def test_rotate_and_commit(self, tmp_path: Path):
+        """Rotated entries are replayed until committed."""
+        journal = UsageJournal(tmp_path / "nested" / "usage.journal")
+        key = (1, period_start(OCTOBER))
+        journal.append(key, UsageCounters(10, 1, 0))
+        journal.rotate()
+        journal.append(key, UsageCounters(5, 1, 0))
+
+        assert journal.replay() == {key: UsageCounters(15, 2, 0)}
+        journal.commit()
+        assert journal.replay() == {key: UsageCounters(5, 1, 0)}
+        journal.close()
+
+    def test_one_process_per_journal(self, tmp_path: Path):
+        """A journal already locked by its owner cannot be taken over."""
+        owner = UsageJournal(tmp_path / "usage.journal")
+        owner.lock()
+        with pytest.raises(RuntimeError):
+            UsageJournal(tmp_path / "usage.journal").lock()
+
+        owner.unlock()
+        other = UsageJournal(tmp_path / "usage.journal")
+        other.lock()
+        other.unlock()
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.magic_link_token import MagicLinkToken
+from app.models.session import Session
+from app.models.user import User
+from app.services.cleanup import CleanupWorker
+from app.services.magic_link import magic_link_service
+from tests.factories import MagicLinkTokenFactory, SessionFactory
+
+
+class TestCleanup:
+    """Test batched expiry cleanup."""
+
+    async def test_cleanup_expired_tokens_in_batches(self, db: AsyncSession):
+        """Test expired tokens are deleted across several batches."""
+        past = datetime.now(timezone.utc) - timedelta(minutes=5)
+        future = datetime.now(timezone.utc) + timedelta(minutes=5)
+        for i in range(7):
+            await MagicLinkTokenFactory.create(
+                db, email=f"expired{i}@example.com", expires_at=past
+            )
+        for i in range(2):
+            await MagicLinkTokenFactory.create(
+                db, email=f"valid{i}@example.com", expires_at=future
+            )
+
+        deleted = await magic_link_service.cleanup_expired_tokens(
+            db, batch_size=3, pause=0
+        )
+
+        assert deleted == 7
+        remaining = await db.scalar(select(func.count(MagicLinkToken.id)))
+        assert remaining == 2
+
+    async def test_worker_reports_each_task(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+    ):
+        """Test a worker run reports rows deleted per table."""
+        await SessionFactory.create(db, user=user)
+        await MagicLinkTokenFactory.create(db)
+        worker = CleanupWorker(batch_size=10, pause=0, session_factory=session_factory)
+
+        reports = {report.task: report for report in await worker.run_once()}
+
+        assert reports["sessions"].rows_deleted == 1
+        assert reports["magic_link_tokens"].rows_deleted == 1
+        assert reports["rate_limit_buckets"].rows_deleted == 0
+        assert all(report.error is None for report in reports.values())
+        assert await db.scalar(select(func.count(Session.id))) == 0
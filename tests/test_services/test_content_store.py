@@ -0,0 +1,143 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.stored_email import FailedEmail, QuarantinedEmail
+from app.models.user import User
+from app.services.content_store import (
+    HEADER_SIZE,
+    ContentCorruptError,
+    ContentStore,
+    _purge_expired,
+)
+
+KEY_A = {"a": b"\x01" * 32}
+
+
+def make_store(tmp_path, keys=KEY_A, **kwargs) -> ContentStore:
+    kwargs.setdefault("chunk_size", 16)
+    return ContentStore(str(tmp_path), keys=dict(keys), **kwargs)
+
+
+class TestContentStore:
+    """Test streaming encryption and decryption."""
+
+    def test_round_trip_in_chunks(self, tmp_path):
+        """Content is encrypted chunk by chunk and nothing is stored in clear."""
+        store = make_store(tmp_path)
+        data = os.urandom(100) + b"secret"
+        stored = store.store([data[:7], data[7:60], data[60:]])
+
+        assert (stored.key_id, stored.size) == ("a", len(data))
+        raw = store.path(stored.pointer).read_bytes()
+        assert b"secret" not in raw
+        chunks = list(store.open(stored.pointer, "a"))
+        assert [len(c) for c in chunks] == [16] * 6 + [10]
+        assert b"".join(chunks) == data
+        assert list(tmp_path.rglob("*.tmp")) == []
+
+    def test_empty_content(self, tmp_path):
+        """An empty message still round-trips."""
+        store = make_store(tmp_path)
+        stored = store.store([])
+        assert store.read(stored.pointer, "a") == b""
+
+    def test_tampering_is_detected(self, tmp_path):
+        """Flipped bits and dropped trailing chunks fail authentication."""
+        store = make_store(tmp_path)
+        stored = store.store([b"x" * 40])
+        path = store.path(stored.pointer)
+        original = path.read_bytes()
+
+        flipped = bytearray(original)
+        flipped[HEADER_SIZE + 10] ^= 1
+        path.write_bytes(bytes(flipped))
+        with pytest.raises(ContentCorruptError):
+            store.read(stored.pointer, "a")
+
+        # Drop the last chunk: the one before was not sealed as the last
+        frame = 4 + 16 + 16
+        path.write_bytes(original[: HEADER_SIZE + 2 * frame])
+        with pytest.raises(ContentCorruptError):
+            store.read(stored.pointer, "a")
+
+    def test_key_rotation(self, tmp_path):
+        """New content uses the active key; old content keeps its own."""
+        old = make_store(tmp_path).store([b"old"])
+        keys = {**KEY_A, "b": b"\x02" * 32}
+        store = make_store(tmp_path, keys=keys, key_id="b")
+        new = store.store([b"new"])
+
+        assert new.key_id == "b"
+        assert store.read(old.pointer, old.key_id) == b"old"
+        with pytest.raises(ContentCorruptError):
+            store.read(old.pointer, "b")
+        with pytest.raises(ValueError):
+            make_store(tmp_path, keys=keys)
+
+    def test_discarded_writes_leave_nothing(self, tmp_path):
+        """Leaving the writer without committing removes the partial file."""
+        store = make_store(tmp_path)
+        with store.writer() as writer:
+            writer.write(b"y" * 50)
+        assert [p for p in tmp_path.rglob("*") if p.is_file()] == []
+
+    def test_purge_older_than(self, tmp_path):
+        """Files are purged by the time they were written."""
+        store = make_store(tmp_path)
+        old = store.store([b"old"])
+        new = store.store([b"new"])
+        os.utime(store.path(old.pointer), (0, 0))
+
+        assert store.purge_older_than(datetime(2000, 1, 1, tzinfo=timezone.utc)) == 1
+        assert not store.path(old.pointer).exists()
+        assert store.read(new.pointer, "a") == b"new"
+
+
+class TestPurgeExpired:
+    """Test retention of quarantined and failed mail."""
+
+    async def test_files_go_with_their_last_row(
+        self, db: AsyncSession, user: User, tmp_path
+    ):
+        """Expired rows are deleted; shared content outlives them if needed."""
+        store = make_store(tmp_path)
+        shared = store.store([b"shared"])
+        only = store.store([b"only"])
+        now = datetime.now(timezone.utc)
+
+        def quarantine(pointer: str, expires: datetime) -> QuarantinedEmail:
+            return QuarantinedEmail(
+                user_id=user.id,
+                size_bytes=6,
+                spam_score=1,
+                spam_reason="missing-date",
+                content_pointer=pointer,
+                content_key_id="a",
+                received_at=now,
+                will_delete_at=expires,
+            )
+
+        db.add_all(
+            [
+                quarantine(shared.pointer, now - timedelta(days=1)),
+                quarantine(only.pointer, now - timedelta(days=1)),
+                FailedEmail(
+                    user_id=user.id,
+                    size_bytes=6,
+                    content_pointer=shared.pointer,
+                    content_key_id="a",
+                    received_at=now,
+                    will_delete_at=now + timedelta(days=1),
+                ),
+            ]
+        )
+        await db.commit()
+
+        assert await _purge_expired(db, QuarantinedEmail, 1, 0, store) == 2
+        assert list(await db.scalars(select(QuarantinedEmail))) == []
+        assert store.read(shared.pointer, "a") == b"shared"
+        assert not store.path(only.pointer).exists()
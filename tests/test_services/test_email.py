@@ -84,6 +84,25 @@ class TestEmailService:
         assert context["verification_url"] in content
         assert context["email"] in content
 
+    def test_render_template_usage_warning(self, email_service: EmailService) -> None:
+        """Test usage warning template rendering per threshold."""
+        context = {
+            "threshold": 60,
+            "over_limit": False,
+            "usage_percent": 62,
+            "metric": "bandwidth",
+            "approaching_reset": False,
+            "manage_url": "https://example.com/aliases",
+        }
+
+        content = email_service._render_template("usage_warning.txt", context)
+        assert "62% of your monthly bandwidth allowance early in your cycle" in content
+        assert context["manage_url"] in content
+
+        context.update(threshold=101, over_limit=True, usage_percent=130)
+        content = email_service._render_template("usage_warning.txt", context)
+        assert "Overflow Hold for up to 30 days" in content
+
     async def test_send_email_async_thread_execution(
         self, email_service: EmailService
     ) -> None:
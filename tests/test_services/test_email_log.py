@@ -0,0 +1,113 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.email_log import FORWARDED, RECEIVED, EmailLog
+from app.models.user import User
+from app.services.email_log import (
+    EmailLogRecord,
+    EmailLogWriter,
+    cleanup_email_logs,
+    hash_subject,
+    next_month,
+    partition_name,
+)
+
+
+def make_writer(
+    session_factory: async_sessionmaker[AsyncSession], **kwargs
+) -> EmailLogWriter:
+    return EmailLogWriter(session_factory=session_factory, **kwargs)
+
+
+def make_record(user: User, received_at: datetime | None = None) -> EmailLogRecord:
+    return EmailLogRecord(
+        user_id=user.id,
+        alias_id=None,
+        from_address="sender@example.com",
+        subject_hash=hash_subject("Hello"),
+        size_bytes=100,
+        status=RECEIVED,
+        received_at=received_at or datetime.now(timezone.utc),
+    )
+
+
+async def count_logs(db: AsyncSession) -> int:
+    return await db.scalar(select(func.count()).select_from(EmailLog)) or 0
+
+
+class TestEmailLogWriter:
+    """Test buffered email_logs writes."""
+
+    async def test_flush_writes_in_batches(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+    ):
+        """Buffered records are written with multi-row inserts on flush."""
+        writer = make_writer(session_factory, batch_size=2)
+        for _ in range(5):
+            writer.add(make_record(user))
+        forwarded = make_record(user)
+        forwarded.status = FORWARDED
+        writer.add(forwarded)
+
+        assert await count_logs(db) == 0
+        assert await writer.flush() == 6
+        assert writer.pending == 0
+        assert await count_logs(db) == 6
+        statuses = await db.scalars(select(EmailLog.status))
+        assert sorted(statuses) == [FORWARDED] + [RECEIVED] * 5
+
+    async def test_failed_flush_keeps_records(
+        self, session_factory: async_sessionmaker[AsyncSession], user: User
+    ):
+        """A failed write keeps the records, bounded by max_buffer."""
+        writer = make_writer(session_factory, max_buffer=3)
+        for _ in range(2):
+            writer.add(make_record(user))
+
+        writer.session_factory = None  # type: ignore[assignment]
+        with pytest.raises(TypeError):
+            await writer.flush()
+        assert writer.pending == 2
+
+        writer.add(make_record(user))
+        writer.add(make_record(user))
+        assert writer.pending == 3
+        assert writer.dropped == 1
+
+    def test_hash_subject(self):
+        """Only a fingerprint of the subject is kept."""
+        assert hash_subject(None) is None
+        assert len(hash_subject("Hello") or "") == 64
+        assert hash_subject("Hello") != "Hello"
+
+
+class TestEmailLogRetention:
+    """Test partition naming and retention."""
+
+    def test_partition_names(self):
+        """Partitions are monthly and named by year and month."""
+        assert partition_name(date(2026, 10, 1)) == "email_logs_p2026_10"
+        assert next_month(date(2026, 12, 1)) == date(2027, 1, 1)
+        assert next_month(date(2026, 1, 1)) == date(2026, 2, 1)
+
+    async def test_cleanup_deletes_expired_rows(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+    ):
+        """Without partitioning, expired rows are deleted in batches."""
+        writer = make_writer(session_factory)
+        old = datetime.now(timezone.utc) - timedelta(days=365)
+        for received_at in (old, old, None):
+            writer.add(make_record(user, received_at))
+        await writer.flush()
+
+        assert await cleanup_email_logs(db, batch_size=1, pause=0) == 2
+        assert await count_logs(db) == 1
@@ -0,0 +1,181 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config.environments import PlanTier
+from app.models.alias import Alias
+from app.models.destination import Destination
+from app.models.user import User
+from app.services.bandwidth import BandwidthAccountant
+from app.services.enforcement import (
+    ALIAS_INACTIVE,
+    ALIAS_UNKNOWN,
+    BANDWIDTH_EXCEEDED,
+    EMAILS_EXCEEDED,
+    NO_VERIFIED_DESTINATIONS,
+    OVERSIZE,
+    EnforcementEngine,
+)
+from tests.factories import AliasFactory, DestinationFactory, UserFactory
+
+TIERS = {
+    "starter": PlanTier(emails_per_month=3, bytes_per_month=1000),
+    "pro": PlanTier(emails_per_month=100, bytes_per_month=100_000),
+}
+
+
+def make_engine(
+    session_factory: async_sessionmaker[AsyncSession], **kwargs
+) -> EnforcementEngine:
+    accountant = BandwidthAccountant(journal_path=None, session_factory=session_factory)
+    kwargs.setdefault("max_message_bytes", 500)
+    return EnforcementEngine(
+        accountant=accountant,
+        plan_tiers=TIERS,
+        default_tier="starter",
+        session_factory=session_factory,
+        **kwargs,
+    )
+
+
+class TestEnforcementEngine:
+    """Test in-memory accept/hold/reject decisions."""
+
+    async def test_accepts_within_limits(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        destination: Destination,
+        alias: Alias,
+    ):
+        """Mail within plan limits is accepted for the alias owner."""
+        engine = make_engine(session_factory)
+        await engine.load(db)
+
+        decision = engine.check("TestAlias@Example.com", 100)
+        assert decision.action == "accept"
+        assert decision.reason is None
+        assert decision.user_id == user.id
+
+    async def test_rejects_by_reason(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        destination: Destination,
+        alias: Alias,
+    ):
+        """Unknown, inactive, unverified and oversize mail is rejected."""
+        other = await UserFactory.create(db, email="other@example.com")
+        unverified = await DestinationFactory.create(db, user=other, verified=False)
+        await AliasFactory.create(
+            db, user=other, destination=unverified, name="unverified"
+        )
+        await AliasFactory.create(
+            db, user=user, destination=destination, name="off", is_active=False
+        )
+        engine = make_engine(session_factory)
+        await engine.load(db)
+
+        assert engine.check("nobody@example.com").reason == ALIAS_UNKNOWN
+        assert engine.check("off@example.com").reason == ALIAS_INACTIVE
+        assert engine.check("unverified@example.com").reason == NO_VERIFIED_DESTINATIONS
+        assert engine.check("testalias@example.com", 501).reason == OVERSIZE
+        assert all(
+            engine.check(address).action == "reject"
+            for address in ("nobody@example.com", "off@example.com")
+        )
+
+    async def test_over_limit_modes(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        destination: Destination,
+        alias: Alias,
+    ):
+        """Over-limit mail follows the configured enforcement mode."""
+        engine = make_engine(session_factory)
+        await engine.load(db)
+
+        engine.record_received("testalias@example.com", 900)
+        decision = engine.check("testalias@example.com", 200)
+        assert (decision.action, decision.reason) == ("hold", BANDWIDTH_EXCEEDED)
+        # At RCPT time the size is unknown, so only hard-exhausted limits apply
+        assert engine.check("testalias@example.com").action == "accept"
+
+        engine.record_received("testalias@example.com", 10)
+        engine.record_received("testalias@example.com", 10)
+        engine.mode = "reject"
+        decision = engine.check("testalias@example.com", 10)
+        assert (decision.action, decision.reason) == ("reject", EMAILS_EXCEEDED)
+
+        engine.mode = "allow-with-flag"
+        decision = engine.check("testalias@example.com", 10)
+        assert decision.action == "accept"
+        assert decision.flagged
+
+    async def test_usage_includes_persisted_base(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        destination: Destination,
+        alias: Alias,
+    ):
+        """Flushed usage is loaded with the snapshot."""
+        engine = make_engine(session_factory)
+        engine.accountant.record_received(user.id, 990)
+        await engine.accountant.flush()
+
+        fresh = make_engine(session_factory)
+        await fresh.load(db)
+        assert fresh.check("testalias@example.com", 20).reason == BANDWIDTH_EXCEEDED
+
+    async def test_incremental_refresh(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        destination: Destination,
+        alias: Alias,
+    ):
+        """Changed aliases, plans and destinations are picked up incrementally."""
+        engine = make_engine(session_factory, max_message_bytes=10_000)
+        await engine.load(db)
+        assert engine.check("testalias@example.com", 2000).reason == (
+            BANDWIDTH_EXCEEDED
+        )
+
+        new_user = await UserFactory.create(db, email="new@example.com")
+        new_destination = await DestinationFactory.create(
+            db, user=new_user, verified=False
+        )
+        await AliasFactory.create(
+            db, user=new_user, destination=new_destination, name="fresh"
+        )
+        await db.execute(update(User).where(User.id == user.id).values(plan_tier="pro"))
+        await db.execute(
+            update(Alias).where(Alias.id == alias.id).values(is_active=False)
+        )
+        await db.commit()
+        await engine.refresh(db)
+
+        assert engine.check("testalias@example.com").reason == ALIAS_INACTIVE
+        assert engine.check("fresh@example.com").reason == NO_VERIFIED_DESTINATIONS
+
+        await db.execute(
+            update(Alias).where(Alias.id == alias.id).values(is_active=True)
+        )
+        await db.execute(
+            update(Destination)
+            .where(Destination.id == new_destination.id)
+            .values(verified_at=datetime.now(timezone.utc))
+        )
+        await db.commit()
+        await engine.refresh(db)
+
+        assert engine.check("testalias@example.com", 2000).action == "accept"
+        assert engine.check("fresh@example.com").action == "accept"
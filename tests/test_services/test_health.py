@@ -0,0 +1,105 @@
+import asyncio
+
+from app.services import health
+from app.services.health import CheckResult, HealthMonitor
+
+
+class TestHealthMonitor:
+    """Test background health monitor caching."""
+
+    async def test_results_are_cached_between_reads(self):
+        """Test probes run once and later reads hit the cache."""
+        calls = 0
+
+        async def probe() -> tuple[bool, str]:
+            nonlocal calls
+            calls += 1
+            return True, "ok"
+
+        monitor = HealthMonitor(interval=60, timeout=1, stale_after=60)
+        monitor.register("database", probe)
+
+        first = await monitor.get_results()
+        second = await monitor.get_results()
+
+        assert calls == 1
+        assert first["database"] is second["database"]
+        assert first["database"].to_dict()["status"] == "pass"
+
+    async def test_probe_timeout_marks_failure(self):
+        """Test a hanging probe is reported as failed, not awaited forever."""
+
+        async def probe() -> tuple[bool, str]:
+            await asyncio.sleep(10)
+            return True, "ok"
+
+        monitor = HealthMonitor(interval=60, timeout=0.01, stale_after=60)
+        monitor.register("database", probe)
+
+        results = await monitor.get_results()
+
+        assert results["database"].healthy is False
+        assert "timeout" in results["database"].details
+
+    async def test_non_critical_failure_warns(self):
+        """Test non-critical probes report warn instead of fail."""
+
+        async def probe() -> tuple[bool, str]:
+            raise ConnectionRefusedError("refused")
+
+        monitor = HealthMonitor(interval=60, timeout=1, stale_after=60)
+        monitor.register("smtp", probe, critical=False)
+
+        results = await monitor.get_results()
+
+        assert results["smtp"].to_dict()["status"] == "warn"
+
+    def test_stale_result_fails(self):
+        """Test results older than the staleness bound are reported as failed."""
+        result = CheckResult(
+            healthy=True, details="connected", response_time=0.001, checked_at=0.0
+        )
+
+        data = result.to_dict(stale_after=30)
+
+        assert data["status"] == "fail"
+        assert data["details"].startswith("stale")
+
+    async def test_start_primes_cache_and_stop_cancels(self):
+        """Test start runs probes immediately and stop ends the loop."""
+
+        async def probe() -> tuple[bool, str]:
+            return True, "ok"
+
+        monitor = HealthMonitor(interval=60, timeout=1, stale_after=60)
+        monitor.register("database", probe)
+
+        await monitor.start()
+        try:
+            assert "database" in monitor._results
+            assert monitor._migrations is not None
+        finally:
+            await monitor.stop()
+
+        assert monitor._task is None
+
+    async def test_failed_migration_check_is_retried(self, monkeypatch):
+        """Test a failing migration check is re-run by the loop until it passes."""
+        outcomes = [(False, "error: connection refused"), (True, "up to date")]
+
+        async def check_migrations() -> tuple[bool, str]:
+            return outcomes.pop(0) if len(outcomes) > 1 else outcomes[0]
+
+        monkeypatch.setattr(health, "check_migrations", check_migrations)
+        monitor = HealthMonitor(interval=0.01, timeout=1, stale_after=60)
+
+        await monitor.start()
+        try:
+            assert (await monitor.get_migrations()).healthy is False
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if (await monitor.get_migrations()).healthy:
+                    break
+            assert (await monitor.get_migrations()).healthy is True
+        finally:
+            await monitor.stop()
@@ -0,0 +1,236 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from email import message_from_bytes
+from typing import AsyncIterator
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.exceptions import (
+    PayloadTooLargeError,
+    ServiceUnavailableError,
+    UnauthorizedError,
+)
+from app.services.inbound import (
+    CLOUDFLARE,
+    InboundConsumer,
+    InboundDeferred,
+    InboundReceiver,
+    InboundSpool,
+    normalize,
+)
+from app.services.pipeline import BytesContent
+
+RAW = b"From: a@example.com\r\nSubject: Hi\r\n\r\n" + b"x" * 5000
+
+
+async def chunks(data: bytes, size: int = 1000) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+def postmark_body(payload: dict) -> BytesContent:
+    return BytesContent(json.dumps(payload).encode())
+
+
+def signed_headers(body: bytes, secret: str = "s3cret") -> dict[str, str]:
+    return {
+        "x-qsm-mail-from": "a@example.com",
+        "x-qsm-rcpt-to": "mint-bison-42@example.com, crisp-otter-7@example.com",
+        "x-qsm-signature": hmac.new(secret.encode(), body, hashlib.sha256).hexdigest(),
+    }
+
+
+@pytest.fixture
+def spool(tmp_path) -> InboundSpool:
+    return InboundSpool(str(tmp_path), write_buffer=2048)
+
+
+@pytest.fixture
+def receiver(spool: InboundSpool) -> InboundReceiver:
+    return InboundReceiver(
+        spool,
+        max_bytes=10_000,
+        cloudflare_secret="s3cret",
+        postmark_user="pm",
+        postmark_password="secret",
+    )
+
+
+class TestInboundSpool:
+    """Test the durable spool."""
+
+    async def test_write_claim_load_remove(self, spool: InboundSpool):
+        """A committed entry is claimed once and loads back unchanged."""
+        async with spool.writer(10_000) as writer:
+            async for chunk in chunks(RAW):
+                await writer.write(chunk)
+            entry_id = await writer.commit(
+                {"provider": CLOUDFLARE, "mail_from": None, "rcpt_tos": ["x@y.z"]}
+            )
+
+        assert spool.pending() == 1
+        assert spool.claim(10) == [entry_id]
+        assert spool.claim(10) == []
+        message = spool.load(entry_id)
+        assert (message.content.read(), message.rcpt_tos) == (RAW, ["x@y.z"])
+
+        spool.remove(entry_id)
+        assert list(spool.cur.iterdir()) == []
+
+    async def test_oversize_body_is_discarded(self, spool: InboundSpool):
+        """Exceeding the size limit aborts the entry and removes the file."""
+        with pytest.raises(PayloadTooLargeError):
+            async with spool.writer(3000) as writer:
+                async for chunk in chunks(RAW):
+                    await writer.write(chunk)
+
+        assert list(spool.tmp.iterdir()) == []
+        assert spool.pending() == 0
+
+    async def test_recover_returns_expired_claims(self, spool: InboundSpool):
+        """Claims older than the lease become pending again; live ones stay."""
+        for _ in range(2):
+            async with spool.writer(10_000) as writer:
+                await writer.write(RAW)
+                await writer.commit({"provider": CLOUDFLARE})
+        stale, live = spool.claim(10)
+        os.utime(spool.cur / f"{stale}.json", (0, time.time() - 120))
+
+        assert spool.recover(lease=60) == 1
+        assert spool.claim(10) == [stale]
+        assert spool.load(live).content.read() == RAW
+
+
+class TestNormalize:
+    """Test provider payload adapters."""
+
+    def test_postmark_rebuilds_message(self):
+        """Parsed Postmark fields become a MIME message with attachments."""
+        payload = {
+            "FromFull": {"Email": "a@example.com"},
+            "From": "A <a@example.com>",
+            "To": "mint-bison-42@example.com",
+            "OriginalRecipient": "mint-bison-42@example.com",
+            "Subject": "Hello",
+            "Headers": [
+                {"Name": "Message-ID", "Value": "<1@example.com>"},
+                {"Name": "Content-Type", "Value": "text/plain"},
+            ],
+            "TextBody": "plain",
+            "HtmlBody": "<p>html</p>",
+            "Attachments": [
+                {
+                    "Name": "a.bin",
+                    "ContentType": "application/octet-stream",
+                    "Content": base64.b64encode(b"\x00\x01").decode(),
+                }
+            ],
+        }
+        message = normalize("1", {"provider": "postmark"}, postmark_body(payload))
+
+        assert message.mail_from == "a@example.com"
+        assert message.rcpt_tos == ["mint-bison-42@example.com"]
+        parsed = message_from_bytes(message.content.read())
+        assert parsed["Subject"] == "Hello"
+        assert parsed["Message-ID"] == "<1@example.com>"
+        assert parsed.get_content_type() == "multipart/mixed"
+        attachment = [p for p in parsed.walk() if p.get_filename() == "a.bin"][0]
+        assert attachment.get_payload(decode=True) == b"\x00\x01"
+
+    def test_postmark_prefers_raw_source(self):
+        """RawEmail, when included, is used as-is."""
+        payload = {"From": "a@example.com", "To": "b@example.com", "RawEmail": "X"}
+        message = normalize("1", {"provider": "postmark"}, postmark_body(payload))
+        assert (message.content.read(), message.rcpt_tos) == (b"X", ["b@example.com"])
+
+
+class TestInboundReceiver:
+    """Test request verification and spooling."""
+
+    async def test_cloudflare_signed_body_is_spooled(
+        self, receiver: InboundReceiver, spool: InboundSpool
+    ):
+        """A correctly signed body is committed with its envelope."""
+        entry_id = await receiver.receive_cloudflare(signed_headers(RAW), chunks(RAW))
+
+        spool.claim(1)
+        message = spool.load(entry_id)
+        assert message.mail_from == "a@example.com"
+        assert message.rcpt_tos == [
+            "mint-bison-42@example.com",
+            "crisp-otter-7@example.com",
+        ]
+        assert message.content.read() == RAW
+
+    async def test_bad_signature_spools_nothing(
+        self, receiver: InboundReceiver, spool: InboundSpool
+    ):
+        """A wrong signature is rejected after streaming, leaving no files."""
+        with pytest.raises(UnauthorizedError):
+            await receiver.receive_cloudflare(
+                signed_headers(RAW, secret="other"), chunks(RAW)
+            )
+
+        assert spool.pending() == 0
+        assert list(spool.tmp.iterdir()) == []
+
+    async def test_postmark_basic_auth(self, receiver: InboundReceiver):
+        """Postmark requests need the configured basic auth credentials."""
+        body = json.dumps({"To": "mint-bison-42@example.com"}).encode()
+        good = "Basic " + base64.b64encode(b"pm:secret").decode()
+        bad = "Basic " + base64.b64encode(b"pm:wrong").decode()
+
+        assert await receiver.receive_postmark({"authorization": good}, chunks(body))
+        with pytest.raises(UnauthorizedError):
+            await receiver.receive_postmark({"authorization": bad}, chunks(body))
+
+    async def test_busy_receiver_asks_to_retry(self, receiver: InboundReceiver):
+        """Requests beyond max_concurrent get a 503 with Retry-After."""
+        receiver.active = receiver.max_concurrent
+
+        with pytest.raises(ServiceUnavailableError) as exc_info:
+            await receiver.receive_cloudflare(signed_headers(RAW), chunks(RAW))
+        assert "retry_after" in exc_info.value.details
+
+
+class TestInboundConsumer:
+    """Test draining the spool."""
+
+    async def test_processes_and_sets_aside_failures(
+        self, receiver: InboundReceiver, spool: InboundSpool
+    ):
+        """Handled entries are deleted; failing ones move to failed/."""
+        ok = await receiver.receive_cloudflare(signed_headers(RAW), chunks(RAW))
+        bad = await receiver.receive_cloudflare(signed_headers(b"!"), chunks(b"!"))
+
+        async def process(message):
+            if message.content.read() != RAW:
+                raise ValueError("cannot forward")
+
+        handle = AsyncMock(side_effect=process)
+        consumer = InboundConsumer(handle, spool, workers=2)
+
+        assert await consumer.run_once() == 2
+        assert {call.args[0].id for call in handle.await_args_list} == {ok, bad}
+        assert list(spool.cur.iterdir()) == []
+        assert sorted(path.name for path in spool.failed.iterdir()) == [
+            f"{bad}.body",
+            f"{bad}.json",
+        ]
+
+    async def test_deferred_entries_return_to_the_spool(
+        self, receiver: InboundReceiver, spool: InboundSpool
+    ):
+        """InboundDeferred leaves the entry pending instead of failed."""
+        entry_id = await receiver.receive_cloudflare(signed_headers(RAW), chunks(RAW))
+        handle = AsyncMock(side_effect=InboundDeferred("451 try later"))
+        consumer = InboundConsumer(handle, spool)
+
+        assert await consumer.run_once() == 0
+        assert list(spool.failed.iterdir()) == []
+        assert spool.claim(10) == [entry_id]
@@ -1,7 +1,10 @@
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.magic_link_token import MagicLinkToken
 from app.models.user import User
 from app.services.magic_link import magic_link_service
+from app.services.session import session_service
 
 
 class TestMagicLinkService:
@@ -47,6 +50,21 @@ class TestMagicLinkService:
         second_result = await magic_link_service.verify_magic_link(db, token)
         assert second_result is None
 
+    async def test_reissue_replaces_previous_token(self, db: AsyncSession):
+        """Test a new magic link upserts over the previous one for that email."""
+        email = "reissue@example.com"
+
+        first = await magic_link_service.create_magic_link(db, email)
+        await magic_link_service.verify_magic_link(db, first)
+        second = await magic_link_service.create_magic_link(db, email)
+
+        count = await db.scalar(
+            select(func.count(MagicLinkToken.id)).where(MagicLinkToken.email == email)
+        )
+        assert count == 1
+        assert await magic_link_service.verify_magic_link(db, first) is None
+        assert await magic_link_service.verify_magic_link(db, second) == email
+
     async def test_get_or_create_user_existing(self, db: AsyncSession):
         """Test getting existing user."""
         email = "existing@example.com"
@@ -72,3 +90,40 @@ class TestMagicLinkService:
 
         assert user.id is not None
         assert user.email == email
+
+    async def test_login_creates_user_and_session(self, db: AsyncSession):
+        """Test consolidated login provisions the user and opens a session."""
+        email = "login@example.com"
+        token = await magic_link_service.create_magic_link(db, email)
+
+        login = await magic_link_service.login(db, token, "test-agent", "127.0.0.1")
+
+        assert login is not None
+        assert login.email == email
+        result = await session_service.verify_session(db, login.signed_token)
+        assert result is not None
+        session, user = result
+        assert user.id == login.user_id
+        assert session.user_agent == "test-agent"
+
+    async def test_login_reuses_existing_user(self, db: AsyncSession):
+        """Test login for an existing address does not create a second user."""
+        user = User(email="returning@example.com")
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+        token = await magic_link_service.create_magic_link(db, user.email)
+
+        login = await magic_link_service.login(db, token)
+
+        assert login is not None
+        assert login.user_id == user.id
+        count = await db.scalar(select(func.count(User.id)))
+        assert count == 1
+
+    async def test_login_token_single_use(self, db: AsyncSession):
+        """Test a consumed token cannot log in again."""
+        token = await magic_link_service.create_magic_link(db, "once@example.com")
+
+        assert await magic_link_service.login(db, token) is not None
+        assert await magic_link_service.login(db, token) is None
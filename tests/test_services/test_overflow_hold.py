@@ -0,0 +1,111 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.email_log import FORWARDED, HELD
+from app.models.stored_email import HeldEmail
+from app.models.user import User
+from app.services.content_store import ContentStore, _purge_expired
+from app.services.overflow_hold import HoldReleaser, current_period_start
+
+RAW = b"Subject: Hi\r\nFrom: a@example.com\r\n\r\nbody"
+
+
+def hold(user: User, stored, held_at: datetime, n: int = 0) -> HeldEmail:
+    return HeldEmail(
+        user_id=user.id,
+        recipient=f"alias{n}@x.io",
+        from_address="a@example.com",
+        size_bytes=stored.size,
+        hold_reason="bandwidth-exceeded",
+        content_pointer=stored.pointer,
+        content_key_id=stored.key_id,
+        received_at=held_at,
+        held_at=held_at,
+        will_delete_at=held_at + timedelta(days=30),
+    )
+
+
+class TestHoldReleaser:
+    """Test paced release after the period rolls over."""
+
+    async def seed(self, db: AsyncSession, user: User, store: ContentStore) -> None:
+        last_period = current_period_start() - timedelta(days=3)
+        rows = [
+            hold(user, store.store([RAW]), last_period + timedelta(minutes=n), n)
+            for n in range(5)
+        ]
+        rows.append(hold(user, store.store([RAW]), datetime.now(timezone.utc), 9))
+        db.add_all(rows)
+        await db.commit()
+
+    async def test_releases_last_period_oldest_first(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        tmp_path,
+    ):
+        """Earlier periods' mail goes through the pipeline, paced, then goes."""
+        store = ContentStore(str(tmp_path), keys={"k": b"k" * 32})
+        await self.seed(db, user, store)
+        forwarded = []
+
+        async def forward(message):
+            assert await message.content.aread() == RAW
+            forwarded.append(message.recipients[0].address)
+            message.recipients[0].status = FORWARDED
+            return message
+
+        releaser = HoldReleaser(forward, store, session_factory, rate=50, batch_size=2)
+        assert await releaser.due_users() == [user.id]
+
+        start = time.perf_counter()
+        assert await releaser.run_once() == 5
+        assert time.perf_counter() - start >= 4 / 50
+
+        assert forwarded == [f"alias{n}@x.io" for n in range(5)]
+        (left,) = await db.scalars(select(HeldEmail))
+        assert left.recipient == "alias9@x.io"
+        files = [p for p in tmp_path.rglob("*") if p.is_file()]
+        assert [p.name for p in files] == [left.content_pointer]
+        assert await releaser.due_users() == []
+
+    async def test_stops_when_held_again(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        tmp_path,
+    ):
+        """Once the new period is over its limits too, the rest stay held."""
+        store = ContentStore(str(tmp_path), keys={"k": b"k" * 32})
+        await self.seed(db, user, store)
+        calls = []
+
+        async def forward(message):
+            calls.append(message)
+            message.recipients[0].status = HELD if len(calls) == 2 else FORWARDED
+            await asyncio.sleep(0)
+            return message
+
+        releaser = HoldReleaser(
+            forward, store, session_factory, rate=1000, concurrency=1
+        )
+        assert await releaser.run_once() == 2
+
+        remaining = sorted(await db.scalars(select(HeldEmail.recipient)))
+        assert remaining == [f"alias{n}@x.io" for n in (2, 3, 4, 9)]
+
+    async def test_purge_expired(self, db: AsyncSession, user: User, tmp_path):
+        """Rows past their hold period are purged with their content."""
+        store = ContentStore(str(tmp_path), keys={"k": b"k" * 32})
+        stored = store.store([RAW])
+        db.add(hold(user, stored, datetime.now(timezone.utc) - timedelta(days=31)))
+        await db.commit()
+
+        assert await _purge_expired(db, HeldEmail, 100, 0, store) == 1
+        assert not store.path(stored.pointer).exists()
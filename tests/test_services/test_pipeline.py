@@ -0,0 +1,407 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.email_log import FAILED, FORWARDED, HELD, SPAM
+from app.models.stored_email import FailedEmail, HeldEmail, QuarantinedEmail
+from app.models.user import User
+from app.services.content_store import ContentStore
+from app.services.email_log import hash_subject
+from app.services.enforcement import Decision
+from app.services.pipeline import (
+    PENDING,
+    REJECTED,
+    BytesContent,
+    EncryptedContent,
+    EnforceStage,
+    EventStage,
+    FileContent,
+    ForwardStage,
+    LogStage,
+    MailMessage,
+    RelayConfig,
+    RetainStage,
+    SnapshotStage,
+    SpamStage,
+    ValidateStage,
+    build_pipeline,
+)
+from app.services.sender_auth import SenderAuthResult
+from app.services.spam import MISSING_DATE, SpamFilter, SpamVerdict
+from app.utils.mail_headers import parse_headers, rewrite_header_block
+
+RAW = b"Subject: Hi\r\nFrom: a@example.com\r\n\r\nbody\r\n\r\nmore"
+RELAY = RelayConfig("smtp.example.com", 587, "user", "password")
+
+
+def make_message(*rcpt_tos: str, content: bytes = RAW) -> MailMessage:
+    return MailMessage.create(
+        "smtp",
+        "a@example.com",
+        rcpt_tos or ["mint-bison-42@x.io"],
+        BytesContent(content),
+    )
+
+
+class TestContent:
+    """Test content pointers."""
+
+    def test_header_block(self, tmp_path):
+        """Only the headers and the blank line after them are returned."""
+        path = tmp_path / "m.eml"
+        path.write_bytes(RAW)
+
+        expected = b"Subject: Hi\r\nFrom: a@example.com\r\n\r\n"
+        assert BytesContent(RAW).header_block() == expected
+        assert FileContent(path).header_block() == expected
+        assert FileContent(path).size == len(RAW)
+        assert BytesContent(b"A: b\n\nbody").header_block() == b"A: b\n\n"
+
+    def test_encrypted_content(self, tmp_path):
+        """Stored content decrypts in chunks; headers stop early."""
+        store = ContentStore(str(tmp_path), keys={"k": b"k" * 32}, chunk_size=8)
+        stored = store.store(BytesContent(RAW).chunks(5))
+        content = EncryptedContent(store, stored.pointer, stored.key_id, stored.size)
+
+        assert content.read() == RAW
+        assert content.header_block() == BytesContent(RAW).header_block()
+        assert b"".join(content.chunks(1024)) == RAW
+
+
+class TestHeaders:
+    """Test header-only field extraction."""
+
+    def test_parse_headers(self):
+        """Wanted fields are unfolded; the first single-valued one wins."""
+        block = (
+            b"Received: from a\r\n"
+            b"subject: Hello\r\n  world\r\n"
+            b"From: A <a@example.com>\r\n"
+            b"From: ignored@example.com\r\n"
+            b"Authentication-Results: mx.x.io;\r\n\tspf=pass\r\n"
+            b"Authentication-Results: relay.x.io; dkim=none\r\n"
+            b"Message-ID: <m1@example.com>\r\n"
+            b"X-Subject: not this\r\n\r\n"
+        )
+        headers = parse_headers(block)
+
+        assert headers.subject == "Hello  world"
+        assert headers.from_ == "A <a@example.com>"
+        assert headers.date is None
+        assert headers.message_id == "<m1@example.com>"
+        assert headers.authentication_results == (
+            "mx.x.io;\tspf=pass",
+            "relay.x.io; dkim=none",
+        )
+
+    def test_rewrite_header_block(self):
+        """Dropped fields go, kept ones are untouched, new ones are one line."""
+        block = b"To: alias@x.io,\n  other@x.io\nSubject: Hi\n\n"
+        rewritten = rewrite_header_block(
+            block, [("X-A", "one\r\nBcc: evil@x.io"), ("To", "d@x.io")], "to".__eq__
+        )
+        assert rewritten == b"X-A: one Bcc: evil@x.io\nTo: d@x.io\nSubject: Hi\n\n"
+        assert rewrite_header_block(b"Subject: Hi", [], "to".__eq__) == (
+            b"Subject: Hi\r\n\r\n"
+        )
+
+
+class TestStages:
+    """Test each stage on hand-built messages."""
+
+    async def test_validate_resolves_recipients(self):
+        """Unknown aliases are rejected; the subject is hashed."""
+        message = make_message("a@x.io", "b@x.io")
+        await ValidateStage({"a@x.io": "d@example.com"}.get).process(message)
+
+        assert message.subject_hash == hash_subject("Hi")
+        assert message.headers is not None
+        assert message.headers.from_ == "a@example.com"
+        assert [(r.status, r.destination) for r in message.recipients] == [
+            (PENDING, "d@example.com"),
+            (REJECTED, None),
+        ]
+
+    async def test_enforce_defers_until_ready(self):
+        """Without a loaded snapshot nothing is decided; the sender retries."""
+        enforcer = MagicMock(ready=False)
+        message = make_message("a@x.io", "b@x.io")
+        await EnforceStage(enforcer).process(message)
+
+        assert [r.status for r in message.recipients] == [REJECTED, REJECTED]
+        assert message.reply.startswith("451 4.3.0")
+        enforcer.check.assert_not_called()
+        enforcer.record_received.assert_not_called()
+
+    async def test_enforce_settles_held_and_rejected(self):
+        """Hold and reject decisions settle recipients; usage is counted."""
+        enforcer = MagicMock()
+        enforcer.check.side_effect = [
+            Decision("hold", "bandwidth-exceeded", 1),
+            Decision("reject", "oversize", 1),
+            Decision("accept", None, 1),
+        ]
+        message = make_message("a@x.io", "b@x.io", "c@x.io")
+        await EnforceStage(enforcer).process(message)
+
+        assert [r.status for r in message.recipients] == [HELD, REJECTED, PENDING]
+        assert enforcer.record_received.call_count == 2
+
+    async def test_spam_settles_filtered_recipients(self):
+        """Spam settles recipients whose plan includes filtering."""
+        enforcer = MagicMock()
+        enforcer.spam_filter_included.side_effect = lambda rcpt: rcpt == "a@x.io"
+        message = make_message("a@x.io", "b@x.io")
+        await SpamStage(SpamFilter(bad_domains=[]), enforcer).process(message)
+
+        assert message.spam is not None
+        assert message.spam.reasons == (MISSING_DATE,)
+        assert [r.status for r in message.recipients] == [SPAM, PENDING]
+        assert message.recipients[0].reason == "missing-date (score 1)"
+
+    async def test_spam_skips_unfiltered_messages(self):
+        """Messages with no filtered recipient are not scored."""
+        enforcer = MagicMock()
+        enforcer.spam_filter_included.return_value = False
+        spam_filter = MagicMock()
+        message = make_message()
+        await SpamStage(spam_filter, enforcer).process(message)
+
+        spam_filter.score.assert_not_called()
+        assert message.recipients[0].status == PENDING
+
+    async def test_forward_stops_at_first_failure(self):
+        """A relay error fails the recipient and leaves the rest unsent."""
+        sent = []
+
+        def send(config, msg):
+            if msg.rcpt_to == "bad@example.com":
+                raise OSError("relay down")
+            sent.append(msg.rcpt_to)
+
+        enforcer = MagicMock()
+        message = make_message("a@x.io", "b@x.io", "c@x.io")
+        for rcpt, destination in zip(message.recipients, ["ok", "bad", "ok"]):
+            rcpt.destination = f"{destination}@example.com"
+        await ForwardStage(enforcer, lambda: RELAY, send).process(message)
+
+        assert sent == ["ok@example.com"]
+        assert [r.status for r in message.recipients] == [FORWARDED, FAILED, PENDING]
+        assert message.reply == "550 Forwarding failed"
+        enforcer.record_forwarded.assert_called_once_with("a@x.io")
+
+    async def test_forward_keeps_the_original_bytes(self):
+        """Only the header block changes; the MIME body goes out as received."""
+        body = (
+            b"--b\r\nContent-Type: application/octet-stream\r\n"
+            b"Content-Transfer-Encoding: base64\r\n\r\n"
+            + bytes(range(256)).hex().encode()
+            + b"\r\n--b--\r\n"
+        )
+        raw = (
+            b"From: A <a@example.com>\r\nTo: alias@x.io\r\n"
+            b"X-QSM-Validation: spf=pass; dkim=pass; dmarc=pass\r\n"
+            b'Content-Type: multipart/mixed; boundary="b"\r\n\r\n' + body
+        )
+        sent = []
+        message = make_message("alias@x.io", content=raw)
+        message.recipients[0].destination = "d@example.com"
+        message.recipients[0].decision = Decision("accept", "bandwidth-exceeded")
+        message.validation = SenderAuthResult("fail", "none", "none")
+        await ForwardStage(None, lambda: RELAY, lambda c, m: sent.append(m)).process(
+            message
+        )
+
+        (msg,) = sent
+        assert (msg.mail_from, msg.rcpt_to) == ("a@example.com", "d@example.com")
+        assert msg.data == (
+            b"X-QSM-Validation: spf=fail; dkim=none; dmarc=none\r\n"
+            b"X-QSM-Reason: bandwidth-exceeded\r\n"
+            b"To: d@example.com\r\n"
+            b"From: A <a@example.com>\r\n"
+            b'Content-Type: multipart/mixed; boundary="b"\r\n\r\n' + body
+        )
+
+    async def test_log_and_events_follow_outcome(self):
+        """Settled recipients of known users are logged and published."""
+        message = make_message("a@x.io", "b@x.io", "c@x.io")
+        statuses = [FORWARDED, HELD, REJECTED]
+        decisions = [
+            Decision("accept", None, 1, 10),
+            Decision("hold", "emails-exceeded", 1, 11),
+            Decision("accept", None, None),
+        ]
+        for rcpt, status, decision in zip(message.recipients, statuses, decisions):
+            rcpt.status, rcpt.decision = status, decision
+        log_writer, webhooks = MagicMock(), MagicMock()
+
+        await LogStage(log_writer).process(message)
+        await EventStage(webhooks).process(message)
+
+        records = [call.args[0] for call in log_writer.add.call_args_list]
+        assert [(r.alias_id, r.status) for r in records] == [
+            (10, FORWARDED),
+            (11, HELD),
+        ]
+        (events,) = webhooks.publish.call_args.args
+        assert [(e.event, e.alias_id) for e in events] == [
+            ("forwarded", 10),
+            ("over_limit", 11),
+        ]
+
+    @pytest.mark.parametrize(
+        "reason, expected",
+        [
+            (
+                "bandwidth-exceeded",
+                (
+                    "over_limit",
+                    {"enforcement": "reject", "reason_code": "bandwidth-exceeded"},
+                ),
+            ),
+            (
+                "emails-exceeded",
+                (
+                    "over_limit",
+                    {"enforcement": "reject", "reason_code": "emails-exceeded"},
+                ),
+            ),
+            ("oversize", ("oversize", {"size_bytes": len(RAW), "limit_bytes": 500})),
+            ("alias-inactive", None),
+            ("no-verified-destinations", None),
+        ],
+    )
+    async def test_reject_events(self, reason, expected):
+        """Plan limits publish over_limit, oversize its own event, others none."""
+        message = make_message()
+        message.recipients[0].status = REJECTED
+        message.recipients[0].decision = Decision("reject", reason, 1, 10)
+        webhooks = MagicMock()
+
+        await EventStage(webhooks, MagicMock(max_message_bytes=500)).process(message)
+
+        if expected is None:
+            webhooks.publish.assert_not_called()
+            return
+        name, metadata = expected
+        (events,) = webhooks.publish.call_args.args
+        assert [(e.event, e.alias_id, e.metadata) for e in events] == [
+            (name, 10, metadata)
+        ]
+
+    async def test_retain_keeps_spam_held_and_failed(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        tmp_path,
+    ):
+        """One encrypted copy per message; one row per kept recipient."""
+        store = ContentStore(str(tmp_path), keys={"k": b"k" * 32})
+        message = make_message("a@x.io", "b@x.io", "c@x.io", "d@x.io")
+        message.spam = SpamVerdict(1, (MISSING_DATE,), True)
+        statuses = [SPAM, FAILED, FORWARDED, HELD]
+        for rcpt, status in zip(message.recipients, statuses):
+            rcpt.status, rcpt.decision = status, Decision("accept", None, user.id)
+        message.recipients[3].reason = "bandwidth-exceeded"
+        await RetainStage(store, session_factory).process(message)
+
+        (quarantined,) = await db.scalars(select(QuarantinedEmail))
+        (failed,) = await db.scalars(select(FailedEmail))
+        (held,) = await db.scalars(select(HeldEmail))
+        assert quarantined.content_pointer == failed.content_pointer
+        assert held.content_pointer == failed.content_pointer
+        assert (held.recipient, held.hold_reason) == ("d@x.io", "bandwidth-exceeded")
+        assert quarantined.spam_reason == "missing-date"
+        assert quarantined.will_delete_at > failed.will_delete_at
+        assert store.read(failed.content_pointer, failed.content_key_id) == RAW
+
+    async def test_retain_writes_on_its_own_loop(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        tmp_path,
+    ):
+        """Messages processed on another loop (aiosmtpd) save rows on ours."""
+        store = ContentStore(str(tmp_path), keys={"k": b"k" * 32})
+        loops = []
+
+        def recording_factory():
+            loops.append(asyncio.get_running_loop())
+            return session_factory()
+
+        stage = RetainStage(store, recording_factory)
+        message = make_message()
+        message.recipients[0].status = FAILED
+        message.recipients[0].decision = Decision("accept", None, user.id)
+        await asyncio.to_thread(asyncio.run, stage.process(message))
+
+        assert loops == [asyncio.get_running_loop()]
+        assert len(list(await db.scalars(select(FailedEmail)))) == 1
+
+    async def test_snapshot_points_logs_at_headers(self, tmp_path):
+        """Only the header block is stored, and logged rows point at it."""
+        store = ContentStore(str(tmp_path), keys={"k": b"k" * 32})
+        message = make_message("a@x.io", "b@x.io")
+        message.recipients[0].status = FORWARDED
+        message.recipients[0].decision = Decision("accept", None, 1, 10)
+        message.recipients[1].status = REJECTED
+        log_writer = MagicMock()
+
+        await SnapshotStage(store).process(message)
+        await LogStage(log_writer).process(message)
+
+        snapshot = message.header_snapshot
+        assert snapshot is not None
+        assert store.read(snapshot.pointer, "k") == RAW[: RAW.index(b"body")]
+        (record,) = [call.args[0] for call in log_writer.add.call_args_list]
+        assert (record.header_pointer, record.header_key_id) == (snapshot.pointer, "k")
+
+    async def test_snapshot_skips_unowned_messages(self, tmp_path):
+        """Messages nobody will see logged are not snapshotted."""
+        store = ContentStore(str(tmp_path), keys={"k": b"k" * 32})
+        message = make_message()
+        message.recipients[0].status = REJECTED
+        await SnapshotStage(store).process(message)
+        assert message.header_snapshot is None
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestPipeline:
+    """Test the assembled pipeline."""
+
+    async def test_messages_overlap_and_stats_are_kept(self):
+        """Slow relay sends for different messages run concurrently."""
+
+        def send(config, msg):
+            time.sleep(0.2)
+
+        pipeline = build_pipeline(
+            lambda rcpt: "d@example.com", relay_config=lambda: RELAY
+        )
+        pipeline.stages[4].send = send
+        messages = [make_message() for _ in range(5)]
+
+        start = time.perf_counter()
+        await asyncio.gather(*(pipeline.run(m) for m in messages))
+        assert time.perf_counter() - start < 0.8
+
+        assert all(m.recipients[0].status == FORWARDED for m in messages)
+        assert pipeline.stats["forward"].calls == 5
+        assert pipeline.stats["forward"].mean >= 0.2
+        assert list(pipeline.stats) == [
+            "validate",
+            "enforce",
+            "spam",
+            "auth",
+            "forward",
+            "retain",
+            "snapshot",
+            "log",
+            "events",
+        ]
@@ -0,0 +1,71 @@
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.services.rate_limit import (
+    DatabaseRateLimitBackend,
+    InMemoryRateLimitBackend,
+    RateLimiter,
+)
+
+
+class TestRateLimiter:
+    """Test GCRA rate limiter."""
+
+    async def test_allows_burst_up_to_limit(self):
+        """Test limit requests are admitted, then the next is denied."""
+        limiter = RateLimiter(InMemoryRateLimitBackend())
+
+        results = [await limiter.hit("key", 3, 60, now=1000.0) for _ in range(4)]
+
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert [r.remaining for r in results[:3]] == [2, 1, 0]
+        assert results[3].retry_after == 20.0
+
+    async def test_capacity_recovers_over_time(self):
+        """Test one request becomes available per emission interval."""
+        limiter = RateLimiter(InMemoryRateLimitBackend())
+        for _ in range(3):
+            await limiter.hit("key", 3, 60, now=1000.0)
+
+        assert (await limiter.hit("key", 3, 60, now=1019.0)).allowed is False
+        assert (await limiter.hit("key", 3, 60, now=1020.0)).allowed is True
+
+    async def test_keys_are_independent(self):
+        """Test limits apply per key."""
+        limiter = RateLimiter(InMemoryRateLimitBackend())
+
+        await limiter.hit("a", 1, 60, now=1000.0)
+
+        assert (await limiter.hit("a", 1, 60, now=1000.0)).allowed is False
+        assert (await limiter.hit("b", 1, 60, now=1000.0)).allowed is True
+
+    async def test_memory_backend_is_bounded(self):
+        """Test the in-memory backend never holds more than max_keys."""
+        backend = InMemoryRateLimitBackend(max_keys=10)
+        limiter = RateLimiter(backend)
+
+        for i in range(100):
+            await limiter.hit(f"ip:{i}", 5, 60, now=1000.0)
+
+        assert len(backend) == 10
+
+    async def test_memory_backend_drops_expired_keys(self):
+        """Test expired keys are evicted before live ones."""
+        backend = InMemoryRateLimitBackend(max_keys=10)
+        limiter = RateLimiter(backend)
+        await limiter.hit("old", 5, 60, now=1000.0)
+
+        await limiter.hit("new", 5, 60, now=2000.0)
+
+        assert len(backend) == 1
+
+    async def test_database_backend(
+        self, session_factory: async_sessionmaker[AsyncSession]
+    ):
+        """Test the shared backend enforces the same limits."""
+        limiter = RateLimiter(DatabaseRateLimitBackend(session_factory))
+
+        results = [await limiter.hit("key", 2, 60, now=1000.0) for _ in range(3)]
+
+        assert [r.allowed for r in results] == [True, True, False]
+        assert results[2].retry_after == 30.0
+        assert (await limiter.hit("key", 2, 60, now=1030.0)).allowed is True
@@ -0,0 +1,334 @@
+import asyncio
+import base64
+import hashlib
+
+import pytest
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, padding, rsa
+
+from app.services.sender_auth import (
+    FAIL,
+    NONE,
+    PASS,
+    PERMERROR,
+    SOFTFAIL,
+    TEMPERROR,
+    BodyCanonicalizer,
+    DnsCache,
+    DnsError,
+    DnsNotFound,
+    SenderAuthenticator,
+    SenderAuthResult,
+    body_hash,
+    check_dkim,
+    check_dmarc,
+    check_spf,
+    signed_header_data,
+    split_fields,
+)
+
+
+class StubResolver:
+    """Answers from a dict of (name, type) -> records; counts queries."""
+
+    def __init__(self, records=None, delay=0.0, fail=()):
+        self.records = records or {}
+        self.delay = delay
+        self.fail = set(fail)
+        self.queries = []
+
+    async def resolve(self, name, rdtype):
+        self.queries.append((name, rdtype))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if name in self.fail:
+            raise DnsError(name)
+        if (name, rdtype) not in self.records:
+            raise DnsNotFound(name)
+        return list(self.records[(name, rdtype)]), 300.0
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(records=None, **kwargs) -> DnsCache:
+    resolver = StubResolver(records, **kwargs)
+    return DnsCache(resolver, max_entries=100, max_ttl=3600, negative_ttl=60)
+
+
+MESSAGE = (
+    b"From: Alice <alice@example.com>\r\n"
+    b"To: mint-bison-42@x.io\r\n"
+    b"Subject: Hi  there\r\n"
+    b"\r\n"
+    b"Hello \t world  \r\n"
+    b"\r\n"
+    b"\r\n"
+)
+
+
+def sign(message: bytes, key, selector="s1", domain="example.com", c="relaxed"):
+    """Prepend a DKIM-Signature for ``message`` made with ``key``."""
+    ed = isinstance(key, ed25519.Ed25519PrivateKey)
+    algorithm = "ed25519-sha256" if ed else "rsa-sha256"
+    header_c, body_c = c.split("/") if "/" in c else (c, "simple")
+    bh = base64.b64encode(body_hash([message], body_c == "relaxed", None)).decode()
+    unsigned = (
+        f"DKIM-Signature: v=1; a={algorithm}; c={header_c}/{body_c};"
+        f" d={domain}; s={selector};\r\n\th=from:to:subject; bh={bh}; b="
+    ).encode()
+    block = message[: message.index(b"\r\n\r\n") + 2]
+    data = signed_header_data(
+        split_fields(block), unsigned, ["from", "to", "subject"], header_c == "relaxed"
+    )
+    if algorithm == "rsa-sha256":
+        signature = key.sign(data, padding.PKCS1v15(), hashes.SHA256())
+    else:
+        signature = key.sign(hashlib.sha256(data).digest())
+    return unsigned + base64.b64encode(signature) + b"\r\n" + message
+
+
+def key_record(key) -> str:
+    if isinstance(key, ed25519.Ed25519PrivateKey):
+        raw = key.public_key().public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw
+        )
+        return f"v=DKIM1; k=ed25519; p={base64.b64encode(raw).decode()}"
+    der = key.public_key().public_bytes(
+        serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return f"v=DKIM1; k=rsa; p={base64.b64encode(der).decode()}"
+
+
+async def spf(cache: DnsCache, mail_from: str, ip: str | None = "192.0.2.1") -> str:
+    return (await check_spf(cache, ip, mail_from, None))[0]
+
+
+def header_block(message: bytes) -> bytes:
+    return message[: message.index(b"\r\n\r\n") + 4]
+
+
+class TestDnsCache:
+    """Test TTLs, negative caching and lookup sharing."""
+
+    async def test_answers_are_cached_for_their_ttl(self):
+        """Repeat queries are served from memory until the TTL runs out."""
+        clock = Clock()
+        resolver = StubResolver({("a.test", "TXT"): ["x"]})
+        cache = DnsCache(resolver, max_ttl=100, negative_ttl=10, clock=clock)
+
+        assert await cache.query("A.test.", "TXT") == ["x"]
+        assert await cache.query("a.test", "TXT") == ["x"]
+        assert (len(resolver.queries), cache.hits) == (1, 1)
+
+        clock.now = 101  # max_ttl caps the record's 300s
+        await cache.query("a.test", "TXT")
+        assert len(resolver.queries) == 2
+
+    async def test_negative_answers_are_cached_failures_are_not(self):
+        """Missing names are remembered; timeouts are retried."""
+        resolver = StubResolver(fail={"down.test"})
+        cache = DnsCache(resolver, negative_ttl=10, clock=Clock())
+        for _ in range(2):
+            with pytest.raises(DnsNotFound):
+                await cache.query("missing.test", "TXT")
+            with pytest.raises(DnsError):
+                await cache.query("down.test", "TXT")
+        assert resolver.queries.count(("missing.test", "TXT")) == 1
+        assert resolver.queries.count(("down.test", "TXT")) == 2
+
+    async def test_concurrent_queries_share_one_lookup(self):
+        """Queries for a name already being looked up wait for that lookup."""
+        resolver = StubResolver({("a.test", "A"): ["192.0.2.1"]}, delay=0.05)
+        cache = DnsCache(resolver)
+        results = await asyncio.gather(*(cache.query("a.test", "A") for _ in range(5)))
+        assert results == [["192.0.2.1"]] * 5
+        assert resolver.queries == [("a.test", "A")]
+
+    async def test_queries_from_another_event_loop(self):
+        """A lookup in flight on one loop is not awaited from another."""
+        resolver = StubResolver({("a.test", "A"): ["192.0.2.1"]}, delay=0.05)
+        cache = DnsCache(resolver)
+        here = asyncio.create_task(cache.query("a.test", "A"))
+        await asyncio.sleep(0)
+        there = await asyncio.to_thread(asyncio.run, cache.query("a.test", "A"))
+        assert there == await here == ["192.0.2.1"]
+
+    async def test_least_recently_used_entries_are_evicted(self):
+        """Beyond max_entries the oldest answer is dropped."""
+        records = {(f"{n}.test", "A"): ["192.0.2.1"] for n in "abc"}
+        resolver = StubResolver(records)
+        cache = DnsCache(resolver, max_entries=2)
+        for name in ("a.test", "b.test", "a.test", "c.test", "a.test", "b.test"):
+            await cache.query(name, "A")
+        assert resolver.queries.count(("b.test", "A")) == 2
+        assert resolver.queries.count(("a.test", "A")) == 1
+
+
+class TestSpf:
+    """Test SPF evaluation."""
+
+    RECORDS = {
+        ("example.com", "TXT"): [
+            "google-site-verification=abc",
+            "v=spf1 ip4:192.0.2.0/24 a:mail.example.com mx include:_spf.example.net"
+            " ~all",
+        ],
+        ("mail.example.com", "A"): ["198.51.100.7"],
+        ("example.com", "MX"): ["mx.example.com"],
+        ("mx.example.com", "A"): ["198.51.100.25"],
+        ("_spf.example.net", "TXT"): ["v=spf1 ip6:2001:db8::/32 -all"],
+        ("redirected.test", "TXT"): ["v=spf1 redirect=example.com"],
+        ("loop.test", "TXT"): ["v=spf1 include:loop.test -all"],
+    }
+
+    @pytest.mark.parametrize(
+        "ip, result",
+        [
+            ("192.0.2.10", PASS),
+            ("198.51.100.7", PASS),
+            ("198.51.100.25", PASS),
+            ("2001:db8::1", PASS),
+            ("203.0.113.5", SOFTFAIL),
+        ],
+    )
+    async def test_mechanisms(self, ip, result):
+        """ip4, a, mx and include are matched in order; ~all otherwise."""
+        cache = make_cache(self.RECORDS)
+        assert await check_spf(cache, ip, "bounce@example.com", None) == (
+            result,
+            "example.com",
+        )
+
+    async def test_redirect_helo_and_none(self):
+        """redirect= applies another domain's record; HELO is the fallback."""
+        cache = make_cache(self.RECORDS)
+        assert await spf(cache, "a@redirected.test") == PASS
+        assert await check_spf(cache, "192.0.2.1", None, "Example.com.") == (
+            PASS,
+            "example.com",
+        )
+        assert await spf(cache, "a@nospf.test") == NONE
+        assert await spf(cache, "a@example.com", ip=None) == NONE
+
+    async def test_errors(self):
+        """Lookup loops are permerror, unreachable DNS temperror."""
+        cache = make_cache(self.RECORDS, fail={"down.test"})
+        assert await spf(cache, "a@loop.test") == PERMERROR
+        assert await spf(cache, "a@down.test") == TEMPERROR
+
+
+class TestDkim:
+    """Test DKIM verification."""
+
+    def test_empty_body_hashes(self):
+        """The RFC 6376 hashes of an empty body for both algorithms."""
+        assert base64.b64encode(body_hash([b"A: b\r\n\r\n"], False, None)) == (
+            b"frcCV1k9oG9oKj3dpUqdJg1PxRT2RSN/XKdLCPjaYaY="
+        )
+        assert base64.b64encode(body_hash([b"A: b\r\n\r\n"], True, None)) == (
+            b"47DEQpj8HBSa+/TImW+5JCeuQeRkm5NMpJWZG3hSuFU="
+        )
+
+    def test_body_hash_does_not_depend_on_chunking(self):
+        """Lines split across chunks canonicalize the same."""
+        whole = BodyCanonicalizer(relaxed=True)
+        whole.feed(b"a  b\r\nc\r\n\r\n")
+        split = BodyCanonicalizer(relaxed=True)
+        for byte in b"a  b\r\nc\r\n\r\n":
+            split.feed(bytes([byte]))
+        assert whole.finish() == split.finish()
+
+    @pytest.mark.parametrize(
+        "key, c",
+        [
+            (rsa.generate_private_key(public_exponent=65537, key_size=2048), "relaxed"),
+            (ed25519.Ed25519PrivateKey.generate(), "relaxed/relaxed"),
+            (ed25519.Ed25519PrivateKey.generate(), "simple/simple"),
+        ],
+    )
+    async def test_valid_and_tampered_signatures(self, key, c):
+        """A good signature passes; edited headers or body fail."""
+        cache = make_cache({("s1._domainkey.example.com", "TXT"): [key_record(key)]})
+        signed = sign(MESSAGE, key, c=c)
+
+        async def check(message: bytes):
+            return await check_dkim(cache, header_block(message), lambda: [message])
+
+        assert await check(signed) == (PASS, ["example.com"])
+        assert (await check(signed.replace(b"Hi  there", b"Bye")))[0] == FAIL
+        assert (await check(signed.replace(b"Hello", b"Howdy")))[0] == FAIL
+
+    async def test_missing_key_and_no_signature(self):
+        """Unsigned mail is none; a signature without its key permerror."""
+        key = ed25519.Ed25519PrivateKey.generate()
+        cache = make_cache()
+        assert await check_dkim(cache, header_block(MESSAGE), list) == (NONE, [])
+        signed = sign(MESSAGE, key)
+        result = await check_dkim(cache, header_block(signed), lambda: [signed])
+        assert result == (PERMERROR, [])
+
+
+class TestDmarc:
+    """Test DMARC alignment."""
+
+    RECORDS = {
+        ("_dmarc.example.com", "TXT"): ["v=DMARC1; p=reject"],
+        ("_dmarc.strict.test", "TXT"): ["v=DMARC1; p=reject; aspf=s; adkim=s"],
+    }
+
+    async def test_alignment(self):
+        """Relaxed alignment accepts subdomains; strict needs the same domain."""
+        cache = make_cache(self.RECORDS)
+        spf = (PASS, "bounce.example.com")
+        assert await check_dmarc(cache, "news.example.com", spf, []) == PASS
+        assert await check_dmarc(cache, "example.com", (FAIL, "example.com"), []) == (
+            FAIL
+        )
+        assert await check_dmarc(
+            cache, "example.com", (NONE, None), ["example.com"]
+        ) == (PASS)
+        strict = (PASS, "mail.strict.test")
+        assert await check_dmarc(cache, "strict.test", strict, []) == FAIL
+        assert await check_dmarc(cache, "other.test", spf, []) == NONE
+
+
+class TestSenderAuthenticator:
+    """Test the per-message time budget."""
+
+    async def test_full_check(self):
+        """Results are summarized for X-QSM-Validation."""
+        key = ed25519.Ed25519PrivateKey.generate()
+        cache = make_cache(
+            {
+                ("s1._domainkey.example.com", "TXT"): [key_record(key)],
+                ("example.com", "TXT"): ["v=spf1 ip4:192.0.2.1 -all"],
+                ("_dmarc.example.com", "TXT"): ["v=DMARC1; p=none"],
+            }
+        )
+        signed = sign(MESSAGE, key)
+        result = await SenderAuthenticator(cache, timeout=1).check(
+            "203.0.113.9",
+            "mx.sender.test",
+            "bounce@example.com",
+            header_block(signed),
+            "Alice <alice@example.com>",
+            lambda: [signed],
+        )
+        assert result == SenderAuthResult(FAIL, PASS, PASS)
+        assert result.header == "spf=fail; dkim=pass; dmarc=pass"
+
+    async def test_slow_dns_is_temperror(self):
+        """Checks still waiting on DNS when the budget runs out give up."""
+        cache = make_cache({("example.com", "TXT"): ["v=spf1 -all"]}, delay=0.5)
+        start = asyncio.get_running_loop().time()
+        result = await SenderAuthenticator(cache, timeout=0.05).check(
+            "192.0.2.1", None, "a@example.com", MESSAGE, "a@example.com", list
+        )
+        assert result == SenderAuthResult(TEMPERROR, NONE, TEMPERROR)
+        assert asyncio.get_running_loop().time() - start < 0.3
@@ -3,7 +3,8 @@ from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
-from app.services.session import session_service
+from app.services.session import SessionService, session_service
+from app.services.session_revocation import SessionRevocationList
 
 
 class TestSessionService:
@@ -68,3 +69,104 @@ class TestSessionService:
         # Verify session is gone
         result = await session_service.verify_session(db, signed_token)
         assert result is None
+
+    async def test_destroy_session_keeps_revoked_row(self, db: AsyncSession):
+        """Destroyed sessions are marked revoked rather than deleted."""
+        user = User(email="revoke@example.com")
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+
+        signed_token, session = await session_service.create_session(db, user.id)
+        revocations = SessionRevocationList()
+        service = SessionService(revocations=revocations)
+
+        assert await service.destroy_session(db, signed_token) is True
+        assert await service.destroy_session(db, signed_token) is False
+
+        await db.refresh(session)
+        assert session.revoked_at is not None
+        assert revocations.is_revoked(session.id)
+
+
+class TestStatelessSessions:
+    """Test cookie-only session verification."""
+
+    async def _login(
+        self, db: AsyncSession, service: SessionService, email: str
+    ) -> tuple[User, str]:
+        user = User(email=email)
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+        signed_token, _ = await service.create_session(db, user.id, email=user.email)
+        return user, signed_token
+
+    async def test_verify_stateless(self, db: AsyncSession):
+        """Signed claims identify the user once the revocation list is synced."""
+        revocations = SessionRevocationList()
+        service = SessionService(stateless=True, revocations=revocations)
+        user, signed_token = await self._login(db, service, "claims@example.com")
+
+        # Not synced yet: fall back to the database
+        assert service.verify_stateless(signed_token) is None
+
+        await revocations.sync(db)
+        claims = service.verify_stateless(signed_token)
+        assert claims is not None
+        assert claims.user_id == user.id
+        assert claims.email == user.email
+
+    async def test_get_user_from_session_stateless(self, db: AsyncSession):
+        """Stateless lookups return a transient user without querying."""
+        revocations = SessionRevocationList()
+        service = SessionService(stateless=True, revocations=revocations)
+        user, signed_token = await self._login(db, service, "fast@example.com")
+        await revocations.sync(db)
+
+        found = await service.get_user_from_session(db, signed_token)
+        assert found is not None
+        assert found.id == user.id
+        assert found.email == user.email
+
+    async def test_cookie_without_claims_falls_back(self, db: AsyncSession):
+        """Cookies lacking an email claim are verified against the database."""
+        revocations = SessionRevocationList()
+        service = SessionService(stateless=True, revocations=revocations)
+        user = User(email="legacy@example.com")
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+        signed_token, _ = await service.create_session(db, user.id)
+        await revocations.sync(db)
+
+        assert service.verify_stateless(signed_token) is None
+        found = await service.get_user_from_session(db, signed_token)
+        assert found is not None
+        assert found.id == user.id
+
+    async def test_revocation_seen_by_other_workers(self, db: AsyncSession):
+        """A logout on one worker is picked up by another worker's sync."""
+        worker_a = SessionService(stateless=True, revocations=SessionRevocationList())
+        revocations_b = SessionRevocationList()
+        worker_b = SessionService(stateless=True, revocations=revocations_b)
+        _, signed_token = await self._login(db, worker_a, "logout@example.com")
+        await revocations_b.sync(db)
+        assert worker_b.verify_stateless(signed_token) is not None
+
+        assert await worker_a.destroy_session(db, signed_token) is True
+        await revocations_b.sync(db)
+
+        assert worker_b.verify_stateless(signed_token) is None
+        assert await worker_b.get_user_from_session(db, signed_token) is None
+
+    async def test_overflow_disables_fast_path(self, db: AsyncSession):
+        """An overflowing revocation list stops trusting itself."""
+        revocations = SessionRevocationList(max_entries=1)
+        await revocations.sync(db)
+        assert revocations.ready
+
+        far_future = datetime.now(timezone.utc).timestamp() + 3600
+        revocations.add(1, far_future)
+        revocations.add(2, far_future)
+        assert not revocations.ready
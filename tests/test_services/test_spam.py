@@ -0,0 +1,103 @@
+import os
+
+from app.services.spam import (
+    BAD_SENDER_DOMAIN,
+    EXCESSIVE_RECIPIENTS,
+    MALFORMED_FROM,
+    MISSING_DATE,
+    PROVIDER_FLAGGED,
+    SpamFilter,
+    parse_domains,
+)
+from app.utils.mail_headers import from_address
+
+CLEAN = (
+    b"From: Alice <alice@example.com>\r\n"
+    b"To: mint-bison-42@x.io\r\n"
+    b"Subject: Hi\r\n"
+    b"Date: Mon, 19 Oct 2026 12:00:00 +0000\r\n\r\n"
+)
+
+
+def make_filter(**kwargs) -> SpamFilter:
+    kwargs.setdefault("bad_domains", ["bad.example"])
+    kwargs.setdefault("domains_file", None)
+    return SpamFilter(**kwargs)
+
+
+class TestParsing:
+    """Test domain list and From parsing."""
+
+    def test_parse_domains(self):
+        """Entries are normalized; blanks and comments are skipped."""
+        lines = ["Bad.Example.", "", "# comment", "*.spam.test  # wildcard", " "]
+        assert parse_domains(lines) == {"bad.example", "spam.test"}
+
+    def test_from_address(self):
+        """Exactly one address, bare or in angle brackets."""
+        assert from_address(" Alice <a@example.com>") == "a@example.com"
+        assert from_address(" a@example.com ") == "a@example.com"
+        assert from_address(" Alice") is None
+        assert from_address(" <a@x.io>, <b@x.io>") is None
+        assert from_address(" a@x.io b@x.io") is None
+
+
+class TestSpamFilter:
+    """Test scoring and reloading."""
+
+    def test_clean_message(self):
+        """A well-formed message from a good domain scores zero."""
+        verdict = make_filter().score(CLEAN, "alice@example.com", 1)
+        assert (verdict.score, verdict.spam, verdict.reasons) == (0, False, ())
+
+    def test_bad_domain_matches_subdomains(self):
+        """Listed domains catch their subdomains, not lookalikes."""
+        spam_filter = make_filter()
+        assert spam_filter.is_bad_domain("bad.example")
+        assert spam_filter.is_bad_domain("mail.BAD.example.")
+        assert not spam_filter.is_bad_domain("notbad.example")
+
+        verdict = spam_filter.score(CLEAN, "bounce@mx.bad.example", 1)
+        assert verdict.reasons == (BAD_SENDER_DOMAIN,)
+
+    def test_header_rules(self):
+        """Missing Date, malformed From, recipients and provider flags add up."""
+        headers = (
+            b"From: nobody\r\n"
+            b"To: a@x.io, b@x.io,\r\n\tc@x.io\r\n"
+            b"X-Spam-Status: Yes, score=7.1\r\n\r\n"
+        )
+        verdict = make_filter(max_recipients=2, threshold=3).score(headers, None, 1)
+        assert verdict.reasons == (
+            PROVIDER_FLAGGED,
+            MALFORMED_FROM,
+            MISSING_DATE,
+            EXCESSIVE_RECIPIENTS,
+        )
+        assert verdict.score == 4 and verdict.spam
+        assert verdict.reason == (
+            "provider-flagged,malformed-from,missing-date,excessive-recipients"
+        )
+
+    def test_threshold(self):
+        """Below the threshold a message is scored but not spam."""
+        headers = CLEAN.replace(b"Date", b"X-Date")
+        verdict = make_filter(threshold=2).score(headers, "alice@example.com")
+        assert (verdict.score, verdict.spam) == (1, False)
+
+    def test_reload_picks_up_file_changes(self, tmp_path):
+        """The domains file is re-read only when it changes."""
+        path = tmp_path / "domains.txt"
+        path.write_text("one.example\n")
+        spam_filter = make_filter(domains_file=str(path))
+        assert spam_filter.domains == {"bad.example", "one.example"}
+        assert not spam_filter.reload()
+
+        path.write_text("two.example\n")
+        os.utime(path, ns=(0, 10**9))
+        assert spam_filter.reload()
+        assert spam_filter.domains == {"bad.example", "two.example"}
+
+        path.unlink()
+        assert not spam_filter.reload()
+        assert spam_filter.is_bad_domain("two.example")
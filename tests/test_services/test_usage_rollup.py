@@ -0,0 +1,149 @@
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.email_log import FAILED, FORWARDED, RECEIVED, SPAM, EmailLog
+from app.models.usage_rollup import UsageDaily, UsageWeekly
+from app.models.user import User
+from app.services.usage_rollup import UsageRollup, usage_history, week_start
+
+MONDAY = datetime(2026, 10, 12, 9, tzinfo=timezone.utc)
+
+
+def make_rollup(
+    session_factory: async_sessionmaker[AsyncSession], **kwargs
+) -> UsageRollup:
+    return UsageRollup(session_factory=session_factory, **kwargs)
+
+
+async def add_logs(
+    db: AsyncSession, user: User, *entries: tuple[datetime, str, int]
+) -> list[EmailLog]:
+    logs = [
+        EmailLog(
+            user_id=user.id,
+            received_at=received_at,
+            status=status,
+            size_bytes=size,
+            forwarded_at=received_at if status == FORWARDED else None,
+        )
+        for received_at, status, size in entries
+    ]
+    db.add_all(logs)
+    await db.commit()
+    return logs
+
+
+async def daily(db: AsyncSession, user: User) -> dict[date, UsageDaily]:
+    rows = await db.scalars(
+        select(UsageDaily)
+        .where(UsageDaily.user_id == user.id)
+        .execution_options(populate_existing=True)
+    )
+    return {row.day: row for row in rows}
+
+
+class TestUsageRollup:
+    """Test incremental daily/weekly rollups."""
+
+    def test_week_start(self):
+        """Weeks start on Monday."""
+        assert week_start(date(2026, 10, 18)) == date(2026, 10, 12)
+        assert week_start(date(2026, 10, 12)) == date(2026, 10, 12)
+
+    async def test_rolls_up_days_and_weeks(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+    ):
+        """Log rows are aggregated per UTC day, then per week."""
+        await add_logs(
+            db,
+            user,
+            (MONDAY, FORWARDED, 100),
+            (MONDAY + timedelta(hours=2), SPAM, 50),
+            (MONDAY + timedelta(days=1), FAILED, 10),
+            (MONDAY + timedelta(days=7), RECEIVED, 1),
+        )
+        report = await make_rollup(session_factory).run(db)
+        assert (report.days, report.weeks) == (3, 2)
+
+        days = await daily(db, user)
+        monday = days[MONDAY.date()]
+        assert (
+            monday.emails_received,
+            monday.emails_forwarded,
+            monday.emails_spam,
+            monday.emails_failed,
+            monday.bytes_received,
+        ) == (2, 1, 1, 0, 150)
+
+        week = await db.scalar(
+            select(UsageWeekly).where(
+                UsageWeekly.user_id == user.id,
+                UsageWeekly.week_start == MONDAY.date(),
+            )
+        )
+        assert week is not None
+        assert (week.emails_received, week.emails_failed) == (3, 1)
+        assert week.bytes_received == 160
+
+    async def test_incremental_and_idempotent(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+    ):
+        """Later runs only touch changed buckets; re-reads never double count."""
+        logs = await add_logs(db, user, (MONDAY, RECEIVED, 100))
+        rollup = make_rollup(session_factory)
+        await rollup.run(db)
+
+        # Nothing changed outside the overlap window: no buckets touched
+        quiet = make_rollup(session_factory, overlap=0)
+        await quiet._set_watermark(
+            db, datetime.now(timezone.utc) + timedelta(minutes=1)
+        )
+        assert (await quiet.run(db)).days == 0
+
+        # A forward updates the row; the overlap re-reads it and recomputes
+        await db.execute(
+            update(EmailLog)
+            .where(EmailLog.id == logs[0].id)
+            .values(status=FORWARDED, forwarded_at=MONDAY, updated_at=datetime.now())
+        )
+        await rollup._set_watermark(db, datetime(2000, 1, 1, tzinfo=timezone.utc))
+        await db.commit()
+        await rollup.run(db)
+        await rollup.run(db)
+
+        monday = (await daily(db, user))[MONDAY.date()]
+        assert (monday.emails_received, monday.emails_forwarded) == (1, 1)
+        assert monday.bytes_received == 100
+
+    async def test_history_reads_rollups(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+    ):
+        """Dashboard history comes from the rollup tables, oldest first."""
+        await add_logs(
+            db,
+            user,
+            (MONDAY + timedelta(days=1), RECEIVED, 1),
+            (MONDAY, RECEIVED, 1),
+        )
+        await make_rollup(session_factory).run(db)
+
+        rows = await usage_history(db, user.id, "daily", MONDAY.date())
+        assert [row.start for row in rows] == [
+            MONDAY.date(),
+            MONDAY.date() + timedelta(days=1),
+        ]
+        weeks = await usage_history(db, user.id, "weekly", date(2026, 1, 1))
+        assert [(row.start, row.emails_received) for row in weeks] == [
+            (MONDAY.date(), 2)
+        ]
@@ -0,0 +1,190 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config.environments import PlanTier
+from app.models.usage_warning import UsageWarning
+from app.models.user import User
+from app.services.bandwidth import BandwidthAccountant
+from app.services.usage_thresholds import (
+    BYTES,
+    EMAILS,
+    OVER_LIMIT,
+    ThresholdEvaluator,
+    ThresholdEvent,
+    period_elapsed,
+)
+
+TIERS = {"starter": PlanTier(emails_per_month=10, bytes_per_month=1000)}
+
+EARLY = datetime(2026, 4, 3, tzinfo=timezone.utc)  # elapsed < 0.25
+MID = datetime(2026, 4, 10, tzinfo=timezone.utc)  # 0.25 <= elapsed < 0.5
+LATE = datetime(2026, 4, 28, tzinfo=timezone.utc)  # elapsed >= 0.75
+
+
+def make_evaluator(
+    session_factory: async_sessionmaker[AsyncSession], **kwargs
+) -> ThresholdEvaluator:
+    accountant = kwargs.pop(
+        "accountant",
+        BandwidthAccountant(journal_path=None, session_factory=session_factory),
+    )
+    kwargs.setdefault("emails_enabled", False)
+    kwargs.setdefault("webhooks", None)
+    return ThresholdEvaluator(
+        accountant=accountant,
+        plan_tiers=TIERS,
+        default_tier="starter",
+        session_factory=session_factory,
+        **kwargs,
+    )
+
+
+class TestThresholdFor:
+    """Test the sliding threshold rules."""
+
+    def test_elapsed_fraction(self):
+        """Elapsed is the fraction of the calendar month that has passed."""
+        assert period_elapsed(datetime(2026, 4, 1, tzinfo=timezone.utc)) == 0
+        assert period_elapsed(datetime(2026, 4, 16, tzinfo=timezone.utc)) == 0.5
+
+    def test_thresholds_slide_with_elapsed(
+        self, session_factory: async_sessionmaker[AsyncSession]
+    ):
+        """Early warnings apply only early in the period; 80/100/over always."""
+        evaluator = make_evaluator(session_factory)
+
+        assert evaluator.threshold_for(650, 1000, 0.1) == 60
+        assert evaluator.threshold_for(650, 1000, 0.3) == 0
+        assert evaluator.threshold_for(720, 1000, 0.3) == 70
+        assert evaluator.threshold_for(720, 1000, 0.6) == 0
+        assert evaluator.threshold_for(800, 1000, 0.9) == 80
+        assert evaluator.threshold_for(1000, 1000, 0.1) == 100
+        assert evaluator.threshold_for(1001, 1000, 0.1) == OVER_LIMIT
+
+        evaluator.early_enabled = False
+        assert evaluator.threshold_for(650, 1000, 0.1) == 0
+
+
+class TestThresholdEvaluator:
+    """Test incremental evaluation and de-duplication."""
+
+    async def test_emits_once_per_threshold(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+    ):
+        """Each crossing is emitted once; higher thresholds still follow."""
+        evaluator = make_evaluator(session_factory)
+        accountant = evaluator.accountant
+
+        accountant.record_received(user.id, 600, at=EARLY)
+        events = await evaluator.evaluate(db, [user.id], EARLY)
+        assert [(e.metric, e.threshold, e.usage_percent) for e in events] == [
+            (BYTES, 60, 60)
+        ]
+
+        accountant.record_received(user.id, 10, at=EARLY)
+        assert await evaluator.evaluate(db, [user.id], EARLY) == []
+
+        accountant.record_received(user.id, 500, at=EARLY)
+        events = await evaluator.evaluate(db, [user.id], EARLY)
+        assert [(e.metric, e.threshold) for e in events] == [(BYTES, OVER_LIMIT)]
+        assert events[0].over_limit
+
+    async def test_warns_on_either_counter(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+    ):
+        """Email counts cross thresholds independently of bytes."""
+        evaluator = make_evaluator(session_factory)
+        for _ in range(8):
+            evaluator.accountant.record_received(user.id, 1, at=LATE)
+
+        events = await evaluator.evaluate(db, [user.id], LATE)
+        assert [(e.metric, e.threshold) for e in events] == [(EMAILS, 80)]
+        assert events[0].approaching_reset
+
+    async def test_dedup_survives_restart(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+    ):
+        """A fresh evaluator does not re-emit what another one recorded."""
+        first = make_evaluator(session_factory)
+        first.accountant.record_received(user.id, 750, at=MID)
+        await first.accountant.flush()
+        assert len(await first.evaluate(db, [user.id], MID)) == 1
+
+        second = make_evaluator(session_factory)
+        assert await second.evaluate(db, [user.id], MID) == []
+        count = await db.scalar(select(func.count()).select_from(UsageWarning))
+        assert count == 1
+
+    async def test_run_once_evaluates_dirty_users(
+        self, session_factory: async_sessionmaker[AsyncSession], user: User
+    ):
+        """Only users whose usage moved are evaluated; sinks get one batch."""
+        sink = AsyncMock()
+        evaluator = make_evaluator(session_factory)
+        evaluator.add_sink(sink)
+
+        assert await evaluator.run_once(EARLY) == 0
+        evaluator.accountant.record_received(user.id, 850, at=EARLY)
+        assert await evaluator.run_once(EARLY) == 1
+        sink.assert_awaited_once()
+        (events,) = sink.await_args.args
+        assert [(e.user_id, e.threshold) for e in events] == [(user.id, 80)]
+
+        assert await evaluator.run_once(EARLY) == 0
+        sink.assert_awaited_once()
+
+    async def test_email_sink_sends_highest_per_user(
+        self, session_factory: async_sessionmaker[AsyncSession], user: User
+    ):
+        """The notification sink sends one email per user."""
+        evaluator = make_evaluator(session_factory)
+        period = EARLY.date().replace(day=1)
+        events = [
+            ThresholdEvent(user.id, period, BYTES, 80, 85, False),
+            ThresholdEvent(user.id, period, EMAILS, 100, 100, False),
+        ]
+        with patch(
+            "app.services.usage_thresholds.email_service.send_usage_warning",
+            new_callable=AsyncMock,
+        ) as send:
+            await evaluator.email_warnings(events)
+
+        send.assert_awaited_once_with("test@example.com", 100, 100, EMAILS, False)
+
+    async def test_webhook_sink_publishes_events(
+        self, session_factory: async_sessionmaker[AsyncSession], user: User
+    ):
+        """Crossings become usage_threshold / over_limit webhook events."""
+        webhooks = MagicMock()
+        evaluator = make_evaluator(session_factory, webhooks=webhooks)
+        period = EARLY.date().replace(day=1)
+
+        await evaluator.publish_webhooks(
+            [
+                ThresholdEvent(user.id, period, BYTES, 80, 85, False),
+                ThresholdEvent(user.id, period, EMAILS, OVER_LIMIT, 120, False),
+            ]
+        )
+
+        (events,) = webhooks.publish.call_args.args
+        threshold, over = list(events)
+        assert threshold.event == "usage_threshold"
+        assert threshold.metadata == {
+            "metric": BYTES,
+            "threshold_percent": 80,
+            "current_percent": 85,
+        }
+        assert over.event == "over_limit"
+        assert over.metadata["reason_code"] == "emails-exceeded"
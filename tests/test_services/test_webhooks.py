@@ -0,0 +1,289 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.user import User
+from app.models.webhook import DEAD, PENDING, Webhook, WebhookDelivery
+from app.services.webhooks import (
+    CircuitBreaker,
+    WebhookDispatcher,
+    WebhookEvent,
+    backoff_delay,
+    sign,
+)
+
+
+class StubEndpoint:
+    """Local HTTP server standing in for customer webhook endpoints."""
+
+    def __init__(self) -> None:
+        self.requests: list[tuple[str, dict[str, str], bytes]] = []
+        self.status = 200
+        self.delay = 0.0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        self.requests.append((request.path, dict(request.headers), body))
+        if request.path == "/slow":
+            await asyncio.sleep(self.delay)
+        return web.Response(status=200 if request.path == "/slow" else self.status)
+
+
+@pytest.fixture
+async def stub() -> AsyncIterator[tuple[StubEndpoint, TestServer]]:
+    endpoint = StubEndpoint()
+    app = web.Application()
+    app.router.add_post("/{name}", endpoint.handle)
+    server = TestServer(app)
+    await server.start_server()
+    yield endpoint, server
+    await server.close()
+
+
+async def add_webhook(
+    db: AsyncSession,
+    user: User,
+    url: str,
+    key_id: str | None = None,
+    batch_events: bool = False,
+) -> Webhook:
+    webhook = Webhook(
+        user_id=user.id,
+        url=url,
+        secret="s3cret",
+        key_id=key_id,
+        batch_events=batch_events,
+    )
+    db.add(webhook)
+    await db.commit()
+    return webhook
+
+
+def make_dispatcher(
+    session_factory: async_sessionmaker[AsyncSession], **kwargs
+) -> WebhookDispatcher:
+    kwargs.setdefault("backoff_base", 0.01)
+    return WebhookDispatcher(session_factory=session_factory, **kwargs)
+
+
+async def deliveries(db: AsyncSession) -> list[WebhookDelivery]:
+    return list(
+        await db.scalars(
+            select(WebhookDelivery).execution_options(populate_existing=True)
+        )
+    )
+
+
+class TestWebhookHelpers:
+    """Test signing, backoff and the circuit breaker."""
+
+    def test_backoff_grows_with_jitter(self):
+        """Delays double per attempt, capped, with up to half randomized."""
+        assert backoff_delay(1, 5, 100, rand=lambda: 0) == 2.5
+        assert backoff_delay(3, 5, 100, rand=lambda: 1) == 20
+        assert backoff_delay(10, 5, 100, rand=lambda: 1) == 100
+
+    def test_circuit_breaker(self):
+        """Opens after repeated failures and lets one probe through later."""
+        breaker = CircuitBreaker(threshold=2, cooldown=10, max_cooldown=15)
+        breaker.record_failure(0)
+        assert breaker.allow(0)
+        breaker.record_failure(0)
+        assert not breaker.allow(5)
+
+        assert breaker.allow(11)
+        assert not breaker.allow(11)  # one probe at a time
+        breaker.record_failure(11)
+        assert not breaker.allow(20)  # reopened for 15s (capped)
+        assert breaker.allow(27)
+        breaker.record_success()
+        assert breaker.closed and breaker.allow(27)
+
+
+class TestWebhookDispatcher:
+    """Test delivery against a local HTTP stub."""
+
+    async def test_delivers_signed_event(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        stub,
+    ):
+        """Events are stored, POSTed with signature headers, then removed."""
+        endpoint, server = stub
+        await add_webhook(db, user, str(server.make_url("/ok")), key_id="k1")
+        dispatcher = make_dispatcher(session_factory)
+        event = WebhookEvent("forwarded", user.id, {"size_bytes": 10}, alias_id=3)
+        dispatcher.publish([event])
+
+        assert await dispatcher.accept() == 1
+        await dispatcher.drain()
+        assert await dispatcher.save_results() == 1
+        await dispatcher.stop()
+
+        path, headers, body = endpoint.requests[0]
+        assert headers["X-QSM-Signature"] == sign("s3cret", body)
+        assert headers["X-QSM-Key-Id"] == "k1"
+        assert int(headers["X-QSM-Timestamp"]) > 0
+        payload = json.loads(body)
+        assert payload["id"] == event.id == headers["X-QSM-Event-Id"]
+        assert payload["event"] == "forwarded"
+        assert payload["alias_id"] == "3"
+        assert await deliveries(db) == []
+
+    async def test_failures_back_off_then_die(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        stub,
+    ):
+        """Failed deliveries are rescheduled, then abandoned after max attempts."""
+        endpoint, server = stub
+        endpoint.status = 500
+        await add_webhook(db, user, str(server.make_url("/fail")))
+        dispatcher = make_dispatcher(
+            session_factory, max_attempts=2, breaker_threshold=10
+        )
+        dispatcher.publish([WebhookEvent("received", user.id, {})])
+
+        await dispatcher.accept()
+        await dispatcher.drain()
+        await dispatcher.save_results()
+        (row,) = await deliveries(db)
+        assert (row.status, row.attempts, row.last_error) == (PENDING, 1, "HTTP 500")
+
+        later = datetime.now(timezone.utc) + timedelta(minutes=1)
+        assert await dispatcher.claim_due(later) == 1
+        await dispatcher.drain()
+        await dispatcher.save_results()
+        await dispatcher.stop()
+        (row,) = await deliveries(db)
+        assert (row.status, row.attempts) == (DEAD, 2)
+        assert len(endpoint.requests) == 2
+
+    async def test_open_breaker_defers_without_attempts(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        stub,
+    ):
+        """A dead endpoint stops being called; deliveries wait for it."""
+        endpoint, server = stub
+        endpoint.status = 503
+        await add_webhook(db, user, str(server.make_url("/down")))
+        dispatcher = make_dispatcher(
+            session_factory, breaker_threshold=1, max_per_endpoint=1
+        )
+        dispatcher.publish([WebhookEvent("received", user.id, {}) for _ in range(3)])
+
+        await dispatcher.accept()
+        await dispatcher.drain()
+        await dispatcher.save_results()
+        await dispatcher.stop()
+
+        assert len(endpoint.requests) == 1
+        rows = await deliveries(db)
+        assert sorted(row.attempts for row in rows) == [0, 0, 1]
+        assert {row.last_error for row in rows} == {"HTTP 503", "circuit open"}
+
+    async def test_slow_endpoint_does_not_block_others(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        stub,
+    ):
+        """Other endpoints are delivered while one is stuck."""
+        endpoint, server = stub
+        endpoint.delay = 0.5
+        await add_webhook(db, user, str(server.make_url("/slow")))
+        await add_webhook(db, user, str(server.make_url("/fast")))
+        dispatcher = make_dispatcher(session_factory, max_per_endpoint=1)
+        dispatcher.publish([WebhookEvent("received", user.id, {}) for _ in range(3)])
+
+        await dispatcher.accept()
+        await asyncio.sleep(0.2)
+        fast = [path for path, _, _ in endpoint.requests if path == "/fast"]
+        slow = [path for path, _, _ in endpoint.requests if path == "/slow"]
+        assert len(fast) == 3
+        assert len(slow) == 1
+        await dispatcher.stop()
+
+        # Unfinished deliveries stay in the retry queue
+        assert len(await deliveries(db)) == 3
+
+    async def test_batching_coalesces_events(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        stub,
+    ):
+        """Batched webhooks get signed arrays, split by size, ids preserved."""
+        endpoint, server = stub
+        await add_webhook(db, user, str(server.make_url("/batch")), batch_events=True)
+        dispatcher = make_dispatcher(
+            session_factory, coalesce_max_events=3, coalesce_max_wait=0.05
+        )
+        events = [WebhookEvent("forwarded", user.id, {"n": n}) for n in range(5)]
+        dispatcher.publish(events)
+
+        await dispatcher.accept()
+        await dispatcher.drain()
+        assert await dispatcher.save_results() == 5
+        await dispatcher.stop()
+
+        assert [int(h["X-QSM-Batch-Size"]) for _, h, _ in endpoint.requests] == [3, 2]
+        received = []
+        for _, headers, body in endpoint.requests:
+            assert headers["X-QSM-Signature"] == sign("s3cret", body)
+            assert "X-QSM-Event-Id" not in headers
+            received.extend(envelope["id"] for envelope in json.loads(body))
+        assert sorted(received) == sorted(event.id for event in events)
+        assert await deliveries(db) == []
+
+    async def test_failed_batch_retries_each_event(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+        stub,
+    ):
+        """A rejected batch counts as one failed attempt for every event in it."""
+        endpoint, server = stub
+        endpoint.status = 500
+        await add_webhook(db, user, str(server.make_url("/batch")), batch_events=True)
+        dispatcher = make_dispatcher(session_factory, coalesce_max_wait=0.01)
+        dispatcher.publish([WebhookEvent("received", user.id, {}) for _ in range(3)])
+
+        await dispatcher.accept()
+        await dispatcher.drain()
+        await dispatcher.save_results()
+        await dispatcher.stop()
+
+        assert len(endpoint.requests) == 1
+        rows = await deliveries(db)
+        assert [(row.status, row.attempts) for row in rows] == [(PENDING, 1)] * 3
+
+    async def test_users_without_webhooks_store_nothing(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession],
+        user: User,
+    ):
+        """Events for users with no active webhook are dropped."""
+        dispatcher = make_dispatcher(session_factory)
+        dispatcher.publish([WebhookEvent("received", user.id, {})])
+
+        assert await dispatcher.accept() == 0
+        assert await deliveries(db) == []